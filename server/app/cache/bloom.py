@@ -0,0 +1,66 @@
+# Bloom filter over stored cache keys.
+# Lets ShapeCache.get() answer "definitely not in Cloud Storage" without a
+# network round-trip, so first-time concepts go straight to generation.
+
+from __future__ import annotations
+
+import hashlib
+import math
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter (no false negatives, tunable false positives).
+
+    Uses Kirsch–Mitzenmacher double hashing over one 128-bit BLAKE2b
+    digest. ``add`` is locked; membership checks are lock-free reads.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[str], capacity: int, error_rate: float = 0.01) -> BloomFilter:
+        bloom = cls(capacity, error_rate)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, key: str) -> list[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key: str) -> None:
+        positions = self._positions(key)
+        with self._lock:
+            for pos in positions:
+                self._bits[pos >> 3] |= 1 << (pos & 7)
+            self._count += 1
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str):
+            return False
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def __len__(self) -> int:
+        """Number of ``add`` calls (duplicates counted)."""
+        return self._count
+
+    @property
+    def saturated(self) -> bool:
+        """True once more keys were added than the filter was sized for."""
+        return self._count > self.capacity
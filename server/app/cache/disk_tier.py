@@ -0,0 +1,357 @@
+# Local-disk shape tier: append-only data file + JSON index, read via mmap.
+# Sits between the memory LRU and Cloud Storage so restarts / scale-outs on
+# the same host reload shapes in milliseconds instead of re-downloading.
+#
+# Layout (directory):
+#   shapes.dat   [file header 12B] then frames: [key_len H][rec_len I][key][record]
+#                record = shape_format binary record (read into a ShapeRecord as-is)
+#   index.json   {"file_id", "data_size", "entries": {key: [offset, length, last_used]}}
+#
+# The index is rewritten atomically on persist() / compaction only. Frames
+# appended after the last index write are recovered by scanning the tail.
+#
+# One process per directory: open() takes an exclusive flock on a "lock"
+# file (not the data file — compaction swaps that inode). Workers sharing
+# CACHE_DISK_DIR that find it locked each take the first free worker-N
+# subdirectory instead, so their appends never interleave.
+
+from __future__ import annotations
+
+import fcntl
+import json
+import mmap
+import os
+import secrets
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+from app.cache.memory_tier import ShapeRecord
+from app.cache.shape_format import ShapeFormatError
+
+logger = structlog.get_logger(__name__)
+
+_DATA_FILE = "shapes.dat"
+_INDEX_FILE = "index.json"
+_LOCK_FILE = "lock"
+_MAX_WORKER_DIRS = 64  # worker-1 … worker-N, for processes sharing one directory
+_FILE_MAGIC = b"LDSK"
+_FILE_VERSION = 1
+_FILE_HEADER = struct.Struct("<4sB3xI")  # magic, version, pad, file_id
+_FRAME = struct.Struct("<HI")  # key_len, record_len
+
+# Compact once dead (overwritten / evicted) bytes exceed this share of max_bytes
+_COMPACT_DEAD_RATIO = 0.5
+
+
+class DiskTier:
+    """Size-bounded, memory-mapped, append-only shape store on local disk.
+
+    Thread-safe. ``max_bytes`` bounds live record bytes; least recently
+    used entries are evicted first, and the data file is compacted when
+    dead space grows past half of the budget.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str], max_bytes: int) -> None:
+        self._root = Path(directory)
+        self._dir = self._root  # The directory actually locked by open()
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._lock_fd: int | None = None
+        # key → [record offset, record length, last used epoch]
+        self._index: dict[str, list[float]] = {}
+        self._live_bytes = 0
+        self._file_id = 0
+        self._file: Any = None
+        self._mm: mmap.mmap | None = None
+        self._size = 0  # Bytes written to the data file (== append offset)
+
+    # ── Lifecycle ────────────────────────────────────────────────────────
+
+    def open(self) -> None:
+        """Create or reopen the store. Recovers frames missing from the index."""
+        t0 = time.perf_counter()
+        self._dir = self._claim_directory()
+        data_path = self._dir / _DATA_FILE
+
+        with self._lock:
+            if not data_path.exists() or data_path.stat().st_size < _FILE_HEADER.size:
+                self._create_data_file(data_path)
+            self._file = open(data_path, "r+b")  # noqa: SIM115 — held open for appends
+            magic, version, self._file_id = _FILE_HEADER.unpack(self._file.read(_FILE_HEADER.size))
+            if magic != _FILE_MAGIC or version != _FILE_VERSION:
+                logger.warning("disk_tier_reset", reason="unrecognized data file")
+                self._file.close()
+                self._create_data_file(data_path)
+                self._file = open(data_path, "r+b")  # noqa: SIM115
+                _, _, self._file_id = _FILE_HEADER.unpack(self._file.read(_FILE_HEADER.size))
+
+            scan_from = self._load_index()
+            recovered = self._recover_tail(scan_from)
+            self._remap()
+
+        logger.info(
+            "disk_tier_opened",
+            path=str(self._dir),
+            entries=len(self._index),
+            recovered=recovered,
+            live_mb=round(self._live_bytes / 1e6, 1),
+            time_ms=round((time.perf_counter() - t0) * 1000, 1),
+        )
+
+    def persist(self) -> None:
+        """Flush appended data and atomically rewrite the index."""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._write_index()
+
+    def close(self) -> None:
+        """Persist and release the file handle and mapping."""
+        self.persist()
+        with self._lock:
+            if self._mm is not None:
+                self._mm.close()
+                self._mm = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)  # Releases the flock
+                self._lock_fd = None
+
+    # ── Read / write ─────────────────────────────────────────────────────
+
+    def get(self, key: str) -> ShapeRecord | None:
+        """Read a shape's record bytes from the mapped file, or None on miss."""
+        with self._lock:
+            loc = self._index.get(key)
+            if loc is None or self._file is None:
+                return None
+            offset, length = int(loc[0]), int(loc[1])
+            if self._mm is None or offset + length > len(self._mm):
+                self._remap()
+            assert self._mm is not None
+            try:
+                # One copy out of the mapping (it may be remapped or closed);
+                # the record's arrays are views of that copy.
+                record = ShapeRecord.from_encoded(self._mm[offset : offset + length])
+            except ShapeFormatError as e:
+                logger.warning("disk_tier_corrupt_record", key=key, error=str(e))
+                self._drop(key)
+                return None
+            loc[2] = time.time()
+            return record
+
+    def put(self, key: str, shape: ShapeRecord) -> None:
+        """Append a shape (replacing any previous version) and evict to budget."""
+        record = shape.encode()
+        key_bytes = key.encode()
+        if len(record) > self._max_bytes:
+            return
+        with self._lock:
+            if self._file is None:
+                return
+            if key in self._index:
+                self._drop(key)
+            self._evict_for(len(record))
+
+            self._file.seek(self._size)
+            self._file.write(_FRAME.pack(len(key_bytes), len(record)))
+            self._file.write(key_bytes)
+            self._file.write(record)
+            self._file.flush()  # Visible to the mapping (same page cache)
+
+            offset = self._size + _FRAME.size + len(key_bytes)
+            self._size = offset + len(record)
+            self._index[key] = [offset, len(record), time.time()]
+            self._live_bytes += len(record)
+
+            if self._size - _FILE_HEADER.size - self._live_bytes > (
+                self._max_bytes * _COMPACT_DEAD_RATIO
+            ):
+                self._compact()
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            return key in self._index
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._index)
+
+    def keys_by_recency(self) -> list[str]:
+        """Keys ordered most recently used first."""
+        with self._lock:
+            # Tie-break on offset: later appends are more recent
+            return sorted(
+                self._index, key=lambda k: (self._index[k][2], self._index[k][0]), reverse=True
+            )
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "path": str(self._dir),
+                "entries": len(self._index),
+                "live_bytes": self._live_bytes,
+                "file_bytes": self._size,
+                "max_bytes": self._max_bytes,
+            }
+
+    # ── Internals (caller holds self._lock) ──────────────────────────────
+
+    def _claim_directory(self) -> Path:
+        """Lock the configured directory, or else the first free worker-N subdirectory.
+
+        Raises RuntimeError when every candidate is held by another process.
+        """
+        candidates = [
+            self._root,
+            *(self._root / f"worker-{n}" for n in range(1, _MAX_WORKER_DIRS + 1)),
+        ]
+        for directory in candidates:
+            directory.mkdir(parents=True, exist_ok=True)
+            fd = os.open(directory / _LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            self._lock_fd = fd
+            if directory != self._root:
+                logger.info("disk_tier_worker_dir", root=str(self._root), path=str(directory))
+            return directory
+        raise RuntimeError(f"every disk tier directory under {self._root} is locked")
+
+    def _create_data_file(self, path: Path) -> None:
+        file_id = secrets.randbits(32)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(_FILE_HEADER.pack(_FILE_MAGIC, _FILE_VERSION, file_id))
+        os.replace(tmp, path)
+        (self._dir / _INDEX_FILE).unlink(missing_ok=True)
+
+    def _load_index(self) -> int:
+        """Load index.json if it matches the data file. Returns offset to scan from."""
+        self._index.clear()
+        self._live_bytes = 0
+        file_size = os.fstat(self._file.fileno()).st_size
+        try:
+            doc = json.loads((self._dir / _INDEX_FILE).read_bytes())
+            if doc["file_id"] != self._file_id or doc["data_size"] > file_size:
+                raise ValueError("index does not match data file")
+            for key, (offset, length, last_used) in doc["entries"].items():
+                if offset + length <= doc["data_size"]:
+                    self._index[key] = [offset, length, last_used]
+                    self._live_bytes += length
+            return int(doc["data_size"])
+        except FileNotFoundError:
+            return _FILE_HEADER.size
+        except Exception as e:
+            logger.warning("disk_tier_index_rebuild", error=str(e))
+            self._index.clear()
+            self._live_bytes = 0
+            return _FILE_HEADER.size
+
+    def _recover_tail(self, offset: int) -> int:
+        """Index complete frames after ``offset``; truncate a torn trailing frame."""
+        file_size = os.fstat(self._file.fileno()).st_size
+        recovered = 0
+        now = time.time()
+        self._file.seek(offset)
+        while offset + _FRAME.size <= file_size:
+            key_len, rec_len = _FRAME.unpack(self._file.read(_FRAME.size))
+            end = offset + _FRAME.size + key_len + rec_len
+            if end > file_size:
+                break
+            key = self._file.read(key_len).decode()
+            self._file.seek(rec_len, os.SEEK_CUR)
+            if key in self._index:
+                self._live_bytes -= int(self._index[key][1])
+            self._index[key] = [offset + _FRAME.size + key_len, rec_len, now]
+            self._live_bytes += rec_len
+            recovered += 1
+            offset = end
+        if offset < file_size:
+            self._file.truncate(offset)
+        self._size = offset
+        return recovered
+
+    def _remap(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _drop(self, key: str) -> None:
+        loc = self._index.pop(key, None)
+        if loc is not None:
+            self._live_bytes -= int(loc[1])
+
+    def _evict_for(self, incoming: int) -> None:
+        """Evict least recently used entries until ``incoming`` bytes fit."""
+        if self._live_bytes + incoming <= self._max_bytes:
+            return
+        evicted = 0
+        for key in sorted(self._index, key=lambda k: self._index[k][2]):
+            self._drop(key)
+            evicted += 1
+            if self._live_bytes + incoming <= self._max_bytes:
+                break
+        logger.debug("disk_tier_evicted", count=evicted)
+
+    def _compact(self) -> None:
+        """Rewrite live frames into a fresh data file and swap it in atomically."""
+        t0 = time.perf_counter()
+        self._remap()
+        assert self._mm is not None
+
+        data_path = self._dir / _DATA_FILE
+        tmp_path = data_path.with_suffix(".compact")
+        file_id = secrets.randbits(32)
+        new_index: dict[str, list[float]] = {}
+        with open(tmp_path, "wb") as out:
+            out.write(_FILE_HEADER.pack(_FILE_MAGIC, _FILE_VERSION, file_id))
+            pos = _FILE_HEADER.size
+            for key, (offset, length, last_used) in self._index.items():
+                key_bytes = key.encode()
+                out.write(_FRAME.pack(len(key_bytes), int(length)))
+                out.write(key_bytes)
+                out.write(self._mm[int(offset) : int(offset) + int(length)])
+                record_at = pos + _FRAME.size + len(key_bytes)
+                new_index[key] = [record_at, length, last_used]
+                pos = record_at + int(length)
+            out.flush()
+            os.fsync(out.fileno())
+
+        self._mm.close()
+        self._mm = None
+        self._file.close()
+        os.replace(tmp_path, data_path)
+        self._file = open(data_path, "r+b")  # noqa: SIM115
+        self._file_id = file_id
+        self._index = new_index
+        self._size = pos
+        self._write_index()
+        self._remap()
+        logger.info(
+            "disk_tier_compacted",
+            entries=len(new_index),
+            file_mb=round(pos / 1e6, 1),
+            time_ms=round((time.perf_counter() - t0) * 1000, 1),
+        )
+
+    def _write_index(self) -> None:
+        doc = {
+            "version": 1,
+            "file_id": self._file_id,
+            "data_size": self._size,
+            "entries": self._index,
+        }
+        tmp = self._dir / f"{_INDEX_FILE}.tmp"
+        tmp.write_text(json.dumps(doc, separators=(",", ":")))
+        os.replace(tmp, self._dir / _INDEX_FILE)
@@ -0,0 +1,166 @@
+# Shape manifest: one small JSON blob indexing every stored shape.
+# Replaces shapes/ listings in warmup / count / stats.
+# Updated on every set() with optimistic concurrency (if_generation_match),
+# against any StorageBackend (storage.py).
+# Hit counts ride along on those writes and drive warmup priority.
+# Entries carry a content hash; a key whose shape duplicates a stored one
+# points at that blob (``blob``) instead of owning a copy.
+
+from __future__ import annotations
+
+import json
+import random
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import TYPE_CHECKING, Any
+
+import structlog
+
+from app.cache.shape_format import FORMAT_VERSION, LEGACY_SUFFIX, SHAPE_SUFFIX
+from app.cache.storage import StorageConflictError
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from app.cache.storage import StorageBackend
+
+logger = structlog.get_logger(__name__)
+
+MANIFEST_BLOB = "index/shapes-manifest.json"
+MANIFEST_VERSION = 1
+LEGACY_FORMAT = 0  # Format tag for pre-binary shapes/<key>.json blobs
+
+_MAX_UPDATE_ATTEMPTS = 8
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """One stored shape: blob size, creation time, format, usage, and content."""
+
+    key: str
+    size: int
+    created_at: float
+    format: int = FORMAT_VERSION
+    hits: int = 0
+    last_used: float = 0.0
+    content_hash: str = ""  # shape_format.content_hash(); "" for older entries
+    blob: str = ""  # Shared blob of an identical shape; "" = shapes/<key>
+
+    @property
+    def blob_name(self) -> str:
+        if self.blob:
+            return self.blob
+        suffix = LEGACY_SUFFIX if self.format == LEGACY_FORMAT else SHAPE_SUFFIX
+        return f"shapes/{self.key}{suffix}"
+
+
+def _serialize(entries: dict[str, ManifestEntry]) -> bytes:
+    return json.dumps(
+        {
+            "version": MANIFEST_VERSION,
+            "updated_at": time.time(),
+            "entries": [asdict(e) for e in entries.values()],
+        },
+        separators=(",", ":"),
+    ).encode()
+
+
+def _parse(data: bytes) -> dict[str, ManifestEntry]:
+    doc: dict[str, Any] = json.loads(data)
+    if doc.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version: {doc.get('version')}")
+    return {e["key"]: ManifestEntry(**e) for e in doc["entries"]}
+
+
+def read_manifest(storage: StorageBackend) -> tuple[dict[str, ManifestEntry], int] | None:
+    """Read the manifest in one GET. Returns (entries, generation) or None if absent."""
+    result = storage.get_with_generation(MANIFEST_BLOB)
+    if result is None:
+        return None
+    data, generation = result
+    return _parse(data), generation
+
+
+def _write_manifest(
+    storage: StorageBackend, entries: dict[str, ManifestEntry], generation: int
+) -> None:
+    """Conditional write: raises StorageConflictError if someone else wrote first."""
+    storage.put(
+        MANIFEST_BLOB,
+        _serialize(entries),
+        content_type="application/json",
+        if_generation_match=generation,
+    )
+
+
+def _list_entries(storage: StorageBackend) -> dict[str, ManifestEntry]:
+    """Build entries from an O(N) shapes/ listing (binary record wins over .json)."""
+    entries: dict[str, ManifestEntry] = {}
+    for obj in storage.list("shapes/"):
+        name = obj.name
+        if name.endswith(SHAPE_SUFFIX):
+            fmt, suffix = FORMAT_VERSION, SHAPE_SUFFIX
+        elif name.endswith(LEGACY_SUFFIX):
+            fmt, suffix = LEGACY_FORMAT, LEGACY_SUFFIX
+        else:
+            continue
+        key = name.removeprefix("shapes/").removesuffix(suffix)
+        if key in entries and entries[key].format != LEGACY_FORMAT:
+            continue
+        entries[key] = ManifestEntry(key=key, size=obj.size, created_at=obj.created_at, format=fmt)
+    return entries
+
+
+def rebuild_manifest(storage: StorageBackend) -> dict[str, ManifestEntry]:
+    """One-time migration for buckets written before the manifest existed.
+
+    Writes the manifest only if no one has created it meanwhile.
+    """
+    entries = _list_entries(storage)
+    try:
+        _write_manifest(storage, entries, generation=0)
+        logger.info("cache_manifest_rebuilt", entries=len(entries))
+    except StorageConflictError:
+        logger.info("cache_manifest_rebuild_raced", hint="another instance created it first")
+    return entries
+
+
+def _apply_usage(entries: dict[str, ManifestEntry], usage: Mapping[str, tuple[int, float]]) -> None:
+    """Merge (hit delta, last-used timestamp) pairs into existing entries."""
+    for key, (hits, last_used) in usage.items():
+        if (e := entries.get(key)) is not None:
+            entries[key] = replace(e, hits=e.hits + hits, last_used=max(e.last_used, last_used))
+
+
+def add_to_manifest(
+    storage: StorageBackend,
+    entry: ManifestEntry,
+    usage: Mapping[str, tuple[int, float]] | None = None,
+) -> dict[str, ManifestEntry]:
+    """Read-modify-write the manifest with generation-match retries.
+
+    ``usage`` holds per-key hit deltas accumulated since the last write;
+    they are re-applied to each freshly read manifest, so a retry never
+    double-counts. Returns the entries as written. Raises the last
+    StorageConflictError if every attempt loses the race (callers log and
+    move on — the shape blob itself is already stored and the next writer
+    re-reads).
+    """
+    for attempt in range(_MAX_UPDATE_ATTEMPTS):
+        current = read_manifest(storage)
+        # No manifest yet: seed from a listing so pre-manifest shapes stay indexed
+        entries, generation = current if current is not None else (_list_entries(storage), 0)
+        if (previous := entries.get(entry.key)) is not None:
+            entry = replace(entry, hits=previous.hits, last_used=previous.last_used)
+        entries[entry.key] = entry
+        _apply_usage(entries, usage or {})
+        try:
+            _write_manifest(storage, entries, generation)
+            return entries
+        except StorageConflictError:
+            if attempt == _MAX_UPDATE_ATTEMPTS - 1:
+                raise
+            # Jittered backoff: concurrent writers otherwise retry in lockstep
+            time.sleep(random.uniform(0, 0.05 * (2**attempt)))
+            logger.debug("cache_manifest_conflict", key=entry.key, attempt=attempt + 1)
+    raise AssertionError("unreachable")
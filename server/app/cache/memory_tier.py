@@ -0,0 +1,343 @@
+# In-memory shape tier: byte-budgeted LRU of compact ShapeRecords.
+# A record holds the raw float32 / uint8 arrays (~26 KB for 2048 points)
+# instead of a GenerateResponse with base64 strings and pydantic overhead;
+# base64 encodings are derived on demand in to_response(). With optional
+# zstd (requires the zstandard package) the arrays are stored compressed.
+# Records that get served also keep their JSON body (to_json()), so cache
+# hits are written out without pydantic — only per-request fields vary.
+
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any
+
+import numpy as np
+import structlog
+from cachetools import LRUCache  # type: ignore[import-untyped]
+
+from app.cache.shape_format import (
+    LEGACY_SUFFIX,
+    decode_arrays,
+    decode_blob,
+    decode_meta,
+    encode_parts,
+)
+from app.schemas import BoundingBox, GenerateResponse
+
+logger = structlog.get_logger(__name__)
+
+# Rough fixed cost of the record object, its slots and metadata strings
+_RECORD_OVERHEAD = 256
+_ZSTD_LEVEL = 3
+
+
+def _zstd() -> Any | None:
+    try:
+        import zstandard  # type: ignore[import-not-found]
+    except ImportError:
+        return None
+    return zstandard
+
+
+class ShapeRecord:
+    """Compact, immutable memory-tier entry for one cached shape."""
+
+    __slots__ = (
+        "_json_head",
+        "_json_tail",
+        "_num_points",
+        "_part_ids",
+        "_payload",
+        "_positions",
+        "bbox_max",
+        "bbox_min",
+        "cached",
+        "generation_time_ms",
+        "nbytes",
+        "part_names",
+        "pipeline",
+        "template_type",
+    )
+
+    def __init__(
+        self,
+        positions: np.ndarray,
+        part_ids: np.ndarray,
+        *,
+        part_names: tuple[str, ...],
+        template_type: str,
+        bbox_min: tuple[float, ...],
+        bbox_max: tuple[float, ...],
+        pipeline: str,
+        generation_time_ms: int,
+        cached: bool = False,
+        compress: bool = False,
+    ) -> None:
+        positions = np.ascontiguousarray(positions, dtype=np.float32).reshape(-1, 3)
+        part_ids = np.ascontiguousarray(part_ids, dtype=np.uint8)
+        self._num_points = len(positions)
+        zstd = _zstd() if compress else None
+        if zstd is not None:
+            # Positions then part ids, one frame (content size embedded)
+            self._payload: bytes | None = zstd.compress(
+                positions.tobytes() + part_ids.tobytes(), _ZSTD_LEVEL
+            )
+            self._positions: np.ndarray | None = None
+            self._part_ids: np.ndarray | None = None
+            data_bytes = len(self._payload)
+        else:
+            positions.flags.writeable = False
+            part_ids.flags.writeable = False
+            self._payload = None
+            self._positions = positions
+            self._part_ids = part_ids
+            data_bytes = positions.nbytes + part_ids.nbytes
+        self.part_names = part_names
+        self.template_type = template_type
+        self.bbox_min = bbox_min
+        self.bbox_max = bbox_max
+        self.pipeline = pipeline
+        self.generation_time_ms = generation_time_ms
+        self.cached = cached
+        self._json_head: bytes | None = None
+        self._json_tail = b""
+        self.nbytes = data_bytes + _RECORD_OVERHEAD + sum(len(n) for n in part_names)
+
+    @classmethod
+    def from_response(cls, response: GenerateResponse, *, compress: bool = False) -> ShapeRecord:
+        bbox = response.bounding_box
+        return cls(
+            np.frombuffer(base64.b64decode(response.positions), dtype=np.float32),
+            np.frombuffer(base64.b64decode(response.part_ids), dtype=np.uint8),
+            part_names=tuple(response.part_names),
+            template_type=response.template_type,
+            bbox_min=tuple(bbox.min),
+            bbox_max=tuple(bbox.max),
+            pipeline=response.pipeline,
+            generation_time_ms=response.generation_time_ms,
+            cached=response.cached,
+            compress=compress,
+        )
+
+    @classmethod
+    def from_blob(cls, name: str, data: bytes, *, compress: bool = False) -> ShapeRecord:
+        """Record from a stored blob: binary records directly, legacy JSON via pydantic."""
+        if name.endswith(LEGACY_SUFFIX):
+            return cls.from_response(decode_blob(name, data), compress=compress)
+        return cls.from_encoded(data, compress=compress)
+
+    @classmethod
+    def from_encoded(cls, data: bytes | memoryview, *, compress: bool = False) -> ShapeRecord:
+        """Record over a binary shape record's arrays without copying them."""
+        positions, part_ids = decode_arrays(data)
+        meta = decode_meta(data)
+        bbox = meta["bounding_box"]
+        return cls(
+            positions,
+            part_ids,
+            part_names=tuple(meta["part_names"]),
+            template_type=meta["template_type"],
+            bbox_min=tuple(bbox["min"]),
+            bbox_max=tuple(bbox["max"]),
+            pipeline=meta["pipeline"],
+            generation_time_ms=meta["generation_time_ms"],
+            cached=meta["cached"],
+            compress=compress,
+        )
+
+    def compressed_as(self, compress: bool) -> ShapeRecord:
+        """This record, or a copy whose arrays are (not) zstd-compressed."""
+        if compress == self.compressed or (compress and _zstd() is None):
+            return self
+        positions, part_ids = self.arrays()
+        return ShapeRecord(
+            positions,
+            part_ids,
+            part_names=self.part_names,
+            template_type=self.template_type,
+            bbox_min=self.bbox_min,
+            bbox_max=self.bbox_max,
+            pipeline=self.pipeline,
+            generation_time_ms=self.generation_time_ms,
+            cached=self.cached,
+            compress=compress,
+        )
+
+    def encode(self) -> bytes:
+        """Binary shape record (shape_format.py) — the inverse of from_encoded()."""
+        positions, part_ids = self.arrays()
+        return encode_parts(
+            positions.tobytes(),
+            part_ids.tobytes(),
+            {
+                "part_names": list(self.part_names),
+                "template_type": self.template_type,
+                "bounding_box": {"min": list(self.bbox_min), "max": list(self.bbox_max)},
+                "cached": self.cached,
+                "generation_time_ms": self.generation_time_ms,
+                "pipeline": self.pipeline,
+            },
+        )
+
+    @property
+    def compressed(self) -> bool:
+        return self._payload is not None
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """Read-only (positions (N, 3) float32, part_ids (N,) uint8)."""
+        if self._payload is None:
+            assert self._positions is not None and self._part_ids is not None
+            return self._positions, self._part_ids
+        zstd = _zstd()
+        assert zstd is not None
+        raw = zstd.decompress(self._payload)
+        split = self._num_points * 12
+        positions = np.frombuffer(raw, dtype=np.float32, count=self._num_points * 3)
+        part_ids = np.frombuffer(raw, dtype=np.uint8, offset=split)
+        return positions.reshape(-1, 3), part_ids
+
+    def to_response(self) -> GenerateResponse:
+        """Fresh GenerateResponse (callers may mutate it; the record is unaffected)."""
+        positions, part_ids = self.arrays()
+        return GenerateResponse.model_construct(
+            positions=base64.b64encode(positions).decode("ascii"),
+            part_ids=base64.b64encode(part_ids).decode("ascii"),
+            part_names=list(self.part_names),
+            template_type=self.template_type,
+            bounding_box=BoundingBox.model_construct(
+                min=list(self.bbox_min), max=list(self.bbox_max)
+            ),
+            cached=self.cached,
+            generation_time_ms=self.generation_time_ms,
+            pipeline=self.pipeline,
+        )
+
+    def prepare_json(self) -> int:
+        """Serialize the response body once. Returns bytes added (0 if done).
+
+        The body is split around the per-request fields, in schema order:
+        head = ``{"positions": ..., "bounding_box": {...},"cached":``
+        tail = ``,"pipeline": ...`` (``alias_of`` and ``}`` follow per
+        request). Not locked — a racing duplicate build produces identical
+        bytes.
+        """
+        if self._json_head is not None:
+            return 0
+        positions, part_ids = self.arrays()
+        dumps = json.JSONEncoder(separators=(",", ":")).encode
+        head = b"".join(
+            (
+                b'{"positions":"',
+                base64.b64encode(positions),
+                b'","part_ids":"',
+                base64.b64encode(part_ids),
+                b'","part_names":',
+                dumps(list(self.part_names)).encode(),
+                b',"template_type":',
+                dumps(self.template_type).encode(),
+                b',"bounding_box":',
+                dumps({"min": list(self.bbox_min), "max": list(self.bbox_max)}).encode(),
+                b',"cached":',
+            )
+        )
+        self._json_tail = b',"pipeline":' + dumps(self.pipeline).encode()
+        self._json_head = head
+        added = len(head) + len(self._json_tail)
+        self.nbytes += added
+        return added
+
+    def to_json(
+        self, *, cached: bool, generation_time_ms: int, alias_of: str | None = None
+    ) -> bytes:
+        """GenerateResponse JSON with the per-request fields filled in."""
+        self.prepare_json()
+        assert self._json_head is not None
+        return b"".join(
+            (
+                self._json_head,
+                b"true" if cached else b"false",
+                b',"generation_time_ms":',
+                str(generation_time_ms).encode(),
+                self._json_tail,
+                b',"alias_of":',
+                json.dumps(alias_of).encode(),
+                b"}",
+            )
+        )
+
+
+def _record_size(record: ShapeRecord) -> int:
+    return record.nbytes
+
+
+class MemoryTier(LRUCache):  # type: ignore[misc]
+    """LRU of ShapeRecords bounded by total ``nbytes`` rather than entry count.
+
+    Not thread-safe on its own — ShapeCache guards it with its lock.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        super().__init__(maxsize=max_bytes, getsizeof=_record_size)
+        # Same entries as the LRU, for lookups that must not touch recency
+        self._records: dict[str, ShapeRecord] = {}
+        self.inserts = 0
+        self.evictions = 0
+
+    def __setitem__(self, key: str, value: ShapeRecord) -> None:
+        self._store(key, value)
+        self.inserts += 1
+
+    def _store(self, key: str, value: ShapeRecord) -> None:
+        """Insert or re-measure ``key``, evicting other entries through popitem().
+
+        ``key`` leaves the LRU first, so making room can never evict it; the
+        entries evicted instead keep ``_records`` and the counters in step.
+        """
+        if value.nbytes > self.maxsize:
+            raise ValueError("value too large")
+        if key in self._records:
+            super().__delitem__(key)  # Not an eviction; _records is rewritten below
+        super().__setitem__(key, value)
+        self._records[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        super().__delitem__(key)  # Eviction and pop() end up here
+        del self._records[key]
+
+    def popitem(self) -> tuple[str, ShapeRecord]:
+        item = super().popitem()  # Called by LRUCache only to make room
+        self.evictions += 1
+        return item  # type: ignore[no-any-return]
+
+    def clear(self) -> None:
+        evictions = self.evictions
+        super().clear()  # May go through popitem(), depending on the cachetools version
+        self._records.clear()
+        self.evictions = evictions
+
+    def peek(self, key: str) -> ShapeRecord | None:
+        """Look up ``key`` without touching its recency."""
+        return self._records.get(key)
+
+    def reaccount(self, key: str) -> None:
+        """Re-measure ``key`` after its record grew (e.g. prepare_json())."""
+        record = self._records[key]
+        if record.nbytes > self.maxsize:
+            del self[key]
+            return
+        self._store(key, record)  # Not counted as an insert
+
+    def fits(self, nbytes: int) -> bool:
+        """Whether ``nbytes`` more would fit without evicting anything."""
+        return self.currsize + nbytes <= self.maxsize
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "policy": "lru",
+            "entries": len(self),
+            "bytes": self.currsize,
+            "max_bytes": self.maxsize,
+            "evictions": self.evictions,
+            "eviction_rate": round(self.evictions / self.inserts, 4) if self.inserts else 0.0,
+        }
@@ -0,0 +1,181 @@
+# Peer cache tier — groupcache-style fill from the instance that owns a key.
+# Each instance's memory tier is private, so without this a shape generated on
+# instance A reaches instance B only through shared storage. With CACHE_PEERS
+# set, a consistent-hash ring over the peers' base URLs gives every cache key
+# one owner; on a local miss a non-owner asks the owner over
+# GET /internal/cache/{key} before storage or the GPU. The owner answers from
+# its own memory → disk → storage tiers (never its peers, so no loops), which
+# also concentrates each key's storage reads on one instance.
+# A 404 from the owner is a miss (it already asked storage); a timeout or
+# error falls back to reading storage locally.
+#
+# Try it with several local uvicorn processes sharing one storage directory:
+#   export SKIP_MODEL_LOAD=true CACHE_STORAGE_DIR=/tmp/lumen-cache \
+#          CACHE_PEERS=http://127.0.0.1:8001,http://127.0.0.1:8002,http://127.0.0.1:8003
+#   for port in 8001 8002 8003; do
+#     CACHE_PEER_SELF=http://127.0.0.1:$port \
+#       uvicorn app.main:create_app --factory --port $port &
+#   done
+# then POST the same cached concept to each port and compare "peers" in
+# /cache/stats.
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from app.cache.memory_tier import ShapeRecord
+from app.cache.shape_format import ShapeFormatError
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    import httpx
+
+    from app.config import Settings
+
+PEER_PATH = "/internal/cache"
+
+
+class PeerError(Exception):
+    """The owning peer could not answer (timeout, connection, bad status)."""
+
+
+def _point(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hashing: adding or removing a peer remaps ~1/N of the keys.
+
+    Each node is placed at ``replicas`` virtual points so keys spread evenly
+    even with a handful of instances.
+    """
+
+    def __init__(self, nodes: Iterable[str], *, replicas: int = 64) -> None:
+        points = sorted(
+            (_point(f"{node}#{i}"), node) for node in set(nodes) for i in range(replicas)
+        )
+        if not points:
+            raise ValueError("HashRing needs at least one node")
+        self._hashes = [h for h, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def owner(self, key: str) -> str:
+        i = bisect.bisect(self._hashes, _point(key)) % len(self._hashes)
+        return self._nodes[i]
+
+
+class PeerTier:
+    """Client side of the peer tier: key ownership plus fetches from owners."""
+
+    def __init__(
+        self,
+        peers: Iterable[str],
+        self_url: str = "",
+        *,
+        timeout: float = 0.5,
+        api_key: str = "",
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._peers = sorted({p.strip().rstrip("/") for p in peers if p.strip()})
+        self._self = self_url.strip().rstrip("/")
+        self._ring = HashRing(self._peers)
+        self._timeout = timeout
+        self._headers = {"X-API-Key": api_key} if api_key else {}
+        self._transport = transport  # Tests route requests in-process
+        self._client: httpx.AsyncClient | None = None
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+        self._latency_total_ms = 0.0
+        self._served = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> PeerTier | None:
+        """None unless CACHE_PEERS lists at least one peer."""
+        peers = [p for p in settings.cache_peers.split(",") if p.strip()]
+        if not peers:
+            return None
+        return cls(
+            peers,
+            settings.cache_peer_self,
+            timeout=settings.cache_peer_timeout_seconds,
+            api_key=settings.api_key.get_secret_value(),
+        )
+
+    def owner(self, key: str) -> str | None:
+        """Base URL of the peer owning ``key``; None when this instance owns it."""
+        owner = self._ring.owner(key)
+        return None if owner == self._self else owner
+
+    async def fetch(self, owner: str, key: str) -> ShapeRecord | None:
+        """The shape for ``key`` from ``owner``, or None if the owner has none.
+
+        Raises PeerError if the owner could not answer.
+        """
+        import httpx
+
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self._timeout, headers=self._headers, transport=self._transport
+            )
+        t0 = time.perf_counter()
+        try:
+            response = await self._client.get(f"{owner}{PEER_PATH}/{key}")
+        except httpx.HTTPError as e:
+            self._record(errors=1)
+            raise PeerError(f"{owner}: {type(e).__name__}: {e}") from e
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        if response.status_code == 404:
+            self._record(misses=1, latency_ms=elapsed_ms)
+            return None
+        if response.status_code != 200:
+            self._record(errors=1)
+            raise PeerError(f"{owner}: HTTP {response.status_code}")
+        try:
+            shape = ShapeRecord.from_encoded(response.content)
+        except (ShapeFormatError, ValueError, KeyError) as e:
+            self._record(errors=1)
+            raise PeerError(f"{owner}: undecodable shape: {e}") from e
+        self._record(hits=1, latency_ms=elapsed_ms)
+        return shape
+
+    def record_served(self) -> None:
+        """Count a shape this instance served to another peer."""
+        with self._lock:
+            self._served += 1
+
+    def _record(
+        self, *, hits: int = 0, misses: int = 0, errors: int = 0, latency_ms: float = 0.0
+    ) -> None:
+        with self._lock:
+            self._hits += hits
+            self._misses += misses
+            self._errors += errors
+            self._latency_total_ms += latency_ms
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            answered = self._hits + self._misses
+            return {
+                "peers": len(self._peers),
+                "self": self._self or None,
+                "hits": self._hits,
+                "misses": self._misses,
+                "errors": self._errors,
+                "served": self._served,
+                "avg_latency_ms": (
+                    round(self._latency_total_ms / answered, 2) if answered else 0.0
+                ),
+            }
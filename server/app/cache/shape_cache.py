@@ -1,112 +1,300 @@
-# Async two-tier cache: memory LRU (cachetools) + Cloud Storage persistence.
-# Storage I/O wrapped in executor to avoid blocking event loop.
-# self._in_flight prevents thundering herd via request coalescing.
+# Async shape cache. Cache keys come from the memoized concept analysis
+# (app/pipeline/concept.py), and a lookup walks these tiers in order:
+#
+#   memory  — byte-budgeted compact records: an LRU (memory_tier.py),
+#             W-TinyLFU admission (tinylfu.py), or one arena shared by every
+#             worker process (shared_tier.py)
+#   disk    — optional local tier (disk_tier.py)
+#   peers   — with peers configured (peers.py), the instance that owns a key
+#   storage — a StorageBackend (storage.py): Cloud Storage or a local directory
+#
+# Storage is read with one GET per key, and concurrent reads of a key are
+# single-flighted (services/single_flight.py). A Bloom filter of stored keys
+# skips definite misses. A miss can still be served from a cached
+# near-synonym (app/pipeline/aliases.py). Blobs are binary shape records
+# (shape_format.py), and legacy .json blobs are still read.
+#
+# Writes fill memory and disk at once. Uploads go through a bounded
+# write-behind queue (write_behind.py) that is drained on disconnect. A shape
+# whose content hash is already stored is indexed under the new key instead
+# of being uploaded again.
+#
+# Warmup first streams the packed hot-set snapshot (snapshot.py) in one
+# download. It then fills in the rest from the manifest (manifest.py, one blob
+# rather than list_blobs) with parallel fetches, highest priority first,
+# under a deadline (warmup.py).
+#
+# Storage and disk I/O run in the IO executor, never on the event loop.
 
 from __future__ import annotations
 
 import asyncio
-import hashlib
-import re
+import functools
+import os
+import tempfile
 import threading
 import time
-from typing import Any
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 import structlog
-from cachetools import LRUCache  # type: ignore[import-untyped]
 
-from app.schemas import GenerateResponse
+from app.cache.bloom import BloomFilter
+from app.cache.disk_tier import DiskTier
+from app.cache.manifest import (
+    ManifestEntry,
+    add_to_manifest,
+    read_manifest,
+    rebuild_manifest,
+)
+from app.cache.memory_tier import MemoryTier, ShapeRecord
+from app.cache.peers import PeerError
+from app.cache.shape_format import (
+    CONTENT_TYPE,
+    LEGACY_SUFFIX,
+    SHAPE_SUFFIX,
+    content_hash,
+    encode_shape,
+)
+from app.cache.shared_tier import SharedMemoryTier
+from app.cache.snapshot import SNAPSHOT_BLOB, SnapshotInfo, SnapshotReader, write_snapshot
+from app.cache.storage import GCSStorageBackend
+from app.cache.tinylfu import TinyLFUMemoryTier
+from app.cache.warmup import WarmupProgress, plan_warmup
+from app.cache.write_behind import WriteBehindQueue
+from app.pipeline.concept import (
+    ConceptAnalysis,
+    analyze_concept,
+    concept_cache_stats,
+    hash_key,
+    normalize_text,
+)
+from app.services.single_flight import SingleFlight
 
-logger = structlog.get_logger(__name__)
-
-# ── NLP setup for cache key normalization ────────────────────────────────────
-import nltk  # type: ignore[import-untyped]  # noqa: E402
-from nltk.stem import WordNetLemmatizer  # type: ignore[import-untyped]  # noqa: E402
-
-# Ensure wordnet corpus is available (no-op if already downloaded)
-try:
-    nltk.data.find("corpora/wordnet")
-except LookupError:
-    nltk.download("wordnet", quiet=True)
-try:
-    nltk.data.find("corpora/omw-1.4")
-except LookupError:
-    nltk.download("omw-1.4", quiet=True)
+if TYPE_CHECKING:
+    from collections.abc import Iterator
 
-_lemmatizer = WordNetLemmatizer()
+    from app.cache.peers import PeerTier
+    from app.cache.storage import StorageBackend
+    from app.pipeline.aliases import AliasIndex
+    from app.schemas import GenerateResponse
 
-# ── Stop words stripped during key normalization ─────────────────────────────
-_ARTICLES = frozenset({"a", "an", "the"})
+logger = structlog.get_logger(__name__)
 
 
 class ShapeCache:
-    """Two-tier cache: in-memory LRU + Cloud Storage persistence."""
+    """Tiered cache: in-memory LRU → local disk (optional) → shared storage."""
 
-    def __init__(self, bucket_name: str = "", memory_capacity: int = 200) -> None:
+    def __init__(
+        self,
+        bucket_name: str = "",
+        memory_max_bytes: int = 1024**3,
+        memory_compression: bool = False,
+        memory_policy: str = "lru",
+        disk_dir: str = "",
+        disk_max_bytes: int = 2 * 1024**3,
+        bloom_refresh_seconds: float = 60.0,
+        write_queue_size: int = 256,
+        write_concurrency: int = 4,
+        write_enqueue_timeout: float = 0.5,
+        write_drain_timeout: float = 8.0,
+        io_executor: Executor | None = None,
+        storage: StorageBackend | None = None,
+        aliases: AliasIndex | None = None,
+        peers: PeerTier | None = None,
+        shared_memory_name: str = "",
+    ) -> None:
+        # An explicit backend wins; otherwise connect() opens gs://bucket_name
         self._bucket_name = bucket_name
-        self._memory: LRUCache[str, GenerateResponse] = LRUCache(maxsize=memory_capacity)
+        # "tinylfu" adds frequency-aware admission (tinylfu.py) for skewed traffic;
+        # "shared" keeps one arena for all uvicorn workers on the host (shared_tier.py)
+        self._memory: MemoryTier | TinyLFUMemoryTier | SharedMemoryTier
+        if memory_policy == "shared":
+            self._memory = SharedMemoryTier(memory_max_bytes, shared_memory_name)
+        elif memory_policy == "tinylfu":
+            self._memory = TinyLFUMemoryTier(memory_max_bytes)
+        else:
+            self._memory = MemoryTier(memory_max_bytes)
+        self._memory_compression = memory_compression
         self._lock = threading.Lock()
-        self._client: Any = None
-        self._bucket: Any = None
+        self._storage: StorageBackend | None = storage
+        self._disk = DiskTier(disk_dir, disk_max_bytes) if disk_dir else None
+        # Storage and disk round-trips; None = the loop's default executor
+        self._io_executor = io_executor
 
         self._memory_hits = 0
+        self._disk_hits = 0
         self._storage_hits = 0
         self._misses = 0
         self._memory_retrieval_total_ms = 0.0
         self._memory_retrieval_count = 0
+        self._disk_retrieval_total_ms = 0.0
+        self._disk_retrieval_count = 0
         self._storage_retrieval_total_ms = 0.0
         self._storage_retrieval_count = 0
 
-        # Request coalescing: prevents thundering herd on storage reads
-        self._in_flight: dict[str, asyncio.Event] = {}
-        self._in_flight_lock = asyncio.Lock()
+        # Request coalescing: concurrent storage reads for a key share one GET,
+        # and every waiter receives the leader's record (no memory re-read)
+        self._storage_flights = SingleFlight()
+        self._coalesced_hits = 0
+
+        # Near-synonym fallback: a miss served by a cached canonical concept
+        self._aliases = aliases
+        self._alias_hits = 0
+
+        # Peer tier: misses on keys another instance owns are asked of it first
+        self._peers = peers
+        self._peer_hits = 0
+
+        # Last manifest seen (key → entry); refreshed on warmup, count, and set
+        self._manifest: dict[str, ManifestEntry] = {}
+        # Content hash → entry owning the blob, for upload dedupe
+        self._content_index: dict[str, ManifestEntry] = {}
+        self._deduped_uploads = 0
+        # Hits since the last manifest write: key → (count, last-used epoch).
+        # Flushed into the manifest on the next set() to rank warmup priority.
+        self._usage: dict[str, tuple[int, float]] = {}
+        self._usage_max = 10_000
+        self.warmup = WarmupProgress()
+        self._manifest_loaded = False
+        # Last hot-set snapshot loaded or built by this instance
+        self._snapshot: SnapshotInfo | None = None
+
+        # Known stored keys. None until the first manifest read — until then
+        # every memory miss still asks storage. Rebuilt on each manifest read
+        # (so keys written by other instances appear within the refresh period).
+        self._known_keys: BloomFilter | None = None
+        self._known_keys_built_at = 0.0
+        self._bloom_refresh_seconds = bloom_refresh_seconds
+        self._bloom_refresh_task: asyncio.Task[int] | None = None
+        self._bloom_skips = 0
+
+        # Storage uploads, off the request path
+        self._writes = WriteBehindQueue(
+            self._set_in_storage,
+            max_pending=write_queue_size,
+            concurrency=write_concurrency,
+            enqueue_timeout=write_enqueue_timeout,
+            executor=io_executor,
+        )
+        self._write_drain_timeout = write_drain_timeout
 
         # Collision tracking: maps hash → normalized text (capped at 10k)
         self._key_origins: dict[str, str] = {}
         self._key_origins_max = 10_000
 
     async def connect(self) -> None:
-        """Initialize Cloud Storage client. Async wrapper around sync SDK."""
-        if self._bucket_name:
+        """Reload the disk tier, then connect the storage backend.
+
+        The disk tier is opened first so the memory tier is warm before any
+        storage traffic.
+        """
+        if self._disk is not None:
             loop = asyncio.get_running_loop()
-            await loop.run_in_executor(None, self._connect_sync)
+            await loop.run_in_executor(self._io_executor, self._open_disk_sync)
+        if self._storage is None and self._bucket_name:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._io_executor, self._connect_sync)
+        if self._storage is not None:
+            logger.info("cache_connected", storage=self._storage.uri)
         else:
-            logger.info("cache_memory_only", reason="no CACHE_BUCKET set")
+            logger.info("cache_memory_only", reason="no CACHE_BUCKET or CACHE_STORAGE_DIR set")
 
     def _connect_sync(self) -> None:
         """Synchronous Cloud Storage connection."""
         try:
-            from google.cloud import storage
-
-            self._client = storage.Client()
-            self._bucket = self._client.bucket(self._bucket_name)
-            logger.info("cache_connected", bucket=f"gs://{self._bucket_name}")
+            self._storage = GCSStorageBackend.connect(self._bucket_name)
         except Exception as e:
             logger.warning("cache_storage_unavailable", error=str(e))
 
+    def _open_disk_sync(self) -> None:
+        """Open the disk tier and promote its most recent shapes to memory.
+
+        A shared arena is promoted into by its creator only, and never with
+        shapes another worker already put there.
+        """
+        assert self._disk is not None
+        t0 = time.perf_counter()
+        try:
+            self._disk.open()
+        except Exception as e:
+            logger.warning("disk_tier_unavailable", error=str(e))
+            self._disk = None
+            return
+        if isinstance(self._memory, SharedMemoryTier) and not self._memory.created:
+            return
+        loaded = 0
+        for key in self._disk.keys_by_recency():
+            if key in self._memory:
+                continue
+            record = self._disk.get(key)
+            if record is None:
+                continue
+            record = record.compressed_as(self._memory_compression)
+            with self._lock:
+                if not self._memory.fits(record.nbytes):
+                    break  # Memory budget full; the rest stays on disk
+                self._memory[key] = record
+            loaded += 1
+        logger.info(
+            "cache_reloaded_from_disk",
+            shapes_loaded=loaded,
+            time_ms=round((time.perf_counter() - t0) * 1000, 1),
+        )
+
     async def disconnect(self) -> None:
-        """Close Cloud Storage client."""
-        if self._client:
-            self._client.close()
+        """Drain pending uploads, flush the memory tier to disk, close storage."""
+        await self._writes.drain(self._write_drain_timeout)
+        if self._disk is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._io_executor, self._flush_to_disk_sync)
+        if self._storage is not None:
+            self._storage.close()
+        if self._peers is not None:
+            await self._peers.close()
+        if isinstance(self._memory, SharedMemoryTier):
+            self._memory.close()
+
+    def _flush_to_disk_sync(self) -> None:
+        """Write memory-tier shapes missing from disk, then persist the index.
+
+        Only the creator of a shared arena flushes it; other workers' shapes
+        reached their own disk tiers on write.
+        """
+        assert self._disk is not None
+        if isinstance(self._memory, SharedMemoryTier) and not self._memory.created:
+            items: list[tuple[str, ShapeRecord]] = []
+        else:
+            with self._lock:
+                items = list(self._memory.items())
+        flushed = 0
+        for key, record in items:
+            if key not in self._disk:
+                self._disk.put(key, record)
+                flushed += 1
+        self._disk.close()
+        logger.info("cache_flushed_to_disk", shapes_flushed=flushed)
 
     @property
     def is_connected(self) -> bool:
         """Whether the cache backend is operational (memory always counts)."""
-        return self._bucket is not None or not self._bucket_name
-
+        return self._storage is not None or not self._bucket_name
 
     @staticmethod
     def normalize_key(text: str) -> str:
         """Normalize text: lowercase, strip punctuation, remove articles, lemmatize nouns."""
-        text = text.lower().strip()
-        text = re.sub(r"[^\w\s]", "", text)
-        words = [w for w in text.split() if w not in _ARTICLES]
-        words = [_lemmatizer.lemmatize(w) for w in words]
-        return " ".join(words) if words else text
+        return normalize_text(text)
 
     @staticmethod
     def _hash_key(normalized: str) -> str:
         """SHA-256 hash of normalized text, first 16 hex chars."""
-        return hashlib.sha256(normalized.encode()).hexdigest()[:16]
+        return hash_key(normalized)
+
+    @staticmethod
+    def _analyze(text: str | ConceptAnalysis) -> ConceptAnalysis:
+        """Reuse the caller's analysis, or fetch the memoized one."""
+        return text if isinstance(text, ConceptAnalysis) else analyze_concept(text)
 
     def _track_collision(self, key: str, normalized: str) -> None:
         """Log if two different normalized texts produce the same hash."""
@@ -123,179 +311,696 @@ class ShapeCache:
             if len(self._key_origins) < self._key_origins_max:
                 self._key_origins[key] = normalized
 
+    def _record_usage(self, key: str) -> None:
+        """Accumulate a hit for warmup ranking. Caller holds self._lock."""
+        count, _ = self._usage.get(key, (0, 0.0))
+        if count or len(self._usage) < self._usage_max:
+            self._usage[key] = (count + 1, time.time())
+
+    def _make_record(self, response: GenerateResponse) -> ShapeRecord:
+        return ShapeRecord.from_response(response, compress=self._memory_compression)
+
+    def _remember(self, key: str, record: ShapeRecord) -> ShapeRecord:
+        """Store a compact record in the memory tier. Caller holds self._lock."""
+        record = record.compressed_as(self._memory_compression)
+        if record.nbytes > self._memory.maxsize:
+            # Single shape larger than the whole budget — serve from lower tiers
+            logger.warning("cache_record_too_large", key=key, nbytes=record.nbytes)
+            return record
+        self._memory[key] = record
+        return record
+
     # ── Get ──────────────────────────────────────────────────────────────
 
-    async def get(self, text: str) -> GenerateResponse | None:
+    async def get(self, text: str | ConceptAnalysis) -> GenerateResponse | None:
         """Look up cached shape. Coalesces concurrent storage reads."""
-        normalized = self.normalize_key(text)
-        key = self._hash_key(normalized)
+        record = await self._lookup(self._analyze(text))
+        return record.to_response() if record is not None else None
+
+    async def get_record(
+        self,
+        text: str | ConceptAnalysis,
+        *,
+        prepare_json: bool = False,
+        count_miss: bool = True,
+    ) -> ShapeRecord | None:
+        """Like get(), but returns the shared, immutable record itself.
+
+        With ``prepare_json`` the record's JSON body is built for the
+        serialized hit path (``record.to_json()``): no pydantic, no response
+        object. The body is built once per memory-resident record and then
+        counts toward the memory budget. Pass ``count_miss=False`` when
+        get_alias_record() follows a miss; it counts the miss instead.
+        """
+        analysis = self._analyze(text)
+        record = await self._lookup(analysis, count_miss=count_miss)
+        if record is not None and prepare_json:
+            self._prepare_json(analysis.cache_key, record)
+        return record
 
+    def peek_record(
+        self, text: str | ConceptAnalysis, *, prepare_json: bool = False
+    ) -> ShapeRecord | None:
+        """Memory tier only — no I/O, no await, a miss is not counted."""
+        analysis = self._analyze(text)
+        record = self._peek(analysis.cache_key, analysis.text)
+        if record is not None and prepare_json:
+            self._prepare_json(analysis.cache_key, record)
+        return record
+
+    def _prepare_json(self, key: str, record: ShapeRecord) -> None:
+        if record.prepare_json():
+            with self._lock:
+                if self._memory.peek(key) is record:
+                    self._memory.reaccount(key)
+
+    def _peek(self, key: str, text: str) -> ShapeRecord | None:
         t0 = time.perf_counter()
         with self._lock:
-            if key in self._memory:
-                elapsed_ms = (time.perf_counter() - t0) * 1000
-                self._memory_hits += 1
-                self._memory_retrieval_total_ms += elapsed_ms
-                self._memory_retrieval_count += 1
-                logger.debug("cache_hit", tier="memory", text=text, key=key)
-                return self._memory[key]  # type: ignore[no-any-return]
-        if self._bucket:
-            new_event: asyncio.Event | None = None
-            event: asyncio.Event | None = None
-
-            async with self._in_flight_lock:
-                if key in self._in_flight:
-                    event = self._in_flight[key]
-                else:
-                    new_event = asyncio.Event()
-                    self._in_flight[key] = new_event
-
-            if event is not None:
-                logger.debug("cache_coalescing", text=text, key=key)
-                await event.wait()
-                with self._lock:
-                    if key in self._memory:
-                        self._memory_hits += 1
-                        return self._memory[key]  # type: ignore[no-any-return]
-                self._misses += 1
+            record: ShapeRecord | None = self._memory.get(key)
+            if record is None:
                 return None
-            try:
-                t0_storage = time.perf_counter()
-                loop = asyncio.get_running_loop()
-                result = await loop.run_in_executor(None, self._get_from_storage, key)
-                elapsed_ms = (time.perf_counter() - t0_storage) * 1000
-
-                if result is not None:
-                    self._storage_hits += 1
-                    self._storage_retrieval_total_ms += elapsed_ms
-                    self._storage_retrieval_count += 1
-                    with self._lock:
-                        self._memory[key] = result  # Promote to memory
-                    logger.debug(
-                        "cache_hit",
-                        tier="storage",
-                        text=text,
-                        key=key,
-                        retrieval_ms=round(elapsed_ms, 1),
-                    )
-                    return result
-            finally:
-                if new_event is not None:
-                    new_event.set()  # Wake any waiting coroutines
-                    async with self._in_flight_lock:
-                        self._in_flight.pop(key, None)
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            self._memory_hits += 1
+            self._memory_retrieval_total_ms += elapsed_ms
+            self._memory_retrieval_count += 1
+            self._record_usage(key)
+        logger.debug("cache_hit", tier="memory", text=text, key=key)
+        return record
 
-        self._misses += 1
+    async def _lookup(
+        self, analysis: ConceptAnalysis, *, count_miss: bool = True
+    ) -> ShapeRecord | None:
+        """Memory → disk → peer → storage lookup shared by get() and get_record()."""
+        return await self._lookup_key(analysis.cache_key, analysis.text, count_miss=count_miss)
+
+    async def _lookup_key(
+        self, key: str, text: str, *, peers: bool = True, count_miss: bool = True
+    ) -> ShapeRecord | None:
+        record = self._peek(key, text)
+        if record is not None:
+            return record
+        record = await self._read_disk(key, text)
+        if record is not None:
+            return record
+        # The Bloom filter only speaks for storage: a key a peer generated moments
+        # ago is not in the manifest yet (uploads are write-behind), so a key
+        # another instance owns is always asked of that owner
+        peer_owned = peers and self._peers is not None and self._peers.owner(key) is not None
+        if not peer_owned and self._definitely_not_stored(key):
+            if count_miss:
+                self._misses += 1
+            logger.debug("cache_miss", text=text, key=key, skipped_storage=True)
+            return None
+        remote = self._read_remote if peers else self._read_through_storage
+        if self._storage is not None or (peers and self._peers is not None):
+            record, shared = await self._storage_flights.do(
+                key, functools.partial(remote, key, text)
+            )
+            if record is not None:
+                if shared:
+                    self._coalesced_hits += 1
+                return record  # type: ignore[no-any-return]
+
+        if count_miss:
+            self._misses += 1
         logger.debug("cache_miss", text=text, key=key)
         return None
 
-    def _get_from_storage(self, key: str) -> GenerateResponse | None:
-        """Synchronous Cloud Storage read. Runs in executor."""
+    async def _read_disk(self, key: str, text: str) -> ShapeRecord | None:
+        """Disk-tier read, decoded in the IO executor; promotes a hit to memory.
+
+        Keys not on disk are answered from the in-memory index without the hop.
+        """
+        if self._disk is None or key not in self._disk:
+            return None
+        t0_disk = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._io_executor, self._disk.get, key)
+        if result is None:
+            return None
+        elapsed_ms = (time.perf_counter() - t0_disk) * 1000
+        with self._lock:
+            self._disk_hits += 1
+            self._disk_retrieval_total_ms += elapsed_ms
+            self._disk_retrieval_count += 1
+            record = self._remember(key, result)  # Promote to memory
+            self._record_usage(key)
+        logger.debug("cache_hit", tier="disk", text=text, key=key)
+        return record
+
+    # ── Aliases ──────────────────────────────────────────────────────────
+
+    def _alias_candidates(self, analysis: ConceptAnalysis) -> tuple[str, ...]:
+        if self._aliases is None:
+            return ()
+        return self._aliases.candidates(analysis.normalized, analysis.template.template_type)
+
+    def peek_alias_record(
+        self, text: str | ConceptAnalysis, *, prepare_json: bool = False
+    ) -> tuple[ShapeRecord, str] | None:
+        """Memory-tier record of a near-synonym, and the canonical concept used."""
+        analysis = self._analyze(text)
+        for canonical in self._alias_candidates(analysis):
+            key = hash_key(canonical)
+            record = self._peek(key, canonical)
+            if record is not None:
+                return self._alias_hit(analysis, canonical, key, record, prepare_json)
+        return None
+
+    async def get_alias_record(
+        self, text: str | ConceptAnalysis, *, prepare_json: bool = False
+    ) -> tuple[ShapeRecord, str] | None:
+        """Serve a miss from a cached near-synonym: memory, disk, then storage.
+
+        Call after get_record(count_miss=False) missed; the miss is counted
+        here, once, unless a near-synonym serves it. Storage is only asked
+        for canonicals the known-keys filter says are stored, so a true miss
+        costs no extra round-trips.
+        """
+        analysis = self._analyze(text)
+        for canonical in self._alias_candidates(analysis):
+            key = hash_key(canonical)
+            record = self._peek(key, canonical) or await self._read_disk(key, canonical)
+            if (
+                record is None
+                and self._storage is not None
+                and self._known_keys is not None
+                and key in self._known_keys
+            ):
+                record, _ = await self._storage_flights.do(
+                    key, functools.partial(self._read_through_storage, key, canonical)
+                )
+            if record is not None:
+                return self._alias_hit(analysis, canonical, key, record, prepare_json)
+        self._misses += 1
+        return None
+
+    def _alias_hit(
+        self,
+        analysis: ConceptAnalysis,
+        canonical: str,
+        key: str,
+        record: ShapeRecord,
+        prepare_json: bool,
+    ) -> tuple[ShapeRecord, str]:
+        self._alias_hits += 1
+        if prepare_json:
+            self._prepare_json(key, record)
+        logger.info("cache_alias_hit", text=analysis.text, alias_of=canonical, key=key)
+        return record, canonical
+
+    async def _read_through_storage(self, key: str, text: str) -> ShapeRecord | None:
+        """One storage read for ``key``; promotes a hit to memory and disk."""
+        t0_storage = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._io_executor, self._get_from_storage, key)
+        if result is None:
+            return None
+        elapsed_ms = (time.perf_counter() - t0_storage) * 1000
+        self._storage_hits += 1
+        self._storage_retrieval_total_ms += elapsed_ms
+        self._storage_retrieval_count += 1
+        with self._lock:
+            record = self._remember(key, result)  # Promote to memory
+            self._record_usage(key)
+        await self._put_disk(key, result)
+        logger.debug(
+            "cache_hit",
+            tier="storage",
+            text=text,
+            key=key,
+            retrieval_ms=round(elapsed_ms, 1),
+        )
+        return record
+
+    def _get_from_storage(self, key: str) -> ShapeRecord | None:
+        """Synchronous storage read. Runs in executor.
+
+        One GET per lookup: a missing object is a miss, no exists() probe.
+        The manifest says which blob (binary or legacy JSON) holds the key;
+        only before the manifest is first read does a miss also try the
+        legacy name, so pre-binary buckets keep serving hits.
+        """
+        assert self._storage is not None
+        entry = self._manifest.get(key)
+        if entry is not None:
+            names = [entry.blob_name]
+        else:
+            names = [f"shapes/{key}{SHAPE_SUFFIX}"]
+            if not self._manifest_loaded:
+                names.append(f"shapes/{key}{LEGACY_SUFFIX}")
         try:
-            blob = self._bucket.blob(f"shapes/{key}.json")
-            if blob.exists():
-                return GenerateResponse.model_validate_json(blob.download_as_text())
+            for name in names:
+                data = self._storage.get(name)
+                if data is not None:
+                    return ShapeRecord.from_blob(name, data, compress=self._memory_compression)
         except Exception as e:
             logger.warning("cache_read_failed", key=key, error=str(e))
         return None
 
-    async def set(self, text: str, response: GenerateResponse) -> None:
-        """Cache shape in memory and Cloud Storage."""
-        normalized = self.normalize_key(text)
-        key = self._hash_key(normalized)
+    def _definitely_not_stored(self, key: str) -> bool:
+        """True if the known-keys filter rules out a storage hit (a skipped read)."""
+        if self._storage is None or self._known_keys is None or key in self._known_keys:
+            return False
+        self._bloom_skips += 1
+        self._maybe_refresh_known_keys()
+        return True
+
+    def _maybe_refresh_known_keys(self, force: bool = False) -> None:
+        """Re-read the manifest in the background once the Bloom filter is stale."""
+        stale = force or (
+            time.monotonic() - self._known_keys_built_at > self._bloom_refresh_seconds
+        )
+        running = self._bloom_refresh_task is not None and not self._bloom_refresh_task.done()
+        if stale and not running:
+            self._bloom_refresh_task = asyncio.create_task(self.count_stored_shapes())
+
+    async def set(self, text: str | ConceptAnalysis, response: GenerateResponse) -> None:
+        """Cache shape in memory and on local disk; queue the storage upload.
+
+        Returns before the upload runs — see flush_writes().
+        """
+        analysis = self._analyze(text)
+        normalized, key = analysis.normalized, analysis.cache_key
 
         self._track_collision(key, normalized)
 
         with self._lock:
-            self._memory[key] = response
-        if self._bucket:
+            record = self._remember(key, self._make_record(response))
+        if self._known_keys is not None:
+            self._known_keys.add(key)
+            if self._known_keys.saturated and self._storage is not None:
+                self._maybe_refresh_known_keys(force=True)  # Resize before FP rate climbs
+        await self._put_disk(key, record)
+        if self._storage is not None:
+            await self._writes.put(key, response)
+
+    async def _put_disk(self, key: str, record: ShapeRecord) -> None:
+        """Disk-tier write in the IO executor: encoding, eviction and compaction block."""
+        if self._disk is not None:
             loop = asyncio.get_running_loop()
-            await loop.run_in_executor(None, self._set_in_storage, key, response)
+            await loop.run_in_executor(self._io_executor, self._disk.put, key, record)
+
+    async def flush_writes(self) -> None:
+        """Wait for every queued storage upload to finish."""
+        await self._writes.flush()
+
+    def write_stats(self) -> dict[str, int]:
+        """Write-behind queue counters (cheap; no storage round-trip)."""
+        return self._writes.stats()
 
     def _set_in_storage(self, key: str, response: GenerateResponse) -> None:
-        """Synchronous Cloud Storage write. Runs in executor."""
+        """Synchronous storage write. Runs in executor.
+
+        A shape whose content hash matches a stored blob is not uploaded
+        again: its manifest entry points at the existing blob.
+        """
+        assert self._storage is not None
+        digest = content_hash(response)
+        with self._lock:
+            owner = self._content_index.get(digest)
         try:
-            blob = self._bucket.blob(f"shapes/{key}.json")
-            blob.upload_from_string(
-                response.model_dump_json(),
-                content_type="application/json",
-            )
+            if owner is not None:
+                entry = ManifestEntry(
+                    key=key,
+                    size=owner.size,
+                    created_at=time.time(),
+                    content_hash=digest,
+                    blob="" if owner.key == key else owner.blob_name,
+                )
+                self._deduped_uploads += 1
+                logger.debug("cache_upload_deduped", key=key, blob=owner.blob_name)
+            else:
+                data = encode_shape(response)
+                self._storage.put(f"shapes/{key}{SHAPE_SUFFIX}", data, content_type=CONTENT_TYPE)
+                entry = ManifestEntry(
+                    key=key, size=len(data), created_at=time.time(), content_hash=digest
+                )
         except Exception as e:
             logger.warning("cache_write_failed", key=key, error=str(e))
+            return
+        with self._lock:
+            usage, self._usage = self._usage, {}
+        try:
+            entries = add_to_manifest(self._storage, entry, usage)
+            with self._lock:
+                self._set_manifest(entries)
+        except Exception as e:
+            # Shape is stored; only the index lags until the next writer succeeds
+            logger.warning("cache_manifest_update_failed", key=key, error=str(e))
+            with self._lock:
+                for k, (n, ts) in usage.items():
+                    count, last = self._usage.get(k, (0, 0.0))
+                    self._usage[k] = (count + n, max(last, ts))
+
+    def _set_manifest(self, entries: dict[str, ManifestEntry]) -> None:
+        """Adopt a manifest and re-index blob owners by content. Caller holds self._lock."""
+        self._manifest = entries
+        self._content_index = {
+            e.content_hash: e for e in entries.values() if e.content_hash and not e.blob
+        }
+
+    def _read_manifest_sync(self) -> dict[str, ManifestEntry]:
+        """One small GET of the manifest; rebuilds it once for pre-manifest buckets.
+
+        Also rebuilds the known-keys Bloom filter, sized at twice the
+        current entry count so local set()s have headroom until the next read.
+        """
+        assert self._storage is not None
+        current = read_manifest(self._storage)
+        entries = current[0] if current is not None else rebuild_manifest(self._storage)
+        with self._lock:
+            pending = list(self._memory.keys())  # Set locally, maybe not yet in the manifest
+        known = BloomFilter.from_keys(
+            [*entries, *pending], capacity=max(2 * (len(entries) + len(pending)), 1024)
+        )
+        with self._lock:
+            self._set_manifest(entries)
+            self._manifest_loaded = True
+            self._known_keys = known
+            self._known_keys_built_at = time.monotonic()
+        return entries
 
     async def preload_to_memory(self, concept: str) -> bool:
-        """Load single concept from Cloud Storage into memory."""
-        normalized = self.normalize_key(concept)
-        key = self._hash_key(normalized)
+        """Load single concept from storage into memory."""
+        key = self._analyze(concept).cache_key
 
         with self._lock:
             if key in self._memory:
                 return True  # Already in memory
 
-        if not self._bucket:
+        if self._storage is None:
             return False
 
         loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(None, self._get_from_storage, key)
+        result = await loop.run_in_executor(self._io_executor, self._get_from_storage, key)
         if result is not None:
             with self._lock:
-                self._memory[key] = result
+                self._remember(key, result)
             return True
         return False
 
-    async def load_all_cached(self) -> int:
-        """Load all shapes from Cloud Storage into memory at startup."""
-        if not self._bucket:
+    async def load_all_cached(
+        self,
+        *,
+        workers: int = 16,
+        deadline_s: float = 120.0,
+        memory_budget_bytes: int = 0,
+        order: str = "recent",
+    ) -> int:
+        """Warm the memory tier from storage at startup.
+
+        Loads the hot-set snapshot first (one sequential download), then
+        fetches the remaining manifest entries with ``workers`` parallel
+        downloads in priority order, stopping at the memory-tier capacity,
+        the byte budget, or ``deadline_s`` — whichever comes first. Progress
+        is logged once per second and exposed via ``stats()["warmup"]``.
+        """
+        if self._storage is None:
             return 0
 
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self._load_all_sync)
+        return await loop.run_in_executor(
+            self._io_executor, self._load_all_sync, workers, deadline_s, memory_budget_bytes, order
+        )
+
+    def _fetch_entry(self, entry: ManifestEntry, stopped: threading.Event) -> int:
+        """Download + decode one manifest entry into memory. Returns bytes read.
+
+        A fetch still in flight when warmup has given up (``stopped``) is
+        discarded rather than written into the cache after warmup reported done.
+        """
+        assert self._storage is not None
+        data = self._storage.get(entry.blob_name)
+        if data is None:
+            raise LookupError(f"{entry.blob_name} is in the manifest but not in storage")
+        record = ShapeRecord.from_blob(entry.blob_name, data, compress=self._memory_compression)
+        with self._lock:
+            if stopped.is_set():
+                return 0
+            self._remember(entry.key, record)
+        if self._disk is not None:
+            self._disk.put(entry.key, record)  # Next restart reloads from disk
+        return len(data)
+
+    def _load_all_sync(
+        self,
+        workers: int = 16,
+        deadline_s: float = 120.0,
+        memory_budget_bytes: int = 0,
+        order: str = "recent",
+    ) -> int:
+        """Snapshot, then parallel bulk load from storage. Runs in executor."""
+        if isinstance(self._memory, SharedMemoryTier) and not self._memory.created:
+            # The worker that created the arena warms it for everyone
+            logger.info("cache_warmup_skipped", reason="shared_memory", segment=self._memory.name)
+            self.warmup.finish("shared")
+            return 0
+        deadline = time.monotonic() + deadline_s
+        from_snapshot = self._load_snapshot_sync(deadline)
+        try:
+            entries = self._read_manifest_sync()
+            with self._lock:
+                # Shapes already reloaded from the disk tier need no download
+                missing = [e for e in entries.values() if e.key not in self._memory]
+                free_bytes = self._memory.maxsize - self._memory.currsize
+            budget = min(memory_budget_bytes, free_bytes) if memory_budget_bytes else free_bytes
+            plan = (
+                plan_warmup(
+                    missing,
+                    order=order,
+                    max_entries=len(missing),
+                    memory_budget_bytes=budget,
+                )
+                if budget > 0
+                else []
+            )
+        except Exception as e:
+            logger.warning("cache_warmup_failed", error=str(e))
+            self.warmup.finish("failed")
+            return from_snapshot
+
+        self.warmup.start(candidates=len(entries), planned=len(plan))
+        pool = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="cache-warmup")
+        stopped = threading.Event()
+        # Submission order == priority order; the pool dequeues FIFO
+        pending: dict[Future[int], ManifestEntry] = {
+            pool.submit(self._fetch_entry, entry, stopped): entry for entry in plan
+        }
+        state = "complete"
+        last_log = time.monotonic()
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    state = "deadline"
+                    break
+                done, _ = wait(pending, timeout=min(1.0, remaining), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    entry = pending.pop(fut)
+                    try:
+                        self.warmup.record(fut.result())
+                    except Exception as e:
+                        self.warmup.record(None)
+                        logger.warning(
+                            "cache_warmup_entry_failed",
+                            blob=entry.blob_name,
+                            error=str(e),
+                        )
+                if time.monotonic() - last_log >= 1.0:
+                    last_log = time.monotonic()
+                    logger.info("cache_warmup_progress", **self.warmup.to_dict())
+        finally:
+            with self._lock:
+                stopped.set()  # Fetches finishing after this point are dropped
+            pool.shutdown(wait=False, cancel_futures=True)
 
-    def _load_all_sync(self) -> int:
-        """Synchronous bulk load from Cloud Storage. Runs in executor."""
+        self.warmup.finish(state)
+        progress = self.warmup.to_dict()
+        if state == "deadline":
+            logger.warning("cache_warmup_deadline", deadline_s=deadline_s, **progress)
+        else:
+            logger.info("cache_warmup_complete", **progress)
+        return from_snapshot + int(progress["loaded"])
+
+    # ── Peers ────────────────────────────────────────────────────────────
+
+    async def _read_remote(self, key: str, text: str) -> ShapeRecord | None:
+        """The owning peer if another instance owns ``key``, else storage.
+
+        A peer miss is final (the owner already asked storage); a peer that
+        cannot answer falls back to reading storage here.
+        """
+        owner = self._peers.owner(key) if self._peers is not None else None
+        if owner is not None:
+            try:
+                return await self._read_through_peer(owner, key, text)
+            except PeerError as e:
+                logger.warning("cache_peer_failed", peer=owner, key=key, error=str(e))
+                if self._definitely_not_stored(key):
+                    return None
+        if self._storage is None:
+            return None
+        return await self._read_through_storage(key, text)
+
+    async def _read_through_peer(self, owner: str, key: str, text: str) -> ShapeRecord | None:
+        """Fetch ``key`` from its owner; keeps a local copy of a hit in memory."""
+        assert self._peers is not None
+        result = await self._peers.fetch(owner, key)
+        if result is None:
+            return None
+        with self._lock:
+            self._peer_hits += 1
+            record = self._remember(key, result)
+            self._record_usage(key)
+        logger.debug("cache_hit", tier="peer", text=text, key=key, peer=owner)
+        return record
+
+    async def get_for_peer(self, key: str) -> bytes | None:
+        """Encoded shape for another instance: own tiers and storage, never peers."""
+        record = await self._lookup_key(key, key, peers=False)
+        if record is None:
+            return None
+        if self._peers is not None:
+            self._peers.record_served()
+        return record.encode()
+
+    def peer_stats(self) -> dict[str, Any] | None:
+        return self._peers.stats() if self._peers is not None else None
+
+    # ── Snapshot ─────────────────────────────────────────────────────────
+
+    def _load_snapshot_sync(self, deadline: float) -> int:
+        """Stream the snapshot to a temp file and decode it into memory.
+
+        Entries are in priority order, so stopping at the memory budget or
+        the deadline keeps the hottest shapes. Any failure falls back to the
+        per-shape warmup. Returns shapes loaded.
+        """
+        assert self._storage is not None
+        t0 = time.perf_counter()
+        fd, path = tempfile.mkstemp(prefix="shape-snapshot-", suffix=".bin")
+        os.close(fd)
         loaded = 0
         try:
-            # TODO: Replace with counter blob if cache exceeds ~500 entries.
-            # At that point, list_blobs becomes an expensive paginated call.
-            blobs = self._bucket.list_blobs(prefix="shapes/")
-            for blob in blobs:
-                try:
-                    data = blob.download_as_text()
-                    response = GenerateResponse.model_validate_json(data)
-                    key = blob.name.removeprefix("shapes/").removesuffix(".json")
+            if not self._storage.get_file(SNAPSHOT_BLOB, path):
+                return 0
+            with SnapshotReader(path) as reader:
+                info = self._snapshot = reader.info
+                for key, record, _ in reader:
+                    if time.monotonic() >= deadline:
+                        break
+                    record = record.compressed_as(self._memory_compression)
                     with self._lock:
-                        self._memory[key] = response
+                        if key in self._memory:
+                            continue  # Reloaded from the disk tier
+                        if not self._memory.fits(record.nbytes):
+                            break
+                        self._memory[key] = record
                     loaded += 1
-                except Exception as e:
-                    logger.warning(
-                        "cache_warmup_entry_failed",
-                        blob=blob.name,
-                        error=str(e),
-                    )
         except Exception as e:
-            logger.warning("cache_warmup_failed", error=str(e))
+            logger.warning("cache_snapshot_load_failed", error=str(e))
+            return loaded
+        finally:
+            Path(path).unlink(missing_ok=True)
+        logger.info(
+            "cache_snapshot_loaded",
+            version=info.version,
+            shapes_loaded=loaded,
+            entries=info.entries,
+            time_ms=round((time.perf_counter() - t0) * 1000, 1),
+        )
         return loaded
 
+    async def build_snapshot(self, top_n: int) -> SnapshotInfo | None:
+        """Pack the ``top_n`` most-hit shapes into the snapshot object."""
+        if self._storage is None:
+            return None
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._io_executor, self._build_snapshot_sync, top_n)
+
+    def _snapshot_record(self, entry: ManifestEntry) -> bytes | None:
+        """Encoded shape for ``entry``: from memory if resident, else storage."""
+        assert self._storage is not None
+        with self._lock:
+            record = self._memory.peek(entry.key)
+        if record is not None:
+            return record.encode()
+        data = self._storage.get(entry.blob_name)
+        if data is None or entry.blob_name.endswith(SHAPE_SUFFIX):
+            return data
+        return ShapeRecord.from_blob(entry.blob_name, data).encode()  # Legacy JSON
+
+    def _build_snapshot_sync(self, top_n: int) -> SnapshotInfo | None:
+        """Write the bundle to a temp file, then upload it in one put. Runs in executor."""
+        assert self._storage is not None
+        t0 = time.perf_counter()
+        entries = self._read_manifest_sync()
+        plan = plan_warmup(
+            entries.values(),
+            order="frequent",
+            max_entries=top_n,
+            memory_budget_bytes=self._memory.maxsize,  # No point packing what can't be loaded
+        )
+        if not plan:
+            return None
+
+        def records() -> Iterator[tuple[str, bytes, int]]:
+            for entry in plan:
+                try:
+                    data = self._snapshot_record(entry)
+                except Exception as e:
+                    logger.warning("cache_snapshot_entry_failed", key=entry.key, error=str(e))
+                    continue
+                if data is not None:
+                    yield entry.key, data, entry.hits
+
+        version = self._snapshot.version + 1 if self._snapshot is not None else 1
+        fd, path = tempfile.mkstemp(prefix="shape-snapshot-", suffix=".bin")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                info = write_snapshot(out, records(), version=version)
+            self._storage.put_file(SNAPSHOT_BLOB, path)
+        finally:
+            Path(path).unlink(missing_ok=True)
+        self._snapshot = info
+        logger.info(
+            "cache_snapshot_built",
+            version=info.version,
+            entries=info.entries,
+            bytes=info.size,
+            time_ms=round((time.perf_counter() - t0) * 1000, 1),
+        )
+        return info
+
     async def count_stored_shapes(self) -> int:
-        """Count shapes in Cloud Storage. TODO: Use counter blob at scale > 500."""
-        if not self._bucket:
+        """Count shapes in storage (one manifest read, not a listing)."""
+        if self._storage is None:
             return 0
 
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self._count_sync)
+        return await loop.run_in_executor(self._io_executor, self._count_sync)
 
     def _count_sync(self) -> int:
-        """Synchronous blob count. Runs in executor."""
+        """Synchronous manifest read. Runs in executor."""
         try:
-            blobs = list(self._bucket.list_blobs(prefix="shapes/"))
-            return len(blobs)
+            return len(self._read_manifest_sync())
         except Exception as e:
             logger.warning("cache_count_failed", error=str(e))
             return 0
 
     async def stats(self) -> dict[str, Any]:
         """Return cache hit/miss statistics."""
-        total = self._memory_hits + self._storage_hits + self._misses
+        hits = (
+            self._memory_hits
+            + self._disk_hits
+            + self._peer_hits
+            + self._storage_hits
+            + self._coalesced_hits
+        )
+        total = hits + self._misses
 
         storage_count = await self.count_stored_shapes()
 
@@ -304,25 +1009,57 @@ class ShapeCache:
             if self._memory_retrieval_count > 0
             else 0.0
         )
+        avg_disk_ms = (
+            round(self._disk_retrieval_total_ms / self._disk_retrieval_count, 2)
+            if self._disk_retrieval_count > 0
+            else 0.0
+        )
         avg_stor_ms = (
             round(self._storage_retrieval_total_ms / self._storage_retrieval_count, 1)
             if self._storage_retrieval_count > 0
             else 0.0
         )
+        with self._lock:
+            memory = self._memory.stats()
 
         return {
             "memory_cache_size": len(self._memory),
+            "memory": memory,
+            "disk_cache_size": len(self._disk) if self._disk is not None else 0,
             "storage_cache_size": storage_count,
             "memory_hits": self._memory_hits,
+            "disk_hits": self._disk_hits,
+            "peer_hits": self._peer_hits,
             "storage_hits": self._storage_hits,
+            "coalesced_hits": self._coalesced_hits,
+            "alias_hits": self._alias_hits,
             "misses": self._misses,
-            "hit_rate": round((self._memory_hits + self._storage_hits) / max(total, 1), 3),
+            "hit_rate": round(hits / max(total, 1), 3),
             "avg_memory_retrieval_ms": avg_mem_ms,
+            "avg_disk_retrieval_ms": avg_disk_ms,
             "avg_storage_retrieval_ms": avg_stor_ms,
+            "writes": self.write_stats(),
+            "deduped_uploads": self._deduped_uploads,
+            "aliases": self._aliases.stats() if self._aliases is not None else None,
+            "peers": self.peer_stats(),
+            "disk": self._disk.stats() if self._disk is not None else None,
+            "bloom": (
+                {
+                    "keys": len(self._known_keys),
+                    "bits": self._known_keys.num_bits,
+                    "hashes": self._known_keys.num_hashes,
+                    "skipped_storage_reads": self._bloom_skips,
+                }
+                if self._known_keys is not None
+                else None
+            ),
+            "warmup": self.warmup.to_dict(),
+            "snapshot": self._snapshot.to_dict() if self._snapshot is not None else None,
+            "concepts": concept_cache_stats(),
         }
 
     def clear_memory(self) -> None:
-        """Clear in-memory cache (does not affect Cloud Storage)."""
+        """Clear in-memory cache (does not affect the disk tier or shared storage)."""
         with self._lock:
             self._memory.clear()
         logger.info("cache_cleared")
@@ -0,0 +1,131 @@
+# Binary on-storage shape record: fixed header + raw arrays + JSON metadata.
+# Replaces model_dump_json() blobs (base64 inside JSON, ~33% larger, full
+# pydantic validation per read). Legacy .json blobs remain readable.
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import struct
+from typing import Any
+
+import numpy as np
+
+from app.schemas import BoundingBox, GenerateResponse
+
+# ── Layout ───────────────────────────────────────────────────────────────────
+# [header 20B][positions float32 × N×3][part_ids uint8 × N][metadata JSON]
+#
+# Header (little-endian):
+#   magic         4s   b"LSHP"
+#   version       B    FORMAT_VERSION
+#   flags         B    reserved, 0
+#   reserved      H    0
+#   positions_len I    bytes of raw float32 positions
+#   part_ids_len  I    bytes of raw uint8 part ids
+#   meta_len      I    bytes of UTF-8 JSON metadata
+#
+# The header is a multiple of 4 bytes, so positions start float32-aligned.
+
+MAGIC = b"LSHP"
+FORMAT_VERSION = 1
+SHAPE_SUFFIX = ".bin"
+LEGACY_SUFFIX = ".json"
+CONTENT_TYPE = "application/octet-stream"
+
+_HEADER = struct.Struct("<4sBBHIII")
+
+
+class ShapeFormatError(ValueError):
+    """Raised when a stored blob is not a readable shape record."""
+
+
+def encode_shape(response: GenerateResponse) -> bytes:
+    """Serialize a GenerateResponse into a versioned binary record."""
+    return encode_parts(
+        base64.b64decode(response.positions),
+        base64.b64decode(response.part_ids),
+        response.model_dump(exclude={"positions", "part_ids", "alias_of"}),
+    )
+
+
+def encode_parts(positions: bytes, part_ids: bytes, meta: dict[str, Any]) -> bytes:
+    """Binary record from raw array bytes and the other response fields."""
+    meta_bytes = json.dumps(meta, separators=(",", ":")).encode()
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, 0, 0, len(positions), len(part_ids), len(meta_bytes)
+    )
+    return b"".join((header, positions, part_ids, meta_bytes))
+
+
+def content_hash(response: GenerateResponse) -> str:
+    """Identity of the shape itself: points, parts and template, not timing."""
+    digest = hashlib.sha256()
+    digest.update(base64.b64decode(response.positions))
+    digest.update(base64.b64decode(response.part_ids))
+    digest.update(json.dumps([response.part_names, response.template_type]).encode())
+    return digest.hexdigest()[:32]
+
+
+def _sections(data: bytes | memoryview) -> tuple[memoryview, memoryview, memoryview]:
+    """Split a record into (positions, part_ids, meta) views without copying."""
+    view = memoryview(data)
+    if len(view) < _HEADER.size:
+        raise ShapeFormatError(f"Record too short: {len(view)} bytes")
+
+    magic, version, _, _, pos_len, ids_len, meta_len = _HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ShapeFormatError(f"Bad magic: {bytes(magic)!r}")
+    if version != FORMAT_VERSION:
+        raise ShapeFormatError(f"Unsupported format version: {version}")
+
+    pos_start = _HEADER.size
+    ids_start = pos_start + pos_len
+    meta_start = ids_start + ids_len
+    end = meta_start + meta_len
+    if len(view) < end:
+        raise ShapeFormatError(f"Truncated record: expected {end} bytes, got {len(view)}")
+
+    return view[pos_start:ids_start], view[ids_start:meta_start], view[meta_start:end]
+
+
+def decode_arrays(data: bytes | memoryview) -> tuple[np.ndarray, np.ndarray]:
+    """Zero-copy numpy views of (positions (N, 3) float32, part_ids (N,) uint8).
+
+    The returned arrays share memory with ``data`` and are read-only.
+    """
+    positions, part_ids, _ = _sections(data)
+    return (
+        np.frombuffer(positions, dtype=np.float32).reshape(-1, 3),
+        np.frombuffer(part_ids, dtype=np.uint8),
+    )
+
+
+def decode_meta(data: bytes | memoryview) -> dict[str, Any]:
+    """The record's response fields other than the two arrays."""
+    _, _, meta = _sections(data)
+    return json.loads(bytes(meta))  # type: ignore[no-any-return]
+
+
+def decode_shape(data: bytes | memoryview) -> GenerateResponse:
+    """Rebuild a GenerateResponse from a binary record.
+
+    Skips pydantic validation (``model_construct``) — records are only
+    ever produced by ``encode_shape`` and are guarded by magic + version.
+    """
+    positions, part_ids, meta_view = _sections(data)
+    meta = json.loads(bytes(meta_view))
+    meta["bounding_box"] = BoundingBox.model_construct(**meta["bounding_box"])
+    return GenerateResponse.model_construct(
+        positions=base64.b64encode(positions).decode("ascii"),
+        part_ids=base64.b64encode(part_ids).decode("ascii"),
+        **meta,
+    )
+
+
+def decode_blob(name: str, data: bytes) -> GenerateResponse:
+    """Decode a stored blob by its suffix (binary record or legacy JSON)."""
+    if name.endswith(LEGACY_SUFFIX):
+        return GenerateResponse.model_validate_json(data)
+    return decode_shape(data)
@@ -0,0 +1,490 @@
+# Shared-memory shape tier: one arena for every uvicorn worker on a host.
+# With `--workers N` each worker otherwise holds a private memory tier and
+# runs its own warmup — N× the RAM, N× the downloads. This tier keeps binary
+# shape records (shape_format.py) in one multiprocessing.shared_memory
+# segment mapped by every worker, so resident cache memory stays constant as
+# workers are added. Drop-in for MemoryTier (CACHE_MEMORY_POLICY=shared).
+#
+# Segment layout:
+#   [header 64B][slots × 32B][data: ring of entries]
+# Header (little-endian): magic 4s, version B, 3x, slots I, live I, used I,
+#   attached I, data_offset Q, capacity Q, cursor Q, oldest Q, high Q
+# Slot: seq I, 4x, key hash Q, entry offset Q, entry length I, 4x
+# Entry: key_len H, record_len I, key, pad to 8, shape record
+#
+# The index is an open-addressing hash table read without locks: each slot
+# is a seqlock (the writer makes seq odd, rewrites the slot, makes it even;
+# readers retry if seq was odd or changed). Writers — any worker — are
+# serialized by an flock.
+#
+# The data area is a ring: entries are appended at the cursor, and when the
+# arena is full the cursor wraps and the oldest entries ahead of it are
+# evicted (their slots tombstoned first, then their bytes reused). Because
+# bytes are reused, a hit copies its entry out of the arena and checks the
+# slot's seq afterwards; a copy torn by a concurrent eviction is retried.
+# Each process keeps the records it served in a small local LRU keyed by
+# (slot, seq) — the seq changes on every rewrite of the slot — so repeat hits
+# skip the copy and keep their prepared JSON (memory_tier.py).
+# Tombstones are swept by rebuilding the index once they crowd the table.
+# Workers count themselves in ``attached``; the last one to close unlinks.
+
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import structlog
+from cachetools import LRUCache  # type: ignore[import-untyped]
+
+from app.cache.memory_tier import ShapeRecord
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+logger = structlog.get_logger(__name__)
+
+_MAGIC = b"LSHM"
+_VERSION = 2
+_HEADER = struct.Struct("<4sB3xIIIIQQQQQ")
+_HEADER_SIZE = 64
+_SEQ = struct.Struct("<I")
+_SLOT = struct.Struct("<I4xQQI4x")
+_ENTRY = struct.Struct("<HI")
+_ALIGN = 8
+
+_EMPTY = 0
+_TOMBSTONE = 1
+_MAX_LOAD = 0.75  # Used (live + tombstone) slots before the index is rebuilt
+_TYPICAL_RECORD_BYTES = 8 * 1024  # Sizes the index; 2048-point shapes are ~26 KB
+_SEQ_RETRIES = 8  # Then the slot reads as a miss (e.g. a writer died mid-update)
+_COPY_RETRIES = 3  # Hits whose entry was evicted mid-copy
+_ATTACH_TIMEOUT_S = 5.0
+_LOCAL_MAX_BYTES = 64 * 1024 * 1024  # Per-process records served, with their JSON
+
+
+def _local_size(item: tuple[int, int, ShapeRecord]) -> int:
+    return item[2].nbytes
+
+
+def default_segment_name(port: int) -> str:
+    """Per-server name: uvicorn workers share their supervisor's pid, and servers
+    launched by one parent (PID 1 in a container, systemd) differ by port."""
+    return f"lumen-shapes-{os.getppid()}-{port}"
+
+
+def _key_hash(key: str) -> int:
+    digest = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+    return digest | 2  # Never _EMPTY or _TOMBSTONE
+
+
+def _aligned(n: int) -> int:
+    return (n + _ALIGN - 1) & ~(_ALIGN - 1)
+
+
+@dataclass
+class _ArenaState:
+    """Mutable header fields. Read and written back under the write lock."""
+
+    live: int  # Slots holding an entry
+    used: int  # Slots holding an entry or a tombstone
+    attached: int  # Workers with the segment open
+    cursor: int  # Next write position in the data area
+    oldest: int  # First entry ahead of the cursor not yet evicted (previous lap)
+    high: int  # End of the entries written on the previous lap (or this one)
+
+    @property
+    def occupied(self) -> int:
+        """Data bytes held by entries not yet reclaimed."""
+        return self.cursor + self.high - self.oldest
+
+
+class SharedMemoryTier:
+    """Byte-budgeted shape arena in shared memory, mapped by every worker.
+
+    The first process to open ``name`` creates the segment; later ones
+    attach to it. Thread- and process-safe.
+    """
+
+    def __init__(
+        self, max_bytes: int, name: str, *, local_max_bytes: int = _LOCAL_MAX_BYTES
+    ) -> None:
+        if not name:
+            raise ValueError("SharedMemoryTier needs a segment name")
+        self.name = name
+        self.maxsize = max_bytes
+        self._thread_lock = threading.Lock()  # flock is per process, not per thread
+        # key → (slot, seq, record) for records this process served
+        self._local = LRUCache(maxsize=local_max_bytes, getsizeof=_local_size)
+        self._local_lock = threading.Lock()
+        self.local_hits = 0
+        self._lock_path = Path(tempfile.gettempdir()) / f"{self.name}.lock"
+        self.rejected = 0  # Inserts refused by this process (oversized, or index full)
+        self.evictions = 0  # Entries this process evicted to make room
+        self.inserts = 0
+
+        slots = 1024
+        while slots * _MAX_LOAD < 2 * max_bytes // _TYPICAL_RECORD_BYTES:
+            slots *= 2
+        data_offset = _HEADER_SIZE + slots * _SLOT.size
+        try:
+            self._shm = shared_memory.SharedMemory(
+                self.name, create=True, size=data_offset + max_bytes
+            )
+            self.created = True
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(self.name)
+            self.created = False
+        # Lifetime is managed here (the last worker unlinks on close), not by the
+        # resource tracker, which would unlink it when any one worker exits
+        resource_tracker.unregister(self._shm._name, "shared_memory")  # type: ignore[attr-defined]
+        self._buf = self._shm.buf
+
+        if self.created:
+            self._slots, self._data_offset = slots, data_offset
+            self._write_state(_ArenaState(0, 0, 1, 0, 0, 0), magic=b"\0" * 4)
+            self._buf[0:4] = _MAGIC  # Last: attaching workers wait for it
+        else:
+            self._wait_ready()
+        _, _, self._slots, _, _, _, self._data_offset, capacity, *_ = _HEADER.unpack_from(self._buf)
+        self.maxsize = capacity
+        if not self.created:
+            with self._write_lock():
+                state = self._read_state()
+                state.attached += 1
+                self._write_state(state)
+        logger.info(
+            "shared_memory_tier_opened",
+            name=self.name,
+            created=self.created,
+            mb=round(capacity / 1e6, 1),
+            slots=self._slots,
+        )
+
+    def _wait_ready(self) -> None:
+        deadline = time.monotonic() + _ATTACH_TIMEOUT_S
+        while bytes(self._buf[0:4]) != _MAGIC:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Shared memory segment {self.name!r} was never initialized")
+            time.sleep(0.01)
+        version = self._buf[4]
+        if version != _VERSION:
+            raise RuntimeError(f"Shared memory segment {self.name!r} has version {version}")
+
+    # ── Index ────────────────────────────────────────────────────────────
+
+    def _slot_at(self, i: int) -> int:
+        return _HEADER_SIZE + i * _SLOT.size
+
+    def _read_slot(self, i: int) -> tuple[int, int, int, int]:
+        """(seq, key hash, entry offset, entry length), consistent under the seqlock."""
+        at = self._slot_at(i)
+        for _ in range(_SEQ_RETRIES):
+            seq, key_hash, offset, length = _SLOT.unpack_from(self._buf, at)
+            if seq & 1 == 0 and _SEQ.unpack_from(self._buf, at)[0] == seq:
+                return seq, key_hash, offset, length
+        return 1, _TOMBSTONE, 0, 0  # Mid-update or torn: a miss for this key, keep probing
+
+    def _write_slot(self, i: int, key_hash: int, offset: int, length: int) -> None:
+        """Seqlock write. Caller holds the write lock."""
+        at = self._slot_at(i)
+        odd = _SEQ.unpack_from(self._buf, at)[0] | 1  # Already odd if a writer died here
+        _SEQ.pack_into(self._buf, at, odd)
+        _SLOT.pack_into(self._buf, at, odd, key_hash, offset, length)
+        _SEQ.pack_into(self._buf, at, odd + 1)
+
+    def _key_at(self, offset: int) -> bytes:
+        key_len, _ = _ENTRY.unpack_from(self._buf, offset)
+        start = offset + _ENTRY.size
+        return bytes(self._buf[start : start + key_len])
+
+    def _find(self, key: str) -> tuple[int, int, int, int] | None:
+        """(slot, seq, entry offset, entry length) for ``key``, or None."""
+        key_hash = _key_hash(key)
+        key_bytes = key.encode()
+        mask = self._slots - 1
+        i = key_hash & mask
+        for _ in range(self._slots):
+            seq, slot_hash, offset, length = self._read_slot(i)
+            if slot_hash == _EMPTY:
+                return None
+            if slot_hash == key_hash and self._key_at(offset) == key_bytes:
+                return i, seq, offset, length
+            i = (i + 1) & mask
+        return None
+
+    def _copy_entry(
+        self, slot: int, seq: int, offset: int, length: int
+    ) -> tuple[str, bytes] | None:
+        """(key, record bytes) of an entry, or None if it was evicted while being copied."""
+        entry = bytes(self._buf[offset : offset + length])
+        if _SEQ.unpack_from(self._buf, self._slot_at(slot))[0] != seq:
+            return None
+        key_len, record_len = _ENTRY.unpack_from(entry)
+        key = entry[_ENTRY.size : _ENTRY.size + key_len].decode()
+        start = _aligned(_ENTRY.size + key_len)
+        return key, entry[start : start + record_len]
+
+    def _live(self) -> Iterator[tuple[int, int, int, int, int]]:
+        """(slot, seq, key hash, entry offset, entry length) of every live entry."""
+        for i in range(self._slots):
+            seq, slot_hash, offset, length = self._read_slot(i)
+            if slot_hash not in (_EMPTY, _TOMBSTONE):
+                yield i, seq, slot_hash, offset, length
+
+    def _rebuild_index(self, state: _ArenaState) -> None:
+        """Reinsert live entries into an empty table, dropping tombstones.
+
+        Caller holds the write lock. Concurrent readers may miss while it runs.
+        """
+        live = [(key_hash, offset, length) for _, _, key_hash, offset, length in self._live()]
+        for i in range(self._slots):
+            if self._read_slot(i)[1] != _EMPTY:
+                self._write_slot(i, _EMPTY, 0, 0)
+        mask = self._slots - 1
+        for key_hash, offset, length in live:
+            i = key_hash & mask
+            while self._read_slot(i)[1] != _EMPTY:
+                i = (i + 1) & mask
+            self._write_slot(i, key_hash, offset, length)
+        state.used = state.live = len(live)
+
+    # ── Ring ─────────────────────────────────────────────────────────────
+
+    def _evict_until(self, state: _ArenaState, end: int) -> None:
+        """Evict previous-lap entries starting before ``end``. Caller holds the write lock."""
+        while state.oldest < min(end, state.high):
+            offset = self._data_offset + state.oldest
+            key_len, record_len = _ENTRY.unpack_from(self._buf, offset)
+            found = self._find(self._key_at(offset).decode())
+            if found is not None and found[2] == offset:  # Not replaced or deleted since
+                self._write_slot(found[0], _TOMBSTONE, 0, 0)
+                state.live -= 1
+                self.evictions += 1
+            state.oldest += _aligned(_aligned(_ENTRY.size + key_len) + record_len)
+
+    @contextlib.contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        with self._thread_lock, self._lock_path.open("a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _read_state(self) -> _ArenaState:
+        _, _, _, live, used, attached, _, _, cursor, oldest, high = _HEADER.unpack_from(self._buf)
+        return _ArenaState(live, used, attached, cursor, oldest, high)
+
+    def _write_state(self, state: _ArenaState, *, magic: bytes = _MAGIC) -> None:
+        _HEADER.pack_into(
+            self._buf,
+            0,
+            magic,
+            _VERSION,
+            self._slots,
+            state.live,
+            state.used,
+            state.attached,
+            self._data_offset,
+            self.maxsize,
+            state.cursor,
+            state.oldest,
+            state.high,
+        )
+
+    # ── Mapping interface (as used by ShapeCache) ────────────────────────
+
+    @property
+    def currsize(self) -> int:
+        """Arena bytes held by entries not yet reclaimed, dead ones included."""
+        return self._read_state().occupied
+
+    def __len__(self) -> int:
+        return self._read_state().live
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._find(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for slot, seq, _, offset, _ in self._live():
+            key = self._key_at(offset)
+            if _SEQ.unpack_from(self._buf, self._slot_at(slot))[0] == seq:
+                yield key.decode()
+
+    def keys(self) -> list[str]:
+        return list(self)
+
+    def items(self) -> list[tuple[str, ShapeRecord]]:
+        items = []
+        for slot, seq, _, offset, length in self._live():
+            entry = self._copy_entry(slot, seq, offset, length)
+            if entry is not None:
+                items.append((entry[0], ShapeRecord.from_encoded(entry[1])))
+        return items
+
+    def get(self, key: str, default: Any = None) -> Any:
+        for _ in range(_COPY_RETRIES):
+            found = self._find(key)
+            if found is None:
+                return default
+            slot, seq, _, _ = found
+            with self._local_lock:
+                local = self._local.get(key)
+            if local is not None and local[:2] == (slot, seq):
+                self.local_hits += 1
+                return local[2]  # Unchanged since this process copied it
+            entry = self._copy_entry(*found)
+            if entry is not None:
+                record = ShapeRecord.from_encoded(entry[1])
+                self._remember_local(key, slot, seq, record)
+                return record
+        return default
+
+    def _remember_local(self, key: str, slot: int, seq: int, record: ShapeRecord) -> None:
+        with self._local_lock:
+            if record.nbytes <= self._local.maxsize:
+                self._local[key] = (slot, seq, record)
+            else:
+                self._local.pop(key, None)
+
+    def peek(self, key: str) -> ShapeRecord | None:
+        return self.get(key)  # type: ignore[no-any-return]
+
+    def __setitem__(self, key: str, record: ShapeRecord) -> None:
+        """Append ``record``, evicting the oldest entries to make room.
+
+        Refused (counted) for a record larger than the whole arena, or when
+        the index is full of live entries.
+        """
+        data = record.encode()
+        key_bytes = key.encode()
+        header_len = _aligned(_ENTRY.size + len(key_bytes))
+        entry_len = _aligned(header_len + len(data))
+        key_hash = _key_hash(key)
+        if entry_len > self.maxsize:
+            self.rejected += 1
+            return
+        with self._write_lock():
+            state = self._read_state()
+            if state.cursor + entry_len > self.maxsize:
+                # Wrap: this lap becomes the previous one, the rest of the old lap goes
+                self._evict_until(state, state.high)
+                state.high, state.cursor, state.oldest = state.cursor, 0, 0
+            self._evict_until(state, state.cursor + entry_len)
+            if state.used + 1 > self._slots * _MAX_LOAD:
+                self._rebuild_index(state)
+                if state.used + 1 > self._slots * _MAX_LOAD:
+                    self._write_state(state)
+                    self.rejected += 1  # Index full of live (tiny) records
+                    return
+
+            offset = self._data_offset + state.cursor
+            _ENTRY.pack_into(self._buf, offset, len(key_bytes), len(data))
+            self._buf[offset + _ENTRY.size : offset + _ENTRY.size + len(key_bytes)] = key_bytes
+            self._buf[offset + header_len : offset + header_len + len(data)] = data
+
+            mask = self._slots - 1
+            i = key_hash & mask
+            free: int | None = None
+            while True:
+                _, slot_hash, slot_offset, _ = self._read_slot(i)
+                if slot_hash == _EMPTY:
+                    break
+                if slot_hash == _TOMBSTONE:
+                    free = i if free is None else free
+                elif slot_hash == key_hash and self._key_at(slot_offset) == key_bytes:
+                    free = i  # Replace in place
+                    state.live -= 1
+                    break
+                i = (i + 1) & mask
+            if free is None:
+                free = i
+                state.used += 1
+            self._write_slot(free, key_hash, offset, entry_len)
+            state.live += 1
+            state.cursor += entry_len
+            state.high = max(state.high, state.cursor)
+            state.oldest = max(state.oldest, state.cursor)
+            self._write_state(state)
+            self.inserts += 1
+
+    def __delitem__(self, key: str) -> None:
+        with self._write_lock():
+            found = self._find(key)
+            if found is None:
+                raise KeyError(key)
+            self._write_slot(found[0], _TOMBSTONE, 0, 0)
+            state = self._read_state()
+            state.live -= 1
+            self._write_state(state)
+        with self._local_lock:
+            self._local.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry for all workers and reclaim the whole arena."""
+        with self._write_lock():
+            for i in range(self._slots):
+                if self._read_slot(i)[1] != _EMPTY:
+                    self._write_slot(i, _EMPTY, 0, 0)
+            state = self._read_state()
+            state.live = state.used = state.cursor = state.oldest = state.high = 0
+            self._write_state(state)
+        with self._local_lock:
+            self._local.clear()
+
+    def reaccount(self, key: str) -> None:
+        """Re-measure ``key``'s local copy after it grew (e.g. prepare_json()).
+
+        The prepared JSON is private to this process; the arena is unaffected.
+        """
+        with self._local_lock:
+            local = self._local.get(key)
+        if local is not None:
+            self._remember_local(key, *local)
+
+    def fits(self, nbytes: int) -> bool:
+        """Whether ``nbytes`` more would fit in the arena without evicting."""
+        return self.currsize + nbytes <= self.maxsize
+
+    def stats(self) -> dict[str, Any]:
+        state = self._read_state()
+        return {
+            "policy": "shared",
+            "segment": self.name,
+            "creator": self.created,
+            "workers": state.attached,
+            "entries": state.live,
+            "bytes": state.occupied,
+            "max_bytes": self.maxsize,
+            "slots": self._slots,
+            "slots_used": state.used,
+            "evictions": self.evictions,
+            "rejected": self.rejected,
+            "local_entries": len(self._local),
+            "local_bytes": self._local.currsize,
+            "local_hits": self.local_hits,
+        }
+
+    def close(self) -> None:
+        """Unmap the segment; the last attached worker also removes it."""
+        with self._write_lock():
+            state = self._read_state()
+            state.attached -= 1
+            self._write_state(state)
+        self._buf = None  # type: ignore[assignment]
+        try:
+            self._shm.close()
+        except BufferError:
+            # Record views still referenced somewhere; the mapping goes with the process
+            logger.debug("shared_memory_tier_views_alive", name=self.name)
+        if state.attached <= 0:
+            with contextlib.suppress(FileNotFoundError):
+                self._shm.unlink()
+            self._lock_path.unlink(missing_ok=True)
@@ -0,0 +1,122 @@
+# Packed snapshot bundle: the hot set in one object for cold-start warmup.
+# A scale-to-zero cold start otherwise fetches shapes one GET at a time; a
+# bundle of the top concepts by hits is one sequential download, then
+# memory-mapped and decoded in place (shape_format records, zlib-compressed).
+#
+# Layout — written front to back in one pass, index last:
+#   [record 0][record 1]...[index JSON][footer 20B]
+# Footer (little-endian):
+#   magic         4s   b"LSNB"
+#   format        B    BUNDLE_FORMAT
+#   reserved      3x
+#   index_offset  Q    byte offset of the index JSON
+#   index_len     I    bytes of index JSON
+# Index: {"version", "created_at", "entries": [[key, offset, length, hits], ...]}
+# with entries in priority order, so a partial load keeps the hottest shapes.
+
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from app.cache.memory_tier import ShapeRecord
+from app.cache.shape_format import ShapeFormatError
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from pathlib import Path
+
+SNAPSHOT_BLOB = "index/snapshot.bin"
+BUNDLE_MAGIC = b"LSNB"
+BUNDLE_FORMAT = 1
+_ZLIB_LEVEL = 6
+
+_FOOTER = struct.Struct("<4sB3xQI")
+
+
+@dataclass(frozen=True)
+class SnapshotInfo:
+    """Bundle identity for /cache/stats."""
+
+    version: int
+    created_at: float
+    entries: int
+    size: int
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "created_at": self.created_at,
+            "age_s": round(time.time() - self.created_at, 1),
+            "entries": self.entries,
+            "bytes": self.size,
+        }
+
+
+def write_snapshot(
+    out: BinaryIO, records: Iterable[tuple[str, bytes, int]], *, version: int
+) -> SnapshotInfo:
+    """Stream ``(key, encoded shape, hits)`` records into a bundle, hottest first."""
+    entries: list[list[Any]] = []
+    offset = 0
+    for key, data, hits in records:
+        packed = zlib.compress(data, _ZLIB_LEVEL)
+        out.write(packed)
+        entries.append([key, offset, len(packed), hits])
+        offset += len(packed)
+    created_at = time.time()
+    index = json.dumps(
+        {"version": version, "created_at": created_at, "entries": entries},
+        separators=(",", ":"),
+    ).encode()
+    out.write(index)
+    out.write(_FOOTER.pack(BUNDLE_MAGIC, BUNDLE_FORMAT, offset, len(index)))
+    return SnapshotInfo(version, created_at, len(entries), offset + len(index) + _FOOTER.size)
+
+
+class SnapshotReader:
+    """Memory-mapped bundle; records are decompressed one at a time on iteration."""
+
+    def __init__(self, path: str | Path) -> None:
+        with open(path, "rb") as f:
+            size = f.seek(0, 2)
+            if size < _FOOTER.size:
+                raise ShapeFormatError(f"Snapshot too short: {size} bytes")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, fmt, index_offset, index_len = _FOOTER.unpack_from(self._mm, size - _FOOTER.size)
+            if magic != BUNDLE_MAGIC:
+                raise ShapeFormatError(f"Bad snapshot magic: {bytes(magic)!r}")
+            if fmt != BUNDLE_FORMAT:
+                raise ShapeFormatError(f"Unsupported snapshot format: {fmt}")
+            if index_offset + index_len > size - _FOOTER.size:
+                raise ShapeFormatError("Truncated snapshot index")
+            index = json.loads(self._mm[index_offset : index_offset + index_len])
+        except Exception:
+            self._mm.close()
+            raise
+        self._entries: list[list[Any]] = index["entries"]
+        self.info = SnapshotInfo(index["version"], index["created_at"], len(self._entries), size)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[tuple[str, ShapeRecord, int]]:
+        """Yield ``(key, record, stored bytes)`` in priority order."""
+        for key, offset, length, _hits in self._entries:
+            data = zlib.decompress(self._mm[offset : offset + length])
+            yield key, ShapeRecord.from_encoded(data), length
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __enter__(self) -> SnapshotReader:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
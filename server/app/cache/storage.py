@@ -0,0 +1,305 @@
+# Storage backends for the shared (third) cache tier.
+# ShapeCache and the manifest talk to a StorageBackend, never to an SDK:
+#   GCSStorageBackend   — Google Cloud Storage bucket (production)
+#   LocalStorageBackend — a directory: zero-network / on-prem deployments,
+#                         and a realistic stand-in for load tests
+# Calls are blocking, like the SDK; ShapeCache runs them on its I/O executor.
+#
+# Objects are named like blobs ("shapes/<key>.bin"). Every object has a
+# generation number for compare-and-swap writes (the manifest relies on it):
+# put(..., if_generation_match=g) succeeds only if the current generation is
+# g, with 0 meaning "must not exist yet", and raises StorageConflictError
+# otherwise.
+
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Protocol
+
+
+class StorageConflictError(Exception):
+    """A conditional put lost the race: the object's generation changed."""
+
+
+@dataclass(frozen=True, slots=True)
+class StoredObject:
+    """Listing entry: object name, size in bytes, creation time (epoch s)."""
+
+    name: str
+    size: int
+    created_at: float
+
+
+class StorageBackend(Protocol):
+    """Blob store behind the shared cache tier."""
+
+    @property
+    def uri(self) -> str:
+        """Human-readable location for logs (gs://bucket, file:///dir)."""
+        ...
+
+    def get(self, name: str) -> bytes | None:
+        """Object contents, or None if it does not exist."""
+        ...
+
+    def get_with_generation(self, name: str) -> tuple[bytes, int] | None:
+        """Contents and generation, or None if the object does not exist."""
+        ...
+
+    def put(
+        self,
+        name: str,
+        data: bytes,
+        *,
+        content_type: str = "application/octet-stream",
+        if_generation_match: int | None = None,
+    ) -> None:
+        """Write the whole object; conditional if ``if_generation_match`` is set."""
+        ...
+
+    def get_file(self, name: str, path: str | Path) -> bool:
+        """Stream an object to a local file. False if it does not exist."""
+        ...
+
+    def put_file(
+        self, name: str, path: str | Path, *, content_type: str = "application/octet-stream"
+    ) -> None:
+        """Stream a local file into an object (unconditional)."""
+        ...
+
+    def list(self, prefix: str) -> list[StoredObject]:
+        """Objects whose name starts with ``prefix``."""
+        ...
+
+    def delete(self, name: str) -> None:
+        """Remove an object; a missing object is not an error."""
+        ...
+
+    def close(self) -> None: ...
+
+
+# ── Google Cloud Storage ─────────────────────────────────────────────────────
+
+
+class GCSStorageBackend:
+    """StorageBackend over a google.cloud.storage Bucket."""
+
+    def __init__(self, bucket: Any, client: Any = None) -> None:
+        self.bucket = bucket
+        self._client = client
+
+    @classmethod
+    def connect(cls, bucket_name: str) -> GCSStorageBackend:
+        """Create a client for ``bucket_name`` (blocking; credentials lookup)."""
+        from google.cloud import storage
+
+        client = storage.Client()
+        return cls(client.bucket(bucket_name), client)
+
+    @property
+    def uri(self) -> str:
+        return f"gs://{self.bucket.name}"
+
+    def get(self, name: str) -> bytes | None:
+        result = self.get_with_generation(name)
+        return result[0] if result is not None else None
+
+    def get_with_generation(self, name: str) -> tuple[bytes, int] | None:
+        from google.api_core.exceptions import NotFound
+
+        blob = self.bucket.blob(name)
+        try:
+            data: bytes = blob.download_as_bytes()
+        except NotFound:
+            return None
+        return data, int(blob.generation or 0)
+
+    def put(
+        self,
+        name: str,
+        data: bytes,
+        *,
+        content_type: str = "application/octet-stream",
+        if_generation_match: int | None = None,
+    ) -> None:
+        from google.api_core.exceptions import PreconditionFailed
+
+        kwargs: dict[str, Any] = {"content_type": content_type}
+        if if_generation_match is not None:
+            kwargs["if_generation_match"] = if_generation_match
+        try:
+            self.bucket.blob(name).upload_from_string(data, **kwargs)
+        except PreconditionFailed as e:
+            raise StorageConflictError(name) from e
+
+    def get_file(self, name: str, path: str | Path) -> bool:
+        from google.api_core.exceptions import NotFound
+
+        try:
+            self.bucket.blob(name).download_to_filename(str(path))
+        except NotFound:
+            return False
+        return True
+
+    def put_file(
+        self, name: str, path: str | Path, *, content_type: str = "application/octet-stream"
+    ) -> None:
+        self.bucket.blob(name).upload_from_filename(str(path), content_type=content_type)
+
+    def list(self, prefix: str) -> list[StoredObject]:
+        return [
+            StoredObject(
+                name=blob.name,
+                size=int(blob.size or 0),
+                created_at=blob.time_created.timestamp() if blob.time_created else time.time(),
+            )
+            for blob in self.bucket.list_blobs(prefix=prefix)
+        ]
+
+    def delete(self, name: str) -> None:
+        from google.api_core.exceptions import NotFound
+
+        with contextlib.suppress(NotFound):
+            self.bucket.blob(name).delete()
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+
+
+# ── Local filesystem ─────────────────────────────────────────────────────────
+
+
+class LocalStorageBackend:
+    """StorageBackend over a directory, safe for several processes sharing it.
+
+    ``shapes/3fa9c1d2e4b5a6f7.bin`` is stored as
+    ``<root>/shapes/3f/3fa9c1d2e4b5a6f7.bin``: sharding by key prefix keeps
+    directories small at millions of shapes. Writes go to a temp file in
+    the target directory and are renamed into place, so readers never see
+    a partial object. The generation is the file's mtime in nanoseconds;
+    conditional puts hold an exclusive flock for the check-and-rename.
+    """
+
+    _TMP_PREFIX = ".tmp-"
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock_path = self.root / ".lock"
+        self._thread_lock = threading.Lock()  # flock is per process, not per thread
+
+    @property
+    def uri(self) -> str:
+        return self.root.resolve().as_uri()
+
+    def _path(self, name: str) -> Path:
+        directory, _, base = name.rpartition("/")
+        if not base or base.startswith(".") or ".." in name.split("/"):
+            raise ValueError(f"Invalid object name: {name!r}")
+        return self.root / directory / base[:2] / base
+
+    def get(self, name: str) -> bytes | None:
+        try:
+            return self._path(name).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def get_with_generation(self, name: str) -> tuple[bytes, int] | None:
+        path = self._path(name)
+        try:
+            with path.open("rb") as f:
+                generation = os.fstat(f.fileno()).st_mtime_ns
+                return f.read(), generation
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _generation(path: Path) -> int:
+        try:
+            return path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def put(
+        self,
+        name: str,
+        data: bytes,
+        *,
+        content_type: str = "application/octet-stream",
+        if_generation_match: int | None = None,
+    ) -> None:
+        path = self._path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{self._TMP_PREFIX}{path.name}.{uuid.uuid4().hex}")
+        tmp.write_bytes(data)
+        try:
+            if if_generation_match is None:
+                os.replace(tmp, path)
+                return
+            with self._thread_lock, self._lock_path.open("a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                previous = self._generation(path)
+                if previous != if_generation_match:
+                    raise StorageConflictError(name)
+                os.replace(tmp, path)
+                if self._generation(path) == previous:
+                    # Coarse mtime: make sure the generation still moves forward
+                    os.utime(path, ns=(previous + 1, previous + 1))
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def get_file(self, name: str, path: str | Path) -> bool:
+        try:
+            shutil.copyfile(self._path(name), path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put_file(
+        self, name: str, path: str | Path, *, content_type: str = "application/octet-stream"
+    ) -> None:
+        target = self._path(name)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f"{self._TMP_PREFIX}{target.name}.{uuid.uuid4().hex}")
+        try:
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, target)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def list(self, prefix: str) -> list[StoredObject]:
+        directory, _, _ = prefix.rpartition("/")
+        base_dir = self.root / directory
+        if not base_dir.is_dir():
+            return []
+        objects: list[StoredObject] = []
+        for shard in sorted(base_dir.iterdir()):
+            if not shard.is_dir() or shard.name.startswith("."):
+                continue
+            for path in sorted(shard.iterdir()):
+                if path.name.startswith(".") or not path.is_file():
+                    continue
+                name = f"{directory}/{path.name}" if directory else path.name
+                if not name.startswith(prefix):
+                    continue
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue  # Deleted meanwhile
+                objects.append(StoredObject(name=name, size=st.st_size, created_at=st.st_mtime))
+        return objects
+
+    def delete(self, name: str) -> None:
+        self._path(name).unlink(missing_ok=True)
+
+    def close(self) -> None:
+        pass
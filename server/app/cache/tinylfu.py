@@ -0,0 +1,254 @@
+# W-TinyLFU memory tier: frequency-aware admission in front of the LRU.
+# Concept traffic is skewed — a few concepts ("dog", "horse") dominate, with
+# a long tail of one-off phrases. Under plain LRU a burst of unique phrases
+# flushes the hot set. Here new shapes enter a small LRU window (1% of the
+# budget); a shape leaving the window is admitted to the main LRU only if a
+# count-min sketch says it has been requested more often than the main
+# entries it would evict. One-offs die in the window; the hot set stays.
+# The sketch counts every lookup, hit or miss, and halves all counters
+# periodically so past popularity fades. Drop-in for MemoryTier (same
+# mapping interface, byte budget and stats); selected by memory_policy.
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from app.cache.memory_tier import ShapeRecord
+
+_MASK64 = (1 << 64) - 1
+_SEEDS = (0x97CB3127, 0xB3F5E5D1, 0xC2B2AE3D, 0x27D4EB2F)
+_MAX_COUNT = 15  # 4-bit counters, as in TinyLFU
+_TYPICAL_RECORD_BYTES = 28 * 1024  # 2048-point shape — sizes the sketch
+
+
+class FrequencySketch:
+    """Count-min sketch of recent access frequency, with periodic aging."""
+
+    def __init__(self, expected_entries: int) -> None:
+        width = 1024
+        while width < expected_entries:
+            width <<= 1
+        self._width = width
+        self._shift = 64 - (width.bit_length() - 1)
+        self._table = bytearray(len(_SEEDS) * width)
+        self._additions = 0
+        self._sample_size = 10 * width  # Age after this many increments
+        self.resets = 0
+
+    def _indexes(self, key: str) -> list[int]:
+        h = hash(key) & _MASK64
+        return [
+            row * self._width + ((((h ^ seed) * 0x9E3779B97F4A7C15) & _MASK64) >> self._shift)
+            for row, seed in enumerate(_SEEDS)
+        ]
+
+    def increment(self, key: str) -> None:
+        table = self._table
+        added = False
+        for i in self._indexes(key):
+            if table[i] < _MAX_COUNT:
+                table[i] += 1
+                added = True
+        if added:
+            self._additions += 1
+            if self._additions >= self._sample_size:
+                self._age()
+
+    def frequency(self, key: str) -> int:
+        table = self._table
+        return min(table[i] for i in self._indexes(key))
+
+    def _age(self) -> None:
+        """Halve every counter so old popularity decays."""
+        counters = np.frombuffer(self._table, dtype=np.uint8)
+        counters >>= 1
+        self._additions //= 2
+        self.resets += 1
+
+
+def _nbytes(record: ShapeRecord) -> int:
+    return record.nbytes
+
+
+class TinyLFUMemoryTier:
+    """Byte-budgeted window LRU + TinyLFU-admitted main LRU of ShapeRecords.
+
+    Not thread-safe on its own — ShapeCache guards it with its lock.
+    """
+
+    def __init__(self, max_bytes: int, window_fraction: float = 0.01) -> None:
+        self.maxsize = max_bytes
+        self._window_max = max(int(max_bytes * window_fraction), 1)
+        self._window: OrderedDict[str, ShapeRecord] = OrderedDict()
+        self._main: OrderedDict[str, ShapeRecord] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._window_bytes = 0
+        self._main_bytes = 0
+        self._sketch = FrequencySketch(max(max_bytes // _TYPICAL_RECORD_BYTES, 1))
+        self.inserts = 0
+        self.evictions = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    # ── Mapping interface (as used by ShapeCache) ─────────────────────────────
+
+    @property
+    def currsize(self) -> int:
+        return self._window_bytes + self._main_bytes
+
+    def __len__(self) -> int:
+        return len(self._window) + len(self._main)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._window or key in self._main
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._window
+        yield from self._main
+
+    def keys(self) -> list[str]:
+        return [*self._window, *self._main]
+
+    def items(self) -> list[tuple[str, ShapeRecord]]:
+        return [*self._window.items(), *self._main.items()]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Look up ``key``, counting the access (hit or miss) in the sketch."""
+        self._sketch.increment(key)
+        for segment in (self._window, self._main):
+            record = segment.get(key)
+            if record is not None:
+                segment.move_to_end(key)
+                return record
+        return default
+
+    def __getitem__(self, key: str) -> ShapeRecord:
+        record: ShapeRecord | None = self.get(key)
+        if record is None:
+            raise KeyError(key)
+        return record
+
+    def peek(self, key: str) -> ShapeRecord | None:
+        """Look up ``key`` without counting an access or reordering."""
+        return self._window.get(key) or self._main.get(key)
+
+    def __setitem__(self, key: str, record: ShapeRecord) -> None:
+        size = _nbytes(record)
+        if size > self.maxsize:
+            raise ValueError("value too large")
+        if key in self:
+            self._remove(key)
+        self._window[key] = record
+        self._sizes[key] = size
+        self._window_bytes += size
+        self.inserts += 1
+        self._rebalance()
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._remove(key)
+
+    def clear(self) -> None:
+        self._window.clear()
+        self._main.clear()
+        self._sizes.clear()
+        self._window_bytes = self._main_bytes = 0
+
+    def reaccount(self, key: str) -> None:
+        """Re-measure ``key`` after its record grew (e.g. prepare_json())."""
+        record = self.peek(key)
+        if record is None:
+            return
+        size = _nbytes(record)
+        if size > self.maxsize:
+            self._remove(key)
+            return
+        delta = size - self._sizes[key]
+        self._sizes[key] = size
+        if key in self._window:
+            self._window_bytes += delta
+        else:
+            self._main_bytes += delta
+        self._rebalance()
+
+    def fits(self, nbytes: int) -> bool:
+        """Whether ``nbytes`` more would fit without evicting anything."""
+        return self.currsize + nbytes <= self.maxsize
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "policy": "tinylfu",
+            "entries": len(self),
+            "bytes": self.currsize,
+            "max_bytes": self.maxsize,
+            "window_entries": len(self._window),
+            "evictions": self.evictions,
+            "eviction_rate": round(self.evictions / self.inserts, 4) if self.inserts else 0.0,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "sketch_resets": self._sketch.resets,
+        }
+
+    # ── Policy ───────────────────────────────────────────────────────────────
+
+    def _remove(self, key: str) -> None:
+        size = self._sizes.pop(key)
+        if self._window.pop(key, None) is not None:
+            self._window_bytes -= size
+        else:
+            del self._main[key]
+            self._main_bytes -= size
+
+    def _rebalance(self) -> None:
+        # Window overflow: its LRU entries become admission candidates
+        while self._window_bytes > self._window_max and len(self._window) > 1:
+            key, record = self._window.popitem(last=False)
+            size = self._sizes[key]
+            self._window_bytes -= size
+            self._admit(key, record, size)
+        # Growth in place (reaccount) can still overshoot: trim main, then window
+        while self.currsize > self.maxsize:
+            segment = self._main or self._window
+            key, _ = segment.popitem(last=False)
+            size = self._sizes.pop(key)
+            if segment is self._main:
+                self._main_bytes -= size
+            else:
+                self._window_bytes -= size
+            self.evictions += 1
+
+    def _admit(self, key: str, record: ShapeRecord, size: int) -> None:
+        """Move a window victim into main if it beats main's LRU victims."""
+        victims: list[str] = []
+        freed = 0
+        it = iter(self._main)
+        while self.currsize - freed + size > self.maxsize:
+            victim = next(it, None)
+            if victim is None:
+                break
+            victims.append(victim)
+            freed += self._sizes[victim]
+
+        if self.currsize - freed + size > self.maxsize or (
+            victims
+            and self._sketch.frequency(key) <= max(self._sketch.frequency(v) for v in victims)
+        ):
+            del self._sizes[key]  # Candidate loses; main is unchanged
+            self.rejected += 1
+            self.evictions += 1
+            return
+
+        for victim in victims:
+            del self._main[victim]
+            self._main_bytes -= self._sizes.pop(victim)
+            self.evictions += 1
+        self._main[key] = record
+        self._main_bytes += size
+        self.admitted += 1
@@ -0,0 +1,107 @@
+# Cache warmup planning + progress tracking.
+# plan_warmup() orders manifest entries by priority and trims them to the
+# memory budget; WarmupProgress is the live view exposed in /cache/stats.
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from app.cache.manifest import ManifestEntry
+
+WARMUP_ORDERS = ("recent", "frequent")
+
+
+def _priority(entry: ManifestEntry, order: str) -> tuple[float, ...]:
+    recency = max(entry.last_used, entry.created_at)
+    if order == "frequent":
+        return (entry.hits, recency)
+    return (recency, entry.hits)
+
+
+def plan_warmup(
+    entries: Iterable[ManifestEntry],
+    *,
+    order: str = "recent",
+    max_entries: int,
+    memory_budget_bytes: int,
+) -> list[ManifestEntry]:
+    """Highest-priority entries first, cut at the entry cap or byte budget.
+
+    Args:
+        entries: Manifest entries (any order).
+        order: "recent" (last used / created first) or "frequent" (most hits first).
+        max_entries: Memory-tier capacity — loading past it only evicts.
+        memory_budget_bytes: Stop once stored sizes would exceed this (0 = no limit).
+    """
+    if order not in WARMUP_ORDERS:
+        raise ValueError(f"Unknown warmup order '{order}'. Expected one of {WARMUP_ORDERS}")
+
+    ranked = sorted(entries, key=lambda e: _priority(e, order), reverse=True)
+    plan: list[ManifestEntry] = []
+    budget_used = 0
+    for entry in ranked[:max_entries]:
+        if memory_budget_bytes and budget_used + entry.size > memory_budget_bytes:
+            break
+        budget_used += entry.size
+        plan.append(entry)
+    return plan
+
+
+@dataclass
+class WarmupProgress:
+    """Thread-safe warmup counters, updated by fetch workers."""
+
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    state: str = "idle"  # idle → running → complete | deadline | failed; or shared
+    candidates: int = 0  # Entries in the manifest
+    planned: int = 0  # Entries selected by plan_warmup()
+    loaded: int = 0
+    failed: int = 0
+    bytes_loaded: int = 0
+    _started_at: float = 0.0
+    _finished_at: float = 0.0
+
+    def start(self, candidates: int, planned: int) -> None:
+        with self._lock:
+            self.state = "running"
+            self.candidates = candidates
+            self.planned = planned
+            self.loaded = self.failed = self.bytes_loaded = 0
+            self._started_at = time.monotonic()
+            self._finished_at = 0.0
+
+    def record(self, size: int | None) -> None:
+        """Record one finished fetch (size None = failed)."""
+        with self._lock:
+            if size is None:
+                self.failed += 1
+            else:
+                self.loaded += 1
+                self.bytes_loaded += size
+
+    def finish(self, state: str) -> None:
+        with self._lock:
+            self.state = state
+            self._finished_at = time.monotonic()
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            end = self._finished_at or time.monotonic()
+            elapsed = end - self._started_at if self._started_at else 0.0
+            return {
+                "state": self.state,
+                "candidates": self.candidates,
+                "planned": self.planned,
+                "loaded": self.loaded,
+                "failed": self.failed,
+                "bytes_loaded": self.bytes_loaded,
+                "elapsed_s": round(elapsed, 2),
+                "shapes_per_s": round(self.loaded / elapsed, 1) if elapsed > 0 else 0.0,
+            }
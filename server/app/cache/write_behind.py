@@ -0,0 +1,157 @@
+# Write-behind queue for Cloud Storage uploads.
+# set() returns once memory and disk hold the shape; the upload is queued
+# here and run by a few workers on the I/O executor (or a pool of its own). A key already
+# waiting in the queue is coalesced (only its latest value is uploaded).
+# When the queue is full, put() waits briefly (backpressure), then drops the
+# upload and counts it — the shape stays cached locally and is regenerated
+# or re-uploaded later. drain() flushes pending uploads under a deadline on
+# shutdown (Cloud Run allows ~10 s after SIGTERM).
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+import structlog
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = structlog.get_logger(__name__)
+
+
+class WriteBehindQueue:
+    """Bounded, key-coalescing async queue in front of a blocking upload."""
+
+    def __init__(
+        self,
+        upload: Callable[[str, Any], None],
+        *,
+        max_pending: int = 256,
+        concurrency: int = 4,
+        enqueue_timeout: float = 0.5,
+        executor: Executor | None = None,
+    ) -> None:
+        self._upload = upload
+        self._max_pending = max_pending
+        self._concurrency = concurrency
+        self._enqueue_timeout = enqueue_timeout
+        # Keys in upload order; the latest value per key lives in _pending
+        self._queue: asyncio.Queue[str] | None = None
+        self._pending: dict[str, Any] = {}
+        self._workers: list[asyncio.Task[None]] = []
+        # A shared executor is borrowed; without one, the queue owns a pool
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._closed = False
+        self._uploading = 0
+
+        self.enqueued = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+
+    def _start(self) -> asyncio.Queue[str]:
+        """Create the queue and workers on first use (needs a running loop)."""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self._max_pending)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._concurrency, thread_name_prefix="cache-write"
+                )
+            self._workers = [
+                asyncio.create_task(self._worker(self._queue)) for _ in range(self._concurrency)
+            ]
+        return self._queue
+
+    async def put(self, key: str, value: Any) -> bool:
+        """Queue an upload. Returns False if it was dropped."""
+        if self._closed:
+            self.dropped += 1
+            logger.warning("cache_write_dropped", key=key, reason="shutting_down")
+            return False
+        if key in self._pending:
+            self._pending[key] = value  # Not uploaded yet — upload the latest only
+            self.coalesced += 1
+            return True
+        queue = self._start()
+        # Registered before the slot: a worker may take the key before we resume,
+        # and same-key puts arriving while we wait for a slot coalesce onto it
+        self._pending[key] = value
+        try:
+            await asyncio.wait_for(queue.put(key), timeout=self._enqueue_timeout)
+        except TimeoutError:
+            self._pending.pop(key, None)
+            self.dropped += 1
+            logger.warning("cache_write_dropped", key=key, reason="queue_full")
+            return False
+        self.enqueued += 1
+        return True
+
+    async def _worker(self, queue: asyncio.Queue[str]) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            key = await queue.get()
+            try:
+                value = self._pending.pop(key, None)
+                if value is None:
+                    continue  # Dropped while waiting for a slot
+                self._uploading += 1
+                try:
+                    await loop.run_in_executor(self._executor, self._upload, key, value)
+                    self.written += 1
+                except Exception as e:
+                    self.failed += 1
+                    logger.warning("cache_write_failed", key=key, error=str(e))
+                finally:
+                    self._uploading -= 1
+            finally:
+                queue.task_done()
+
+    @property
+    def depth(self) -> int:
+        """Uploads queued or in progress."""
+        return len(self._pending) + self._uploading
+
+    async def flush(self) -> None:
+        """Wait until every queued upload has finished."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def drain(self, timeout: float) -> int:
+        """Stop accepting uploads and flush for up to ``timeout`` seconds.
+
+        Returns the number of uploads abandoned at the deadline.
+        """
+        self._closed = True
+        if self._queue is None:
+            return 0
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        lost = self.depth
+        for worker in self._workers:
+            worker.cancel()
+        for worker in self._workers:
+            with contextlib.suppress(asyncio.CancelledError):
+                await worker
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if lost:
+            logger.warning("cache_write_drain_incomplete", abandoned=lost, timeout_s=timeout)
+        else:
+            logger.info("cache_writes_drained", written=self.written)
+        return lost
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pending": self.depth,
+            "max_pending": self._max_pending,
+            "enqueued": self.enqueued,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+        }
@@ -19,6 +19,7 @@ class Settings(BaseSettings):
 
     # ── Infrastructure ───────────────────────────────────────────────────────
     cache_bucket: str = "lumen-shape-cache-dev"
+    cache_storage_dir: str = ""  # Shared cache in a local directory instead of GCS; empty = GCS
     model_cache_dir: str = "/home/appuser/models"
     model_weights_bucket: str = ""  # GCS bucket for HF weights; empty = disabled
     port: int = 8080
@@ -43,11 +44,77 @@ class Settings(BaseSettings):
     # ── Limits ───────────────────────────────────────────────────────────────
     max_request_text_length: int = 200
     generation_timeout_seconds: int = 300
+    disconnect_poll_seconds: float = 0.5  # How often a waiting miss checks its client is there
     max_points: int = 2048
     generation_rate_limit_per_minute: int = 20  # Tighter cap on GPU work (cache misses)
     vram_offload_threshold_gb: float = 80.0  # Offload fallback models if VRAM exceeds this (RTX Pro 6000: 96GB)
     eager_load_all: bool = False  # GCE: set EAGER_LOAD_ALL=true to preload fallback models
 
+    # ── Memory cache tier ────────────────────────────────────────────────────
+    cache_memory_max_mb: int = 1024  # Byte budget for in-memory shapes (~26 KB each)
+    cache_memory_compression: bool = False  # zstd-compress records (needs zstandard)
+    cache_memory_policy: str = "lru"  # "lru", "tinylfu" (frequency-aware) or "shared" (all workers)
+    # Shared-memory segment for policy "shared"; give every server on a host its
+    # own. Empty = derived from the uvicorn supervisor's pid and PORT
+    cache_shared_memory_name: str = ""
+
+    # ── Local disk cache tier ────────────────────────────────────────────────
+    cache_disk_dir: str = ""  # Local SSD path for the disk tier; empty = disabled
+    cache_disk_max_mb: int = 2048  # Live-record budget for the disk tier
+
+    # ── Cache warmup ─────────────────────────────────────────────────────────
+    cache_warmup_workers: int = 16  # Parallel Cloud Storage downloads during warmup
+    cache_warmup_deadline_seconds: float = 120.0  # Stop warming after this; serve traffic
+    cache_warmup_memory_budget_mb: int = 0  # 0 = bounded only by memory tier capacity
+    cache_warmup_order: str = "recent"  # "recent" (last used first) or "frequent" (most hits)
+    # Packed hot-set bundle loaded first at warmup; enable the builder on one instance
+    cache_snapshot_interval_seconds: float = 0.0  # Rebuild period; 0 = never build
+    cache_snapshot_top_n: int = 5000  # Most-hit shapes packed into the bundle
+
+    # ── Cache write-behind ───────────────────────────────────────────────────
+    cache_write_queue_size: int = 256  # Pending Cloud Storage uploads before backpressure
+    cache_write_concurrency: int = 4  # Parallel uploads
+    cache_write_enqueue_timeout_seconds: float = 0.5  # Wait for a slot, then drop the upload
+    cache_write_drain_timeout_seconds: float = 8.0  # Shutdown flush deadline (Cloud Run: 10 s)
+
+    # ── Concept aliases ──────────────────────────────────────────────────────
+    cache_alias_enabled: bool = True  # Serve misses from a cached near-synonym ("pony" → "horse")
+    cache_alias_overrides_file: str = ""  # JSON {"alias": "canonical" | null}; empty = none
+
+    # ── Peer cache tier ──────────────────────────────────────────────────────
+    cache_peers: str = ""  # Comma-separated base URLs of all instances; empty = disabled
+    cache_peer_self: str = ""  # This instance's base URL, exactly as listed in cache_peers
+    cache_peer_timeout_seconds: float = 0.5  # Then read storage locally instead
+
+    # ── Devices ──────────────────────────────────────────────────────────────
+    devices: str = ""  # e.g. "cuda:0,cuda:1" (or "cpu:0,cpu:1" stand-ins); empty = all GPUs
+    device_vram_gb: float = 0.0  # Capacity of devices that can't be queried (CPU); 0 = unlimited
+    device_vram_headroom_gb: float = 8.0  # Kept free on each GPU for activations
+
+    # ── GPU scheduler ────────────────────────────────────────────────────────
+    gpu_slots: int = 4  # Generations in flight per device; >= image_batch_max_size
+    gpu_queue_max_wait_seconds: float = 60.0  # Reject misses whose estimated wait is longer
+
+    # ── Image micro-batching ─────────────────────────────────────────────────
+    image_batch_max_size: int = 4  # SDXL prompts per forward pass; 1 = no batching
+    image_batch_window_ms: float = 20.0  # Wait this long for more prompts before running
+
+    # ── Pipeline stages ──────────────────────────────────────────────────────
+    # Image and mesh stages run on the GPU executor, post-processing on the CPU
+    # pool. With EXECUTOR_GPU_WORKERS=1 the two GPU stages share one thread;
+    # raise it to let one request's image overlap another's mesh on the device.
+    # Stage workers, like GPU threads and slots, are per device.
+    stage_image_workers: int = 4  # Per device; >= image_batch_max_size so micro-batches fill
+    stage_mesh_workers: int = 1  # Per device
+    stage_post_workers: int = 2  # Per device; bounded by the CPU executor
+    stage_queue_size: int = 4  # Jobs waiting before each stage; then backpressure
+    stage_deadline_margin: float = 1.2  # Start a step only if estimate × this fits the budget
+
+    # ── Executors ────────────────────────────────────────────────────────────
+    executor_gpu_workers: int = 1  # Threads per device; inference is serialized per device
+    executor_io_workers: int = 16  # Cloud Storage / disk round-trips (reads, uploads)
+    executor_cpu_workers: int = 0  # CPU-bound helpers; 0 = os.cpu_count()
+
     # ── Logging ──────────────────────────────────────────────────────────────
     log_level: str = "INFO"
     log_json: bool = True  # JSON logs for Cloud Logging
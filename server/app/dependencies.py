@@ -11,6 +11,7 @@ from fastapi import Request
 from app.cache.shape_cache import ShapeCache
 from app.config import Settings
 from app.models.registry import ModelRegistry
+from app.services.executors import Executors
 from app.services.metrics import PipelineMetrics
 from app.services.pipeline import PipelineOrchestrator
 
@@ -35,6 +36,11 @@ def get_metrics(request: Request) -> PipelineMetrics:
     return request.app.state.metrics  # type: ignore[no-any-return]
 
 
+def get_executors(request: Request) -> Executors:
+    """Inject the named executors into endpoints via Depends()."""
+    return request.app.state.executors  # type: ignore[no-any-return]
+
+
 def get_pipeline_orchestrator(request: Request) -> PipelineOrchestrator:
     """Inject PipelineOrchestrator into endpoints via Depends()."""
     return request.app.state.pipeline_orchestrator  # type: ignore[no-any-return]
@@ -46,6 +46,17 @@ class GenerationTimeoutError(LumenError):
         )
 
 
+class GenerationCancelledError(LumenError):
+    """Raised when a generation is abandoned (timeout or client disconnect).
+
+    Model wrappers raise it from their denoising-step callbacks, so a
+    cancelled job stops at the next step instead of running to completion.
+    """
+
+    def __init__(self, concept: str, reason: str):
+        super().__init__(f"Generation cancelled for '{concept}': {reason}", status_code=499)
+
+
 class GPUOutOfMemoryError(LumenError):
     """Raised when CUDA OOM occurs during generation."""
 
@@ -73,6 +84,22 @@ class GenerationRateLimitError(LumenError):
         )
 
 
+class GPUQueueFullError(LumenError):
+    """Raised when a cache miss would wait too long for a GPU slot.
+
+    Admission is based on the estimated wait (queue depth × observed
+    generation latency), carried as retry_after_seconds for Retry-After.
+    """
+
+    def __init__(self, estimated_wait_seconds: float, max_wait_seconds: float):
+        self.retry_after_seconds = max(1.0, estimated_wait_seconds - max_wait_seconds)
+        super().__init__(
+            f"GPU queue is full (estimated wait {estimated_wait_seconds:.0f}s, "
+            f"limit {max_wait_seconds:.0f}s). Cached requests are unaffected.",
+            status_code=503,
+        )
+
+
 # ── Handler registration ────────────────────────────────────────────────────
 
 
@@ -100,6 +127,17 @@ def register_exception_handlers(app: FastAPI) -> None:
             headers={"Retry-After": str(retry_after)},
         )
 
+    @app.exception_handler(GPUQueueFullError)
+    async def gpu_queue_full_handler(request: Request, exc: GPUQueueFullError) -> JSONResponse:
+        """503 with Retry-After — roughly when the queue will have drained enough."""
+        retry_after = int(exc.retry_after_seconds)
+        logger.warning("gpu_queue_full_response", error=exc.message, retry_after=retry_after)
+        return JSONResponse(
+            status_code=503,
+            content={"error": exc.message, "type": "GPUQueueFullError"},
+            headers={"Retry-After": str(retry_after)},
+        )
+
     @app.exception_handler(LumenError)
     async def lumen_error_handler(request: Request, exc: LumenError) -> JSONResponse:
         logger.error("lumen_error", error=exc.message, error_type=type(exc).__name__, exc_info=exc)
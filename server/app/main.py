@@ -14,16 +14,23 @@ from starlette.requests import Request
 from starlette.responses import JSONResponse
 
 from app.auth import APIKeyMiddleware
+from app.cache.peers import PeerTier
 from app.cache.shape_cache import ShapeCache
+from app.cache.shared_tier import default_segment_name
+from app.cache.storage import LocalStorageBackend
 from app.config import get_settings
 from app.exceptions import register_exception_handlers
 from app.logging_config import configure_logging
 from app.middleware import RequestContextMiddleware
+from app.models.devices import DevicePool
 from app.models.registry import ModelRegistry
+from app.pipeline.aliases import AliasIndex
+from app.pipeline.concept import load_wordnet, require_wordnet
 from app.rate_limit import limiter
 from app.routes import cache as cache_routes
 from app.routes import debug, generate, health
 from app.routes import prometheus as prometheus_routes
+from app.services.executors import Executors
 from app.services.metrics import PipelineMetrics
 from app.services.pipeline import PipelineOrchestrator
 
@@ -104,21 +111,73 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     if otel_exporter:
         otel_provider = _configure_otel(otel_exporter)
 
-    registry = ModelRegistry(settings)
-    cache = ShapeCache(bucket_name=settings.cache_bucket)
+    # Refuse to start without WordNet: this worker's cache keys would not match
+    require_wordnet()
+
+    # Device discovery imports torch and initializes CUDA — keep it off the event
+    # loop. Not on a GPU executor: those are created per device, from this pool.
+    devices = await asyncio.get_running_loop().run_in_executor(
+        None, DevicePool.from_settings, settings
+    )
+    registry = ModelRegistry(settings, devices)
+    executors = Executors.from_settings(
+        settings, devices=[d.name for d in registry.devices.devices]
+    )
+    aliases = AliasIndex.from_settings(settings) if settings.cache_alias_enabled else None
+    cache = ShapeCache(
+        bucket_name=settings.cache_bucket,
+        memory_max_bytes=settings.cache_memory_max_mb * 1024 * 1024,
+        memory_compression=settings.cache_memory_compression,
+        memory_policy=settings.cache_memory_policy,
+        disk_dir=settings.cache_disk_dir,
+        disk_max_bytes=settings.cache_disk_max_mb * 1024 * 1024,
+        write_queue_size=settings.cache_write_queue_size,
+        write_concurrency=settings.cache_write_concurrency,
+        write_enqueue_timeout=settings.cache_write_enqueue_timeout_seconds,
+        write_drain_timeout=settings.cache_write_drain_timeout_seconds,
+        io_executor=executors.io,
+        storage=(
+            LocalStorageBackend(settings.cache_storage_dir) if settings.cache_storage_dir else None
+        ),
+        aliases=aliases,
+        peers=PeerTier.from_settings(settings),
+        shared_memory_name=settings.cache_shared_memory_name or default_segment_name(settings.port),
+    )
     await cache.connect()
     metrics = PipelineMetrics()
-    orchestrator = PipelineOrchestrator(registry, cache, settings, metrics=metrics)
+    orchestrator = PipelineOrchestrator(
+        registry, cache, settings, metrics=metrics, executors=executors
+    )
 
     app.state.model_registry = registry
     app.state.shape_cache = cache
     app.state.settings = settings
     app.state.metrics = metrics
+    app.state.executors = executors
     app.state.pipeline_orchestrator = orchestrator
 
+    # Load WordNet off the event loop so the first request doesn't pay for it
+    def _load_concepts() -> None:
+        load_wordnet()
+        if aliases is not None:
+            aliases.load()
+
+    app.state._wordnet_task = asyncio.get_running_loop().run_in_executor(
+        executors.cpu, _load_concepts
+    )
+    app.state._wordnet_task.add_done_callback(_on_concepts_loaded)
+
+    snapshot_task = None
+    if settings.cache_snapshot_interval_seconds > 0:
+        snapshot_task = asyncio.create_task(
+            _build_snapshots(
+                cache, settings.cache_snapshot_interval_seconds, settings.cache_snapshot_top_n
+            )
+        )
+
     # Load models in background (task ref stored to prevent GC cancellation)
     if not settings.skip_model_load:
-        task = asyncio.create_task(_load_models_and_warm_cache(registry, cache))
+        task = asyncio.create_task(_load_models_and_warm_cache(registry, cache, executors))
         task.add_done_callback(_on_model_load_done)
         app.state._model_load_task = task
 
@@ -128,7 +187,11 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     if otel_provider is not None:
         otel_provider.shutdown()
 
-    await cache.disconnect()
+    if snapshot_task is not None:
+        snapshot_task.cancel()
+    await orchestrator.close()
+    await cache.disconnect()  # Drains queued uploads under a deadline
+    executors.shutdown()
 
 
 def _on_model_load_done(task: asyncio.Task[None]) -> None:
@@ -143,7 +206,22 @@ def _on_model_load_done(task: asyncio.Task[None]) -> None:
         )
 
 
-async def _load_models_and_warm_cache(registry: ModelRegistry, cache: ShapeCache) -> None:
+def _on_concepts_loaded(future: asyncio.Future[None]) -> None:
+    """Log background WordNet / alias index load failures (suppresses silent exceptions)."""
+    if future.cancelled():
+        logger.warning("concept_load_cancelled")
+    elif exc := future.exception():
+        logger.error(
+            "concept_load_failed",
+            error=str(exc),
+            error_type=type(exc).__name__,
+            hint="Concepts load lazily on the first request instead",
+        )
+
+
+async def _load_models_and_warm_cache(
+    registry: ModelRegistry, cache: ShapeCache, executors: Executors
+) -> None:
     """Load models and warm cache: GCS sync → load → cache warmup."""
     import asyncio
 
@@ -155,7 +233,7 @@ async def _load_models_and_warm_cache(registry: ModelRegistry, cache: ShapeCache
     if settings.model_weights_bucket:
         try:
             await loop.run_in_executor(
-                None,
+                executors.io,
                 sync_model_weights,
                 settings.model_weights_bucket,
                 settings.model_cache_dir,
@@ -167,32 +245,33 @@ async def _load_models_and_warm_cache(registry: ModelRegistry, cache: ShapeCache
         logger.info("background_model_load_start")
 
         def _load() -> None:
+            # One replica per device with room for it (declared vram_gb)
             from app.models.sdxl_turbo import SDXLTurboModel
 
-            sdxl = SDXLTurboModel(device="cuda")
-            registry.register("sdxl_turbo", sdxl)
+            registry.load_replicas("sdxl_turbo", SDXLTurboModel, SDXLTurboModel.VRAM_GB)
 
             from app.models.partcrafter import PartCrafterModel
 
-            partcrafter = PartCrafterModel(device="cuda")
-            registry.register("partcrafter", partcrafter)
+            registry.load_replicas("partcrafter", PartCrafterModel, PartCrafterModel.VRAM_GB)
 
             try:
                 import torch
 
                 if torch.cuda.is_available():
-                    allocated = torch.cuda.memory_allocated() / 1e9
-                    total = torch.cuda.get_device_properties(0).total_memory / 1e9
-                    logger.info(
-                        "vram_budget",
-                        allocated_gb=round(allocated, 2),
-                        total_gb=round(total, 2),
-                        free_gb=round(total - allocated, 2),
-                    )
+                    for i in range(torch.cuda.device_count()):
+                        allocated = torch.cuda.memory_allocated(i) / 1e9
+                        total = torch.cuda.get_device_properties(i).total_memory / 1e9
+                        logger.info(
+                            "vram_budget",
+                            device=f"cuda:{i}",
+                            allocated_gb=round(allocated, 2),
+                            total_gb=round(total, 2),
+                            free_gb=round(total - allocated, 2),
+                        )
             except ImportError:
                 pass
 
-        await loop.run_in_executor(None, _load)
+        await loop.run_in_executor(executors.gpu, _load)  # Serialized with inference
         logger.info("background_model_load_complete")
     except Exception:
         logger.exception("background_model_load_failed")
@@ -207,14 +286,15 @@ async def _load_models_and_warm_cache(registry: ModelRegistry, cache: ShapeCache
                 from app.models.hunyuan3d import Hunyuan3DTurboModel
 
                 logger.info("eager_loading_fallback_models")
-                hunyuan = Hunyuan3DTurboModel(device="cuda")
-                registry.register("hunyuan3d_turbo", hunyuan)
-
-                gsam = GroundedSAM2Model(device="cuda")
-                registry.register("grounded_sam2", gsam)
+                registry.load_replicas(
+                    "hunyuan3d_turbo", Hunyuan3DTurboModel, Hunyuan3DTurboModel.VRAM_GB
+                )
+                registry.load_replicas(
+                    "grounded_sam2", GroundedSAM2Model, GroundedSAM2Model.VRAM_GB
+                )
                 logger.info("fallback_models_eager_loaded")
 
-            await loop.run_in_executor(None, _load_fallback)
+            await loop.run_in_executor(executors.gpu, _load_fallback)
         except Exception:
             logger.exception(
                 "fallback_model_eager_load_failed",
@@ -222,7 +302,12 @@ async def _load_models_and_warm_cache(registry: ModelRegistry, cache: ShapeCache
             )
 
     try:
-        loaded = await cache.load_all_cached()
+        loaded = await cache.load_all_cached(
+            workers=settings.cache_warmup_workers,
+            deadline_s=settings.cache_warmup_deadline_seconds,
+            memory_budget_bytes=settings.cache_warmup_memory_budget_mb * 1024 * 1024,
+            order=settings.cache_warmup_order,
+        )
         logger.info("cache_warmed", shapes_loaded=loaded)
     except Exception:
         logger.exception("cache_warming_failed")
@@ -245,6 +330,18 @@ async def _load_models_and_warm_cache(registry: ModelRegistry, cache: ShapeCache
     logger.info("top_concepts_preloaded", count=preloaded, total=len(top_concepts))
 
 
+async def _build_snapshots(cache: ShapeCache, interval_s: float, top_n: int) -> None:
+    """Periodically repack the hot set so cold starts warm from one download."""
+    import asyncio
+
+    while True:
+        await asyncio.sleep(interval_s)
+        try:
+            await cache.build_snapshot(top_n)
+        except Exception:
+            logger.exception("cache_snapshot_build_failed")
+
+
 def _parse_origins(allowed_origins: str) -> list[str]:
     """Parse comma-separated CORS origins. Empty string → deny all."""
     if not allowed_origins.strip():
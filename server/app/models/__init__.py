@@ -1,6 +1,8 @@
 """Model wrappers — Protocol interfaces and ModelRegistry."""
 
+from app.models.cancellation import CancellationToken
 from app.models.protocol import (
+    BatchTextToImageModel,
     ImageToMeshModel,
     ImageToPartsModel,
     SegmentationModel,
@@ -9,6 +11,8 @@ from app.models.protocol import (
 from app.models.registry import ModelRegistry
 
 __all__ = [
+    "BatchTextToImageModel",
+    "CancellationToken",
     "ImageToMeshModel",
     "ImageToPartsModel",
     "ModelRegistry",
@@ -0,0 +1,99 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Cooperative cancellation — abandoned generations stop within one step
+# ─────────────────────────────────────────────────────────────────────────────
+# A CUDA call cannot be interrupted from outside, so when a request times
+# out or its client disconnects, the GPU thread keeps diffusing for nobody.
+# Instead, each generation carries a CancellationToken: the orchestrator
+# cancels it, and the GPU thread checks it between stages and at the end of
+# every denoising step (diffusers' ``callback_on_step_end``).
+#
+# The token is bound to the GPU thread for the duration of a stage
+# (``cancellable``), so model wrappers pick it up without a protocol change:
+# they pass ``step_callback()`` to their pipeline when one is bound.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
+
+from app.exceptions import GenerationCancelledError
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+_local = threading.local()
+
+
+class CancellationToken:
+    """Thread-safe cancellation flag for one generation (or one batch of them).
+
+    A token built with ``parents`` is cancelled once every parent is: a
+    micro-batch keeps running while any of its callers still wants a result.
+    """
+
+    def __init__(self, label: str = "", *, parents: list[CancellationToken] | None = None) -> None:
+        self.label = label  # Concept text, for the error message
+        self.reason = ""
+        self._event = threading.Event()
+        self._parents = parents or []
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        return bool(self._parents) and all(p.cancelled for p in self._parents)
+
+    def raise_if_cancelled(self) -> None:
+        """Raise GenerationCancelledError if the generation was abandoned."""
+        if self.cancelled:
+            reason = self.reason or next((p.reason for p in self._parents if p.reason), "")
+            raise GenerationCancelledError(self.label, reason or "cancelled")
+
+
+@contextmanager
+def cancellable(token: CancellationToken | None) -> Iterator[None]:
+    """Bind ``token`` to the current thread while the block runs."""
+    previous = getattr(_local, "token", None)
+    _local.token = token
+    try:
+        yield
+    finally:
+        _local.token = previous
+
+
+def current_token() -> CancellationToken | None:
+    """The token bound to this thread, if any."""
+    token: CancellationToken | None = getattr(_local, "token", None)
+    return token
+
+
+def raise_if_cancelled() -> None:
+    """Check the thread's token (no-op when none is bound)."""
+    token = current_token()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def step_callback() -> Callable[..., dict[str, Any]] | None:
+    """A diffusers ``callback_on_step_end`` checking this thread's token.
+
+    None when no token is bound, so wrappers only pass it when it matters.
+    """
+    token = current_token()
+    if token is None:
+        return None
+
+    def on_step_end(
+        pipe: Any, step: int, timestep: Any, callback_kwargs: dict[str, Any]
+    ) -> dict[str, Any]:
+        token.raise_if_cancelled()
+        return callback_kwargs
+
+    return on_step_end
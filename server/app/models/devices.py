@@ -0,0 +1,172 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Device Pool — model replicas per GPU and least-loaded generation routing
+# ─────────────────────────────────────────────────────────────────────────────
+# A multi-GPU box gets one replica of each model per device that has room
+# for it, judged by the model's declared vram_gb against the device's
+# capacity minus what is already placed there (and a headroom reserve for
+# activations). Each generation is routed to the device hosting every model
+# it needs with the fewest generations in flight, so N devices run N
+# generations side by side instead of queueing on cuda:0.
+#
+# Devices are plain names plus a capacity, so the pool runs just as well on
+# CPU stand-ins ("cpu:0,cpu:1", DEVICES) — placement and routing are
+# testable without a GPU. Thread-safe: lazy fallback loads place replicas
+# from GPU executor threads while the event loop routes.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import contextlib
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+import structlog
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from app.config import Settings
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class Device:
+    """One accelerator (or CPU stand-in) and what the pool has put on it."""
+
+    name: str  # torch device string, e.g. "cuda:1" or "cpu:0"
+    vram_gb: float  # Capacity available for model weights; inf = unlimited
+    reserved_gb: float = 0.0  # Declared VRAM of the replicas placed here
+    models: set[str] = field(default_factory=set)
+    in_flight: int = 0  # Generations routed here and not yet finished
+    routed: int = 0
+
+    @property
+    def free_gb(self) -> float:
+        return self.vram_gb - self.reserved_gb
+
+
+class DevicePool:
+    """Places model replicas on devices and routes generations between them."""
+
+    def __init__(self, devices: list[Device]) -> None:
+        if not devices:
+            raise ValueError("DevicePool needs at least one device")
+        self.devices = devices
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> DevicePool:
+        """DEVICES if set, else every visible GPU, else a single CPU device.
+
+        Capacity is the GPU's total memory minus DEVICE_VRAM_HEADROOM_GB;
+        devices that cannot be queried (CPU) get DEVICE_VRAM_GB (0 = unlimited).
+        """
+        names = [name.strip() for name in settings.devices.split(",") if name.strip()]
+        capacities = {} if settings.skip_model_load else _cuda_capacities()
+        if not names:
+            names = list(capacities) or ["cpu"]
+        fallback = settings.device_vram_gb or float("inf")
+        devices = [
+            Device(
+                name,
+                capacities[name] - settings.device_vram_headroom_gb
+                if name in capacities
+                else fallback,
+            )
+            for name in names
+        ]
+        logger.info(
+            "device_pool",
+            devices=[d.name for d in devices],
+            vram_gb=[round(d.vram_gb, 1) for d in devices],
+        )
+        return cls(devices)
+
+    def __len__(self) -> int:
+        return len(self.devices)
+
+    def get(self, name: str) -> Device:
+        for device in self.devices:
+            if device.name == name:
+                return device
+        raise KeyError(f"Unknown device '{name}'. Devices: {[d.name for d in self.devices]}")
+
+    # ── Placement ───────────────────────────────────────────────────────────
+
+    def place(self, model: str, vram_gb: float) -> list[Device]:
+        """Reserve room for a replica of ``model`` on every device that fits one."""
+        with self._lock:
+            placed = [d for d in self.devices if model not in d.models and d.free_gb >= vram_gb]
+            for device in placed:
+                device.models.add(model)
+                device.reserved_gb += vram_gb
+        if not placed:
+            logger.warning("model_not_placed", model=model, vram_gb=vram_gb)
+        return placed
+
+    def reserve(self, model: str, device: str, vram_gb: float) -> None:
+        """Record a replica loaded on ``device`` outside of place() (lazy loads)."""
+        with self._lock:
+            target = self.get(device)
+            if model not in target.models:
+                target.models.add(model)
+                target.reserved_gb += vram_gb
+
+    def release(self, model: str, device: str, vram_gb: float) -> None:
+        """Give back a replica's reservation (model unloaded or failed to load)."""
+        with self._lock:
+            target = self.get(device)
+            if model in target.models:
+                target.models.discard(model)
+                target.reserved_gb = max(target.reserved_gb - vram_gb, 0.0)
+
+    # ── Routing ─────────────────────────────────────────────────────────────
+
+    @contextlib.contextmanager
+    def lease(self, candidates: Iterable[Device]) -> Iterator[Device | None]:
+        """Hold the least-loaded of ``candidates`` (None if there are none)."""
+        with self._lock:
+            device = min(
+                candidates,
+                key=lambda d: (d.in_flight, d.routed, -d.free_gb),
+                default=None,
+            )
+            if device is not None:
+                device.in_flight += 1
+                device.routed += 1
+        try:
+            yield device
+        finally:
+            if device is not None:
+                with self._lock:
+                    device.in_flight -= 1
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {
+                d.name: {
+                    "vram_gb": round(d.vram_gb, 1) if d.vram_gb != float("inf") else None,
+                    "reserved_gb": round(d.reserved_gb, 1),
+                    "models": sorted(d.models),
+                    "in_flight": d.in_flight,
+                    "routed": d.routed,
+                }
+                for d in self.devices
+            }
+
+
+def _cuda_capacities() -> dict[str, float]:
+    """Total memory (GB) of each visible CUDA device, by device name."""
+    try:
+        import torch
+
+        if not torch.cuda.is_available():
+            return {}
+        return {
+            f"cuda:{i}": torch.cuda.get_device_properties(i).total_memory / 1e9
+            for i in range(torch.cuda.device_count())
+        }
+    except ImportError:
+        return {}
@@ -43,6 +43,8 @@ class GroundedSAM2Model:
     ~0.3-0.5s for 6 part prompts, ~4-6GB VRAM.
     """
 
+    VRAM_GB = 4.5  # Declared footprint; the device pool places replicas by it
+
     def __init__(self, device: str = "cuda") -> None:
         """Load GroundingDINO + SAM2.
 
@@ -81,7 +83,7 @@ class GroundedSAM2Model:
 
     @property
     def vram_gb(self) -> float:
-        return 4.5
+        return self.VRAM_GB
 
     @torch.inference_mode()
     def segment(self, image: PIL.Image.Image, prompts: list[str]) -> dict[str, np.ndarray]:
@@ -24,6 +24,8 @@ class Hunyuan3DTurboModel:
     ~1-3s generation, ~6GB VRAM.
     """
 
+    VRAM_GB = 6.0  # Declared footprint; the device pool places replicas by it
+
     def __init__(self, device: str = "cuda") -> None:
         """Load model weights from tencent/Hunyuan3D-2.
 
@@ -50,7 +52,7 @@ class Hunyuan3DTurboModel:
 
     @property
     def vram_gb(self) -> float:
-        return 6.0
+        return self.VRAM_GB
 
     @torch.inference_mode()
     def generate(self, image: PIL.Image.Image) -> trimesh.Trimesh:
@@ -12,6 +12,9 @@
 #   2. PartCrafterPipeline generates N part meshes from the white-bg image
 #   3. None outputs (decoding failures) are replaced with dummy trimeshes
 #
+# A bound cancellation token (models/cancellation.py) is checked after
+# background removal and after every denoising step.
+#
 # VRAM: ~4 GB in float16 on NVIDIA RTX Pro 6000 (+ ~0.2 GB for RMBG)
 # Speed: ~5–10s per generation at 50 inference steps
 # ─────────────────────────────────────────────────────────────────────────────
@@ -27,6 +30,8 @@ import structlog
 import torch
 import trimesh
 
+from app.models.cancellation import raise_if_cancelled, step_callback
+
 logger = structlog.get_logger(__name__)
 
 # ── Defaults ────────────────────────────────────────────────────────────────
@@ -50,6 +55,8 @@ class PartCrafterModel:
     images before feeding them to PartCrafter (which expects white-bg input).
     """
 
+    VRAM_GB = 4.0  # Declared footprint; the device pool places replicas by it
+
     # ── Construction ────────────────────────────────────────────────────────
 
     def __init__(self, device: str = "cuda") -> None:
@@ -113,7 +120,7 @@ class PartCrafterModel:
 
     @property
     def vram_gb(self) -> float:
-        return 4.0
+        return self.VRAM_GB
 
     # ── Inference ───────────────────────────────────────────────────────────
 
@@ -124,6 +131,7 @@ class PartCrafterModel:
         num_parts: int = 6,
         *,
         num_steps: int = _DEFAULT_INFERENCE_STEPS,
+        num_tokens: int = _DEFAULT_NUM_TOKENS,
         guidance_scale: float = _DEFAULT_GUIDANCE_SCALE,
         seed: int = 0,
     ) -> list[trimesh.Trimesh]:
@@ -133,6 +141,8 @@ class PartCrafterModel:
             image: 512×512 RGB image (from SDXL Turbo).
             num_parts: Target number of semantic parts (2–16).
             num_steps: Denoising steps (default 50).
+            num_tokens: Latent tokens per part (default 1024). Fewer is
+                faster and coarser.
             guidance_scale: Classifier-free guidance weight (default 7.0).
             seed: RNG seed for reproducibility.
 
@@ -164,17 +174,21 @@ class PartCrafterModel:
         finally:
             os.unlink(temp_path)
         rmbg_ms = int((time.perf_counter() - t0) * 1000)
+        raise_if_cancelled()
 
         # ── Step 2: PartCrafter mesh generation ─────────────────────────────
         t1 = time.perf_counter()
+        callback = step_callback()
+        step_kwargs = {"callback_on_step_end": callback} if callback is not None else {}
         try:
             outputs = self._pipe(
                 image=[processed_image] * num_parts,
                 attention_kwargs={"num_parts": num_parts},
-                num_tokens=_DEFAULT_NUM_TOKENS,
+                num_tokens=num_tokens,
                 generator=torch.Generator(device=self._pipe.device).manual_seed(seed),
                 num_inference_steps=num_steps,
                 guidance_scale=guidance_scale,
+                **step_kwargs,
             ).meshes
         except torch.cuda.OutOfMemoryError:
             torch.cuda.empty_cache()
@@ -27,9 +27,23 @@ class TextToImageModel(Protocol):
     def generate(self, prompt: str) -> "PIL.Image.Image": ...
 
 
+@runtime_checkable
+class BatchTextToImageModel(TextToImageModel, Protocol):
+    """A TextToImageModel that can also run several prompts in one forward pass.
+
+    Optional: the micro-batcher falls back to one ``generate`` per prompt.
+    """
+
+    def generate_batch(self, prompts: list[str]) -> "list[PIL.Image.Image]": ...
+
+
 @runtime_checkable
 class ImageToPartsModel(Protocol):
-    """Generates part meshes from a reference image (e.g., PartCrafter)."""
+    """Generates part meshes from a reference image (e.g., PartCrafter).
+
+    The keyword settings come from the request's pipeline profile
+    (``app.pipeline.profiles``).
+    """
 
     @property
     def name(self) -> str: ...
@@ -37,7 +51,15 @@ class ImageToPartsModel(Protocol):
     @property
     def vram_gb(self) -> float: ...
 
-    def generate(self, image: "PIL.Image.Image", num_parts: int) -> "list[trimesh.Trimesh]": ...
+    def generate(
+        self,
+        image: "PIL.Image.Image",
+        num_parts: int,
+        *,
+        num_steps: int = ...,
+        num_tokens: int = ...,
+        guidance_scale: float = ...,
+    ) -> "list[trimesh.Trimesh]": ...
 
 
 @runtime_checkable
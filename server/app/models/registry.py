@@ -1,14 +1,20 @@
 # ─────────────────────────────────────────────────────────────────────────────
 # Model Registry — loads, holds, and provides access to ML models
 # ─────────────────────────────────────────────────────────────────────────────
+# Models are held per device: load_replicas() puts one replica on each device
+# of the pool with room for it (app/models/devices.py), and route() leases
+# the least-loaded device hosting a set of models. A model registered
+# without a device (tests, scripts) serves every device.
+# ─────────────────────────────────────────────────────────────────────────────
 
-
-from collections.abc import Callable
+import contextlib
+from collections.abc import Callable, Iterable, Iterator
 from typing import Any
 
 import structlog
 
 from app.config import Settings
+from app.models.devices import DevicePool
 
 logger = structlog.get_logger(__name__)
 
@@ -22,9 +28,11 @@ class ModelRegistry:
     Stored in app.state during lifespan, injected via Depends().
     """
 
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, devices: DevicePool | None = None):
         self._settings = settings
-        self._models: dict[str, Any] = {}
+        self.devices = devices or DevicePool.from_settings(settings)
+        # name → device name (None = any device) → model
+        self._models: dict[str, dict[str | None, Any]] = {}
         self._loaded_names: list[str] = []
 
     def load_primary(self) -> None:
@@ -39,31 +47,78 @@ class ModelRegistry:
         logger.info("primary_model_loading")
         self._log_vram()
 
-    def register(self, name: str, model: Any) -> None:
-        """Register a loaded model by name."""
-        self._models[name] = model
+    def register(self, name: str, model: Any, device: str | None = None) -> None:
+        """Register a loaded model by name, as the replica on ``device`` if given."""
+        self._models.setdefault(name, {})[device] = model
         if name not in self._loaded_names:
             self._loaded_names.append(name)
-        logger.info("model_registered", model=name)
+        if device is None:
+            logger.info("model_registered", model=name)
+        else:
+            logger.info("model_registered", model=name, device=device)
         self._log_vram()
 
-    def get(self, name: str) -> Any:
-        """Get a loaded model by name. Raises KeyError if not loaded."""
-        if name not in self._models:
-            raise KeyError(f"Model '{name}' not loaded. Available: {self._loaded_names}")
-        return self._models[name]
+    def load_replicas(self, name: str, factory: Callable[[str], Any], vram_gb: float) -> int:
+        """Load one replica per device with ``vram_gb`` free; returns how many.
 
-    def get_or_load(self, name: str, factory: Callable[[], Any]) -> Any:
-        """Get model, or lazy-load it using the factory if not yet loaded."""
-        if name not in self._models:
-            logger.info("lazy_loading_model", model=name)
+        ``factory`` builds the model on the device it is given (e.g.
+        ``SDXLTurboModel``, called with ``device="cuda:1"``).
+        """
+        placed = self.devices.place(name, vram_gb)
+        for device in placed:
+            try:
+                self.register(name, factory(device.name), device.name)
+            except Exception:
+                self.devices.release(name, device.name, vram_gb)
+                raise
+        return len(placed)
+
+    def get(self, name: str, device: str | None = None) -> Any:
+        """Get a loaded model by name, preferring ``device``'s replica.
+
+        Raises KeyError if not loaded (on ``device``, when given).
+        """
+        replicas = self._models.get(name)
+        if not replicas:
+            raise KeyError(f"Model '{name}' not loaded. Available: {self._loaded_names}")
+        if device in replicas:
+            return replicas[device]
+        if None in replicas:
+            return replicas[None]
+        if device is None:
+            return next(iter(replicas.values()))
+        raise KeyError(f"Model '{name}' not loaded on {device}. Loaded on: {sorted(replicas)}")
+
+    def get_or_load(self, name: str, factory: Callable[[], Any], device: str | None = None) -> Any:
+        """Get model, or lazy-load it on ``device`` using the factory if not yet there."""
+        if not self.has(name, device):
+            logger.info("lazy_loading_model", model=name, device=device)
             model = factory()
-            self.register(name, model)
-        return self._models[name]
-
-    def has(self, name: str) -> bool:
-        """Check if a model is loaded."""
-        return name in self._models
+            self.register(name, model, device)
+            if device is not None:
+                self.devices.reserve(name, device, model.vram_gb)
+        return self.get(name, device)
+
+    def has(self, name: str, device: str | None = None) -> bool:
+        """Check if a model is loaded (with a replica usable on ``device``, if given)."""
+        replicas = self._models.get(name)
+        if not replicas:
+            return False
+        return device is None or device in replicas or None in replicas
+
+    @contextlib.contextmanager
+    def route(self, names: Iterable[str]) -> Iterator[str | None]:
+        """Lease the least-loaded device with a replica of every loaded model in ``names``.
+
+        Yields the device name (None if no device hosts them all); the
+        device counts as busy until the block exits.
+        """
+        loaded = [name for name in names if self.has(name)]
+        candidates = [
+            d for d in self.devices.devices if all(self.has(name, d.name) for name in loaded)
+        ]
+        with self.devices.lease(candidates) as device:
+            yield device.name if device is not None else None
 
     @property
     def loaded_names(self) -> list[str]:
@@ -75,25 +130,31 @@ class ModelRegistry:
         """Whether model loading was skipped (dev/test mode)."""
         return self._settings.skip_model_load
 
-    def unload(self, name: str) -> None:
-        """Unload a model and free its VRAM.
+    def unload(self, name: str, device: str | None = None) -> None:
+        """Unload a model (only ``device``'s replica, if given) and free its VRAM.
 
         Deletes model reference, removes from registry, and calls
         torch.cuda.empty_cache(). Used to offload fallback models
         (Hunyuan3D, Grounded SAM) after use when VRAM > 18GB.
         """
-        if name not in self._models:
+        replicas = self._models.get(name)
+        if not replicas or (device is not None and device not in replicas):
             return
-        del self._models[name]
-        if name in self._loaded_names:
-            self._loaded_names.remove(name)
+        for replica_device in [device] if device is not None else list(replicas):
+            model = replicas.pop(replica_device)
+            if replica_device is not None:
+                self.devices.release(name, replica_device, model.vram_gb)
+        if not replicas:
+            del self._models[name]
+            if name in self._loaded_names:
+                self._loaded_names.remove(name)
         try:
             import torch
 
             torch.cuda.empty_cache()
         except ImportError:
             pass
-        logger.info("model_unloaded", model=name)
+        logger.info("model_unloaded", model=name, device=device)
         self._log_vram()
 
     def _log_vram(self) -> None:
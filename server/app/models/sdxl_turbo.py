@@ -10,6 +10,11 @@
 #
 # VRAM: ~3 GB in float16 on NVIDIA RTX Pro 6000 (96 GB total)
 # Speed: ~1 second per 512×512 image at 4 steps
+#
+# generate_batch() runs several prompts through one pipeline call; the
+# micro-batcher (services/batching.py) uses it for concurrent misses.
+# When a cancellation token is bound (models/cancellation.py), it is checked
+# after every denoising step so an abandoned request frees the GPU early.
 # ─────────────────────────────────────────────────────────────────────────────
 
 import time
@@ -19,6 +24,8 @@ import structlog
 import torch
 from diffusers import StableDiffusionXLPipeline
 
+from app.models.cancellation import step_callback
+
 logger = structlog.get_logger(__name__)
 
 # ── Defaults ────────────────────────────────────────────────────────────────
@@ -29,9 +36,9 @@ _OUTPUT_SIZE = 512
 
 
 class SDXLTurboModel:
-    """SDXL Turbo wrapper for single-image text-to-image generation.
+    """SDXL Turbo wrapper for text-to-image generation.
 
-    Satisfies the ``TextToImageModel`` protocol defined in
+    Satisfies the ``BatchTextToImageModel`` protocol defined in
     ``app.models.protocol``.  Generates 512×512 RGB images in 1-4
     denoising steps (~1 s on an RTX Pro 6000 GPU in float16).
 
@@ -40,6 +47,8 @@ class SDXLTurboModel:
     produce 3-D geometry.
     """
 
+    VRAM_GB = 3.0  # Declared footprint; the device pool places replicas by it
+
     # ── Construction ────────────────────────────────────────────────────────
 
     def __init__(self, device: str = "cuda") -> None:
@@ -78,7 +87,7 @@ class SDXLTurboModel:
 
     @property
     def vram_gb(self) -> float:
-        return 3.0
+        return self.VRAM_GB
 
     # ── Inference ───────────────────────────────────────────────────────────
 
@@ -110,6 +119,7 @@ class SDXLTurboModel:
                 guidance_scale=guidance_scale,
                 width=_OUTPUT_SIZE,
                 height=_OUTPUT_SIZE,
+                **_step_kwargs(),
             )
         except torch.cuda.OutOfMemoryError:
             torch.cuda.empty_cache()
@@ -127,3 +137,49 @@ class SDXLTurboModel:
             time_ms=elapsed_ms,
         )
         return image
+
+    @torch.inference_mode()
+    def generate_batch(
+        self,
+        prompts: list[str],
+        *,
+        num_steps: int = _DEFAULT_STEPS,
+        guidance_scale: float = _DEFAULT_GUIDANCE,
+    ) -> list[PIL.Image.Image]:
+        """Generate one 512×512 RGB image per prompt in a single batched pass.
+
+        The denoising loop runs once for the whole batch, so N prompts cost
+        far less than N ``generate`` calls. Images come back in prompt order.
+        """
+        t0 = time.perf_counter()
+
+        try:
+            result = self._pipe(
+                prompt=prompts,
+                num_inference_steps=num_steps,
+                guidance_scale=guidance_scale,
+                width=_OUTPUT_SIZE,
+                height=_OUTPUT_SIZE,
+                **_step_kwargs(),
+            )
+        except torch.cuda.OutOfMemoryError:
+            torch.cuda.empty_cache()
+            logger.error("sdxl_turbo_oom", batch_size=len(prompts), steps=num_steps)
+            raise
+
+        images: list[PIL.Image.Image] = list(result.images)
+        elapsed_ms = int((time.perf_counter() - t0) * 1000)
+
+        logger.info(
+            "sdxl_turbo_batch_generated",
+            batch_size=len(prompts),
+            steps=num_steps,
+            time_ms=elapsed_ms,
+        )
+        return images
+
+
+def _step_kwargs() -> dict[str, object]:
+    """``callback_on_step_end`` for the bound cancellation token, if any."""
+    callback = step_callback()
+    return {"callback_on_step_end": callback} if callback is not None else {}
@@ -0,0 +1,139 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Alias Index — near-synonym concepts served from an already-cached shape
+# ─────────────────────────────────────────────────────────────────────────────
+# Normalization folds case, articles and plurals only, so "stallion", "mare"
+# and "pony" each cost a full GPU generation even when "horse" is cached.
+# On a miss the cache asks this index for canonical stand-ins, best first:
+#   1. operator overrides — JSON object {"alias": "canonical"}; a null value
+#      opts the alias out of automatic matching
+#   2. WordNet synonyms of the word's primary noun sense ("sofa" → "couch")
+#   3. WordNet hypernyms up to two levels up ("stallion" → "horse")
+# WordNet candidates must be template nouns (template_matcher.py) — the
+# curated vocabulary that actually gets generated and cached — which keeps
+# generic hypernyms ("equine", "animal") out, and must share the request's
+# template so the served parts still fit. Results are memoized.
+
+from __future__ import annotations
+
+import json
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import structlog
+
+from app.pipeline.concept import CONCEPT_CACHE_SIZE, normalize_text
+from app.pipeline.template_matcher import TEMPLATES, get_template
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from app.config import Settings
+
+logger = structlog.get_logger(__name__)
+
+_TEMPLATE_NOUNS = frozenset(noun for data in TEMPLATES.values() for noun in data["nouns"])
+
+
+class AliasIndex:
+    """Canonical concepts that may stand in for a normalized concept."""
+
+    def __init__(
+        self,
+        overrides: Mapping[str, str | None] | None = None,
+        *,
+        wordnet: bool = True,
+        max_depth: int = 2,
+    ) -> None:
+        self._raw_overrides = dict(overrides or {})
+        self._overrides: dict[str, str | None] | None = None  # Normalized in load()
+        self._use_wordnet = wordnet
+        self._max_depth = max_depth
+        self._wordnet: Any = None
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._candidates = lru_cache(maxsize=CONCEPT_CACHE_SIZE)(self._compute)
+
+    @classmethod
+    def from_file(cls, path: str | Path, **kwargs: Any) -> AliasIndex:
+        """Read overrides from a JSON object of alias → canonical (or null)."""
+        overrides = json.loads(Path(path).read_text())
+        if not isinstance(overrides, dict) or not all(
+            isinstance(k, str) and (v is None or isinstance(v, str)) for k, v in overrides.items()
+        ):
+            raise ValueError(f"{path}: expected a JSON object of alias → canonical concept")
+        return cls(overrides, **kwargs)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> AliasIndex:
+        if settings.cache_alias_overrides_file:
+            return cls.from_file(settings.cache_alias_overrides_file)
+        return cls()
+
+    def load(self) -> None:
+        """Normalize overrides and open WordNet (idempotent, blocking)."""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._overrides = {
+                normalize_text(alias): normalize_text(canonical) if canonical else None
+                for alias, canonical in self._raw_overrides.items()
+            }
+            if self._use_wordnet:
+                try:
+                    from nltk.corpus import wordnet  # type: ignore[import-untyped]
+
+                    wordnet.synsets("warmup")  # Forces the lazy corpus reader to load now
+                    self._wordnet = wordnet
+                except Exception as e:  # Corpus missing: overrides still apply
+                    logger.warning("alias_wordnet_unavailable", error=str(e))
+            self._loaded = True
+            logger.info(
+                "alias_index_loaded",
+                overrides=len(self._overrides),
+                wordnet=self._wordnet is not None,
+            )
+
+    def candidates(self, normalized: str, template_type: str) -> tuple[str, ...]:
+        """Normalized canonical concepts to try for ``normalized``, best first."""
+        return self._candidates(normalized, template_type)
+
+    def _compute(self, normalized: str, template_type: str) -> tuple[str, ...]:
+        self.load()
+        assert self._overrides is not None
+        if normalized in self._overrides:
+            canonical = self._overrides[normalized]
+            return (canonical,) if canonical and canonical != normalized else ()
+        if self._wordnet is None or " " in normalized:
+            return ()
+        found: list[str] = []
+        for word in self._related(normalized):
+            if word == normalized or word in found or word not in _TEMPLATE_NOUNS:
+                continue
+            if template_type == "default" or get_template(word).template_type == template_type:
+                found.append(word)
+        return tuple(found)
+
+    def _related(self, word: str) -> list[str]:
+        """Lemmas of the primary noun sense, then of its hypernyms, nearest first."""
+        synsets = self._wordnet.synsets(word, pos=self._wordnet.NOUN)
+        if not synsets:
+            return []
+        related: list[str] = []
+        level = synsets[:1]  # Primary sense only: "crane" the bird, not the machine
+        for _ in range(self._max_depth + 1):
+            for synset in level:
+                related.extend(name.replace("_", " ").lower() for name in synset.lemma_names())
+            level = [hypernym for synset in level for hypernym in synset.hypernyms()]
+        return related
+
+    def stats(self) -> dict[str, Any]:
+        info = self._candidates.cache_info()
+        return {
+            "overrides": len(self._raw_overrides),
+            "wordnet": self._wordnet is not None,
+            "memoized": info.currsize,
+        }
@@ -0,0 +1,158 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Concept Analysis — one pass over the request text, shared by the cache key,
+# template matcher and prompt builder
+# ─────────────────────────────────────────────────────────────────────────────
+# WordNet is loaded lazily on first use from the local NLTK data path
+# (NLTK_DATA, bundled into the base image) — never downloaded at import.
+# A missing corpus is a startup error, not a fallback: identity lemmatization
+# would give this worker cache keys that differ from every other worker's.
+# Results are memoized in a bounded LRU so repeat concepts skip the regex,
+# lemmatizer, hashing and template lookup entirely.
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+import structlog
+
+from app.pipeline.prompt_templates import get_canonical_prompt
+from app.pipeline.template_matcher import get_template
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from app.pipeline.template_matcher import TemplateInfo
+
+logger = structlog.get_logger(__name__)
+
+CONCEPT_CACHE_SIZE = 4096  # Distinct request texts memoized
+_LEMMA_CACHE_SIZE = 16384  # Distinct words memoized
+
+# ── Stop words stripped during key normalization ─────────────────────────────
+_ARTICLES = frozenset({"a", "an", "the"})
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+_lemmatizer_lock = threading.Lock()
+_lemmatize_fn: Callable[[str], str] | None = None
+
+
+class WordNetUnavailableError(RuntimeError):
+    """The WordNet corpus is not on the NLTK data path."""
+
+
+@dataclass(frozen=True, slots=True)
+class ConceptAnalysis:
+    """Everything derived from a request's text, computed once."""
+
+    text: str  # Stripped input, as the user phrased it
+    normalized: str  # Lowercased, punctuation/articles removed, lemmatized
+    cache_key: str  # SHA-256 prefix of ``normalized``
+    template: TemplateInfo
+    prompt: str  # Canonical SDXL prompt
+
+
+def require_wordnet() -> None:
+    """Raise WordNetUnavailableError unless the corpus is on the data path (cheap, no load)."""
+    import nltk  # type: ignore[import-untyped]
+
+    try:
+        nltk.data.find("corpora/wordnet")
+    except LookupError as e:
+        logger.error("wordnet_corpus_missing", search_path=list(nltk.data.path))
+        raise WordNetUnavailableError(
+            f"WordNet corpus not found on the NLTK data path {list(nltk.data.path)}"
+        ) from e
+
+
+def _load_lemmatizer() -> Callable[[str], str]:
+    """Build the WordNet lemmatizer from the local corpus (no network).
+
+    Raises WordNetUnavailableError if the corpus is missing; nothing is
+    memoized, so a later call retries.
+    """
+    from nltk.stem import WordNetLemmatizer  # type: ignore[import-untyped]
+
+    require_wordnet()
+    lemmatizer = WordNetLemmatizer()
+    lemmatizer.lemmatize("warmup")  # Forces the lazy corpus reader to load now
+    return lemmatizer.lemmatize  # type: ignore[no-any-return]
+
+
+def load_wordnet() -> None:
+    """Load WordNet now instead of on the first request (idempotent, blocking)."""
+    global _lemmatize_fn
+    if _lemmatize_fn is not None:
+        return
+    with _lemmatizer_lock:
+        if _lemmatize_fn is None:
+            _lemmatize_fn = _load_lemmatizer()
+            logger.info("wordnet_loaded")
+
+
+@lru_cache(maxsize=_LEMMA_CACHE_SIZE)
+def _lemmatize(word: str) -> str:
+    if _lemmatize_fn is None:
+        load_wordnet()
+    assert _lemmatize_fn is not None
+    return _lemmatize_fn(word)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text: lowercase, strip punctuation, remove articles, lemmatize nouns."""
+    text = text.lower().strip()
+    text = _PUNCTUATION.sub("", text)
+    words = [_lemmatize(w) for w in text.split() if w not in _ARTICLES]
+    return " ".join(words) if words else text
+
+
+def hash_key(normalized: str) -> str:
+    """SHA-256 hash of normalized text, first 16 hex chars."""
+    return hashlib.sha256(normalized.encode()).hexdigest()[:16]
+
+
+def _resolve_template(text: str, normalized: str) -> TemplateInfo:
+    """Exact noun match first, then the normalized form ("the horses" → quadruped)."""
+    template = get_template(text)
+    if template.template_type == "default" and normalized != text.lower():
+        template = get_template(normalized)
+    return template
+
+
+@lru_cache(maxsize=CONCEPT_CACHE_SIZE)
+def analyze_concept(text: str) -> ConceptAnalysis:
+    """Analyze request text once; memoized in a bounded LRU.
+
+    Args:
+        text: Raw request text (e.g., "Horses!", "a dragon blows fire").
+
+    Returns:
+        ConceptAnalysis with the cache key, template and canonical prompt.
+    """
+    stripped = text.strip()
+    normalized = normalize_text(stripped)
+    template = _resolve_template(stripped, normalized)
+    return ConceptAnalysis(
+        text=stripped,
+        normalized=normalized,
+        cache_key=hash_key(normalized),
+        template=template,
+        prompt=get_canonical_prompt(stripped, template.template_type),
+    )
+
+
+def concept_cache_stats() -> dict[str, Any]:
+    """Memoization counters for /cache/stats."""
+    info = analyze_concept.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0,
+    }
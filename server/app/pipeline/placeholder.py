@@ -0,0 +1,112 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Placeholder Shapes — template-shaped point cloud while a miss generates
+# ─────────────────────────────────────────────────────────────────────────────
+# POST /generate/stream answers a cache miss with a placeholder first, so the
+# client has something to morph from during the 5–30 s generation. Each part
+# of the template is an ellipsoid shell at a rough anatomical position
+# (x forward, y up, z right), e.g. a quadruped's head sits ahead of and above
+# its body. Part names without a known layout are spaced around a ring.
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+import numpy as np
+
+from app.pipeline.point_sampler import normalize_positions
+
+# part name → ((center x, y, z), (radius x, y, z))
+_PART_LAYOUT: dict[str, tuple[tuple[float, float, float], tuple[float, float, float]]] = {
+    # quadruped
+    "head": ((0.9, 0.55, 0.0), (0.18, 0.16, 0.14)),
+    "neck": ((0.7, 0.35, 0.0), (0.12, 0.2, 0.1)),
+    "body": ((0.0, 0.1, 0.0), (0.65, 0.3, 0.28)),
+    "front_legs": ((0.45, -0.45, 0.0), (0.1, 0.35, 0.22)),
+    "back_legs": ((-0.45, -0.45, 0.0), (0.1, 0.35, 0.22)),
+    "tail": ((-0.8, 0.2, 0.0), (0.2, 0.06, 0.06)),
+    # biped
+    "torso": ((0.0, 0.35, 0.0), (0.18, 0.35, 0.28)),
+    "left_arm": ((0.0, 0.35, -0.45), (0.08, 0.32, 0.08)),
+    "right_arm": ((0.0, 0.35, 0.45), (0.08, 0.32, 0.08)),
+    "left_leg": ((0.0, -0.45, -0.15), (0.1, 0.42, 0.1)),
+    "right_leg": ((0.0, -0.45, 0.15), (0.1, 0.42, 0.1)),
+    # bird / aircraft / insect
+    "left_wing": ((0.0, 0.1, -0.6), (0.28, 0.04, 0.45)),
+    "right_wing": ((0.0, 0.1, 0.6), (0.28, 0.04, 0.45)),
+    "wings": ((0.0, 0.2, 0.0), (0.35, 0.03, 0.6)),
+    "legs": ((0.05, -0.4, 0.0), (0.25, 0.2, 0.25)),
+    "fuselage": ((0.0, 0.0, 0.0), (0.9, 0.12, 0.12)),
+    "engines": ((0.1, -0.12, 0.0), (0.15, 0.06, 0.45)),
+    "thorax": ((0.2, 0.0, 0.0), (0.16, 0.12, 0.12)),
+    "abdomen": ((-0.3, 0.0, 0.0), (0.35, 0.16, 0.16)),
+    # fish
+    "tail_fin": ((-0.75, 0.0, 0.0), (0.15, 0.3, 0.03)),
+    "dorsal_fin": ((0.0, 0.38, 0.0), (0.25, 0.12, 0.03)),
+    "pectoral_fins": ((0.25, -0.15, 0.0), (0.12, 0.05, 0.3)),
+    # vehicle
+    "wheels": ((0.0, -0.3, 0.0), (0.6, 0.15, 0.45)),
+    "windshield": ((0.35, 0.3, 0.0), (0.08, 0.15, 0.35)),
+    "roof": ((0.0, 0.6, 0.0), (0.6, 0.08, 0.5)),
+    # furniture
+    "seat": ((0.0, 0.0, 0.0), (0.45, 0.06, 0.45)),
+    "backrest": ((-0.42, 0.45, 0.0), (0.05, 0.42, 0.45)),
+    # plant
+    "trunk": ((0.0, -0.3, 0.0), (0.1, 0.5, 0.1)),
+    "canopy": ((0.0, 0.45, 0.0), (0.55, 0.4, 0.55)),
+    "roots": ((0.0, -0.85, 0.0), (0.35, 0.1, 0.35)),
+    # building
+    "walls": ((0.0, 0.0, 0.0), (0.7, 0.5, 0.6)),
+    "windows": ((0.7, 0.1, 0.0), (0.02, 0.2, 0.45)),
+    "door": ((0.7, -0.3, 0.0), (0.02, 0.2, 0.12)),
+    "foundation": ((0.0, -0.6, 0.0), (0.75, 0.06, 0.65)),
+}
+_RING_RADIUS = 0.6
+_UNKNOWN_RADII = (0.2, 0.2, 0.2)
+
+
+def _layout(part_names: list[str]) -> list[tuple[np.ndarray, np.ndarray]]:
+    layout = []
+    for i, name in enumerate(part_names):
+        if name in _PART_LAYOUT:
+            center, radii = _PART_LAYOUT[name]
+        elif len(part_names) == 1:
+            center, radii = (0.0, 0.0, 0.0), (0.6, 0.6, 0.6)
+        else:
+            angle = 2 * np.pi * i / len(part_names)
+            center = (_RING_RADIUS * np.cos(angle), 0.0, _RING_RADIUS * np.sin(angle))
+            radii = _UNKNOWN_RADII
+        layout.append((np.asarray(center), np.asarray(radii)))
+    return layout
+
+
+def placeholder_points(
+    part_names: list[str],
+    total_points: int = 2048,
+    seed: int = 0,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Template-shaped point cloud: one ellipsoid shell per part.
+
+    Points are allocated by each ellipsoid's approximate surface area, like
+    sample_from_part_meshes, and part_ids index ``part_names``.
+
+    Returns:
+        Tuple of (positions [N, 3] float32, part_ids [N] uint8), normalized
+        like every other point cloud.
+    """
+    if not part_names:
+        raise ValueError("part_names must not be empty")
+
+    rng = np.random.default_rng(seed)
+    layout = _layout(part_names)
+    areas = np.array([r[0] * r[1] + r[1] * r[2] + r[0] * r[2] for _, r in layout])
+    counts = np.floor(areas / areas.sum() * total_points).astype(int)
+    counts[np.argmax(areas)] += total_points - counts.sum()
+
+    positions, part_ids = [], []
+    for part_id, ((center, radii), count) in enumerate(zip(layout, counts, strict=True)):
+        directions = rng.normal(size=(count, 3))
+        directions /= np.linalg.norm(directions, axis=1, keepdims=True) + 1e-9
+        shell = rng.uniform(0.85, 1.0, size=(count, 1))  # Slight thickness
+        positions.append(center + directions * radii * shell)
+        part_ids.append(np.full(count, part_id, dtype=np.uint8))
+
+    points, _ = normalize_positions(np.concatenate(positions).astype(np.float32))
+    return points, np.concatenate(part_ids)
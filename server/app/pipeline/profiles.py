@@ -0,0 +1,97 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Pipeline Profiles — latency tiers selected by GenerateRequest.quality
+# ─────────────────────────────────────────────────────────────────────────────
+# A profile fixes the PartCrafter settings (denoising steps, latent tokens,
+# guidance), whether the Hunyuan3D + Grounded SAM fallback may run, and the
+# point count. ``fast`` roughly halves PartCrafter time and never pays for
+# the fallback; ``standard`` is the original pipeline.
+#
+# A shape depends on its profile and part count, so both are part of the
+# cache key. The standard profile at the template's own part count keeps
+# the bare concept key, so shapes cached before profiles existed still hit.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import dataclasses
+from dataclasses import dataclass
+from functools import lru_cache
+
+from app.pipeline.concept import CONCEPT_CACHE_SIZE, ConceptAnalysis, analyze_concept, hash_key
+from app.pipeline.template_matcher import TemplateInfo
+
+
+@dataclass(frozen=True, slots=True)
+class PipelineProfile:
+    """Generation settings for one quality level."""
+
+    name: str
+    num_steps: int  # PartCrafter denoising steps
+    num_tokens: int  # PartCrafter latent tokens per part
+    guidance_scale: float
+    allow_fallback: bool  # Hunyuan3D + Grounded SAM when PartCrafter fails
+    max_points: int | None = None  # None = settings.max_points
+
+    @property
+    def partcrafter_work(self) -> float:
+        """PartCrafter cost relative to the standard profile (steps × tokens)."""
+        return (self.num_steps * self.num_tokens) / (
+            DEFAULT_PROFILE.num_steps * DEFAULT_PROFILE.num_tokens
+        )
+
+
+PROFILES: dict[str, PipelineProfile] = {
+    "fast": PipelineProfile(
+        name="fast",
+        num_steps=20,
+        num_tokens=512,
+        guidance_scale=7.0,
+        allow_fallback=False,
+        max_points=1024,
+    ),
+    "standard": PipelineProfile(
+        name="standard",
+        num_steps=50,
+        num_tokens=1024,
+        guidance_scale=7.0,
+        allow_fallback=True,
+    ),
+}
+DEFAULT_PROFILE = PROFILES["standard"]
+
+
+def get_profile(quality: str) -> PipelineProfile:
+    """Profile for a quality level (QualityLevel values); unknown → standard."""
+    return PROFILES.get(quality, DEFAULT_PROFILE)
+
+
+def with_part_count(template: TemplateInfo, num_parts: int) -> TemplateInfo:
+    """The template truncated, or padded with ``part_N`` names, to ``num_parts``."""
+    names = template.part_names[:num_parts]
+    names += [f"part_{i + 1}" for i in range(len(names), num_parts)]
+    return TemplateInfo(template_type=template.template_type, part_names=names)
+
+
+@lru_cache(maxsize=CONCEPT_CACHE_SIZE)
+def profile_concept(
+    text: str, profile: str = DEFAULT_PROFILE.name, num_parts: int | None = None
+) -> ConceptAnalysis:
+    """analyze_concept(text) keyed for a profile and requested part count.
+
+    Returns the plain analysis for the standard profile at the template's
+    own part count; otherwise a copy with its own cache key and, for a
+    part count, the resized template.
+    """
+    concept = analyze_concept(text)
+    if num_parts == concept.template.num_parts:
+        num_parts = None
+    if profile == DEFAULT_PROFILE.name and num_parts is None:
+        return concept
+    variant = profile if num_parts is None else f"{profile}/{num_parts}p"
+    return dataclasses.replace(
+        concept,
+        cache_key=hash_key(f"{concept.normalized}#{variant}"),
+        template=(
+            concept.template if num_parts is None else with_part_count(concept.template, num_parts)
+        ),
+    )
@@ -4,9 +4,12 @@
 
 from typing import Any
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Path
+from fastapi.responses import Response
 
+from app.cache.peers import PEER_PATH
 from app.cache.shape_cache import ShapeCache
+from app.cache.shape_format import CONTENT_TYPE
 from app.dependencies import get_cache
 
 router = APIRouter()
@@ -19,13 +22,50 @@ async def cache_stats(cache: ShapeCache = Depends(get_cache)) -> dict[str, Any]:
     Response schema:
     {
         "memory_cache_size": 23,
+        "disk_cache_size": 40,
         "storage_cache_size": 50,
         "memory_hits": 145,
-        "storage_hits": 38,
+        "disk_hits": 20,
+        "peer_hits": 6,                 # filled from the owning instance (CACHE_PEERS)
+        "storage_hits": 18,
         "misses": 12,
         "hit_rate": 0.938,
         "avg_memory_retrieval_ms": 0.1,
-        "avg_storage_retrieval_ms": 45.0
+        "avg_disk_retrieval_ms": 0.4,
+        "avg_storage_retrieval_ms": 45.0,
+        "memory": {"entries": 23, "bytes": 612352, "max_bytes": 1073741824,
+                   "evictions": 0, "eviction_rate": 0.0},
+        "disk": {"entries": 40, "live_bytes": 1048576, "file_bytes": 1310720,
+                 "max_bytes": 2147483648},      # null when CACHE_DISK_DIR is unset
+        "warmup": {
+            "state": "complete",        # idle | running | complete | deadline | failed
+            "candidates": 50,           # entries in the manifest
+            "planned": 50,              # selected by priority + budget
+            "loaded": 50,
+            "failed": 0,
+            "bytes_loaded": 1310720,
+            "elapsed_s": 1.8,
+            "shapes_per_s": 27.8
+        },
+        "concepts": {                   # memoized concept analysis (cache keys)
+            "size": 120, "max_size": 4096, "hits": 980, "misses": 120, "hit_rate": 0.8909
+        }
     }
     """
     return await cache.stats()
+
+
+@router.get(PEER_PATH + "/{key}", include_in_schema=False)
+async def peer_fetch(
+    key: str = Path(pattern="^[0-9a-f]{16}$"),
+    cache: ShapeCache = Depends(get_cache),
+) -> Response:
+    """Serve a shape this instance owns to another instance (peer tier).
+
+    Answers from memory, disk and storage; never asks other peers, so a
+    request cannot loop. 404 means the shape is not cached anywhere.
+    """
+    data = await cache.get_for_peer(key)
+    if data is None:
+        return Response(status_code=404)
+    return Response(content=data, media_type=CONTENT_TYPE)
@@ -14,12 +14,12 @@ from fastapi.responses import Response
 from pydantic import BaseModel
 
 from app.cache.shape_cache import ShapeCache
-from app.dependencies import get_cache, get_model_registry
+from app.dependencies import get_cache, get_model_registry, get_pipeline_orchestrator
 from app.exceptions import ModelNotLoadedError
 from app.models.registry import ModelRegistry
-from app.pipeline.prompt_templates import get_canonical_prompt
-from app.pipeline.template_matcher import get_template
+from app.pipeline.concept import analyze_concept
 from app.schemas import HealthDetailResponse
+from app.services.pipeline import PipelineOrchestrator
 
 router = APIRouter()
 
@@ -83,6 +83,14 @@ async def cache_stats(
     return await cache.stats()
 
 
+@router.get("/queue")
+async def gpu_queue(
+    orchestrator: PipelineOrchestrator = Depends(get_pipeline_orchestrator),
+) -> dict[str, Any]:
+    """GPU scheduler state: slots, queue depth per priority, waits, waiting clients."""
+    return orchestrator.queue_snapshot()
+
+
 @router.post("/cache/clear")
 async def cache_clear(
     cache: ShapeCache = Depends(get_cache),
@@ -116,8 +124,7 @@ async def generate_image(
     if not registry.has("sdxl_turbo"):
         raise ModelNotLoadedError("sdxl_turbo")
 
-    template = get_template(request.text)
-    prompt = get_canonical_prompt(request.text, template.template_type)
+    prompt = analyze_concept(request.text).prompt
 
     sdxl = registry.get("sdxl_turbo")
     image = sdxl.generate(prompt)
@@ -148,8 +155,8 @@ async def generate_mesh(
     if not registry.has("partcrafter"):
         raise ModelNotLoadedError("partcrafter")
 
-    template = get_template(request.text)
-    prompt = get_canonical_prompt(request.text, template.template_type)
+    concept = analyze_concept(request.text)
+    template, prompt = concept.template, concept.prompt
 
     # Step 1: SDXL Turbo image
     sdxl = registry.get("sdxl_turbo")
@@ -1,9 +1,11 @@
 # ─────────────────────────────────────────────────────────────────────────────
-# POST /generate — point cloud generation endpoint (THIN)
+# POST /generate, /generate/stream — point cloud generation endpoints (THIN)
 # ─────────────────────────────────────────────────────────────────────────────
 
 
 from fastapi import APIRouter, Depends, Request
+from fastapi.responses import Response, StreamingResponse
+from slowapi.util import get_remote_address
 
 from app.dependencies import get_pipeline_orchestrator
 from app.rate_limit import limiter
@@ -21,12 +23,50 @@ async def generate(
     request: Request,
     body: GenerateRequest,
     orchestrator: PipelineOrchestrator = Depends(get_pipeline_orchestrator),
-) -> GenerateResponse:
+) -> Response:
     """Generate a part-labeled point cloud from a text concept.
 
     Rate-limited to 300 requests/minute per IP at the HTTP layer.
-    GPU cost is protected by the inner generation_rate_limit_per_minute gate.
+    GPU cost is protected by the inner generation_rate_limit_per_minute gate,
+    and misses queue for the GPU fairly per client IP. A miss whose client
+    disconnects stops waiting (and generating, if nobody else wants it).
     Validation is Pydantic. Errors are exceptions. Logic is in the orchestrator.
     This endpoint is just wiring.
+
+    The orchestrator returns finished JSON bytes (cache hits are pre-serialized),
+    so the body is sent as a raw Response — ``response_model`` only documents it.
+    """
+    body_json = await orchestrator.generate_json(
+        body, client=get_remote_address(request), disconnected=request.is_disconnected
+    )
+    return Response(content=body_json, media_type="application/json")
+
+
+@router.post(
+    "/generate/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+@limiter.limit("300/minute")
+async def generate_stream(
+    request: Request,
+    body: GenerateRequest,
+    orchestrator: PipelineOrchestrator = Depends(get_pipeline_orchestrator),
+) -> StreamingResponse:
+    """Same as POST /generate, streamed as newline-delimited JSON events.
+
+    Each line is ``{"event": ..., ...}``:
+      placeholder — ``data`` is a template-shaped GenerateResponse
+                    (pipeline "placeholder"), sent at once on a cache miss
+      stage       — ``stage`` finished (gpu_slot, image, mesh, post)
+      result      — ``data`` is the final GenerateResponse
+      error       — ``error``, ``type``, ``status``, ``retry_after``
+
+    A memory-cache hit is a single ``result`` line. Closing the stream
+    abandons the request like a disconnect from POST /generate.
     """
-    return await orchestrator.generate(body)
+    return StreamingResponse(
+        orchestrator.generate_stream(body, client=get_remote_address(request)),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
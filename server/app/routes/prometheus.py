@@ -3,8 +3,13 @@
 # ─────────────────────────────────────────────────────────────────────────────
 # GET /metrics/prometheus → text/plain Prometheus format
 # Bridges PipelineMetrics → prometheus-client gauges/counters/histograms.
+# Totals the services already keep cumulatively (dropped uploads, busy
+# seconds, …) are re-exported on each scrape by _SnapshotCollector with
+# counter/histogram semantics, so rate() and histogram_quantile() work.
 # ─────────────────────────────────────────────────────────────────────────────
 
+from collections.abc import Iterator
+
 from fastapi import APIRouter, Depends
 from fastapi.responses import Response
 from prometheus_client import (
@@ -14,10 +19,21 @@ from prometheus_client import (
     Histogram,
     generate_latest,
 )
+from prometheus_client.core import CounterMetricFamily, HistogramMetricFamily
+from prometheus_client.metrics_core import Metric
 
-from app.dependencies import get_metrics, get_model_registry
+from app.cache.shape_cache import ShapeCache
+from app.dependencies import (
+    get_cache,
+    get_executors,
+    get_metrics,
+    get_model_registry,
+    get_pipeline_orchestrator,
+)
 from app.models.registry import ModelRegistry
+from app.services.executors import Executors
 from app.services.metrics import PipelineMetrics
+from app.services.pipeline import PipelineOrchestrator
 
 router = APIRouter()
 
@@ -25,6 +41,42 @@ router = APIRouter()
 
 _registry = CollectorRegistry()
 
+
+class _SnapshotCollector:
+    """Metric families built from the services' cumulative stats, once per scrape."""
+
+    def __init__(self) -> None:
+        self._families: list[Metric] = []
+
+    def update(self, families: list[Metric]) -> None:
+        self._families = families
+
+    def collect(self) -> Iterator[Metric]:
+        yield from self._families
+
+
+_totals = _SnapshotCollector()
+_registry.register(_totals)
+
+_IMAGE_BATCH_BUCKETS = (1, 2, 4, 8, 16)  # Prompts per SDXL pass; IMAGE_BATCH_MAX_SIZE is 4
+
+
+def _batch_size_histogram(sizes: dict[str, int]) -> HistogramMetricFamily:
+    """Histogram of image batch sizes from PipelineMetrics' size → count table."""
+    counts = {int(size): count for size, count in sizes.items()}
+    buckets = [
+        (str(bound), sum(n for size, n in counts.items() if size <= bound))
+        for bound in _IMAGE_BATCH_BUCKETS
+    ]
+    buckets.append(("+Inf", sum(counts.values())))
+    return HistogramMetricFamily(
+        "lumen_image_batch_size",
+        "Prompts per micro-batched text-to-image pass",
+        buckets=buckets,
+        sum_value=sum(size * n for size, n in counts.items()),
+    )
+
+
 _requests_total = Counter(
     "lumen_requests_total",
     "Total requests to the generation pipeline",
@@ -46,6 +98,86 @@ _cache_hit_ratio = Gauge(
     registry=_registry,
 )
 
+_cache_write_queue_depth = Gauge(
+    "lumen_cache_write_queue_depth",
+    "Cloud Storage uploads queued or in progress",
+    registry=_registry,
+)
+
+_cache_peer_latency = Gauge(
+    "lumen_cache_peer_latency_ms",
+    "Average owning-peer response time in milliseconds",
+    registry=_registry,
+)
+
+_gpu_queue_depth = Gauge(
+    "lumen_gpu_queue_depth",
+    "Cache misses waiting for a GPU slot, per priority class",
+    ["priority"],
+    registry=_registry,
+)
+
+_gpu_slots_in_use = Gauge(
+    "lumen_gpu_slots_in_use",
+    "GPU slots held by running generations",
+    registry=_registry,
+)
+
+_gpu_queue_wait = Gauge(
+    "lumen_gpu_queue_wait_seconds",
+    "Time recent generations spent queued for a GPU slot",
+    ["quantile"],
+    registry=_registry,
+)
+
+_gpu_queue_estimated_wait = Gauge(
+    "lumen_gpu_queue_estimated_wait_seconds",
+    "Estimated wait for a new interactive miss (queue depth × observed latency)",
+    registry=_registry,
+)
+
+_stage_queue_depth = Gauge(
+    "lumen_stage_queue_depth",
+    "Generations waiting for a pipeline stage worker (image, mesh, post)",
+    ["stage"],
+    registry=_registry,
+)
+
+_step_estimate = Gauge(
+    "lumen_step_estimate_seconds",
+    "Rolling estimate of each pipeline step's duration, across template types",
+    ["step"],
+    registry=_registry,
+)
+
+_device_in_flight = Gauge(
+    "lumen_device_in_flight",
+    "Generations running on each device",
+    ["device"],
+    registry=_registry,
+)
+
+_device_vram_reserved = Gauge(
+    "lumen_device_vram_reserved_gb",
+    "Declared VRAM of the model replicas placed on each device",
+    ["device"],
+    registry=_registry,
+)
+
+_executor_queue_depth = Gauge(
+    "lumen_executor_queue_depth",
+    "Tasks waiting for a thread, per executor",
+    ["executor"],
+    registry=_registry,
+)
+
+_executor_utilization = Gauge(
+    "lumen_executor_utilization",
+    "Fraction of an executor's threads currently running a task (0.0–1.0)",
+    ["executor"],
+    registry=_registry,
+)
+
 _gpu_memory_bytes = Gauge(
     "lumen_gpu_memory_bytes",
     "GPU memory currently allocated in bytes",
@@ -60,12 +192,127 @@ _model_load_status = Gauge(
 )
 
 
-def _sync_metrics(metrics: PipelineMetrics, model_registry: ModelRegistry) -> None:
-    """Sync PipelineMetrics data into Prometheus gauges."""
+def _sync_metrics(
+    metrics: PipelineMetrics,
+    model_registry: ModelRegistry,
+    cache: ShapeCache,
+    executors: Executors,
+    orchestrator: PipelineOrchestrator,
+) -> None:
+    """Sync PipelineMetrics data into Prometheus gauges and the totals snapshot."""
     data = metrics.to_dict()
+    totals: list[Metric] = []
 
     # Cache hit ratio
     _cache_hit_ratio.set(data["cache_hit_rate"])
+    totals.append(
+        CounterMetricFamily(
+            "lumen_coalesced_requests",
+            "Requests served by another request's in-flight fetch or generation",
+            value=data["coalesced_requests"],
+        )
+    )
+    totals.append(_batch_size_histogram(data["image_batch_sizes"]))
+    totals.append(
+        CounterMetricFamily(
+            "lumen_generations_cancelled",
+            "Generations abandoned mid-pipeline because no caller was left (timeout, disconnect)",
+            value=data["generations_cancelled"],
+        )
+    )
+    totals.append(
+        CounterMetricFamily(
+            "lumen_wasted_gpu_seconds",
+            "GPU stage seconds spent on generations that were later abandoned",
+            value=data["wasted_gpu_seconds"],
+        )
+    )
+
+    # Write-behind queue
+    writes = cache.write_stats()
+    _cache_write_queue_depth.set(writes["pending"])
+    totals.append(
+        CounterMetricFamily(
+            "lumen_cache_writes_dropped",
+            "Cloud Storage uploads dropped (write queue full or shutting down)",
+            value=writes["dropped"],
+        )
+    )
+
+    # Peer tier
+    peers = cache.peer_stats()
+    if peers is not None:
+        peer_requests = CounterMetricFamily(
+            "lumen_cache_peer_requests",
+            "Cache fills asked of the owning peer, by result (hit, miss, error)",
+            labels=["result"],
+        )
+        for result, field in (("hit", "hits"), ("miss", "misses"), ("error", "errors")):
+            peer_requests.add_metric([result], peers[field])
+        totals.append(peer_requests)
+        _cache_peer_latency.set(peers["avg_latency_ms"])
+
+    # GPU scheduler
+    queue = orchestrator.queue_stats()
+    for priority, depth in queue["queued_by_priority"].items():
+        _gpu_queue_depth.labels(priority=priority).set(depth)
+    _gpu_slots_in_use.set(queue["running"])
+    _gpu_queue_wait.labels(quantile="0.5").set(queue["wait_p50_s"])
+    _gpu_queue_wait.labels(quantile="0.95").set(queue["wait_p95_s"])
+    _gpu_queue_estimated_wait.set(queue["estimated_wait_s"])
+    totals.append(
+        CounterMetricFamily(
+            "lumen_gpu_queue_rejected",
+            "Cache misses rejected because the estimated wait was over the limit",
+            value=queue["rejected"],
+        )
+    )
+    totals.append(
+        CounterMetricFamily(
+            "lumen_gpu_queue_promoted",
+            "Queued generations moved to a higher priority class by a coalesced request",
+            value=queue["promoted"],
+        )
+    )
+
+    # Pipeline stages
+    stage_busy = CounterMetricFamily(
+        "lumen_stage_busy_seconds",
+        "Seconds spent running each pipeline stage",
+        labels=["stage"],
+    )
+    for stage, stats in orchestrator.stage_stats().items():
+        _stage_queue_depth.labels(stage=stage).set(stats["queued"])
+        stage_busy.add_metric([stage], stats["busy_seconds"])
+    totals.append(stage_busy)
+    planner = orchestrator.planner_stats()
+    degradations = CounterMetricFamily(
+        "lumen_deadline_degradations",
+        "Pipeline steps skipped or downgraded because they would overrun the request deadline",
+        labels=["step"],
+    )
+    for step, count in planner["degraded"].items():
+        degradations.add_metric([step], count)
+    totals.append(degradations)
+    for step, estimates in planner["estimates_s"].items():
+        _step_estimate.labels(step=step).set(estimates["*"])
+
+    # Devices
+    for device, stats in orchestrator.device_stats().items():
+        _device_in_flight.labels(device=device).set(stats["in_flight"])
+        _device_vram_reserved.labels(device=device).set(stats["reserved_gb"])
+
+    # Executors
+    executor_busy = CounterMetricFamily(
+        "lumen_executor_busy_seconds",
+        "Thread-seconds spent running tasks, per executor",
+        labels=["executor"],
+    )
+    for name, stats in executors.stats().items():
+        _executor_queue_depth.labels(executor=name).set(stats["queued"])
+        _executor_utilization.labels(executor=name).set(stats["utilization"])
+        executor_busy.add_metric([name], stats["busy_seconds"])
+    totals.append(executor_busy)
 
     # GPU memory
     try:
@@ -90,14 +337,19 @@ def _sync_metrics(metrics: PipelineMetrics, model_registry: ModelRegistry) -> No
             1 if model_registry.has(model_name) else 0
         )
 
+    _totals.update(totals)
+
 
 @router.get("/metrics/prometheus")
 async def prometheus_metrics(
     metrics: PipelineMetrics = Depends(get_metrics),
     model_registry: ModelRegistry = Depends(get_model_registry),
+    cache: ShapeCache = Depends(get_cache),
+    executors: Executors = Depends(get_executors),
+    orchestrator: PipelineOrchestrator = Depends(get_pipeline_orchestrator),
 ) -> Response:
     """Prometheus text exposition format metrics endpoint."""
-    _sync_metrics(metrics, model_registry)
+    _sync_metrics(metrics, model_registry, cache, executors, orchestrator)
     return Response(
         content=generate_latest(_registry),
         media_type="text/plain; version=0.0.4; charset=utf-8",
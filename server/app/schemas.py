@@ -16,6 +16,14 @@ class QualityLevel(StrEnum):
     standard = "standard"  # With fallback (Hunyuan3D + Grounded SAM)
 
 
+class RequestPriority(StrEnum):
+    """GPU scheduling class, highest first."""
+
+    interactive = "interactive"  # A user is waiting on the response
+    prefetch = "prefetch"  # Speculative: a concept the client expects to need soon
+    pregenerate = "pregenerate"  # Batch cache filling
+
+
 class GenerateRequest(BaseModel):
     """Incoming request to generate a 3D point cloud."""
 
@@ -23,6 +31,7 @@ class GenerateRequest(BaseModel):
     verb: str | None = Field(None, max_length=100, description="Optional verb for animation")
     num_parts: int | None = Field(None, ge=1, le=16, description="Part count hint")
     quality: QualityLevel = QualityLevel.standard
+    priority: RequestPriority = RequestPriority.interactive
 
     @field_validator("text")
     @classmethod
@@ -50,6 +59,9 @@ class GenerateResponse(BaseModel):
     cached: bool
     generation_time_ms: int = Field(..., ge=0)
     pipeline: str = Field(..., description="'partcrafter', 'hunyuan3d_grounded_sam', or 'mock'")
+    alias_of: str | None = Field(
+        None, description="Cached concept served for this near-synonym, e.g. 'horse' for 'pony'"
+    )
 
 
 class LivenessResponse(BaseModel):
@@ -0,0 +1,137 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Micro-batching — concurrent text-to-image misses share one forward pass
+# ─────────────────────────────────────────────────────────────────────────────
+# Without batching, N concurrent misses for different concepts run N
+# back-to-back 4-step SDXL Turbo diffusions on the single GPU thread. The
+# batcher collects prompts on the event loop for up to ``window_ms`` (or
+# until ``max_batch`` are waiting), then runs one generate_batch() call on
+# the GPU executor and routes each image back to its caller.
+#
+# A model without generate_batch (see BatchTextToImageModel) is called once
+# per prompt within the batch, so batching degrades to plain queueing.
+# A batch is cancelled (at the next denoising step) only once every caller
+# in it has cancelled its token.
+# Event-loop confined, like SingleFlight; only the model call runs off-loop.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+import structlog
+
+from app.models.cancellation import CancellationToken, cancellable
+from app.models.protocol import BatchTextToImageModel
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from concurrent.futures import Executor
+
+    import PIL.Image
+
+    from app.models.protocol import TextToImageModel
+    from app.services.metrics import PipelineMetrics
+
+logger = structlog.get_logger(__name__)
+
+# prompt, caller's future, caller's cancellation token
+_Pending = tuple[str, "asyncio.Future[PIL.Image.Image]", "CancellationToken | None"]
+
+
+class ImageBatcher:
+    """Collects text-to-image prompts into batches for one model."""
+
+    def __init__(
+        self,
+        model: Callable[[], TextToImageModel],
+        *,
+        max_batch: int = 4,
+        window_ms: float = 20.0,
+        executor: Executor | None = None,
+        metrics: PipelineMetrics | None = None,
+    ) -> None:
+        self._model = model  # Resolved per batch: models load after startup
+        self.max_batch = max(max_batch, 1)
+        self.window_s = max(window_ms, 0.0) / 1000
+        self._executor = executor  # None = the loop's default executor (tests)
+        self._metrics = metrics
+        self._pending: list[_Pending] = []
+        self._timer: asyncio.Handle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def generate(
+        self, prompt: str, token: CancellationToken | None = None
+    ) -> PIL.Image.Image:
+        """Image for ``prompt``, generated in a batch with concurrent callers."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[PIL.Image.Image] = loop.create_future()
+        self._pending.append((prompt, future, token))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_s, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Callers that gave up (timeout, disconnect) while waiting drop out
+        pending = [
+            (p, f, t) for p, f, t in self._pending if not f.done() and not (t and t.cancelled)
+        ]
+        batch, self._pending = pending[: self.max_batch], pending[self.max_batch :]
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_soon(self._flush)
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[_Pending]) -> None:
+        prompts = [prompt for prompt, _, _ in batch]
+        tokens = [token for _, _, token in batch if token is not None]
+        # Cancelled once every caller is; never if any caller cannot cancel
+        token = CancellationToken(prompts[0], parents=tokens) if len(tokens) == len(batch) else None
+        loop = asyncio.get_running_loop()
+        try:
+            images = await loop.run_in_executor(self._executor, self._generate_sync, prompts, token)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), image in zip(batch, images, strict=True):
+            if not future.done():
+                future.set_result(image)
+
+    def _generate_sync(
+        self, prompts: list[str], token: CancellationToken | None = None
+    ) -> list[PIL.Image.Image]:
+        model = self._model()
+        with cancellable(token):
+            if isinstance(model, BatchTextToImageModel) and len(prompts) > 1:
+                images = model.generate_batch(prompts)
+            else:
+                images = [model.generate(prompt) for prompt in prompts]
+        if len(images) != len(prompts):
+            raise RuntimeError(f"{model.name} returned {len(images)} images for {len(prompts)}")
+        if self._metrics:
+            self._metrics.record_image_batch(len(prompts))
+        logger.debug("image_batch_generated", model=model.name, size=len(prompts))
+        return images
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> dict[str, Any]:
+        """Configuration and queue depth; batch sizes go to PipelineMetrics."""
+        return {
+            "max_batch": self.max_batch,
+            "window_ms": round(self.window_s * 1000, 1),
+            "pending": self.pending,
+            "running": len(self._tasks),
+        }
@@ -0,0 +1,129 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Named executors — GPU inference, storage I/O and CPU work on separate pools
+# ─────────────────────────────────────────────────────────────────────────────
+# With one shared default executor, a burst of multi-second GPU generations
+# occupies every thread and cache-hit storage reads queue behind them.
+#
+#   gpu — one pool per device (EXECUTOR_GPU_WORKERS threads each, named
+#         "gpu:<device>" when there are several): inference on a device is
+#         serialized anyway, and a slow generation on one device never
+#         holds a thread another device's work is waiting for
+#   io  — bounded pool for Cloud Storage / local disk round-trips
+#   cpu — CPU-bound helpers (corpus loading, encoding)
+#
+# Each pool counts queued and running tasks and accumulated busy time,
+# exported per executor by /metrics/prometheus.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+    from app.config import Settings
+
+
+class InstrumentedExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor that tracks queue depth, running tasks and busy time."""
+
+    def __init__(self, name: str, max_workers: int) -> None:
+        super().__init__(max_workers=max_workers, thread_name_prefix=name)
+        self.name = name
+        self.workers = max_workers
+        self._stats_lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._busy_seconds = 0.0
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future[Any]:
+        with self._stats_lock:
+            self._queued += 1
+        try:
+            return super().submit(self._run, fn, args, kwargs)
+        except BaseException:
+            with self._stats_lock:
+                self._queued -= 1
+            raise
+
+    def _run(self, fn: Callable[..., Any], args: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
+        with self._stats_lock:
+            self._queued -= 1
+            self._active += 1
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self._stats_lock:
+                self._active -= 1
+                self._completed += 1
+                self._busy_seconds += elapsed
+
+    def stats(self) -> dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "workers": self.workers,
+                "queued": self._queued,
+                "active": self._active,
+                "utilization": round(self._active / self.workers, 3),
+                "completed": self._completed,
+                "busy_seconds": round(self._busy_seconds, 3),
+            }
+
+
+class Executors:
+    """The service's named thread pools. Created in lifespan, one per process."""
+
+    def __init__(
+        self,
+        gpu_workers: int = 1,
+        io_workers: int = 16,
+        cpu_workers: int = 0,
+        devices: Sequence[str] = (),
+    ) -> None:
+        # A single device keeps the plain "gpu" name
+        names = {d: f"gpu:{d}" for d in devices} if len(devices) > 1 else {}
+        self.gpus = {
+            device: InstrumentedExecutor(name, max(gpu_workers, 1))
+            for device, name in names.items()
+        }
+        self.gpu = (  # The first device's pool (model loading, device-less work)
+            next(iter(self.gpus.values()))
+            if self.gpus
+            else InstrumentedExecutor("gpu", max(gpu_workers, 1))
+        )
+        self.io = InstrumentedExecutor("io", max(io_workers, 1))
+        self.cpu = InstrumentedExecutor("cpu", cpu_workers or os.cpu_count() or 1)
+
+    @classmethod
+    def from_settings(cls, settings: Settings, devices: Sequence[str] = ()) -> Executors:
+        """A GPU pool of EXECUTOR_GPU_WORKERS threads for each of ``devices``."""
+        return cls(
+            gpu_workers=settings.executor_gpu_workers,
+            io_workers=settings.executor_io_workers,
+            cpu_workers=settings.executor_cpu_workers,
+            devices=devices,
+        )
+
+    def gpu_for(self, device: str | None) -> InstrumentedExecutor:
+        """``device``'s GPU pool; the first one for None or an unknown device."""
+        return self.gpus.get(device, self.gpu) if device is not None else self.gpu
+
+    def all(self) -> tuple[InstrumentedExecutor, ...]:
+        gpus = tuple(self.gpus.values()) or (self.gpu,)
+        return (*gpus, self.io, self.cpu)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {executor.name: executor.stats() for executor in self.all()}
+
+    def shutdown(self) -> None:
+        """Stop accepting work; running tasks finish in the background."""
+        for executor in self.all():
+            executor.shutdown(wait=False, cancel_futures=True)
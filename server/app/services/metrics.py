@@ -33,6 +33,13 @@ class PipelineMetrics:
     fallback_failures: int = 0
     mock_fallbacks: int = 0
     errors_total: int = 0
+    coalesced_requests: int = 0  # Served by another request's in-flight work
+    image_batches: int = 0  # Micro-batched SDXL forward passes
+    generations_cancelled: int = 0  # Abandoned mid-pipeline (timeout, disconnect)
+    wasted_gpu_seconds: float = 0.0  # GPU stage time spent on abandoned generations
+
+    # Batch size → number of batches of that size
+    _image_batch_sizes: dict[int, int] = field(default_factory=dict, repr=False)
 
     # Bounded -- only keeps last 1000 latencies, oldest auto-evicted
     _latency_history: deque[float] = field(default_factory=lambda: deque(maxlen=1000), repr=False)
@@ -78,6 +85,31 @@ class PipelineMetrics:
             if not cached and success:
                 self._generation_timestamps.append(time.time())
 
+    def record_coalesced(self, latency_ms: float, cached: bool) -> None:
+        """Record a request that waited on another request's fetch/generation.
+
+        Counted as a request (and a cache hit if the shared work was one),
+        but not as a GPU generation — the leader already recorded that.
+        """
+        with self._lock:
+            self.requests_total += 1
+            self.coalesced_requests += 1
+            self._latency_history.append(latency_ms)
+            if cached:
+                self.cache_hits += 1
+
+    def record_image_batch(self, size: int) -> None:
+        """Record one micro-batched text-to-image pass of ``size`` prompts."""
+        with self._lock:
+            self.image_batches += 1
+            self._image_batch_sizes[size] = self._image_batch_sizes.get(size, 0) + 1
+
+    def record_cancelled(self, gpu_seconds: float) -> None:
+        """Record a generation abandoned after ``gpu_seconds`` of GPU stage time."""
+        with self._lock:
+            self.generations_cancelled += 1
+            self.wasted_gpu_seconds += gpu_seconds
+
     def recent_generations_per_minute(self) -> int:
         """Count GPU generations in the last 60 seconds."""
         with self._lock:
@@ -126,6 +158,13 @@ class PipelineMetrics:
                 "fallback_failures": self.fallback_failures,
                 "mock_fallbacks": self.mock_fallbacks,
                 "errors_total": self.errors_total,
+                "coalesced_requests": self.coalesced_requests,
+                "image_batches": self.image_batches,
+                "image_batch_sizes": {
+                    str(size): count for size, count in sorted(self._image_batch_sizes.items())
+                },
+                "generations_cancelled": self.generations_cancelled,
+                "wasted_gpu_seconds": round(self.wasted_gpu_seconds, 3),
                 "latency_p50_ms": round(latencies[n // 2], 1) if n else 0,
                 "latency_p95_ms": round(latencies[int(n * 0.95)], 1) if n else 0,
                 "latency_mean_ms": round(sum(latencies) / n, 1) if n else 0,
@@ -1,39 +1,120 @@
 # Core generation orchestrator: cache → template → models → points.
-# Primary (SDXL+PartCrafter) falls back to Hunyuan3D+Grounded SAM on failure.
+#
+# A request first goes to the cache. A miss whose near-synonym is cached
+# ("pony" → "horse") is served from that shape, and the response's alias_of
+# names the concept used. Concurrent misses for one cache key are coalesced,
+# so one storage read or GPU generation runs per key and every waiter shares
+# its record. The cache key includes the quality profile
+# (pipeline/profiles.py) and the requested part count. The profile sets
+# PartCrafter's steps and tokens, whether the fallback may run, and the
+# point count.
+#
+# A real miss is routed to the least-loaded device holding its models
+# (models/devices.py) and admitted only if its estimated wait for one of that
+# device's GPU slots is short enough; otherwise it is rejected up front. It
+# then queues for a slot on that device, by priority and fairly across
+# clients (services/scheduler.py). A coalesced request more important than
+# the one that started the generation moves its queued job up to its class.
+# The generation then runs as image → mesh → post-process stages
+# (services/stages.py) on that device's own stage workers and GPU executor,
+# so concurrent misses overlap. Reference images for
+# concurrent misses on a device are micro-batched into one SDXL forward pass
+# (IMAGE_BATCH_MAX_SIZE=1 disables batching). Primary is SDXL+PartCrafter,
+# which falls back to Hunyuan3D+Grounded SAM on failure.
+#
+# Each generation carries its deadline through the stages. A step whose
+# estimated time no longer fits is downgraded or skipped for a cheaper path
+# (services/planner.py). Such degraded results are served but not cached. A
+# generation nobody waits for any more (timeout, client disconnect) is
+# cancelled cooperatively: its token is checked between stages and after
+# every denoising step (models/cancellation.py).
+#
+# generate_stream() reports the same request as NDJSON events: a
+# template-shaped placeholder at once, stage progress, then the result.
 
 
 import asyncio
+import functools
+import json
 import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 
 import numpy as np
 import structlog
 from opentelemetry import trace
 
+from app.cache.memory_tier import ShapeRecord
 from app.cache.shape_cache import ShapeCache
 from app.config import Settings
 from app.exceptions import (
+    GenerationCancelledError,
     GenerationFailedError,
     GenerationRateLimitError,
     GenerationTimeoutError,
     GPUOutOfMemoryError,
+    GPUQueueFullError,
+    LumenError,
 )
+from app.models.cancellation import CancellationToken, cancellable, raise_if_cancelled
 from app.models.registry import ModelRegistry
+from app.pipeline.concept import ConceptAnalysis, analyze_concept
 from app.pipeline.encoding import compute_bbox, encode_float32, encode_uint8
 from app.pipeline.mask_to_faces import map_masks_to_faces
 from app.pipeline.mesh_renderer import render_multiview_with_id_pass
+from app.pipeline.placeholder import placeholder_points
 from app.pipeline.point_sampler import (
     normalize_positions,
     sample_from_labeled_mesh,
     sample_from_part_meshes,
 )
-from app.pipeline.prompt_templates import get_canonical_prompt
-from app.pipeline.template_matcher import TemplateInfo, get_template
-from app.schemas import BoundingBox, GenerateRequest, GenerateResponse
+from app.pipeline.profiles import (
+    DEFAULT_PROFILE,
+    PROFILES,
+    PipelineProfile,
+    get_profile,
+    profile_concept,
+)
+from app.schemas import BoundingBox, GenerateRequest, GenerateResponse, RequestPriority
+from app.services.batching import ImageBatcher
+from app.services.executors import Executors
 from app.services.metrics import PipelineMetrics
+from app.services.planner import Deadline, StagePlanner
+from app.services.scheduler import DeviceScheduler
+from app.services.single_flight import SingleFlight
+from app.services.stages import Stage, StagePipeline
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Awaitable, Callable
+
+    import PIL.Image
+    import trimesh
 
 logger = structlog.get_logger(__name__)
 tracer = trace.get_tracer(__name__)
 
+_PRIMARY_MODELS = ("sdxl_turbo", "partcrafter")  # A generation's device must host both
+
+
+def _gpu_stage(
+    fn: "Callable[[PipelineOrchestrator, _Generation], _Generation]",
+) -> "Callable[[PipelineOrchestrator, _Generation], _Generation]":
+    """GPU stage: skip if cancelled, bind the token for the model wrappers'
+    step callbacks, and add the stage's time to the generation's gpu_seconds."""
+
+    @functools.wraps(fn)
+    def run(self: "PipelineOrchestrator", generation: "_Generation") -> "_Generation":
+        if generation.token is not None:
+            generation.token.raise_if_cancelled()
+        t0 = time.perf_counter()
+        try:
+            with cancellable(generation.token):
+                return fn(self, generation)
+        finally:
+            generation.gpu_seconds += time.perf_counter() - t0
+
+    return run
+
 
 class PipelineOrchestrator:
     """Orchestrates generation pipeline: cache → image → mesh → points."""
@@ -44,35 +125,314 @@ class PipelineOrchestrator:
         cache: ShapeCache,
         settings: Settings,
         metrics: PipelineMetrics | None = None,
+        executors: Executors | None = None,
     ) -> None:
         self._registry = registry
         self._cache = cache
         self._settings = settings
         self._metrics = metrics
+        self._executors = executors  # None = the loop's default executor (tests, scripts)
+        self._flights = SingleFlight()  # cache key → in-flight fetch/generation
+        self._scheduler = DeviceScheduler.from_settings(
+            settings, [d.name for d in registry.devices.devices]
+        )
+        self._planner = StagePlanner(settings.stage_deadline_margin)
+        self._stage_pipelines: dict[str | None, StagePipeline] = {}  # device → its stages
+        self._progress: dict[str, set[asyncio.Queue[str]]] = {}  # cache key → stream listeners
+        self._placeholders: dict[tuple[str, int, int], ShapeRecord] = {}  # (type, parts, points)
+        self._batchers: dict[str | None, ImageBatcher] = {}  # device → its SDXL micro-batcher
+
+    async def generate(self, request: GenerateRequest, client: str = "") -> GenerateResponse:
+        """Full generation pipeline: cache → template → models → points.
 
-    async def generate(self, request: GenerateRequest) -> GenerateResponse:
-        """Full generation pipeline: cache → template → models → points."""
+        ``client`` identifies the caller for fair GPU queuing (e.g. its IP).
+        """
         with tracer.start_as_current_span("generate") as span:
             span.set_attribute("concept", request.text)
-            return await self._generate_traced(request, span)
+            start = time.perf_counter()
+            record, cached, alias_of = await self._resolve(
+                request, span, start, client=client, prepare_json=False
+            )
+            response = record.to_response()  # Fresh object per call — safe to patch
+            response.cached = cached
+            response.alias_of = alias_of
+            response.generation_time_ms = int((time.perf_counter() - start) * 1000)
+            return response
 
-    async def _generate_traced(
-        self, request: GenerateRequest, parent_span: trace.Span
-    ) -> GenerateResponse:
-        """Inner generate with OTel tracing."""
+    async def generate_json(
+        self,
+        request: GenerateRequest,
+        client: str = "",
+        disconnected: "Callable[[], Awaitable[bool]] | None" = None,
+    ) -> bytes:
+        """Same as generate(), serialized to GenerateResponse JSON.
+
+        Never builds a response object: the record's pre-serialized body is
+        patched with this request's ``cached``, ``generation_time_ms`` and
+        ``alias_of`` fields and returned as-is.
+
+        ``disconnected`` (e.g. ``Request.is_disconnected``) is polled while a
+        miss waits; once it reports True the wait is abandoned with
+        GenerationCancelledError, and the generation with it if nobody else
+        is waiting for that concept.
+        """
+        with tracer.start_as_current_span("generate") as span:
+            span.set_attribute("concept", request.text)
+            start = time.perf_counter()
+            record, cached, alias_of = await self._resolve(
+                request, span, start, client=client, prepare_json=True, disconnected=disconnected
+            )
+            elapsed = int((time.perf_counter() - start) * 1000)
+            return record.to_json(cached=cached, generation_time_ms=elapsed, alias_of=alias_of)
+
+    async def generate_stream(
+        self, request: GenerateRequest, client: str = ""
+    ) -> "AsyncIterator[bytes]":
+        """generate_json() as NDJSON events, one JSON object per line.
+
+        A memory hit is a single ``result`` event. Anything slower first
+        yields a ``placeholder`` event (a template-shaped GenerateResponse
+        with pipeline "placeholder"), then one ``stage`` event per step the
+        generation completes (gpu_slot, image, mesh, post), then ``result``
+        with the final GenerateResponse. Failures end the stream with an
+        ``error`` event, since the status line has already gone out.
+
+        Caching, coalescing and scheduling are exactly generate_json()'s;
+        closing the stream abandons the request like a disconnect.
+        """
         start = time.perf_counter()
+        concept = profile_concept(request.text, request.quality.value, request.num_parts)
+        progress: asyncio.Queue[str] = asyncio.Queue()
+        self._progress.setdefault(concept.cache_key, set()).add(progress)
+        task = asyncio.ensure_future(self.generate_json(request, client))
+        try:
+            await asyncio.sleep(0)  # Memory hits complete without suspending
+            if not task.done():
+                placeholder = self._placeholder(concept, get_profile(request.quality)).to_json(
+                    cached=False, generation_time_ms=_ms_since(start)
+                )
+                yield _event("placeholder", placeholder)
+            while not task.done():
+                getter = asyncio.ensure_future(progress.get())
+                await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    break
+                yield _event("stage", stage=getter.result(), elapsed_ms=_ms_since(start))
+            while not progress.empty():
+                yield _event("stage", stage=progress.get_nowait(), elapsed_ms=_ms_since(start))
+            yield _event("result", task.result())
+        except LumenError as e:
+            yield _event(
+                "error",
+                error=e.message,
+                type=type(e).__name__,
+                status=e.status_code,
+                retry_after=getattr(e, "retry_after_seconds", None),
+            )
+        except Exception:
+            logger.error("stream_failed", text=request.text, exc_info=True)
+            yield _event("error", error="Internal server error", type="UnhandledError", status=500)
+        finally:
+            task.cancel()  # No-op once done; otherwise the client closed the stream
+            listeners = self._progress.get(concept.cache_key)
+            if listeners is not None:
+                listeners.discard(progress)
+                if not listeners:
+                    del self._progress[concept.cache_key]
+
+    def _placeholder(self, concept: ConceptAnalysis, profile: PipelineProfile) -> ShapeRecord:
+        """Template-shaped stand-in shape, built once per template, part and point count."""
+        template = concept.template
+        total_points = profile.max_points or self._settings.max_points
+        key = (template.template_type, template.num_parts, total_points)
+        record = self._placeholders.get(key)
+        if record is None:
+            positions, part_ids = placeholder_points(template.part_names, total_points=total_points)
+            bbox = compute_bbox(positions)
+            record = ShapeRecord.from_response(
+                GenerateResponse(
+                    positions=encode_float32(positions),
+                    part_ids=encode_uint8(part_ids),
+                    part_names=template.part_names,
+                    template_type=template.template_type,
+                    bounding_box=BoundingBox(min=bbox["min"], max=bbox["max"]),
+                    cached=False,
+                    generation_time_ms=0,
+                    pipeline="placeholder",
+                )
+            )
+            self._placeholders[key] = record
+        return record
+
+    def _publish(self, cache_key: str, stage: str) -> None:
+        """Tell streams waiting on ``cache_key`` that a step finished."""
+        for listener in self._progress.get(cache_key, ()):
+            listener.put_nowait(stage)
+
+    def queue_stats(self) -> dict[str, Any]:
+        """GPU scheduler queue depth, wait times and estimated wait."""
+        return self._scheduler.stats()
+
+    def queue_snapshot(self) -> dict[str, Any]:
+        """queue_stats() plus waiting clients per priority class, stage queues
+        (in total and per device) and the planner's step estimates."""
+        return {
+            **self._scheduler.snapshot(),
+            "stages": self.stage_stats(),
+            "stages_by_device": {
+                str(device): stages.stats() for device, stages in self._stage_pipelines.items()
+            },
+            "planner": self.planner_stats(),
+            "devices": self.device_stats(),
+        }
+
+    def stage_stats(self) -> dict[str, dict[str, Any]]:
+        """Per-stage queue depth, activity and busy time summed over devices
+        (empty before the first miss)."""
+        totals: dict[str, dict[str, Any]] = {}
+        for stages in self._stage_pipelines.values():
+            for name, stats in stages.stats().items():
+                total = totals.setdefault(name, dict.fromkeys(stats, 0))
+                for field, value in stats.items():
+                    total[field] += value
+        for total in totals.values():
+            total["busy_seconds"] = round(total["busy_seconds"], 3)
+            total["avg_ms"] = (
+                round(total["busy_seconds"] / total["completed"] * 1000, 1)
+                if total["completed"]
+                else 0.0
+            )
+        return totals
+
+    def planner_stats(self) -> dict[str, Any]:
+        """Step latency estimates per template type and deadline degradations."""
+        return self._planner.stats()
+
+    def device_stats(self) -> dict[str, dict[str, Any]]:
+        """Per-device capacity, placed models and generations in flight."""
+        return self._registry.devices.stats()
+
+    async def _resolve(
+        self,
+        request: GenerateRequest,
+        span: trace.Span,
+        start: float,
+        *,
+        client: str,
+        prepare_json: bool,
+        disconnected: "Callable[[], Awaitable[bool]] | None" = None,
+    ) -> tuple[ShapeRecord, bool, str | None]:
+        """Record for the request's concept, whether it came from cache, and
+        the near-synonym it was served for (None if the concept itself).
+
+        Memory hits are answered inline. Anything slower — a disk/storage
+        read or a GPU generation — runs once per cache key; concurrent
+        requests for the same concept wait on it and share its record.
+        """
+        # Shared by cache, template and prompt
+        concept = profile_concept(request.text, request.quality.value, request.num_parts)
 
         with tracer.start_as_current_span("cache_lookup"):
-            cached = await self._cache.get(request.text)
-        if cached is not None:
-            cached.cached = True
-            cached.generation_time_ms = int((time.perf_counter() - start) * 1000)
-            parent_span.set_attribute("cached", True)
-            parent_span.set_attribute("pipeline_used", "cache")
+            record = self._cache.peek_record(concept, prepare_json=prepare_json)
+            alias = (
+                self._cache.peek_alias_record(concept, prepare_json=prepare_json)
+                if record is None and _aliasable(concept, request)
+                else None
+            )
+        if alias is not None:
+            record, alias_of = alias
+            self._record_cache_hit(span, alias_of)
+            return record, True, alias_of
+        if record is not None:
+            self._record_cache_hit(span)
+            return record, True, None
+
+        flight = self._flights.do(
+            concept.cache_key,
+            lambda: self._fetch_or_generate(request, concept, span, start, client, prepare_json),
+            priority=request.priority,
+        )
+        if disconnected is not None:
+            flight = self._until_disconnected(flight, disconnected, request.text)
+        (record, cached, alias_of), shared = await flight
+        span.set_attribute("cached", cached)
+        if shared:
+            span.set_attribute("coalesced", True)
             if self._metrics:
-                self._metrics.record_request("cache", 0, cached=True)
-            return cached
-        parent_span.set_attribute("cached", False)
+                elapsed = (time.perf_counter() - start) * 1000
+                self._metrics.record_coalesced(elapsed, cached=cached)
+        return record, cached, alias_of
+
+    async def _fetch_or_generate(
+        self,
+        request: GenerateRequest,
+        concept: ConceptAnalysis,
+        span: trace.Span,
+        start: float,
+        client: str,
+        prepare_json: bool,
+    ) -> tuple[ShapeRecord, bool, str | None]:
+        """Single-flight body: slower cache tiers, near-synonyms, then GPU generation."""
+        aliasable = _aliasable(concept, request)
+        with tracer.start_as_current_span("cache_lookup"):
+            record = await self._cache.get_record(
+                concept, prepare_json=prepare_json, count_miss=not aliasable
+            )
+            alias = (
+                await self._cache.get_alias_record(concept, prepare_json=prepare_json)
+                if record is None and aliasable
+                else None
+            )
+        if alias is not None:
+            record, alias_of = alias
+            self._record_cache_hit(span, alias_of)
+            return record, True, alias_of
+        if record is not None:
+            self._record_cache_hit(span)
+            return record, True, None
+        span.set_attribute("cached", False)
+        # _generate_uncached fills the memory tier before this flight ends
+        response = await self._generate_uncached(request, concept, span, start, client)
+        return ShapeRecord.from_response(response), False, None
+
+    async def _until_disconnected(
+        self,
+        work: "Awaitable[tuple[Any, bool]]",
+        disconnected: "Callable[[], Awaitable[bool]]",
+        text: str,
+    ) -> tuple[Any, bool]:
+        """Await ``work``, cancelling it if the client goes away meanwhile."""
+        task = asyncio.ensure_future(work)
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=self._settings.disconnect_poll_seconds)
+                if done:
+                    return task.result()
+                if await disconnected():
+                    break
+        finally:
+            task.cancel()  # No-op once done; also covers this waiter being cancelled
+        logger.info("client_disconnected", text=text)
+        raise GenerationCancelledError(text, "client disconnected")
+
+    def _record_cache_hit(self, span: trace.Span, alias_of: str | None = None) -> None:
+        span.set_attribute("cached", True)
+        span.set_attribute("pipeline_used", "cache")
+        if alias_of is not None:
+            span.set_attribute("alias_of", alias_of)
+        if self._metrics:
+            self._metrics.record_request("cache", 0, cached=True)
+
+    async def _generate_uncached(
+        self,
+        request: GenerateRequest,
+        concept: ConceptAnalysis,
+        parent_span: trace.Span,
+        start: float,
+        client: str = "",
+    ) -> GenerateResponse:
+        """Cache miss: rate-limit and queue admission, GPU generation, cache write."""
 
         # Inner rate limit protects GPU cost (separate from outer HTTP DoS limit)
         if self._metrics:
@@ -88,38 +448,71 @@ class PipelineOrchestrator:
                     retry_after=retry_after,
                 )
                 raise GenerationRateLimitError(gen_limit, retry_after)
-        template = get_template(request.text)
-        logger.info(
-            "generating",
-            text=request.text,
-            template=template.template_type,
-            parts=template.num_parts,
-        )
+        # Coalesced callers may already have raised the flight's priority
+        key = concept.cache_key
+        priority = self._flights.priority(key) or request.priority
+        # The device is leased before admission, so the queue admitted against
+        # is the one the generation waits in
+        with self._registry.route(_PRIMARY_MODELS) as device:
+            try:
+                self._scheduler.admit(priority, device)
+            except GPUQueueFullError:
+                logger.warning(
+                    "gpu_queue_full",
+                    text=request.text,
+                    priority=priority.value,
+                    device=device,
+                    estimated_wait_s=round(
+                        self._scheduler.device(device).estimated_wait(priority), 1
+                    ),
+                )
+                raise
+            self._flights.on_promote(key, lambda p: self._promote(key, p, device))
+            template = concept.template
+            profile = get_profile(request.quality)
+            parent_span.set_attribute("profile", profile.name)
+            logger.info(
+                "generating",
+                text=request.text,
+                template=template.template_type,
+                parts=template.num_parts,
+                profile=profile.name,
+            )
 
-        # Generate with timeout + GPU error recovery
-        try:
-            positions, part_ids, part_names, pipeline_used = await asyncio.wait_for(
-                self._run_in_executor(request.text, template),
-                timeout=self._settings.generation_timeout_seconds,
+            # Generate with timeout + GPU error recovery
+            token = CancellationToken(request.text)
+            deadline = Deadline.after(self._settings.generation_timeout_seconds)
+            generation = _Generation(
+                concept, token=token, profile=profile, deadline=deadline, device=device
             )
-        except TimeoutError:
-            raise GenerationTimeoutError(
-                request.text, self._settings.generation_timeout_seconds
-            ) from None
-        except Exception as e:
-            # Catch CUDA OOM directly — more precise than string matching
-            _is_oom = False
             try:
-                import torch
+                positions, part_ids, part_names, pipeline_used = await asyncio.wait_for(
+                    self._run_scheduled(generation, request, client, parent_span),
+                    timeout=self._settings.generation_timeout_seconds,
+                )
+            except TimeoutError:
+                token.cancel("timeout")
+                raise GenerationTimeoutError(
+                    request.text, self._settings.generation_timeout_seconds
+                ) from None
+            except asyncio.CancelledError:
+                # Every waiter is gone (single-flight cancels the shared work)
+                token.cancel("disconnected")
+                raise
+            except Exception as e:
+                # Catch CUDA OOM directly — more precise than string matching
+                _is_oom = False
+                try:
+                    import torch
 
-                if isinstance(e, torch.cuda.OutOfMemoryError):
-                    torch.cuda.empty_cache()
-                    _is_oom = True
-            except ImportError:
-                pass
-            if _is_oom:
-                raise GPUOutOfMemoryError() from e
-            raise GenerationFailedError(request.text, str(e)) from e
+                    if isinstance(e, torch.cuda.OutOfMemoryError):
+                        torch.cuda.empty_cache()
+                        _is_oom = True
+                except ImportError:
+                    pass
+                if _is_oom:
+                    raise GPUOutOfMemoryError() from e
+                raise GenerationFailedError(request.text, str(e)) from e
 
         elapsed = int((time.perf_counter() - start) * 1000)
         bbox = compute_bbox(positions)
@@ -135,15 +528,18 @@ class PipelineOrchestrator:
             pipeline=pipeline_used,
         )
 
-        async def _write_cache() -> None:
+        # Memory + disk now; the storage upload is queued (write-behind). A
+        # result degraded to meet the deadline is served but not cached, so the
+        # next miss gets another chance at the full-quality shape
+        if generation.degraded:
+            logger.info("cache_write_skipped_degraded", text=request.text)
+        else:
             try:
                 with tracer.start_as_current_span("cache_write"):
-                    await self._cache.set(request.text, response)
+                    await self._cache.set(concept, response)
             except Exception:
                 logger.warning("cache_write_failed", text=request.text, exc_info=True)
 
-        asyncio.create_task(_write_cache())
-
         parent_span.set_attribute("pipeline_used", pipeline_used)
         parent_span.set_attribute("latency_ms", elapsed)
 
@@ -158,44 +554,184 @@ class PipelineOrchestrator:
             self._metrics.record_request(pipeline_used, elapsed, cached=False)
         return response
 
+    async def _run_scheduled(
+        self,
+        generation: "_Generation",
+        request: GenerateRequest,
+        client: str,
+        span: trace.Span,
+    ) -> tuple[np.ndarray, np.ndarray, list[str], str]:
+        """Wait for a slot of the generation's device in its flight's priority
+        class, then generate there."""
+        device = generation.device
+        if device is not None:
+            span.set_attribute("device", device)
+        key = generation.concept.cache_key
+        priority = self._flights.priority(key) or request.priority
+        async with self._scheduler.slot(priority, client, device, job=key) as waited_s:
+            span.set_attribute("gpu_queue_wait_ms", round(waited_s * 1000, 1))
+            self._publish(key, "gpu_slot")
+            return await self._run_in_executor(generation)
+
+    def _promote(self, key: str, priority: RequestPriority, device: str | None) -> None:
+        """A more important request joined ``key``'s flight: move its queued job up."""
+        if self._scheduler.promote(key, priority, device):
+            logger.info("gpu_job_promoted", key=key, priority=priority.value, device=device)
+
+    def _stages(self, device: str | None) -> StagePipeline:
+        """``device``'s image → mesh → post-process stage pipeline, started on first use.
+
+        Each device has its own stage workers on its own GPU executor, so a
+        backed-up device never occupies the workers another one needs.
+        """
+        stages = self._stage_pipelines.get(device)
+        if stages is None:
+            gpu = self._executors.gpu_for(device) if self._executors else None
+            cpu = self._executors.cpu if self._executors else None
+            settings = self._settings
+            image_stage = (
+                self._batched_image_stage
+                if settings.image_batch_max_size > 1
+                else self._image_stage
+            )
+            stages = self._stage_pipelines[device] = StagePipeline(
+                [
+                    Stage("image", image_stage, settings.stage_image_workers, gpu),
+                    Stage("mesh", self._mesh_stage, settings.stage_mesh_workers, gpu),
+                    Stage("post", self._post_stage, settings.stage_post_workers, cpu),
+                ],
+                queue_size=settings.stage_queue_size,
+                on_abandoned=self._record_abandoned,
+                on_stage_done=lambda stage, generation: self._publish(
+                    generation.concept.cache_key, stage
+                ),
+            )
+        return stages
+
     async def _run_in_executor(
-        self, text: str, template: TemplateInfo
+        self, generation: "_Generation"
     ) -> tuple[np.ndarray, np.ndarray, list[str], str]:
-        """Run synchronous GPU work in a thread to avoid blocking the event loop."""
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self._generate_sync, text, template)
+        """Run the generation stages off the event loop.
+
+        GPU stages use the device's GPU executor and post-processing the CPU
+        pool, so storage I/O never queues behind them and concurrent misses
+        overlap: request N is sampled while request N+1's mesh is generated.
+        """
+        stages = self._stages(generation.device)
+        result: tuple[np.ndarray, np.ndarray, list[str], str] = await stages.submit(generation)
+        return result
+
+    def _record_abandoned(self, generation: "_Generation") -> None:
+        """A generation left the stages after its caller was gone."""
+        reason = generation.token.reason if generation.token is not None else ""
+        logger.info(
+            "generation_abandoned",
+            text=generation.concept.text,
+            reason=reason,
+            wasted_gpu_s=round(generation.gpu_seconds, 3),
+        )
+        if self._metrics:
+            self._metrics.record_cancelled(generation.gpu_seconds)
+
+    async def close(self) -> None:
+        """Stop the stage workers (shutdown)."""
+        for stages in self._stage_pipelines.values():
+            await stages.close()
 
     def _generate_sync(
-        self, text: str, template: TemplateInfo
+        self,
+        concept: ConceptAnalysis,
+        reference_image: "PIL.Image.Image | None" = None,
+        image_ms: float = 0.0,
+        token: CancellationToken | None = None,
+        profile: PipelineProfile = DEFAULT_PROFILE,
+        deadline: Deadline | None = None,
+        device: str | None = None,
     ) -> tuple[np.ndarray, np.ndarray, list[str], str]:
-        """Synchronous GPU pipeline. Primary: SDXL+PartCrafter. Fallback: Hunyuan3D+Grounded SAM."""
-        total_points = self._settings.max_points
+        """Synchronous GPU pipeline. Primary: SDXL+PartCrafter. Fallback: Hunyuan3D+Grounded SAM.
+
+        The stages run back-to-back in the calling thread; ``reference_image``
+        skips the image stage. Cancelling ``token`` stops the run at the next
+        stage boundary or denoising step with GenerationCancelledError. Steps
+        that cannot finish before ``deadline`` are skipped or downgraded.
+        Models are ``device``'s replicas (None = any).
+        """
+        generation = _Generation(
+            concept,
+            image=reference_image,
+            image_ms=image_ms,
+            token=token,
+            profile=profile,
+            deadline=deadline,
+            device=device,
+        )
+        return self._post_stage(self._mesh_stage(self._image_stage(generation)))
+
+    # ── Stages ──────────────────────────────────────────────────────────────
 
-        # Canonical prompt
-        prompt = get_canonical_prompt(text, template.template_type)
-        logger.info("canonical_prompt", prompt=prompt)
+    async def _batched_image_stage(self, generation: "_Generation") -> "_Generation":
+        """Image stage via the SDXL micro-batcher (on the loop; it batches across jobs)."""
+        if self._registry.has("sdxl_turbo", generation.device):
+            if generation.token is not None:
+                generation.token.raise_if_cancelled()
+            t0 = time.perf_counter()
+            try:
+                generation.image = await self._batcher(generation.device).generate(
+                    generation.concept.prompt, generation.token
+                )
+            finally:
+                elapsed = time.perf_counter() - t0
+                generation.gpu_seconds += elapsed
+            generation.image_ms = round(elapsed * 1000, 1)
+        return self._image_stage(generation)
 
-        pipeline_used = "mock"
-        reference_image = None
+    @_gpu_stage
+    def _image_stage(self, generation: "_Generation") -> "_Generation":
+        """SDXL Turbo reference image, unless one was already generated."""
+        concept = generation.concept
+        logger.info("canonical_prompt", prompt=concept.prompt)
 
-        if self._registry.has("sdxl_turbo"):
-            sdxl = self._registry.get("sdxl_turbo")
+        if generation.image is None and self._registry.has("sdxl_turbo", generation.device):
+            sdxl = self._registry.get("sdxl_turbo", generation.device)
             t0 = time.perf_counter()
-            reference_image = sdxl.generate(prompt)
-            image_ms = round((time.perf_counter() - t0) * 1000, 1)
+            generation.image = sdxl.generate(concept.prompt)
+            generation.image_ms = round((time.perf_counter() - t0) * 1000, 1)
+        if generation.image is not None:
             logger.info(
                 "sdxl_image_generated",
-                size=f"{reference_image.width}x{reference_image.height}",
-                text=text,
-                time_ms=image_ms,
+                size=f"{generation.image.width}x{generation.image.height}",
+                text=concept.text,
+                time_ms=generation.image_ms,
             )
-            pipeline_used = "sdxl_turbo+mock"
+            generation.pipeline = "sdxl_turbo+mock"
+        return generation
 
-        if reference_image is not None and self._registry.has("partcrafter"):
-            partcrafter = self._registry.get("partcrafter")
+    @_gpu_stage
+    def _mesh_stage(self, generation: "_Generation") -> "_Generation":
+        """PartCrafter part meshes; Hunyuan3D + Grounded SAM labeled mesh on failure."""
+        reference_image = generation.image
+        if reference_image is None:
+            return generation
+        text, template = generation.concept.text, generation.concept.template
+        template_type = template.template_type
+        profile = generation.profile
+        settings = self._partcrafter_settings(generation)
+
+        if settings is not None:
+            partcrafter = self._registry.get("partcrafter", generation.device)
             t0 = time.perf_counter()
-            part_meshes = partcrafter.generate(reference_image, num_parts=template.num_parts)
-            mesh_ms = round((time.perf_counter() - t0) * 1000, 1)
+            part_meshes = partcrafter.generate(
+                reference_image,
+                num_parts=template.num_parts,
+                num_steps=settings.num_steps,
+                num_tokens=settings.num_tokens,
+                guidance_scale=settings.guidance_scale,
+            )
+            elapsed = time.perf_counter() - t0
+            generation.mesh_ms = round(elapsed * 1000, 1)
+            self._planner.observe(
+                "partcrafter", template_type, elapsed, work=settings.partcrafter_work
+            )
 
             real_count = sum(1 for m in part_meshes if len(m.vertices) > 1)
 
@@ -212,127 +748,239 @@ class PipelineOrchestrator:
             if not valid_meshes:
                 logger.error("partcrafter_all_meshes_failed", text=text)
             else:
-                t1 = time.perf_counter()
-                positions, part_ids = sample_from_part_meshes(
-                    valid_meshes, total_points=total_points
-                )
-                sample_ms = round((time.perf_counter() - t1) * 1000, 1)
+                generation.part_meshes = valid_meshes
+                generation.total_parts = len(part_meshes)
+                return generation
+
+        if not profile.allow_fallback:
+            logger.info("fallback_skipped", text=text, profile=profile.name)
+            return generation
 
-                part_names = template.part_names[: len(valid_meshes)]
-                pipeline_used = "partcrafter"
+        # Fallback: Hunyuan3D + Grounded SAM (lazy-loaded), within its own time cap
+        fallback_timeout = getattr(self._settings, "fallback_timeout_seconds", 120)
+        deadline = (
+            generation.deadline.capped(fallback_timeout)
+            if generation.deadline is not None
+            else Deadline.after(fallback_timeout)
+        )
+        if not self._fits(generation, "hunyuan3d", deadline):
+            return generation
+        try:
+            fallback_t0 = time.perf_counter()
+
+            from app.models.grounded_sam import GroundedSAM2Model
+            from app.models.hunyuan3d import Hunyuan3DTurboModel
+
+            device = generation.device or "cuda"
+            hunyuan = self._registry.get_or_load(
+                "hunyuan3d_turbo",
+                lambda: Hunyuan3DTurboModel(device=device),
+                device=generation.device,
+            )
+            grounded_sam = self._registry.get_or_load(
+                "grounded_sam2",
+                lambda: GroundedSAM2Model(device=device),
+                device=generation.device,
+            )
 
-                logger.info(
-                    "primary_pipeline_complete",
+            step_a_t0 = time.perf_counter()
+            mesh = hunyuan.generate(reference_image)
+            self._planner.observe("hunyuan3d", template_type, time.perf_counter() - step_a_t0)
+            raise_if_cancelled()
+            step_a_ms = round((time.perf_counter() - fallback_t0) * 1000, 1)
+
+            if (time.perf_counter() - fallback_t0) > fallback_timeout:
+                logger.warning(
+                    "fallback_timeout",
                     text=text,
-                    real_parts=real_count,
-                    total_parts=len(part_meshes),
-                    image_ms=image_ms,
-                    mesh_ms=mesh_ms,
-                    sample_ms=sample_ms,
+                    elapsed_s=round(time.perf_counter() - fallback_t0, 1),
                 )
+                raise TimeoutError("Fallback pipeline exceeded timeout")
+
+            # Out of time for labels: every face is part 0 (map_masks_to_faces)
+            step_b_t0 = time.perf_counter()
+            view_results: list[tuple[PIL.Image.Image, np.ndarray]] = []
+            if self._fits(generation, "render", deadline):
+                view_results = render_multiview_with_id_pass(mesh)
+                self._planner.observe("render", template_type, time.perf_counter() - step_b_t0)
+            step_b_ms = round((time.perf_counter() - step_b_t0) * 1000, 1)
+
+            step_c_t0 = time.perf_counter()
+            views_for_mapping = []
+            for color_img, face_id_map in view_results:
+                raise_if_cancelled()
+                if not self._fits(generation, "segment", deadline):
+                    break  # Label from the views segmented so far
+                view_t0 = time.perf_counter()
+                masks = grounded_sam.segment(color_img, template.part_names)
+                self._planner.observe("segment", template_type, time.perf_counter() - view_t0)
+                views_for_mapping.append((masks, face_id_map))
+            step_c_ms = round((time.perf_counter() - step_c_t0) * 1000, 1)
 
-                return positions, part_ids, part_names, pipeline_used
+            step_d_t0 = time.perf_counter()
+            face_centroids = mesh.triangles_center
+            face_labels = map_masks_to_faces(
+                views_for_mapping,
+                face_centroids,
+                part_names=template.part_names,
+            )
+            step_d_ms = round((time.perf_counter() - step_d_t0) * 1000, 1)
+
+            generation.mesh, generation.face_labels = mesh, face_labels
+
+            fallback_total_ms = round((time.perf_counter() - fallback_t0) * 1000, 1)
+            logger.info(
+                "fallback_pipeline_complete",
+                text=text,
+                mesh_gen_ms=step_a_ms,
+                render_ms=step_b_ms,
+                segment_ms=step_c_ms,
+                mask_map_ms=step_d_ms,
+                total_ms=fallback_total_ms,
+                vertices=len(mesh.vertices),
+                faces=len(mesh.faces),
+            )
 
-        # Fallback: Hunyuan3D + Grounded SAM (lazy-loaded)
-        if reference_image is not None:
+            # Offload fallback models if VRAM > 80GB to prevent OOM
             try:
-                fallback_t0 = time.perf_counter()
+                import torch
 
-                from app.models.grounded_sam import GroundedSAM2Model
-                from app.models.hunyuan3d import Hunyuan3DTurboModel
+                if torch.cuda.is_available() and device.startswith("cuda"):
+                    allocated_gb = torch.cuda.memory_allocated(device) / 1e9
+                    threshold = self._settings.vram_offload_threshold_gb
+                    if allocated_gb > threshold:
+                        logger.info(
+                            "vram_offload_triggered",
+                            allocated_gb=round(allocated_gb, 1),
+                            device=device,
+                        )
+                        self._registry.unload("hunyuan3d_turbo", generation.device)
+                        self._registry.unload("grounded_sam2", generation.device)
+            except ImportError:
+                pass
 
-                hunyuan = self._registry.get_or_load(
-                    "hunyuan3d_turbo",
-                    lambda: Hunyuan3DTurboModel(device="cuda"),
-                )
-                grounded_sam = self._registry.get_or_load(
-                    "grounded_sam2",
-                    lambda: GroundedSAM2Model(device="cuda"),
-                )
+        except GenerationCancelledError:
+            raise
+        except Exception as e:
+            # Check for CUDA OOM — re-raise for caller's OOM handler
+            try:
+                import torch
 
-                mesh = hunyuan.generate(reference_image)
-                step_a_ms = round((time.perf_counter() - fallback_t0) * 1000, 1)
+                if isinstance(e, torch.cuda.OutOfMemoryError):
+                    raise
+            except ImportError:
+                pass
+            logger.warning(
+                "fallback_pipeline_failed",
+                text=text,
+                error=str(e),
+            )
+        return generation
 
-                fallback_timeout = getattr(self._settings, "fallback_timeout_seconds", 120)
-                if (time.perf_counter() - fallback_t0) > fallback_timeout:
-                    logger.warning(
-                        "fallback_timeout",
-                        text=text,
-                        elapsed_s=round(time.perf_counter() - fallback_t0, 1),
-                    )
-                    raise TimeoutError("Fallback pipeline exceeded timeout")
+    def _batcher(self, device: str | None) -> ImageBatcher:
+        """The SDXL micro-batcher for ``device``'s replica, created on first use."""
+        batcher = self._batchers.get(device)
+        if batcher is None:
+            batcher = self._batchers[device] = ImageBatcher(
+                lambda: self._registry.get("sdxl_turbo", device),
+                max_batch=self._settings.image_batch_max_size,
+                window_ms=self._settings.image_batch_window_ms,
+                executor=self._executors.gpu_for(device) if self._executors else None,
+                metrics=self._metrics,
+            )
+        return batcher
 
-                step_b_t0 = time.perf_counter()
-                view_results = render_multiview_with_id_pass(mesh)
-                step_b_ms = round((time.perf_counter() - step_b_t0) * 1000, 1)
-
-                step_c_t0 = time.perf_counter()
-                views_for_mapping = []
-                for color_img, face_id_map in view_results:
-                    masks = grounded_sam.segment(color_img, template.part_names)
-                    views_for_mapping.append((masks, face_id_map))
-                step_c_ms = round((time.perf_counter() - step_c_t0) * 1000, 1)
-
-                step_d_t0 = time.perf_counter()
-                face_centroids = mesh.triangles_center
-                face_labels = map_masks_to_faces(
-                    views_for_mapping,
-                    face_centroids,
-                    part_names=template.part_names,
-                )
-                step_d_ms = round((time.perf_counter() - step_d_t0) * 1000, 1)
+    def _partcrafter_settings(self, generation: "_Generation") -> PipelineProfile | None:
+        """The generation's profile, or the costliest cheaper one whose PartCrafter
+        run fits its deadline; None to skip PartCrafter (or if it isn't loaded)."""
+        if not self._registry.has("partcrafter", generation.device):
+            return None
+        profile = generation.profile
+        candidates = sorted(
+            (p for p in PROFILES.values() if p.partcrafter_work < profile.partcrafter_work),
+            key=lambda p: p.partcrafter_work,
+            reverse=True,
+        )
+        for candidate in (profile, *candidates):
+            if self._planner.fits(
+                "partcrafter",
+                generation.concept.template.template_type,
+                generation.deadline,
+                work=candidate.partcrafter_work,
+            ):
+                if candidate is not profile:
+                    self._record_degraded(generation, "partcrafter", to=candidate.name)
+                return candidate
+        self._record_degraded(generation, "partcrafter", to="skip")
+        return None
 
-                positions, part_ids = sample_from_labeled_mesh(
-                    mesh, face_labels, total_points=total_points
-                )
-                pipeline_used = "hunyuan3d_grounded_sam"
+    def _fits(self, generation: "_Generation", step: str, deadline: Deadline) -> bool:
+        """Whether ``step`` can finish before ``deadline``; records the skip if not."""
+        template_type = generation.concept.template.template_type
+        if self._planner.fits(step, template_type, deadline):
+            return True
+        self._record_degraded(generation, step, to="skip", deadline=deadline)
+        return False
 
-                fallback_total_ms = round((time.perf_counter() - fallback_t0) * 1000, 1)
-                logger.info(
-                    "fallback_pipeline_complete",
-                    text=text,
-                    mesh_gen_ms=step_a_ms,
-                    render_ms=step_b_ms,
-                    segment_ms=step_c_ms,
-                    mask_map_ms=step_d_ms,
-                    total_ms=fallback_total_ms,
-                    vertices=len(mesh.vertices),
-                    faces=len(mesh.faces),
-                )
+    def _record_degraded(
+        self,
+        generation: "_Generation",
+        step: str,
+        *,
+        to: str,
+        deadline: Deadline | None = None,
+    ) -> None:
+        deadline = deadline or generation.deadline
+        estimate = self._planner.estimate(step, generation.concept.template.template_type)
+        logger.warning(
+            "deadline_degraded",
+            text=generation.concept.text,
+            step=step,
+            to=to,
+            estimate_s=round(estimate, 2) if estimate is not None else None,
+            remaining_s=round(deadline.remaining(), 2) if deadline is not None else None,
+        )
+        generation.degraded = True
+        self._planner.record_degraded(step)
 
-                # Offload fallback models if VRAM > 80GB to prevent OOM
-                try:
-                    import torch
+    def _post_stage(
+        self, generation: "_Generation"
+    ) -> tuple[np.ndarray, np.ndarray, list[str], str]:
+        """CPU: sample points from the stage outputs (procedural sphere if none)."""
+        if generation.token is not None:
+            generation.token.raise_if_cancelled()
+        total_points = generation.profile.max_points or self._settings.max_points
+        text, template = generation.concept.text, generation.concept.template
 
-                    if torch.cuda.is_available():
-                        allocated_gb = torch.cuda.memory_allocated() / 1e9
-                        threshold = self._settings.vram_offload_threshold_gb
-                        if allocated_gb > threshold:
-                            logger.info(
-                                "vram_offload_triggered",
-                                allocated_gb=round(allocated_gb, 1),
-                            )
-                            self._registry.unload("hunyuan3d_turbo")
-                            self._registry.unload("grounded_sam2")
-                except ImportError:
-                    pass
+        if generation.part_meshes is not None:
+            t1 = time.perf_counter()
+            positions, part_ids = sample_from_part_meshes(
+                generation.part_meshes, total_points=total_points
+            )
+            sample_ms = round((time.perf_counter() - t1) * 1000, 1)
 
-                return positions, part_ids, template.part_names, pipeline_used
+            part_names = template.part_names[: len(generation.part_meshes)]
 
-            except Exception as e:
-                # Check for CUDA OOM — re-raise for caller's OOM handler
-                try:
-                    import torch
+            logger.info(
+                "primary_pipeline_complete",
+                text=text,
+                real_parts=len(generation.part_meshes),
+                total_parts=generation.total_parts,
+                image_ms=generation.image_ms,
+                mesh_ms=generation.mesh_ms,
+                sample_ms=sample_ms,
+            )
 
-                    if isinstance(e, torch.cuda.OutOfMemoryError):
-                        raise
-                except ImportError:
-                    pass
-                logger.warning(
-                    "fallback_pipeline_failed",
-                    text=text,
-                    error=str(e),
+            return positions, part_ids, part_names, "partcrafter"
+
+        if generation.mesh is not None:
+            try:
+                positions, part_ids = sample_from_labeled_mesh(
+                    generation.mesh, generation.face_labels, total_points=total_points
                 )
+                return positions, part_ids, template.part_names, "hunyuan3d_grounded_sam"
+            except Exception as e:
+                logger.warning("fallback_pipeline_failed", text=text, error=str(e))
 
         # Final fallback: procedural sphere if all pipelines fail
         logger.warning("all_pipelines_failed_using_mock", text=text)
@@ -352,4 +1000,42 @@ class PipelineOrchestrator:
         positions, _ = normalize_positions(positions)
         part_ids = rng.integers(0, template.num_parts, total_points).astype(np.uint8)
 
-        return positions, part_ids, template.part_names, pipeline_used
+        return positions, part_ids, template.part_names, generation.pipeline
+
+
+def _event(event: str, data: bytes | None = None, **fields: Any) -> bytes:
+    """One NDJSON stream line; ``data`` is spliced in as pre-serialized JSON."""
+    line = json.dumps({"event": event, **fields}, separators=(",", ":")).encode()
+    if data is not None:
+        line = line[:-1] + b',"data":' + data + b"}"
+    return line + b"\n"
+
+
+def _ms_since(start: float) -> int:
+    return int((time.perf_counter() - start) * 1000)
+
+
+def _aliasable(concept: ConceptAnalysis, request: GenerateRequest) -> bool:
+    """Near-synonyms are cached under default-profile keys only."""
+    return concept.cache_key == analyze_concept(request.text).cache_key
+
+
+@dataclass
+class _Generation:
+    """One cache miss moving through the stages; each stage fills in its part."""
+
+    concept: ConceptAnalysis
+    image: "PIL.Image.Image | None" = None  # SDXL reference image
+    image_ms: float = 0.0
+    part_meshes: "list[trimesh.Trimesh] | None" = None  # Primary: PartCrafter parts
+    total_parts: int = 0
+    mesh_ms: float = 0.0
+    mesh: "trimesh.Trimesh | None" = None  # Fallback: Hunyuan3D mesh + face labels
+    face_labels: np.ndarray | None = None
+    pipeline: str = "mock"  # Used when no mesh could be produced
+    token: CancellationToken | None = None  # Cancelled when no caller is left
+    gpu_seconds: float = 0.0  # Time spent in GPU stages (wasted if abandoned)
+    profile: PipelineProfile = DEFAULT_PROFILE  # Model settings, fallback, point count
+    deadline: Deadline | None = None  # Steps that cannot finish by then are skipped
+    device: str | None = None  # Device whose model replicas run it (None = any)
+    degraded: bool = False  # A step was downgraded or skipped for the deadline
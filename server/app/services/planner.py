@@ -0,0 +1,96 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Stage planner — request deadlines and per-template stage latency estimates
+# ─────────────────────────────────────────────────────────────────────────────
+# A miss has GENERATION_TIMEOUT_SECONDS from the moment it is admitted, queue
+# wait included. That budget travels with the generation as a Deadline, and
+# before each expensive step (PartCrafter, Hunyuan3D, multi-view render,
+# Grounded SAM per view) the orchestrator asks the planner whether the step's
+# estimated time still fits. If not, it degrades right away to a cheaper path
+# (fewer PartCrafter steps, no fallback, fewer or no segmentation views)
+# instead of spending the GPU time and timing out anyway.
+#
+# Estimates are EWMAs of observed step times per (step, template type), with
+# a per-step EWMA across all templates until a template has its own. A step
+# that has never been observed always fits: the planner only degrades on
+# evidence. Thread-safe: GPU stages observe from executor threads.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+_LATENCY_ALPHA = 0.2  # EWMA weight of the newest observation
+_ANY_TEMPLATE = "*"
+
+
+@dataclass(frozen=True, slots=True)
+class Deadline:
+    """The ``time.perf_counter()`` instant a generation must be done by."""
+
+    at: float
+
+    @classmethod
+    def after(cls, seconds: float) -> Deadline:
+        return cls(time.perf_counter() + seconds)
+
+    def remaining(self) -> float:
+        """Seconds left (0.0 once passed)."""
+        return max(self.at - time.perf_counter(), 0.0)
+
+    def capped(self, seconds: float) -> Deadline:
+        """This deadline, or ``seconds`` from now if that is sooner."""
+        return Deadline(min(self.at, time.perf_counter() + seconds))
+
+
+class StagePlanner:
+    """Decides whether a pipeline step can finish before a deadline."""
+
+    def __init__(self, margin: float = 1.2) -> None:
+        self.margin = margin  # Required headroom: estimate × margin <= remaining
+        self._lock = threading.Lock()
+        self._estimates: dict[tuple[str, str], float] = {}  # (step, template) → s per unit
+        self._degraded: dict[str, int] = {}  # step → times skipped or downgraded
+
+    def observe(self, step: str, template_type: str, seconds: float, work: float = 1.0) -> None:
+        """Record a step's duration; ``work`` scales it (e.g. fewer diffusion steps)."""
+        per_unit = seconds / work
+        with self._lock:
+            for key in ((step, template_type), (step, _ANY_TEMPLATE)):
+                previous = self._estimates.get(key, per_unit)
+                self._estimates[key] = previous + _LATENCY_ALPHA * (per_unit - previous)
+
+    def estimate(self, step: str, template_type: str, work: float = 1.0) -> float | None:
+        """Expected seconds for the step, or None if it was never observed."""
+        with self._lock:
+            per_unit = self._estimates.get((step, template_type))
+            if per_unit is None:
+                per_unit = self._estimates.get((step, _ANY_TEMPLATE))
+        return None if per_unit is None else per_unit * work
+
+    def fits(
+        self, step: str, template_type: str, deadline: Deadline | None, work: float = 1.0
+    ) -> bool:
+        """True if the step should start: no deadline, no estimate, or enough time left."""
+        if deadline is None:
+            return True
+        estimate = self.estimate(step, template_type, work)
+        return estimate is None or estimate * self.margin <= deadline.remaining()
+
+    def record_degraded(self, step: str) -> None:
+        with self._lock:
+            self._degraded[step] = self._degraded.get(step, 0) + 1
+
+    def stats(self) -> dict[str, Any]:
+        """Estimates per step and template ("*" = all templates) and degradations."""
+        with self._lock:
+            estimates: dict[str, dict[str, float]] = {}
+            for (step, template_type), seconds in sorted(self._estimates.items()):
+                estimates.setdefault(step, {})[template_type] = round(seconds, 3)
+            return {
+                "margin": self.margin,
+                "estimates_s": estimates,
+                "degraded": dict(self._degraded),
+            }
@@ -0,0 +1,330 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# GPU scheduler — priority queue with per-client fairness in front of the GPU
+# ─────────────────────────────────────────────────────────────────────────────
+# Every cache miss takes one of ``slots`` GPU slots for its generation. When
+# all are taken it queues:
+#   - by priority class: interactive before prefetch before pregenerate
+#   - within a class, round-robin across clients, so one client submitting
+#     many misses cannot starve another's single request
+# Admission is by estimated wait, not a fixed queue length: the jobs queued
+# ahead of a new request, divided by the slots, times the observed slot hold
+# time (EWMA). A miss whose estimate exceeds ``max_wait_s`` is rejected up
+# front (503 + Retry-After) instead of timing out after queueing.
+#
+# A queued job may be promoted to a higher class (promote(), by the job name
+# it was queued under): a coalesced interactive request joining a queued
+# pregenerate generation moves that generation ahead of the other
+# pregenerate work instead of waiting behind it.
+#
+# Slots bound generations in flight, not GPU threads: the GPU executor still
+# serializes inference, and several slots let the SDXL micro-batcher fill.
+#
+# On a multi-GPU box DeviceScheduler gives every device its own GPUScheduler
+# (GPU_SLOTS each), keyed by device name: a generation is routed to a device
+# first and then queues for that device's slots, so one busy device never
+# holds a slot another could use. A miss is admitted on the estimated wait of
+# the device it was routed to, which stays leased until the generation ends.
+# Event-loop confined, like SingleFlight.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Any
+
+from app.exceptions import GPUQueueFullError
+from app.schemas import RequestPriority
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable
+
+    from app.config import Settings
+
+_LATENCY_ALPHA = 0.2  # EWMA weight of the newest slot hold time
+
+
+class GPUScheduler:
+    """Grants GPU slots in priority order, fairly across clients."""
+
+    def __init__(
+        self, slots: int = 4, *, max_wait_s: float = 60.0, initial_latency_s: float = 5.0
+    ) -> None:
+        self.slots = max(slots, 1)
+        self.max_wait_s = max_wait_s
+        self._running = 0
+        # priority → client → that client's waiters, in round-robin order
+        self._queues: dict[RequestPriority, OrderedDict[str, deque[asyncio.Future[None]]]] = {
+            priority: OrderedDict() for priority in RequestPriority
+        }
+        # job → (priority, client, waiter) of a named job still queued
+        self._jobs: dict[str, tuple[RequestPriority, str, asyncio.Future[None]]] = {}
+        self._promoted = 0
+        self._latency_s = initial_latency_s  # Until a generation has been observed
+        self._observed = 0
+        self._waits: deque[float] = deque(maxlen=1000)
+        self._admitted = 0
+        self._rejected = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> GPUScheduler:
+        return cls(settings.gpu_slots, max_wait_s=settings.gpu_queue_max_wait_seconds)
+
+    # ── Admission ───────────────────────────────────────────────────────────
+
+    def queued(self, priority: RequestPriority | None = None) -> int:
+        """Waiters in ``priority``'s class, or in all classes."""
+        classes = [priority] if priority is not None else list(RequestPriority)
+        return sum(len(q) for p in classes for q in self._queues[p].values())
+
+    def estimated_wait(self, priority: RequestPriority = RequestPriority.interactive) -> float:
+        """Seconds a new ``priority`` request would wait for a slot."""
+        ahead = 0
+        for p in RequestPriority:
+            ahead += self.queued(p)
+            if p == priority:
+                break
+        if ahead == 0 and self._running < self.slots:
+            return 0.0
+        return (ahead + 1) / self.slots * self._latency_s
+
+    def admit(self, priority: RequestPriority) -> None:
+        """Raise GPUQueueFullError if the estimated wait is over the limit."""
+        wait = self.estimated_wait(priority)
+        if wait > self.max_wait_s:
+            self._rejected += 1
+            raise GPUQueueFullError(wait, self.max_wait_s)
+        self._admitted += 1
+
+    # ── Slots ───────────────────────────────────────────────────────────────
+
+    @contextlib.asynccontextmanager
+    async def slot(
+        self, priority: RequestPriority, client: str = "", job: str | None = None
+    ) -> AsyncIterator[float]:
+        """Hold one GPU slot for the body; yields the seconds spent queued.
+
+        A ``job`` name lets promote() move the request while it is queued.
+        """
+        t0 = time.perf_counter()
+        await self._acquire(priority, client, job)
+        waited = time.perf_counter() - t0
+        self._waits.append(waited)
+        t1 = time.perf_counter()
+        try:
+            yield waited
+        finally:
+            self._observe(time.perf_counter() - t1)
+            self._release()
+
+    async def _acquire(self, priority: RequestPriority, client: str, job: str | None) -> None:
+        if self._running < self.slots and self.queued() == 0:
+            self._running += 1
+            return
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._queues[priority].setdefault(client, deque()).append(waiter)
+        if job is not None:
+            self._jobs[job] = (priority, client, waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # Granted as we were cancelled: pass the slot on
+            else:
+                if job is not None and job in self._jobs:
+                    priority, client, _ = self._jobs[job]  # Where promote() moved it
+                self._discard(priority, client, waiter)
+            raise
+        finally:
+            if job is not None and job in self._jobs and self._jobs[job][2] is waiter:
+                del self._jobs[job]
+
+    def promote(self, job: str, priority: RequestPriority) -> bool:
+        """Move queued ``job`` into ``priority``'s class, behind that class's
+        waiters from the same client. False if it is not queued here."""
+        entry = self._jobs.get(job)
+        if entry is None or entry[0] == priority or entry[2].done():
+            return False
+        old_priority, client, waiter = entry
+        self._discard(old_priority, client, waiter)
+        self._queues[priority].setdefault(client, deque()).append(waiter)
+        self._jobs[job] = (priority, client, waiter)
+        self._promoted += 1
+        return True
+
+    def _release(self) -> None:
+        """Hand the slot to the next waiter, or free it."""
+        waiter = self._next_waiter()
+        if waiter is None:
+            self._running -= 1
+        else:
+            waiter.set_result(None)  # The slot transfers; _running is unchanged
+
+    def _next_waiter(self) -> asyncio.Future[None] | None:
+        for priority in RequestPriority:
+            clients = self._queues[priority]
+            while clients:
+                client, waiters = next(iter(clients.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    clients.move_to_end(client)  # Round-robin: back of the line
+                else:
+                    del clients[client]
+                if not waiter.done():
+                    return waiter
+        return None
+
+    def _discard(
+        self, priority: RequestPriority, client: str, waiter: asyncio.Future[None]
+    ) -> None:
+        waiters = self._queues[priority].get(client)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._queues[priority][client]
+
+    def _observe(self, seconds: float) -> None:
+        if self._observed == 0:
+            self._latency_s = seconds
+        else:
+            self._latency_s += _LATENCY_ALPHA * (seconds - self._latency_s)
+        self._observed += 1
+
+    # ── Introspection ───────────────────────────────────────────────────────
+
+    def stats(self) -> dict[str, Any]:
+        waits = sorted(self._waits)
+        n = len(waits)
+        return {
+            "slots": self.slots,
+            "running": self._running,
+            "queued": self.queued(),
+            "queued_by_priority": {p.value: self.queued(p) for p in RequestPriority},
+            "avg_latency_s": round(self._latency_s, 3),
+            "estimated_wait_s": round(self.estimated_wait(), 3),
+            "max_wait_s": self.max_wait_s,
+            "wait_p50_s": round(waits[n // 2], 3) if n else 0.0,
+            "wait_p95_s": round(waits[int(n * 0.95)], 3) if n else 0.0,
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "promoted": self._promoted,
+        }
+
+    def snapshot(self) -> dict[str, Any]:
+        """stats() plus the waiting clients per priority class, in service order."""
+        return {
+            **self.stats(),
+            "waiting": {
+                p.value: [
+                    {"client": client, "jobs": len(waiters)}
+                    for client, waiters in self._queues[p].items()
+                ]
+                for p in RequestPriority
+            },
+        }
+
+
+class DeviceScheduler:
+    """One GPUScheduler per device, keyed by device name.
+
+    None (a generation no single device can host) gets its own scheduler
+    on first use.
+    """
+
+    def __init__(
+        self,
+        devices: Iterable[str],
+        slots: int = 4,
+        *,
+        max_wait_s: float = 60.0,
+        initial_latency_s: float = 5.0,
+    ) -> None:
+        self._slots = slots
+        self.max_wait_s = max_wait_s
+        self._initial_latency_s = initial_latency_s
+        self.schedulers: dict[str | None, GPUScheduler] = {
+            device: self._new() for device in devices
+        }
+
+    @classmethod
+    def from_settings(cls, settings: Settings, devices: Iterable[str]) -> DeviceScheduler:
+        """GPU_SLOTS per device, so N devices keep N times the generations in flight."""
+        return cls(devices, settings.gpu_slots, max_wait_s=settings.gpu_queue_max_wait_seconds)
+
+    def _new(self) -> GPUScheduler:
+        return GPUScheduler(
+            self._slots, max_wait_s=self.max_wait_s, initial_latency_s=self._initial_latency_s
+        )
+
+    def device(self, name: str | None) -> GPUScheduler:
+        scheduler = self.schedulers.get(name)
+        if scheduler is None:
+            scheduler = self.schedulers[name] = self._new()
+        return scheduler
+
+    def _shortest(self, priority: RequestPriority) -> GPUScheduler:
+        return min(self.schedulers.values(), key=lambda s: s.estimated_wait(priority))
+
+    def estimated_wait(self, priority: RequestPriority = RequestPriority.interactive) -> float:
+        """Seconds a new ``priority`` request would wait on the least-loaded device."""
+        return self._shortest(priority).estimated_wait(priority)
+
+    def admit(self, priority: RequestPriority, device: str | None) -> None:
+        """Raise GPUQueueFullError if ``device``'s queue is too long for ``priority``."""
+        self.device(device).admit(priority)
+
+    def slot(
+        self,
+        priority: RequestPriority,
+        client: str = "",
+        device: str | None = None,
+        job: str | None = None,
+    ) -> contextlib.AbstractAsyncContextManager[float]:
+        """Hold one of ``device``'s slots; yields the seconds spent queued."""
+        return self.device(device).slot(priority, client, job)
+
+    def promote(self, job: str, priority: RequestPriority, device: str | None) -> bool:
+        """Move ``job``, queued on ``device``, into ``priority``'s class."""
+        return self.device(device).promote(job, priority)
+
+    def stats(self) -> dict[str, Any]:
+        """GPUScheduler.stats() summed over devices, plus each device's own."""
+        per_device = {name: s.stats() for name, s in self.schedulers.items()}
+        waits = sorted(w for s in self.schedulers.values() for w in s._waits)
+        n = len(waits)
+        stats = list(per_device.values())
+        return {
+            "slots": sum(s["slots"] for s in stats),
+            "running": sum(s["running"] for s in stats),
+            "queued": sum(s["queued"] for s in stats),
+            "queued_by_priority": {
+                p.value: sum(s["queued_by_priority"][p.value] for s in stats)
+                for p in RequestPriority
+            },
+            "avg_latency_s": round(sum(s["avg_latency_s"] for s in stats) / len(stats), 3),
+            "estimated_wait_s": round(self.estimated_wait(), 3),
+            "max_wait_s": self.max_wait_s,
+            "wait_p50_s": round(waits[n // 2], 3) if n else 0.0,
+            "wait_p95_s": round(waits[int(n * 0.95)], 3) if n else 0.0,
+            "admitted": sum(s["admitted"] for s in stats),
+            "rejected": sum(s["rejected"] for s in stats),
+            "promoted": sum(s["promoted"] for s in stats),
+            "by_device": {str(name): s for name, s in per_device.items()},
+        }
+
+    def snapshot(self) -> dict[str, Any]:
+        """stats() plus the waiting clients per priority class, per device."""
+        snapshots = {name: s.snapshot()["waiting"] for name, s in self.schedulers.items()}
+        return {
+            **self.stats(),
+            "waiting": {
+                p.value: [
+                    {"device": name, **waiter}
+                    for name, waiting in snapshots.items()
+                    for waiter in waiting[p.value]
+                ]
+                for p in RequestPriority
+            },
+        }
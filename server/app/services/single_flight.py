@@ -0,0 +1,122 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Single-flight — concurrent calls for one key share one in-flight task
+# ─────────────────────────────────────────────────────────────────────────────
+# The first caller (leader) starts the work as a task; later callers await
+# the same task. Every caller gets the same result object or the same
+# exception, and no caller has to re-read a cache after waking (where an
+# eviction in between would turn a shared result into a spurious miss).
+#
+# Callers await through asyncio.shield: one client disconnecting cancels
+# only its own wait, never the shared work the others depend on. When the
+# last waiter for a key gives up, nobody wants the result any more and the
+# shared task itself is cancelled (freeing the GPU for queued work).
+#
+# Callers may pass their request priority. A flight runs at the highest
+# priority among its callers so far: priority() reads it, and on_promote()
+# lets the running work react (e.g. move its queued GPU job up) when a more
+# important caller joins.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+from app.schemas import RequestPriority
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+_RANK = {priority: rank for rank, priority in enumerate(RequestPriority)}  # 0 = most important
+
+
+class SingleFlight:
+    """Per-key table of shared in-flight tasks. Event-loop confined."""
+
+    def __init__(self) -> None:
+        self._tasks: dict[str, asyncio.Task[Any]] = {}
+        self._callers: dict[asyncio.Task[Any], int] = {}  # Task → callers awaiting it
+        self._priorities: dict[str, RequestPriority] = {}  # Key → highest caller priority
+        self._promote_hooks: dict[str, Callable[[RequestPriority], None]] = {}
+        self.leaders = 0  # Calls that started the work
+        self.waiters = 0  # Calls coalesced onto another caller's work
+        self.cancelled = 0  # Shared tasks cancelled because every caller left
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        *,
+        priority: RequestPriority | None = None,
+    ) -> tuple[Any, bool]:
+        """Run ``fn`` once per key among concurrent callers.
+
+        A caller more important than the flight's current priority promotes it.
+
+        Returns:
+            (result, shared) — ``shared`` is True for coalesced waiters.
+        """
+        task = self._tasks.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+            self.leaders += 1
+        else:
+            self.waiters += 1
+        if priority is not None:
+            self._prioritize(key, priority)
+        self._callers[task] = self._callers.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task), shared
+        except asyncio.CancelledError:
+            if self._callers[task] == 1 and not task.done():
+                task.cancel()  # This was the last caller
+                self.cancelled += 1
+            raise
+        finally:
+            self._callers[task] -= 1
+            if not self._callers[task]:
+                del self._callers[task]
+
+    def _prioritize(self, key: str, priority: RequestPriority) -> None:
+        current = self._priorities.get(key)
+        if current is not None and _RANK[priority] >= _RANK[current]:
+            return
+        self._priorities[key] = priority
+        hook = self._promote_hooks.get(key)
+        if current is not None and hook is not None:
+            hook(priority)
+
+    def priority(self, key: str) -> RequestPriority | None:
+        """Highest priority among ``key``'s callers (None if not in flight or not given)."""
+        return self._priorities.get(key)
+
+    def on_promote(self, key: str, hook: Callable[[RequestPriority], None]) -> None:
+        """Call ``hook`` with the new priority whenever a caller promotes ``key``'s flight.
+
+        Registered from inside the flight; dropped when it finishes.
+        """
+        if key in self._tasks:
+            self._promote_hooks[key] = hook
+
+    def _finish(self, key: str, task: asyncio.Task[Any]) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+            self._priorities.pop(key, None)
+            self._promote_hooks.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # Mark retrieved even if every caller went away
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "leaders": self.leaders,
+            "waiters": self.waiters,
+            "cancelled": self.cancelled,
+        }
@@ -0,0 +1,173 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Stage pipeline — concurrent requests overlap across generation stages
+# ─────────────────────────────────────────────────────────────────────────────
+# A generation is image → mesh → post-process. Run back-to-back in one
+# thread per request, the image stage sits idle while PartCrafter runs for
+# the previous request, and the GPU idles while points are sampled on CPU.
+#
+# StagePipeline gives each stage its own workers and a bounded input queue:
+#
+#   submit → [queue] image workers → [queue] mesh workers → [queue] post workers
+#
+# A worker that finishes a job blocks on the next stage's full queue
+# (backpressure), so a slow stage throttles the ones before it instead of
+# piling up images in memory. Jobs whose caller gave up (timeout,
+# disconnect) are dropped at the next stage boundary and free the GPU;
+# ``on_abandoned`` is told about each one (for wasted-work accounting).
+# ``on_stage_done`` reports each job's progress (for streaming responses).
+#
+# Stage functions take and return the job's value. Plain functions run on
+# the stage's executor; coroutine functions (e.g. the SDXL micro-batcher)
+# are awaited on the loop. Event-loop confined, like SingleFlight.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from concurrent.futures import Executor
+
+
+@dataclass
+class Stage:
+    """One step of the pipeline: a function, its worker count and executor."""
+
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+    executor: Executor | None = None  # None = the loop's default executor
+
+    active: int = field(default=0, init=False)
+    completed: int = field(default=0, init=False)
+    failed: int = field(default=0, init=False)
+    busy_seconds: float = field(default=0.0, init=False)
+
+
+@dataclass
+class _Job:
+    value: Any
+    future: asyncio.Future[Any]
+    origin: Any = None  # The submitted value, for on_abandoned
+
+
+class StagePipeline:
+    """Runs jobs through ``stages`` in order, overlapping different jobs."""
+
+    def __init__(
+        self,
+        stages: list[Stage],
+        *,
+        queue_size: int = 8,
+        on_abandoned: Callable[[Any], None] | None = None,
+        on_stage_done: Callable[[str, Any], None] | None = None,
+    ) -> None:
+        if not stages:
+            raise ValueError("StagePipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = max(queue_size, 1)
+        self.abandoned = 0  # Jobs whose caller was gone before they finished
+        self._on_abandoned = on_abandoned
+        self._on_stage_done = on_stage_done  # (stage name, submitted value)
+        self._queues: list[asyncio.Queue[_Job]] = []
+        self._workers: list[asyncio.Task[None]] = []
+
+    def _start(self) -> None:
+        self._queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        for i, stage in enumerate(self.stages):
+            for n in range(max(stage.workers, 1)):
+                task = asyncio.ensure_future(self._work(i))
+                task.set_name(f"stage-{stage.name}-{n}")
+                self._workers.append(task)
+
+    async def submit(self, value: Any) -> Any:
+        """Run ``value`` through every stage; returns the last stage's output.
+
+        Waits for room in the first stage's queue. An exception in any stage
+        is raised here and skips the stages after it.
+        """
+        if not self._workers:
+            self._start()
+        job = _Job(value, asyncio.get_running_loop().create_future(), value)
+        await self._queues[0].put(job)
+        return await job.future
+
+    async def _work(self, index: int) -> None:
+        stage = self.stages[index]
+        queue = self._queues[index]
+        downstream = self._queues[index + 1] if index + 1 < len(self._queues) else None
+        loop = asyncio.get_running_loop()
+        is_async = inspect.iscoroutinefunction(stage.fn)
+        while True:
+            job = await queue.get()
+            if job.future.done():
+                self._abandon(job)  # Caller gave up: skip the remaining stages
+                continue
+            stage.active += 1
+            t0 = time.perf_counter()
+            try:
+                if is_async:
+                    job.value = await stage.fn(job.value)
+                else:
+                    job.value = await loop.run_in_executor(stage.executor, stage.fn, job.value)
+            except Exception as e:
+                stage.failed += 1
+                if job.future.done():
+                    self._abandon(job)
+                else:
+                    job.future.set_exception(e)
+                continue
+            finally:
+                stage.active -= 1
+                stage.busy_seconds += time.perf_counter() - t0
+            stage.completed += 1
+            if self._on_stage_done is not None:
+                self._on_stage_done(stage.name, job.origin)
+            if downstream is not None:
+                await downstream.put(job)  # Blocks while the next stage is backed up
+            elif job.future.done():
+                self._abandon(job)
+            else:
+                job.future.set_result(job.value)
+
+    def _abandon(self, job: _Job) -> None:
+        self.abandoned += 1
+        if self._on_abandoned is not None:
+            self._on_abandoned(job.origin)
+
+    async def close(self) -> None:
+        """Stop the workers. Jobs still queued are cancelled."""
+        for task in self._workers:
+            task.cancel()
+        for task in self._workers:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        for queue in self._queues:
+            while not queue.empty():
+                queue.get_nowait().future.cancel()
+        self._workers = []
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Per stage: workers, queued, active, completed, failed, busy time."""
+        return {
+            stage.name: {
+                "workers": stage.workers,
+                "queued": self._queues[i].qsize() if self._queues else 0,
+                "active": stage.active,
+                "completed": stage.completed,
+                "failed": stage.failed,
+                "busy_seconds": round(stage.busy_seconds, 3),
+                "avg_ms": (
+                    round(stage.busy_seconds / stage.completed * 1000, 1)
+                    if stage.completed
+                    else 0.0
+                ),
+            }
+            for i, stage in enumerate(self.stages)
+        }
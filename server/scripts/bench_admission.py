@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Replay a concept stream through the memory tier: LRU vs W-TinyLFU hit rate.
+
+Usage:
+    uv run python scripts/bench_admission.py
+    uv run python scripts/bench_admission.py --stream concepts.txt
+    uv run python scripts/bench_admission.py --capacities 50 200 1000
+
+--stream is a recorded stream, one request text per line (e.g. extracted
+from "generating"/"cache_hit" log events). Without it a synthetic stream is
+replayed: Zipf-distributed popular concepts interleaved with bursts of
+one-off sentences, the shape of speech-frontend traffic.
+
+Each request is a memory-tier lookup, inserting on miss (as ShapeCache
+does after generation). Every shape is a 2048-point record, so capacities
+are given in shapes and converted to the tier's byte budget.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+from app.cache.memory_tier import MemoryTier, ShapeRecord  # noqa: E402
+from app.cache.tinylfu import TinyLFUMemoryTier  # noqa: E402
+from app.pipeline.concept import hash_key  # noqa: E402
+
+
+def _synthetic_stream(length: int, popular: int, seed: int) -> list[str]:
+    """Zipf(1.1) over ``popular`` concepts with one-off bursts in between."""
+    rng = np.random.default_rng(seed)
+    ranks = np.arange(1, popular + 1)
+    weights = 1.0 / ranks**1.1
+    weights /= weights.sum()
+    stream: list[str] = []
+    unique = 0
+    while len(stream) < length:
+        if rng.random() < 0.05:  # Burst: someone dictates a run of new sentences
+            for _ in range(int(rng.integers(20, 200))):
+                stream.append(f"a one-off sentence number {unique}")
+                unique += 1
+        else:
+            for concept in rng.choice(popular, size=50, p=weights):
+                stream.append(f"concept {concept}")
+    return stream[:length]
+
+
+def _replay(tier: MemoryTier | TinyLFUMemoryTier, keys: list[str], record: ShapeRecord) -> float:
+    hits = 0
+    for key in keys:
+        if tier.get(key) is not None:
+            hits += 1
+        else:
+            tier[key] = record
+    return hits / len(keys)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stream", type=Path, help="Recorded stream, one request text per line")
+    parser.add_argument("--length", type=int, default=200_000, help="Synthetic stream length")
+    parser.add_argument("--popular", type=int, default=2000, help="Synthetic popular concepts")
+    parser.add_argument("--capacities", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.stream:
+        texts = [line.strip() for line in args.stream.read_text().splitlines() if line.strip()]
+        source = str(args.stream)
+    else:
+        texts = _synthetic_stream(args.length, args.popular, args.seed)
+        source = f"synthetic (zipf over {args.popular} + one-off bursts)"
+    # Keys as ShapeCache derives them, minus lemmatization (same for both policies)
+    keys = [hash_key(" ".join(text.lower().split())) for text in texts]
+    print(f"stream: {source}, {len(keys)} requests, {len(set(keys))} distinct")
+
+    record = ShapeRecord(
+        np.zeros((2048, 3), dtype=np.float32),
+        np.zeros(2048, dtype=np.uint8),
+        part_names=("body",),
+        template_type="default",
+        bbox_min=(-1.0, -1.0, -1.0),
+        bbox_max=(1.0, 1.0, 1.0),
+        pipeline="mock",
+        generation_time_ms=0,
+    )
+    print(f"{'capacity':>9} {'lru':>8} {'tinylfu':>8} {'Δ':>7} {'tinylfu µs/req':>15}")
+    for capacity in args.capacities:
+        budget = capacity * record.nbytes
+        lru = _replay(MemoryTier(budget), keys, record)
+        t0 = time.perf_counter()
+        lfu = _replay(TinyLFUMemoryTier(budget), keys, record)
+        per_req_us = (time.perf_counter() - t0) / len(keys) * 1e6
+        delta_pp = (lfu - lru) * 100
+        print(f"{capacity:>9} {lru:>8.1%} {lfu:>8.1%} {delta_pp:>+6.1f}pp {per_req_us:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Benchmark POST /generate cache hits: pydantic response path vs pre-serialized bytes.
+
+Usage:
+    uv run python scripts/bench_cache_hits.py
+    uv run python scripts/bench_cache_hits.py --requests 5000 --concurrency 32
+
+Serves the same memory-tier hit for a 2048-point shape two ways:
+  before — orchestrator.generate() returned through
+           response_model=GenerateResponse (re-validated + re-serialized)
+  after  — orchestrator.generate_json() → raw Response with the record's
+           cached body, only per-request fields patched
+
+Reported twice: "handler" times just the hit path up to response bytes
+(what this change touches); "asgi" runs the real app in-process through
+all middleware (no network, no GPU), where framework overhead dilutes it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("SKIP_MODEL_LOAD", "true")
+os.environ.setdefault("CACHE_BUCKET", "")
+
+import numpy as np  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+from app.cache.shape_cache import ShapeCache  # noqa: E402
+from app.config import Settings  # noqa: E402
+from app.main import create_app  # noqa: E402
+from app.models.registry import ModelRegistry  # noqa: E402
+from app.pipeline.encoding import encode_float32, encode_uint8  # noqa: E402
+from app.rate_limit import limiter  # noqa: E402
+from app.schemas import BoundingBox, GenerateRequest, GenerateResponse  # noqa: E402
+from app.services.pipeline import PipelineOrchestrator  # noqa: E402
+
+
+async def _run(client: AsyncClient, path: str, requests: int, concurrency: int) -> float:
+    """Issue ``requests`` POSTs with ``concurrency`` workers; return hits/sec."""
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            r = await client.post(path, json={"text": "horse"})
+            assert r.status_code == 200 and b'"cached":true' in r.content
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - t0)
+
+
+async def _handler_before(orchestrator: PipelineOrchestrator, request: GenerateRequest) -> bytes:
+    """What FastAPI does with a response_model return value, then JSONResponse."""
+    response = await orchestrator.generate(request)
+    validated = GenerateResponse.model_validate(response.model_dump())
+    return json.dumps(validated.model_dump(mode="json"), separators=(",", ":")).encode()
+
+
+async def _time_handler(fn: object, orchestrator: PipelineOrchestrator, requests: int) -> float:
+    assert callable(fn)
+    request = GenerateRequest(text="horse")
+    t0 = time.perf_counter()
+    for _ in range(requests):
+        await fn(orchestrator, request)
+    return requests / (time.perf_counter() - t0)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    limiter.enabled = False  # Measure the hit path, not the rate limiter
+    settings = Settings(cache_bucket="", skip_model_load=True)
+    cache = ShapeCache(bucket_name="")
+    await cache.connect()
+    orchestrator = PipelineOrchestrator(ModelRegistry(settings), cache, settings)
+
+    rng = np.random.default_rng(0)
+    await cache.set(
+        "horse",
+        GenerateResponse(
+            positions=encode_float32(rng.uniform(-1, 1, (2048, 3))),
+            part_ids=encode_uint8(rng.integers(0, 6, 2048)),
+            part_names=["head", "body", "front_legs", "back_legs", "tail", "neck"],
+            template_type="quadruped",
+            bounding_box=BoundingBox(min=[-1, -1, -1], max=[1, 1, 1]),
+            cached=False,
+            generation_time_ms=1200,
+            pipeline="mock",
+        ),
+    )
+
+    handler_results = {}
+    for name, fn in [
+        ("before", _handler_before),
+        ("after", PipelineOrchestrator.generate_json),
+    ]:
+        await _time_handler(fn, orchestrator, min(200, args.requests))  # Warm up
+        handler_results[name] = await _time_handler(fn, orchestrator, args.requests)
+        print(f"handler {name:>6} {handler_results[name]:9.0f} hits/s")
+    print(f"handler speedup: {handler_results['after'] / handler_results['before']:.2f}x")
+
+    app = create_app()
+    app.state.settings = settings
+    app.state.shape_cache = cache
+    app.state.pipeline_orchestrator = orchestrator
+
+    @app.post("/bench/generate-model", response_model=GenerateResponse)
+    async def generate_model(body: GenerateRequest) -> GenerateResponse:
+        return await orchestrator.generate(body)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        results = {}
+        for name, path in [("before", "/bench/generate-model"), ("after", "/generate")]:
+            await _run(client, path, min(200, args.requests), args.concurrency)  # Warm up
+            results[name] = await _run(client, path, args.requests, args.concurrency)
+            print(f"asgi    {name:>6} {results[name]:9.0f} hits/s  ({path})")
+    print(f"asgi speedup:    {results['after'] / results['before']:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
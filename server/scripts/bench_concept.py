@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Microbenchmark for concept analysis (cache key + template + prompt).
+
+Usage:
+    uv run python scripts/bench_concept.py
+    uv run python scripts/bench_concept.py --iterations 200000
+
+Compares three paths per request text:
+  uncached  — regex + lemmatize + hash + template + prompt on every call
+              (what get/set/get_template each did before memoization)
+  cold      — analyze_concept() on a concept not yet memoized (word lemmas warm)
+  memoized  — analyze_concept() on a repeat concept (the common case)
+
+Requires the WordNet corpus on the NLTK data path (NLTK_DATA); the
+one-time load is reported separately and excluded from per-call numbers.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.pipeline.concept import (  # noqa: E402
+    _lemmatize,
+    analyze_concept,
+    hash_key,
+    load_wordnet,
+    normalize_text,
+)
+from app.pipeline.prompt_templates import get_canonical_prompt  # noqa: E402
+from app.pipeline.template_matcher import get_template  # noqa: E402
+
+CONCEPTS = [
+    "horse", "The Dog!", "a red sports car", "eagles", "a dragon blows fire",
+    "butterfly", "the old castle", "children", "airplane", "oak tree",
+]  # fmt: skip
+
+
+def _uncached(text: str) -> None:
+    _lemmatize.cache_clear()
+    normalized = normalize_text(text)
+    hash_key(normalized)
+    template = get_template(text)
+    get_canonical_prompt(text, template.template_type)
+
+
+def _per_call_us(fn: object, iterations: int) -> float:
+    assert callable(fn)
+    t0 = time.perf_counter()
+    for i in range(iterations):
+        fn(CONCEPTS[i % len(CONCEPTS)])
+    return (time.perf_counter() - t0) / iterations * 1e6
+
+
+def _cold(text: str) -> None:
+    analyze_concept.cache_clear()
+    analyze_concept(text)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50_000)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    load_wordnet()
+    print(f"WordNet load (once per process): {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    for name, fn, n in [
+        ("uncached", _uncached, args.iterations // 10),
+        ("cold", _cold, args.iterations // 10),
+        ("memoized", analyze_concept, args.iterations),
+    ]:
+        _per_call_us(fn, min(n, 1000))  # Warm up
+        print(f"{name:>9}: {_per_call_us(fn, n):8.2f} µs/call  ({n} calls)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Generation latency per pipeline profile (GenerateRequest.quality).
+
+Usage:
+    uv run python scripts/bench_profiles.py
+    uv run python scripts/bench_profiles.py --requests 8 --step-ms 20 --fail-rate 0.2
+
+Fake models sleep instead of running CUDA kernels: SDXL for ``--image-ms``,
+PartCrafter for ``step_ms × steps × tokens / 1024``, and the Hunyuan3D
+fallback for ``--fallback-ms`` whenever PartCrafter returns no usable parts
+(every ``1 / fail-rate``-th request). Point sampling is the real CPU code.
+Requests run one at a time, so the numbers are single-request latency.
+
+Requires the WordNet corpus on the NLTK data path (NLTK_DATA).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import PIL.Image  # noqa: E402
+import trimesh  # noqa: E402
+
+from app.cache.shape_cache import ShapeCache  # noqa: E402
+from app.config import Settings  # noqa: E402
+from app.logging_config import configure_logging  # noqa: E402
+from app.models.registry import ModelRegistry  # noqa: E402
+from app.pipeline.concept import load_wordnet  # noqa: E402
+from app.pipeline.profiles import PROFILES  # noqa: E402
+from app.schemas import GenerateRequest, QualityLevel  # noqa: E402
+from app.services.pipeline import PipelineOrchestrator  # noqa: E402
+
+CONCEPTS = ["horse", "dog", "eagle", "car", "dragon", "castle", "tree", "robot"]
+
+
+class FakeSDXL:
+    name = "sdxl_turbo"
+    vram_gb = 3.0
+
+    def __init__(self, latency_s: float) -> None:
+        self.latency_s = latency_s
+
+    def generate(self, prompt: str) -> PIL.Image.Image:
+        time.sleep(self.latency_s)
+        return PIL.Image.new("RGB", (512, 512))
+
+
+class FakePartCrafter:
+    name = "partcrafter"
+    vram_gb = 8.0
+
+    def __init__(self, step_s: float, fail_every: int) -> None:
+        self.step_s = step_s
+        self.fail_every = fail_every
+        self.calls = 0
+
+    def generate(
+        self,
+        image: PIL.Image.Image,
+        num_parts: int,
+        *,
+        num_steps: int = 50,
+        num_tokens: int = 1024,
+        guidance_scale: float = 7.0,
+    ) -> list[trimesh.Trimesh]:
+        time.sleep(self.step_s * num_steps * num_tokens / 1024)
+        self.calls += 1
+        if self.fail_every and self.calls % self.fail_every == 0:
+            return [trimesh.Trimesh() for _ in range(num_parts)]
+        return [
+            trimesh.creation.box(extents=[0.2, 0.2, 0.2]).apply_translation([i * 0.3, 0, 0])
+            for i in range(num_parts)
+        ]
+
+
+class FakeHunyuan:
+    name = "hunyuan3d_turbo"
+    vram_gb = 12.0
+
+    def __init__(self, latency_s: float) -> None:
+        self.latency_s = latency_s
+
+    def generate(self, image: PIL.Image.Image) -> trimesh.Trimesh:
+        time.sleep(self.latency_s)
+        return trimesh.creation.icosphere(subdivisions=3)
+
+
+class FakeGroundedSAM:
+    name = "grounded_sam2"
+    vram_gb = 4.0
+
+    def segment(self, image: PIL.Image.Image, part_names: list[str]) -> dict[str, object]:
+        return {}
+
+
+def _orchestrator(args: argparse.Namespace) -> PipelineOrchestrator:
+    settings = Settings(cache_bucket="", skip_model_load=True)
+    registry = ModelRegistry(settings)
+    registry.register("sdxl_turbo", FakeSDXL(args.image_ms / 1000))
+    fail_every = round(1 / args.fail_rate) if args.fail_rate > 0 else 0
+    registry.register("partcrafter", FakePartCrafter(args.step_ms / 1000, fail_every))
+    registry.register("hunyuan3d_turbo", FakeHunyuan(args.fallback_ms / 1000))
+    registry.register("grounded_sam2", FakeGroundedSAM())
+    cache = MagicMock(spec=ShapeCache)
+    cache.get_record = AsyncMock(return_value=None)
+    cache.peek_record = MagicMock(return_value=None)
+    cache.get_alias_record = AsyncMock(return_value=None)
+    cache.peek_alias_record = MagicMock(return_value=None)
+    cache.set = AsyncMock()
+    return PipelineOrchestrator(registry, cache, settings)
+
+
+async def _latencies(args: argparse.Namespace, quality: QualityLevel) -> list[float]:
+    orchestrator = _orchestrator(args)
+    latencies = []
+    for i in range(args.requests):
+        request = GenerateRequest(text=CONCEPTS[i % len(CONCEPTS)], quality=quality)
+        t0 = time.perf_counter()
+        await orchestrator.generate(request)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    await orchestrator.close()
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=16, help="Misses per profile")
+    parser.add_argument("--image-ms", type=float, default=300, help="Fake SDXL latency")
+    parser.add_argument(
+        "--step-ms", type=float, default=18, help="Fake PartCrafter latency per step at 1024 tokens"
+    )
+    parser.add_argument("--fallback-ms", type=float, default=4000, help="Fake Hunyuan3D latency")
+    parser.add_argument(
+        "--fail-rate", type=float, default=0.125, help="Share of PartCrafter calls that fail"
+    )
+    args = parser.parse_args()
+
+    configure_logging(log_level="WARNING", json_output=False)
+    load_wordnet()
+    print(
+        f"{args.requests} misses per profile, image {args.image_ms:.0f} ms, "
+        f"PartCrafter {args.step_ms:.0f} ms/step, fallback {args.fallback_ms:.0f} ms, "
+        f"{args.fail_rate:.0%} PartCrafter failures"
+    )
+    print(f"{'profile':>9} {'steps':>6} {'tokens':>7} {'points':>7} {'p50 ms':>8} {'max ms':>8}")
+    for quality in QualityLevel:
+        profile = PROFILES[quality.value]
+        latencies = asyncio.run(_latencies(args, quality))
+        points = profile.max_points or Settings(cache_bucket="").max_points
+        print(
+            f"{profile.name:>9} {profile.num_steps:>6} {profile.num_tokens:>7} {points:>7} "
+            f"{statistics.median(latencies):>8.0f} {max(latencies):>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Generation throughput: back-to-back stages vs the pipelined stage workers.
+
+Usage:
+    uv run python scripts/bench_stages.py
+    uv run python scripts/bench_stages.py --requests 32 --image-ms 400 --mesh-ms 1200
+    uv run python scripts/bench_stages.py --gpu-workers 1 --batch 1
+
+Fake SDXL and PartCrafter models sleep for the given latencies (sleeping
+releases the GIL, as CUDA kernels do); point sampling is the real CPU code.
+A batched SDXL call costs ``image_ms × (1 + (n - 1) × batch_cost)``.
+
+  sequential — every miss runs image → mesh → sample in one GPU-thread call
+               (_generate_sync), the pre-pipelining behaviour
+  pipelined  — misses go through the image/mesh/post stage workers, with
+               SDXL micro-batching and sampling on the CPU pool
+
+Requires the WordNet corpus on the NLTK data path (NLTK_DATA).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import PIL.Image  # noqa: E402
+import trimesh  # noqa: E402
+
+from app.cache.shape_cache import ShapeCache  # noqa: E402
+from app.config import Settings  # noqa: E402
+from app.logging_config import configure_logging  # noqa: E402
+from app.models.registry import ModelRegistry  # noqa: E402
+from app.pipeline.concept import analyze_concept, load_wordnet  # noqa: E402
+from app.services.executors import Executors  # noqa: E402
+from app.services.pipeline import PipelineOrchestrator  # noqa: E402
+
+CONCEPTS = [
+    "horse", "dog", "eagle", "car", "dragon", "castle", "tree", "robot",
+    "chair", "guitar", "shark", "airplane", "elephant", "bicycle", "crown", "boat",
+]  # fmt: skip
+
+
+class FakeSDXL:
+    name = "sdxl_turbo"
+    vram_gb = 3.0
+
+    def __init__(self, latency_s: float, batch_cost: float) -> None:
+        self.latency_s = latency_s
+        self.batch_cost = batch_cost
+
+    def generate(self, prompt: str) -> PIL.Image.Image:
+        time.sleep(self.latency_s)
+        return PIL.Image.new("RGB", (512, 512))
+
+    def generate_batch(self, prompts: list[str]) -> list[PIL.Image.Image]:
+        time.sleep(self.latency_s * (1 + (len(prompts) - 1) * self.batch_cost))
+        return [PIL.Image.new("RGB", (512, 512)) for _ in prompts]
+
+
+class FakePartCrafter:
+    name = "partcrafter"
+    vram_gb = 8.0
+
+    def __init__(self, latency_s: float) -> None:
+        self.latency_s = latency_s
+
+    def generate(
+        self, image: PIL.Image.Image, num_parts: int, **kwargs: object
+    ) -> list[trimesh.Trimesh]:
+        time.sleep(self.latency_s)
+        return [
+            trimesh.creation.box(extents=[0.2, 0.2, 0.2]).apply_translation([i * 0.3, 0, 0])
+            for i in range(num_parts)
+        ]
+
+
+def _orchestrator(args: argparse.Namespace, settings: Settings) -> PipelineOrchestrator:
+    registry = ModelRegistry(settings)
+    registry.register("sdxl_turbo", FakeSDXL(args.image_ms / 1000, args.batch_cost))
+    registry.register("partcrafter", FakePartCrafter(args.mesh_ms / 1000))
+    cache = MagicMock(spec=ShapeCache)
+    cache.set = AsyncMock()
+    executors = Executors.from_settings(settings)
+    return PipelineOrchestrator(registry, cache, settings, executors=executors)
+
+
+async def _sequential(args: argparse.Namespace) -> float:
+    settings = Settings(cache_bucket="", skip_model_load=True, executor_gpu_workers=1)
+    orchestrator = _orchestrator(args, settings)
+    gpu = orchestrator._executors.gpu  # type: ignore[union-attr]
+    loop = asyncio.get_running_loop()
+    concepts = [analyze_concept(CONCEPTS[i % len(CONCEPTS)]) for i in range(args.requests)]
+    t0 = time.perf_counter()
+    await asyncio.gather(
+        *(loop.run_in_executor(gpu, orchestrator._generate_sync, c) for c in concepts)
+    )
+    return time.perf_counter() - t0
+
+
+async def _pipelined(args: argparse.Namespace) -> tuple[float, dict[str, dict[str, float]]]:
+    settings = Settings(
+        cache_bucket="",
+        skip_model_load=True,
+        executor_gpu_workers=args.gpu_workers,
+        image_batch_max_size=args.batch,
+        stage_image_workers=max(args.batch, 1),
+    )
+    orchestrator = _orchestrator(args, settings)
+    concepts = [analyze_concept(CONCEPTS[i % len(CONCEPTS)]) for i in range(args.requests)]
+    t0 = time.perf_counter()
+    await asyncio.gather(*(orchestrator._run_in_executor(c) for c in concepts))
+    elapsed = time.perf_counter() - t0
+    stats = orchestrator.stage_stats()
+    await orchestrator.close()
+    return elapsed, stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=16, help="Concurrent misses")
+    parser.add_argument("--image-ms", type=float, default=300, help="Fake SDXL latency")
+    parser.add_argument("--mesh-ms", type=float, default=900, help="Fake PartCrafter latency")
+    parser.add_argument("--batch", type=int, default=4, help="IMAGE_BATCH_MAX_SIZE")
+    parser.add_argument(
+        "--batch-cost", type=float, default=0.25, help="Marginal cost per extra batched prompt"
+    )
+    parser.add_argument("--gpu-workers", type=int, default=2, help="EXECUTOR_GPU_WORKERS")
+    args = parser.parse_args()
+
+    configure_logging(log_level="WARNING", json_output=False)
+    load_wordnet()
+    print(
+        f"{args.requests} misses, image {args.image_ms:.0f} ms, mesh {args.mesh_ms:.0f} ms, "
+        f"batch ≤{args.batch}, {args.gpu_workers} GPU thread(s)"
+    )
+    sequential = asyncio.run(_sequential(args))
+    pipelined, stats = asyncio.run(_pipelined(args))
+    print(f"{'mode':>11} {'wall s':>8} {'req/s':>7}")
+    print(f"{'sequential':>11} {sequential:>8.2f} {args.requests / sequential:>7.2f}")
+    print(f"{'pipelined':>11} {pipelined:>8.2f} {args.requests / pipelined:>7.2f}")
+    print(f"speedup: {sequential / pipelined:.2f}×")
+    for stage, s in stats.items():
+        busy = f"avg {s['avg_ms']} ms, busy {s['busy_seconds']} s"
+        print(f"  {stage:>5}: {s['completed']} jobs, {busy}")
+
+
+if __name__ == "__main__":
+    main()
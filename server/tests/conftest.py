@@ -39,6 +39,12 @@ def mock_cache() -> ShapeCache:
     """ShapeCache with async methods mocked."""
     cache = MagicMock(spec=ShapeCache)
     cache.get = AsyncMock(return_value=None)
+    cache.get_record = AsyncMock(return_value=None)
+    cache.peek_record = MagicMock(return_value=None)
+    cache.get_alias_record = AsyncMock(return_value=None)
+    cache.peek_alias_record = MagicMock(return_value=None)
+    cache.write_stats = MagicMock(return_value={"pending": 0, "dropped": 0})
+    cache.peer_stats = MagicMock(return_value=None)
     cache.set = AsyncMock()
     cache.stats = AsyncMock(
         return_value={
@@ -0,0 +1,130 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for AliasIndex — near-synonym resolution to canonical template nouns
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+import pytest
+
+from app.pipeline.aliases import AliasIndex
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class FakeSynset:
+    def __init__(self, *lemmas: str, hypernyms: list[FakeSynset] | None = None) -> None:
+        self._lemmas = list(lemmas)
+        self._hypernyms = hypernyms or []
+
+    def lemma_names(self) -> list[str]:
+        return self._lemmas
+
+    def hypernyms(self) -> list[FakeSynset]:
+        return self._hypernyms
+
+
+class FakeWordNet:
+    """The slice of nltk's WordNet reader the index uses."""
+
+    NOUN = "n"
+
+    def __init__(self) -> None:
+        animal = FakeSynset("animal")
+        equine = FakeSynset("equine", "equid", hypernyms=[animal])
+        horse = FakeSynset("horse", "Equus_caballus", hypernyms=[equine])
+        bird = FakeSynset("bird", hypernyms=[animal])
+        self._synsets = {
+            "stallion": [
+                FakeSynset(
+                    "stallion", "entire", hypernyms=[FakeSynset("male_horse", hypernyms=[horse])]
+                )
+            ],
+            "sofa": [FakeSynset("sofa", "couch", "lounge")],
+            "bat": [
+                FakeSynset(
+                    "bat", "chiropteran", hypernyms=[FakeSynset("placental", hypernyms=[bird])]
+                )
+            ],
+            "crane": [
+                FakeSynset("crane", hypernyms=[FakeSynset("wading_bird", hypernyms=[bird])]),
+                FakeSynset("crane", hypernyms=[FakeSynset("lifting_device")]),
+            ],
+        }
+
+    def synsets(self, word: str, pos: str) -> list[FakeSynset]:
+        assert pos == self.NOUN
+        return self._synsets.get(word, [])
+
+
+def _index(overrides: dict[str, str | None] | None = None) -> AliasIndex:
+    index = AliasIndex(overrides, wordnet=False)
+    index._wordnet = FakeWordNet()
+    return index
+
+
+class TestWordNetCandidates:
+    def test_hypernym_within_two_levels(self) -> None:
+        assert _index().candidates("stallion", "quadruped") == ("horse",)
+
+    def test_synonym(self) -> None:
+        assert _index().candidates("sofa", "furniture") == ("couch",)
+
+    def test_only_template_nouns(self) -> None:
+        """Generic hypernyms ("equine", "animal") are never canonical."""
+        candidates = _index().candidates("stallion", "quadruped")
+        assert "equine" not in candidates and "animal" not in candidates
+
+    def test_template_must_match(self) -> None:
+        # A bat is not served a bird's wings and tail
+        assert _index().candidates("bat", "quadruped") == ()
+
+    def test_default_template_accepts_any(self) -> None:
+        assert _index().candidates("crane", "default") == ("bird",)
+
+    def test_primary_sense_only(self) -> None:
+        # "crane" the lifting device never contributes candidates
+        assert _index().candidates("crane", "bird") == ("bird",)
+
+    def test_unknown_and_multiword(self) -> None:
+        index = _index()
+        assert index.candidates("dragon", "default") == ()
+        assert index.candidates("big stallion", "quadruped") == ()
+
+    def test_memoized(self) -> None:
+        index = _index()
+        index.candidates("stallion", "quadruped")
+        index.candidates("stallion", "quadruped")
+        assert index.stats()["memoized"] == 1
+
+
+class TestOverrides:
+    def test_override_wins(self) -> None:
+        index = _index({"Stallions": "the horses", "steed": "horse"})
+        assert index.candidates("stallion", "quadruped") == ("horse",)
+        assert index.candidates("steed", "default") == ("horse",)
+
+    def test_null_opts_out(self) -> None:
+        assert _index({"sofa": None}).candidates("sofa", "furniture") == ()
+
+    def test_without_wordnet(self) -> None:
+        index = AliasIndex({"steed": "horse"}, wordnet=False)
+        assert index.candidates("steed", "default") == ("horse",)
+        assert index.candidates("stallion", "quadruped") == ()
+        assert index.stats() == {"overrides": 1, "wordnet": False, "memoized": 2}
+
+    def test_from_file(self, tmp_path: Path) -> None:
+        path = tmp_path / "aliases.json"
+        path.write_text(json.dumps({"steed": "horse"}))
+        assert AliasIndex.from_file(path, wordnet=False).candidates("steed", "default") == (
+            "horse",
+        )
+
+    def test_from_file_rejects_non_mapping(self, tmp_path: Path) -> None:
+        path = tmp_path / "aliases.json"
+        path.write_text(json.dumps(["steed", "horse"]))
+        with pytest.raises(ValueError):
+            AliasIndex.from_file(path)
@@ -0,0 +1,156 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for ImageBatcher — concurrent prompts share one text-to-image pass
+# ─────────────────────────────────────────────────────────────────────────────
+# A fake CPU model stands in for SDXL Turbo; no GPU or diffusers needed.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import PIL.Image
+import pytest
+
+from app.cache.shape_cache import ShapeCache
+from app.config import Settings
+from app.models.protocol import BatchTextToImageModel, TextToImageModel
+from app.models.registry import ModelRegistry
+from app.routes.prometheus import _batch_size_histogram
+from app.schemas import GenerateRequest
+from app.services.batching import ImageBatcher
+from app.services.metrics import PipelineMetrics
+from app.services.pipeline import PipelineOrchestrator
+
+
+def _image(prompt: str) -> PIL.Image.Image:
+    image = PIL.Image.new("RGB", (8, 8))
+    image.info["prompt"] = prompt
+    return image
+
+
+class FakeTextToImage:
+    """Records how prompts were grouped into calls."""
+
+    name = "fake_sdxl"
+    vram_gb = 0.0
+
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    def generate(self, prompt: str) -> PIL.Image.Image:
+        self.calls.append([prompt])
+        return _image(prompt)
+
+
+class FakeBatchTextToImage(FakeTextToImage):
+    def generate_batch(self, prompts: list[str]) -> list[PIL.Image.Image]:
+        self.calls.append(list(prompts))
+        return [_image(p) for p in prompts]
+
+
+async def _generate_all(batcher: ImageBatcher, prompts: list[str]) -> list[str]:
+    images = await asyncio.gather(*(batcher.generate(p) for p in prompts))
+    return [image.info["prompt"] for image in images]
+
+
+class TestImageBatcher:
+    def test_protocols(self) -> None:
+        assert isinstance(FakeBatchTextToImage(), BatchTextToImageModel)
+        assert isinstance(FakeTextToImage(), TextToImageModel)
+        assert not isinstance(FakeTextToImage(), BatchTextToImageModel)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_prompts_share_a_batch(self) -> None:
+        model = FakeBatchTextToImage()
+        metrics = PipelineMetrics()
+        batcher = ImageBatcher(lambda: model, max_batch=4, window_ms=50, metrics=metrics)
+        assert await _generate_all(batcher, ["a", "b", "c"]) == ["a", "b", "c"]
+        assert model.calls == [["a", "b", "c"]]
+        assert metrics.to_dict()["image_batch_sizes"] == {"3": 1}
+
+    @pytest.mark.asyncio
+    async def test_full_batch_runs_without_waiting(self) -> None:
+        model = FakeBatchTextToImage()
+        batcher = ImageBatcher(lambda: model, max_batch=2, window_ms=10_000)
+        result = await asyncio.wait_for(_generate_all(batcher, ["a", "b", "c", "d"]), 5)
+        assert result == ["a", "b", "c", "d"]
+        assert model.calls == [["a", "b"], ["c", "d"]]
+
+    @pytest.mark.asyncio
+    async def test_lone_prompt_runs_after_window(self) -> None:
+        model = FakeBatchTextToImage()
+        batcher = ImageBatcher(lambda: model, max_batch=4, window_ms=1)
+        assert await _generate_all(batcher, ["a"]) == ["a"]
+        assert model.calls == [["a"]]  # Single prompts use generate()
+        assert batcher.stats()["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_model_without_batch_support(self) -> None:
+        model = FakeTextToImage()
+        batcher = ImageBatcher(lambda: model, max_batch=4, window_ms=10)
+        assert await _generate_all(batcher, ["a", "b"]) == ["a", "b"]
+        assert model.calls == [["a"], ["b"]]
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller(self) -> None:
+        model = MagicMock(spec=FakeBatchTextToImage)
+        model.generate_batch.side_effect = RuntimeError("CUDA error")
+        batcher = ImageBatcher(lambda: model, max_batch=2, window_ms=10)
+        results = await asyncio.gather(
+            batcher.generate("a"), batcher.generate("b"), return_exceptions=True
+        )
+        assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_callers_drop_out(self) -> None:
+        model = FakeBatchTextToImage()
+        batcher = ImageBatcher(lambda: model, max_batch=4, window_ms=50)
+        gone = asyncio.ensure_future(batcher.generate("gone"))
+        stays = asyncio.ensure_future(batcher.generate("stays"))
+        await asyncio.sleep(0)
+        gone.cancel()
+        assert (await stays).info["prompt"] == "stays"
+        assert model.calls == [["stays"]]
+
+
+class TestPipelineBatching:
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_batch_reference_images(self) -> None:
+        settings = Settings(
+            cache_bucket="",
+            skip_model_load=True,
+            max_points=256,
+            image_batch_max_size=4,
+            image_batch_window_ms=50,
+        )
+        registry = ModelRegistry(settings)
+        model = FakeBatchTextToImage()
+        registry.register("sdxl_turbo", model)
+        cache = MagicMock(spec=ShapeCache)
+        cache.get_record = AsyncMock(return_value=None)
+        cache.peek_record = MagicMock(return_value=None)
+        cache.get_alias_record = AsyncMock(return_value=None)
+        cache.peek_alias_record = MagicMock(return_value=None)
+        cache.set = AsyncMock()
+        metrics = PipelineMetrics()
+        orchestrator = PipelineOrchestrator(registry, cache, settings, metrics=metrics)
+
+        concepts = ["horse", "dog", "eagle"]
+        results = await asyncio.gather(
+            *(orchestrator.generate(GenerateRequest(text=c)) for c in concepts)
+        )
+        assert all(r.pipeline == "sdxl_turbo+mock" for r in results)
+        assert len(model.calls) == 1 and len(model.calls[0]) == 3
+        assert metrics.to_dict()["image_batch_sizes"] == {"3": 1}
+
+
+def test_batch_sizes_export_as_a_histogram() -> None:
+    family = _batch_size_histogram({"1": 2, "3": 1, "4": 5})
+    samples = {(s.name, s.labels.get("le")): s.value for s in family.samples}
+    assert samples[("lumen_image_batch_size_bucket", "1")] == 2
+    assert samples[("lumen_image_batch_size_bucket", "2")] == 2
+    assert samples[("lumen_image_batch_size_bucket", "4")] == 8
+    assert samples[("lumen_image_batch_size_bucket", "+Inf")] == 8
+    assert samples[("lumen_image_batch_size_count", None)] == 8
+    assert samples[("lumen_image_batch_size_sum", None)] == 25
@@ -0,0 +1,37 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for BloomFilter — known-key filter in front of Cloud Storage
+# ─────────────────────────────────────────────────────────────────────────────
+
+from hypothesis import given
+from hypothesis import strategies as st
+
+from app.cache.bloom import BloomFilter
+
+
+class TestBloomFilter:
+    @given(st.lists(st.text(min_size=1), max_size=200))
+    def test_no_false_negatives(self, keys: list[str]) -> None:
+        bloom = BloomFilter.from_keys(keys, capacity=max(len(keys), 1))
+        assert all(k in bloom for k in keys)
+
+    def test_false_positive_rate_within_bound(self) -> None:
+        bloom = BloomFilter.from_keys((f"stored-{i}" for i in range(5000)), capacity=5000)
+        probes = 20_000
+        false_positives = sum(f"absent-{i}" in bloom for i in range(probes))
+        assert false_positives / probes < 0.02  # Sized for 1%
+
+    def test_sizing(self) -> None:
+        bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+        assert 9.5 < bloom.num_bits / 10_000 < 9.7  # ~9.6 bits per key at 1%
+        assert bloom.num_hashes == 7
+
+    def test_saturation(self) -> None:
+        bloom = BloomFilter(capacity=2)
+        bloom.add("a")
+        bloom.add("b")
+        assert not bloom.saturated
+        bloom.add("c")
+        assert bloom.saturated
+
+    def test_non_string_is_absent(self) -> None:
+        assert 42 not in BloomFilter(capacity=1)
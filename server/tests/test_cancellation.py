@@ -0,0 +1,177 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for cooperative cancellation — abandoned generations stop early
+# ─────────────────────────────────────────────────────────────────────────────
+# A fake "diffusion" model runs many short steps and calls the bound step
+# callback after each, as diffusers pipelines do; no GPU needed.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import PIL.Image
+import pytest
+import trimesh
+
+from app.cache.shape_cache import ShapeCache
+from app.config import Settings
+from app.exceptions import GenerationCancelledError, GenerationTimeoutError
+from app.models.cancellation import (
+    CancellationToken,
+    cancellable,
+    raise_if_cancelled,
+    step_callback,
+)
+from app.models.registry import ModelRegistry
+from app.schemas import GenerateRequest
+from app.services.metrics import PipelineMetrics
+from app.services.pipeline import PipelineOrchestrator
+
+STEPS = 600  # × STEP_S = 3 s uncancelled
+STEP_S = 0.005
+
+
+class SteppedTextToImage:
+    """Counts denoising steps; checks the bound token after each one."""
+
+    name = "fake_sdxl"
+    vram_gb = 0.0
+
+    def __init__(self, total_steps: int = STEPS) -> None:
+        self.total_steps = total_steps
+        self.steps = 0
+
+    def generate(self, prompt: str) -> PIL.Image.Image:
+        callback = step_callback()
+        for step in range(self.total_steps):
+            time.sleep(STEP_S)
+            self.steps += 1
+            if callback is not None:
+                callback(self, step, 0, {})
+        return PIL.Image.new("RGB", (8, 8))
+
+
+class FakePartCrafter:
+    name = "partcrafter"
+    vram_gb = 0.0
+
+    def generate(
+        self, image: PIL.Image.Image, num_parts: int, **kwargs: object
+    ) -> list[trimesh.Trimesh]:
+        return [trimesh.creation.box(extents=[0.2, 0.2, 0.2]) for _ in range(num_parts)]
+
+
+def _orchestrator(
+    model: SteppedTextToImage, metrics: PipelineMetrics, **overrides: object
+) -> PipelineOrchestrator:
+    settings = Settings(
+        cache_bucket="",
+        skip_model_load=True,
+        max_points=256,
+        image_batch_max_size=1,
+        **overrides,  # type: ignore[arg-type]
+    )
+    registry = ModelRegistry(settings)
+    registry.register("sdxl_turbo", model)
+    registry.register("partcrafter", FakePartCrafter())
+    cache = MagicMock(spec=ShapeCache)
+    cache.get_record = AsyncMock(return_value=None)
+    cache.peek_record = MagicMock(return_value=None)
+    cache.get_alias_record = AsyncMock(return_value=None)
+    cache.peek_alias_record = MagicMock(return_value=None)
+    cache.set = AsyncMock()
+    return PipelineOrchestrator(registry, cache, settings, metrics=metrics)
+
+
+async def _wait_for_abandoned(metrics: PipelineMetrics) -> None:
+    for _ in range(200):
+        if metrics.generations_cancelled:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("generation was never abandoned")
+
+
+class TestCancellationToken:
+    def test_cancel_keeps_first_reason(self) -> None:
+        token = CancellationToken("horse")
+        assert not token.cancelled
+        token.raise_if_cancelled()
+        token.cancel("timeout")
+        token.cancel("disconnected")
+        with pytest.raises(GenerationCancelledError, match="horse.*timeout"):
+            token.raise_if_cancelled()
+
+    def test_joint_token_needs_every_parent(self) -> None:
+        a, b = CancellationToken("a"), CancellationToken("b")
+        batch = CancellationToken("batch", parents=[a, b])
+        a.cancel("disconnected")
+        assert not batch.cancelled
+        b.cancel("timeout")
+        assert batch.cancelled
+
+    def test_binding_is_per_thread_and_scoped(self) -> None:
+        assert step_callback() is None
+        raise_if_cancelled()  # Nothing bound: no-op
+        token = CancellationToken("dog")
+        with cancellable(token):
+            callback = step_callback()
+            assert callback is not None
+            assert callback(None, 0, 0, {"latents": 1}) == {"latents": 1}
+            token.cancel()
+            with pytest.raises(GenerationCancelledError):
+                raise_if_cancelled()
+        assert step_callback() is None
+
+
+class TestPipelineCancellation:
+    @pytest.mark.asyncio
+    async def test_timeout_stops_generation_within_a_step(self) -> None:
+        model, metrics = SteppedTextToImage(), PipelineMetrics()
+        orchestrator = _orchestrator(model, metrics, generation_timeout_seconds=1)
+        with pytest.raises(GenerationTimeoutError):
+            await orchestrator.generate(GenerateRequest(text="horse"))
+        await _wait_for_abandoned(metrics)
+        steps = model.steps
+        await asyncio.sleep(STEP_S * 5)
+        assert model.steps == steps  # Nothing ran after the abandon
+        assert steps < STEPS / 2
+        data = metrics.to_dict()
+        assert data["generations_cancelled"] == 1
+        assert data["wasted_gpu_seconds"] > 0
+        assert orchestrator.queue_stats()["running"] == 0
+        await orchestrator.close()
+
+    @pytest.mark.asyncio
+    async def test_client_disconnect_cancels_generation(self) -> None:
+        model, metrics = SteppedTextToImage(), PipelineMetrics()
+        orchestrator = _orchestrator(model, metrics, disconnect_poll_seconds=0.02)
+        deadline = time.perf_counter() + 0.2
+
+        async def disconnected() -> bool:
+            return time.perf_counter() > deadline
+
+        with pytest.raises(GenerationCancelledError, match="client disconnected"):
+            await orchestrator.generate_json(GenerateRequest(text="dog"), disconnected=disconnected)
+        await _wait_for_abandoned(metrics)
+        assert model.steps < STEPS / 2
+        assert orchestrator._flights.stats()["cancelled"] == 1
+        await orchestrator.close()
+
+    @pytest.mark.asyncio
+    async def test_shared_generation_survives_one_disconnect(self) -> None:
+        model, metrics = SteppedTextToImage(total_steps=40), PipelineMetrics()
+        orchestrator = _orchestrator(model, metrics, disconnect_poll_seconds=0.02)
+
+        async def gone() -> bool:
+            return True
+
+        stays = asyncio.ensure_future(orchestrator.generate_json(GenerateRequest(text="eagle")))
+        await asyncio.sleep(0.05)
+        with pytest.raises(GenerationCancelledError):
+            await orchestrator.generate_json(GenerateRequest(text="eagle"), disconnected=gone)
+        assert b'"cached":false' in await stays
+        assert model.steps == 40
+        assert metrics.generations_cancelled == 0
+        await orchestrator.close()
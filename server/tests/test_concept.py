@@ -0,0 +1,114 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests — Concept Analysis (normalization, memoization, template + prompt)
+# ─────────────────────────────────────────────────────────────────────────────
+
+import asyncio
+
+import pytest
+
+from app.cache.shape_cache import ShapeCache
+from app.pipeline import concept as concept_module
+from app.pipeline.concept import (
+    analyze_concept,
+    concept_cache_stats,
+    hash_key,
+    normalize_text,
+)
+from app.pipeline.prompt_templates import get_canonical_prompt
+
+
+class TestNormalization:
+    def test_matches_shape_cache_key(self) -> None:
+        for text in ["Horse", "the big dog!", "a dragon blows fire"]:
+            result = analyze_concept(text)
+            assert result.normalized == ShapeCache.normalize_key(text)
+            assert result.cache_key == ShapeCache._hash_key(result.normalized)
+
+    def test_articles_and_punctuation_removed(self) -> None:
+        assert normalize_text("The Horse!") == normalize_text("horse")
+
+    def test_all_articles_keeps_text(self) -> None:
+        assert normalize_text("the") == "the"
+
+    def test_hash_key_is_16_hex_chars(self) -> None:
+        key = hash_key("horse")
+        assert len(key) == 16
+        int(key, 16)
+
+
+class TestTemplateAndPrompt:
+    def test_exact_noun(self) -> None:
+        result = analyze_concept("  horse  ")
+        assert result.text == "horse"
+        assert result.template.template_type == "quadruped"
+        assert result.prompt == get_canonical_prompt("horse", "quadruped")
+
+    def test_normalized_form_resolves_template(self) -> None:
+        """Articles no longer hide a known noun from the template matcher."""
+        assert analyze_concept("the horse").template.template_type == "quadruped"
+
+    def test_unknown_phrase_is_default(self) -> None:
+        result = analyze_concept("a dragon blows fire")
+        assert result.template.template_type == "default"
+        assert result.prompt.startswith("a dragon blows fire, 3D render")
+
+
+class TestMemoization:
+    def test_repeat_returns_same_object(self) -> None:
+        assert analyze_concept("memo-cat") is analyze_concept("memo-cat")
+
+    def test_stats_count_hits(self) -> None:
+        analyze_concept("memo-stats-dog")
+        before = concept_cache_stats()
+        analyze_concept("memo-stats-dog")
+        after = concept_cache_stats()
+        assert after["hits"] == before["hits"] + 1
+        assert after["size"] <= after["max_size"]
+
+    def test_bounded(self) -> None:
+        assert analyze_concept.cache_info().maxsize == concept_module.CONCEPT_CACHE_SIZE
+
+
+class TestLazyWordNet:
+    def test_missing_corpus_is_an_error(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        import nltk
+
+        def _missing(name: str, *args: object, **kwargs: object) -> str:
+            raise LookupError(name)
+
+        monkeypatch.setattr(nltk.data, "find", _missing)
+        monkeypatch.setattr(concept_module, "_lemmatize_fn", None)
+        with pytest.raises(concept_module.WordNetUnavailableError):
+            concept_module.require_wordnet()
+        with pytest.raises(concept_module.WordNetUnavailableError):
+            concept_module.load_wordnet()
+        assert concept_module._lemmatize_fn is None  # Nothing memoized; a later call retries
+
+    @pytest.mark.asyncio
+    async def test_background_load_failure_is_logged(self) -> None:
+        from structlog.testing import capture_logs
+
+        from app.main import _on_concepts_loaded
+
+        def _fail() -> None:
+            raise concept_module.WordNetUnavailableError("gone")
+
+        future = asyncio.get_running_loop().run_in_executor(None, _fail)
+        future.add_done_callback(_on_concepts_loaded)
+        with capture_logs() as logs:
+            await asyncio.wait([future])
+            await asyncio.sleep(0)  # Done callbacks run on the next loop iteration
+        assert [log["event"] for log in logs] == ["concept_load_failed"]
+        assert logs[0]["error_type"] == "WordNetUnavailableError"
+
+    def test_import_does_not_load_corpus(self) -> None:
+        """Loading happens on first use (or explicit load_wordnet), not at import."""
+        import importlib
+        import sys
+
+        saved = sys.modules.pop("app.pipeline.concept")
+        try:
+            fresh = importlib.import_module("app.pipeline.concept")
+            assert fresh._lemmatize_fn is None
+        finally:
+            sys.modules["app.pipeline.concept"] = saved
@@ -0,0 +1,218 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for the device pool — replica placement and least-loaded routing
+# ─────────────────────────────────────────────────────────────────────────────
+# Devices are CPU stand-ins ("cpu:0", "cpu:1") with a declared capacity, so
+# placement and routing run without a GPU.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import PIL.Image
+import pytest
+import trimesh
+
+from app.cache.shape_cache import ShapeCache
+from app.config import Settings
+from app.exceptions import GPUQueueFullError
+from app.models.devices import Device, DevicePool
+from app.models.registry import ModelRegistry
+from app.schemas import GenerateRequest
+from app.services.executors import Executors
+from app.services.pipeline import PipelineOrchestrator
+
+
+class FakeModel:
+    """A replica that remembers the device it was built for."""
+
+    VRAM_GB = 4.0
+
+    def __init__(self, device: str) -> None:
+        self.device = device
+
+    @property
+    def vram_gb(self) -> float:
+        return self.VRAM_GB
+
+
+class FakeSDXL(FakeModel):
+    name = "sdxl_turbo"
+
+    def generate(self, prompt: str) -> PIL.Image.Image:
+        image = PIL.Image.new("RGB", (8, 8))
+        image.info["device"] = self.device
+        return image
+
+
+class FakePartCrafter(FakeModel):
+    name = "partcrafter"
+
+    def __init__(self, device: str) -> None:
+        super().__init__(device)
+        self.calls = 0
+        self.threads: set[str] = set()
+
+    def generate(
+        self, image: PIL.Image.Image, num_parts: int, **kwargs: object
+    ) -> list[trimesh.Trimesh]:
+        assert image.info["device"] == self.device  # Same device as its image
+        self.calls += 1
+        self.threads.add(threading.current_thread().name)
+        time.sleep(0.05)
+        return [trimesh.creation.box(extents=[0.2, 0.2, 0.2]) for _ in range(num_parts)]
+
+
+def _orchestrator(
+    settings: Settings, executors: Executors | None = None
+) -> tuple[PipelineOrchestrator, ModelRegistry]:
+    registry = ModelRegistry(settings)
+    registry.load_replicas("sdxl_turbo", FakeSDXL, FakeSDXL.VRAM_GB)
+    registry.load_replicas("partcrafter", FakePartCrafter, FakePartCrafter.VRAM_GB)
+    cache = MagicMock(spec=ShapeCache)
+    cache.get_record = AsyncMock(return_value=None)
+    cache.peek_record = MagicMock(return_value=None)
+    cache.get_alias_record = AsyncMock(return_value=None)
+    cache.peek_alias_record = MagicMock(return_value=None)
+    cache.set = AsyncMock()
+    return PipelineOrchestrator(registry, cache, settings, executors=executors), registry
+
+
+def _settings(**overrides: object) -> Settings:
+    return Settings(
+        cache_bucket="",
+        skip_model_load=True,
+        devices="cpu:0,cpu:1",
+        device_vram_gb=10.0,
+        **overrides,  # type: ignore[arg-type]
+    )
+
+
+class TestDevicePool:
+    def test_from_settings(self) -> None:
+        pool = DevicePool.from_settings(_settings())
+        assert [(d.name, d.vram_gb) for d in pool.devices] == [("cpu:0", 10.0), ("cpu:1", 10.0)]
+        default = DevicePool.from_settings(Settings(cache_bucket="", skip_model_load=True))
+        assert [d.name for d in default.devices] == ["cpu"]
+        assert default.devices[0].vram_gb == float("inf")
+        with pytest.raises(ValueError):
+            DevicePool([])
+
+    def test_place_by_declared_vram(self) -> None:
+        pool = DevicePool([Device("cpu:0", 10.0), Device("cpu:1", 6.0)])
+        assert [d.name for d in pool.place("a", 5.0)] == ["cpu:0", "cpu:1"]
+        assert [d.name for d in pool.place("b", 5.0)] == ["cpu:0"]  # cpu:1 has 1 GB left
+        assert pool.place("c", 5.0) == []
+        pool.release("a", "cpu:1", 5.0)
+        assert [d.name for d in pool.place("c", 5.0)] == ["cpu:1"]
+        assert pool.stats()["cpu:0"]["models"] == ["a", "b"]
+
+    def test_lease_picks_the_least_loaded(self) -> None:
+        pool = DevicePool([Device("cpu:0", 10.0), Device("cpu:1", 10.0)])
+        with pool.lease(pool.devices) as first, pool.lease(pool.devices) as second:
+            assert {first.name, second.name} == {"cpu:0", "cpu:1"}  # type: ignore[union-attr]
+            with pool.lease(pool.devices) as third:
+                assert third is not None and third.in_flight == 2
+        assert all(d.in_flight == 0 for d in pool.devices)
+        with pool.lease([]) as none:
+            assert none is None
+
+
+class TestRegistryReplicas:
+    def test_one_replica_per_device_with_room(self) -> None:
+        registry = ModelRegistry(_settings())
+        assert registry.load_replicas("sdxl_turbo", FakeSDXL, 4.0) == 2
+        assert registry.load_replicas("partcrafter", FakePartCrafter, 8.0) == 0  # 6 GB left
+        assert registry.get("sdxl_turbo", "cpu:1").device == "cpu:1"
+        assert not registry.has("partcrafter")
+
+    def test_unbound_models_serve_every_device(self) -> None:
+        registry = ModelRegistry(_settings())
+        model = MagicMock()
+        registry.register("sdxl_turbo", model)
+        assert registry.get("sdxl_turbo", "cpu:1") is model
+        assert registry.has("sdxl_turbo", "cpu:0")
+
+    def test_missing_replica_and_unload(self) -> None:
+        registry = ModelRegistry(_settings())
+        registry.register("hunyuan3d_turbo", FakeModel("cpu:0"), "cpu:0")
+        with pytest.raises(KeyError, match="cpu:1"):
+            registry.get("hunyuan3d_turbo", "cpu:1")
+        loaded = registry.get_or_load("hunyuan3d_turbo", lambda: FakeModel("cpu:1"), "cpu:1")
+        assert loaded.device == "cpu:1"
+        assert registry.devices.get("cpu:1").reserved_gb == 4.0
+        registry.unload("hunyuan3d_turbo", "cpu:1")
+        assert registry.devices.get("cpu:1").reserved_gb == 0.0
+        assert registry.has("hunyuan3d_turbo", "cpu:0")
+        registry.unload("hunyuan3d_turbo")
+        assert registry.loaded_names == []
+
+    def test_route_needs_every_model(self) -> None:
+        registry = ModelRegistry(_settings())
+        registry.load_replicas("sdxl_turbo", FakeSDXL, 4.0)
+        registry.register("partcrafter", FakePartCrafter("cpu:1"), "cpu:1")
+        for _ in range(3):
+            with registry.route(["sdxl_turbo", "partcrafter"]) as device:
+                assert device == "cpu:1"
+
+
+class TestOrchestratorRouting:
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_spread_across_devices(self) -> None:
+        settings = _settings(image_batch_max_size=1, max_points=256)
+        orchestrator, registry = _orchestrator(settings)
+        assert orchestrator.queue_stats()["slots"] == settings.gpu_slots * 2
+
+        texts = ["horse", "dog", "eagle", "car"]
+        responses = await asyncio.gather(
+            *(orchestrator.generate(GenerateRequest(text=text)) for text in texts)
+        )
+        assert all(r.pipeline == "partcrafter" for r in responses)
+        calls = {d: registry.get("partcrafter", d).calls for d in ("cpu:0", "cpu:1")}
+        assert calls == {"cpu:0": 2, "cpu:1": 2}
+        devices = orchestrator.device_stats()
+        assert devices["cpu:0"]["routed"] == devices["cpu:1"]["routed"] == 2
+        assert devices["cpu:0"]["in_flight"] == 0
+        assert devices["cpu:0"]["reserved_gb"] == 8.0
+        await orchestrator.close()
+
+    @pytest.mark.asyncio
+    async def test_each_device_runs_on_its_own_workers(self) -> None:
+        settings = _settings(image_batch_max_size=1, max_points=256)
+        executors = Executors(cpu_workers=2, devices=["cpu:0", "cpu:1"])
+        orchestrator, registry = _orchestrator(settings, executors)
+        texts = ["horse", "dog", "eagle", "car"]
+        await asyncio.gather(*(orchestrator.generate(GenerateRequest(text=t)) for t in texts))
+        for device in ("cpu:0", "cpu:1"):
+            threads = registry.get("partcrafter", device).threads
+            assert threads and all(t.startswith(f"gpu:{device}") for t in threads)
+        snapshot = orchestrator.queue_snapshot()
+        assert set(snapshot["stages_by_device"]) == {"cpu:0", "cpu:1"}
+        assert snapshot["stages_by_device"]["cpu:0"]["mesh"]["workers"] == 1
+        assert snapshot["stages"]["mesh"]["completed"] == 4
+        assert {d: s["slots"] for d, s in snapshot["by_device"].items()} == {
+            "cpu:0": settings.gpu_slots,
+            "cpu:1": settings.gpu_slots,
+        }
+        await orchestrator.close()
+        executors.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_admission_uses_the_routed_device(self) -> None:
+        settings = _settings(gpu_queue_max_wait_seconds=0.0)
+        registry = ModelRegistry(settings)
+        registry.load_replicas("sdxl_turbo", FakeSDXL, FakeSDXL.VRAM_GB)
+        registry.register("partcrafter", FakePartCrafter("cpu:1"), "cpu:1")
+        orchestrator, _ = _orchestrator(settings)
+        orchestrator._registry = registry
+        orchestrator._scheduler.device("cpu:1")._running = settings.gpu_slots  # cpu:0 is idle
+
+        with pytest.raises(GPUQueueFullError):
+            await orchestrator.generate(GenerateRequest(text="horse"))
+        by_device = orchestrator.queue_stats()["by_device"]
+        assert (by_device["cpu:0"]["rejected"], by_device["cpu:1"]["rejected"]) == (0, 1)
+        assert registry.devices.get("cpu:1").in_flight == 0  # Lease released
+        await orchestrator.close()
@@ -0,0 +1,192 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for DiskTier — mmap-backed, append-only local shape store
+# ─────────────────────────────────────────────────────────────────────────────
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.cache.disk_tier import DiskTier
+from app.cache.memory_tier import ShapeRecord
+from app.pipeline.encoding import encode_float32, encode_uint8
+from app.schemas import BoundingBox, GenerateResponse
+
+
+def _make_response(seed: int = 0, n: int = 64) -> GenerateResponse:
+    rng = np.random.default_rng(seed)
+    return GenerateResponse(
+        positions=encode_float32(rng.uniform(-1, 1, (n, 3))),
+        part_ids=encode_uint8(rng.integers(0, 4, n)),
+        part_names=["head", "body", "legs", "tail"],
+        template_type="quadruped",
+        bounding_box=BoundingBox(min=[-1, -1, -1], max=[1, 1, 1]),
+        cached=False,
+        generation_time_ms=seed,
+        pipeline="mock",
+    )
+
+
+def _make_record(seed: int = 0) -> ShapeRecord:
+    return ShapeRecord.from_response(_make_response(seed))
+
+
+def _get(tier: DiskTier, key: str) -> GenerateResponse | None:
+    record = tier.get(key)
+    return record.to_response() if record is not None else None
+
+
+def _open(path: Path, max_bytes: int = 1 << 20) -> DiskTier:
+    tier = DiskTier(path, max_bytes=max_bytes)
+    tier.open()
+    return tier
+
+
+def _crash(tier: DiskTier) -> None:
+    """Drop the directory lock without persisting, as a killed process would."""
+    assert tier._lock_fd is not None
+    os.close(tier._lock_fd)
+    tier._lock_fd = None
+
+
+class TestReadWrite:
+    def test_put_get_roundtrip(self, tmp_path: Path) -> None:
+        tier = _open(tmp_path)
+        resp = _make_response(1)
+        tier.put("dog", ShapeRecord.from_response(resp))
+        assert _get(tier, "dog") == resp
+        assert tier.get("cat") is None
+        assert "dog" in tier
+        assert len(tier) == 1
+
+    def test_record_outlives_the_mapping(self, tmp_path: Path) -> None:
+        tier = _open(tmp_path)
+        tier.put("dog", _make_record(1))
+        record = tier.get("dog")
+        tier.close()
+        assert record is not None
+        assert record.to_response() == _make_response(1)
+
+    def test_overwrite_replaces_entry(self, tmp_path: Path) -> None:
+        tier = _open(tmp_path)
+        tier.put("dog", _make_record(1))
+        tier.put("dog", _make_record(2))
+        assert _get(tier, "dog") == _make_response(2)
+        assert len(tier) == 1
+
+
+class TestPersistence:
+    def test_reopen_after_persist(self, tmp_path: Path) -> None:
+        tier = _open(tmp_path)
+        for i in range(5):
+            tier.put(f"k{i}", _make_record(i))
+        tier.close()
+
+        reopened = _open(tmp_path)
+        assert len(reopened) == 5
+        assert _get(reopened, "k3") == _make_response(3)
+
+    def test_recovers_frames_appended_after_index(self, tmp_path: Path) -> None:
+        """A crash after appends (no persist) loses no complete records."""
+        tier = _open(tmp_path)
+        tier.put("a", _make_record(1))
+        tier.persist()
+        tier.put("b", _make_record(2))  # Not in index.json
+        _crash(tier)
+
+        reopened = _open(tmp_path)
+        assert _get(reopened, "a") == _make_response(1)
+        assert _get(reopened, "b") == _make_response(2)
+
+    def test_torn_tail_is_truncated(self, tmp_path: Path) -> None:
+        tier = _open(tmp_path)
+        tier.put("a", _make_record(1))
+        tier.put("b", _make_record(2))
+        tier.close()
+
+        data = tmp_path / "shapes.dat"
+        data.write_bytes(data.read_bytes()[:-7])  # Torn write on "b"
+        (tmp_path / "index.json").unlink()
+
+        reopened = _open(tmp_path)
+        assert _get(reopened, "a") == _make_response(1)
+        assert reopened.get("b") is None
+
+        reopened.put("c", _make_record(3))
+        assert _get(reopened, "c") == _make_response(3)
+
+    def test_unrecognized_file_is_reset(self, tmp_path: Path) -> None:
+        (tmp_path / "shapes.dat").write_bytes(b"garbage-not-a-shape-store")
+        tier = _open(tmp_path)
+        assert len(tier) == 0
+        tier.put("a", _make_record(1))
+        assert _get(tier, "a") == _make_response(1)
+
+
+class TestLocking:
+    def test_second_process_gets_its_own_directory(self, tmp_path: Path) -> None:
+        first = _open(tmp_path)
+        second = _open(tmp_path)  # Separate open file description: a second flock
+        assert second.stats()["path"] == str(tmp_path / "worker-1")
+        first.put("ka", _make_record(1))
+        second.put("ka", _make_record(2))
+        second.put("kb", _make_record(3))
+        assert _get(first, "ka") == _make_response(1)
+        assert "kb" not in first
+        first.close()
+        second.close()
+
+        reopened = _open(tmp_path)
+        assert _get(reopened, "ka") == _make_response(1)
+        assert len(reopened) == 1
+
+    def test_close_releases_the_lock(self, tmp_path: Path) -> None:
+        _open(tmp_path).close()
+        assert _open(tmp_path).stats()["path"] == str(tmp_path)
+
+    def test_refuses_when_every_directory_is_locked(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr("app.cache.disk_tier._MAX_WORKER_DIRS", 1)
+        _open(tmp_path)
+        _open(tmp_path)
+        with pytest.raises(RuntimeError, match="locked"):
+            _open(tmp_path)
+
+
+class TestEviction:
+    def test_evicts_least_recently_used(self, tmp_path: Path) -> None:
+        record_size = len(_make_response(0).model_dump_json())  # Upper bound
+        tier = _open(tmp_path, max_bytes=record_size * 3)
+        tier.put("a", _make_record(1))
+        tier.put("b", _make_record(2))
+        tier.put("c", _make_record(3))
+        tier.get("a")  # Refresh "a" — "b" is now least recent
+        tier.put("d", _make_record(4))
+        tier.put("e", _make_record(5))
+
+        assert tier.get("a") is not None
+        assert tier.get("b") is None
+        assert tier.stats()["live_bytes"] <= record_size * 3
+
+    def test_compaction_keeps_live_entries(self, tmp_path: Path) -> None:
+        record_size = len(_make_response(0).model_dump_json())
+        tier = _open(tmp_path, max_bytes=record_size * 4)
+        for i in range(40):
+            tier.put(f"k{i % 3}", _make_record(i))
+
+        stats = tier.stats()
+        assert stats["file_bytes"] < record_size * 8  # Dead space reclaimed
+        assert _get(tier, "k0") == _make_response(39 - 39 % 3)
+        tier.close()
+
+        reopened = _open(tmp_path, max_bytes=record_size * 4)
+        assert len(reopened) == 3
+
+    @pytest.mark.parametrize("n", [1, 10])
+    def test_keys_by_recency(self, tmp_path: Path, n: int) -> None:
+        tier = _open(tmp_path)
+        for i in range(n):
+            tier.put(f"k{i}", _make_record(i))
+        assert tier.keys_by_recency()[0] == f"k{n - 1}"
@@ -0,0 +1,94 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for named executors — GPU work must not starve storage I/O
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+
+from app.cache.shape_cache import ShapeCache
+from app.cache.storage import LocalStorageBackend
+from app.services.executors import Executors, InstrumentedExecutor
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class TestInstrumentedExecutor:
+    def test_tracks_queue_and_busy_time(self) -> None:
+        executor = InstrumentedExecutor("test", max_workers=1)
+        release = threading.Event()
+        first = executor.submit(release.wait, 5)
+        second = executor.submit(time.sleep, 0.01)
+        time.sleep(0.05)
+
+        stats = executor.stats()
+        assert stats["active"] == 1
+        assert stats["queued"] == 1
+        assert stats["utilization"] == 1.0
+
+        release.set()
+        first.result(timeout=5)
+        second.result(timeout=5)
+        stats = executor.stats()
+        assert stats == {
+            "workers": 1,
+            "queued": 0,
+            "active": 0,
+            "utilization": 0.0,
+            "completed": 2,
+            "busy_seconds": stats["busy_seconds"],
+        }
+        assert stats["busy_seconds"] >= 0.05
+        executor.shutdown()
+
+    def test_exceptions_propagate(self) -> None:
+        executor = InstrumentedExecutor("test", max_workers=1)
+        future = executor.submit(int, "not a number")
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+        assert executor.stats()["completed"] == 1
+        executor.shutdown()
+
+
+class TestExecutors:
+    def test_named_pools(self) -> None:
+        executors = Executors(gpu_workers=1, io_workers=4, cpu_workers=2)
+        assert set(executors.stats()) == {"gpu", "io", "cpu"}
+        assert executors.gpu.workers == 1
+        assert executors.io.workers == 4
+        assert executors.gpu_for("cuda:1") is executors.gpu  # One device: one GPU pool
+        executors.shutdown()
+
+    def test_a_gpu_pool_per_device(self) -> None:
+        executors = Executors(gpu_workers=2, devices=["cuda:0", "cuda:1"])
+        assert set(executors.stats()) == {"gpu:cuda:0", "gpu:cuda:1", "io", "cpu"}
+        assert executors.gpu_for("cuda:1") is not executors.gpu_for("cuda:0")
+        assert executors.gpu_for("cuda:1").workers == 2
+        assert executors.gpu_for(None) is executors.gpu is executors.gpu_for("cuda:0")
+        executors.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_storage_read_does_not_wait_for_gpu(self, tmp_path: Path) -> None:
+        """A saturated GPU pool leaves cache storage reads unaffected."""
+        executors = Executors(gpu_workers=1, io_workers=2, cpu_workers=1)
+        cache = ShapeCache(bucket_name="test", io_executor=executors.io)
+        cache._storage = LocalStorageBackend(tmp_path)
+        cache._get_from_storage = lambda key: None  # type: ignore[assignment,method-assign]
+        release = threading.Event()
+        loop = asyncio.get_running_loop()
+        gpu_jobs = [loop.run_in_executor(executors.gpu, release.wait, 5) for _ in range(3)]
+
+        t0 = time.perf_counter()
+        assert await cache.get("horse") is None
+        assert time.perf_counter() - t0 < 1.0
+        assert executors.gpu.stats()["queued"] == 2
+
+        release.set()
+        await asyncio.gather(*gpu_jobs)
+        executors.shutdown()
@@ -85,7 +85,7 @@ class TestFallbackTrigger:
         """Full integration: PartCrafter fails → Hunyuan + GSAM → valid output."""
         registry = _make_mock_registry()
 
-        cache = ShapeCache(bucket_name="", memory_capacity=10)
+        cache = ShapeCache(bucket_name="")
         settings = Settings(
             cache_bucket="",
             skip_model_load=True,
@@ -104,7 +104,9 @@ class TestFallbackTrigger:
             patch.object(
                 registry,
                 "get_or_load",
-                side_effect=lambda name, factory: mock_hunyuan if "hunyuan" in name else mock_gsam,
+                side_effect=lambda name, factory, device=None: (
+                    mock_hunyuan if "hunyuan" in name else mock_gsam
+                ),
             ),
             patch("app.services.pipeline.render_multiview_with_id_pass") as mock_render,
         ):
@@ -162,7 +164,7 @@ class TestFallbackTrigger:
         partcrafter.generate.return_value = meshes
         registry.register("partcrafter", partcrafter)
 
-        cache = ShapeCache(bucket_name="", memory_capacity=10)
+        cache = ShapeCache(bucket_name="")
         orchestrator = PipelineOrchestrator(registry, cache, settings)
 
         request = GenerateRequest(text="horse")
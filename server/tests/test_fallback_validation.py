@@ -92,7 +92,7 @@ class TestFallbackTrigger:
 
         settings = Settings(cache_bucket="", skip_model_load=True)
         registry = ModelRegistry(settings)
-        cache = ShapeCache(bucket_name="", memory_capacity=10)
+        cache = ShapeCache(bucket_name="")
         await cache.connect()
         metrics = PipelineMetrics()
         orchestrator = PipelineOrchestrator(registry, cache, settings, metrics=metrics)
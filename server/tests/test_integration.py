@@ -29,6 +29,7 @@ async def client():
     from app.config import Settings, get_settings
     from app.main import create_app
     from app.models.registry import ModelRegistry
+    from app.services.executors import Executors
     from app.services.metrics import PipelineMetrics
     from app.services.pipeline import PipelineOrchestrator
 
@@ -45,15 +46,19 @@ async def client():
     # Manually initialize app.state (lifespan doesn't run with ASGITransport)
     settings = Settings(cache_bucket="", skip_model_load=True)
     registry = ModelRegistry(settings)
-    cache = ShapeCache(bucket_name="", memory_capacity=10)
+    executors = Executors(cpu_workers=2)
+    cache = ShapeCache(bucket_name="", io_executor=executors.io)
     await cache.connect()
     metrics = PipelineMetrics()
-    orchestrator = PipelineOrchestrator(registry, cache, settings, metrics=metrics)
+    orchestrator = PipelineOrchestrator(
+        registry, cache, settings, metrics=metrics, executors=executors
+    )
 
     app.state.model_registry = registry
     app.state.shape_cache = cache
     app.state.settings = settings
     app.state.metrics = metrics
+    app.state.executors = executors
     app.state.pipeline_orchestrator = orchestrator
 
     # Register mock models
@@ -68,6 +73,7 @@ async def client():
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
+    executors.shutdown()
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -194,6 +200,20 @@ class TestMetricsEndpoint:
         # Check for key metrics in the exposition format
         assert "lumen_cache_hit_ratio" in text
         assert "lumen_model_load_status" in text
+        assert 'lumen_executor_queue_depth{executor="gpu"}' in text
+        assert 'lumen_executor_utilization{executor="io"}' in text
+        assert 'lumen_gpu_queue_depth{priority="interactive"}' in text
+        assert "lumen_gpu_queue_estimated_wait_seconds" in text
+        assert "lumen_generations_cancelled_total 0.0" in text
+        assert "# TYPE lumen_wasted_gpu_seconds_total counter" in text
+        assert "# TYPE lumen_image_batch_size histogram" in text
+        assert "# TYPE lumen_coalesced_requests_total counter" in text
+        assert 'lumen_device_in_flight{device="cpu"}' in text
+        assert "# TYPE lumen_cache_writes_dropped_total counter" in text
+        assert "lumen_cache_writes_dropped_total 0.0" in text
+        assert "# TYPE lumen_gpu_queue_rejected_total counter" in text
+        assert 'lumen_executor_busy_seconds_total{executor="gpu"}' in text
+        assert "# TYPE lumen_stage_busy_seconds_total counter" in text
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -250,4 +270,3 @@ class TestCORS:
         )
         assert response.status_code == 200
         assert "access-control-allow-origin" in response.headers
-
@@ -0,0 +1,170 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for MemoryTier / ShapeRecord — byte-budgeted in-memory shape store
+# ─────────────────────────────────────────────────────────────────────────────
+
+import json
+
+import numpy as np
+import pytest
+
+from app.cache.memory_tier import MemoryTier, ShapeRecord
+from app.pipeline.encoding import encode_float32, encode_uint8
+from app.schemas import BoundingBox, GenerateResponse
+
+
+def _make_response(seed: int = 0, n: int = 2048) -> GenerateResponse:
+    rng = np.random.default_rng(seed)
+    return GenerateResponse(
+        positions=encode_float32(rng.uniform(-1, 1, (n, 3))),
+        part_ids=encode_uint8(rng.integers(0, 4, n)),
+        part_names=["head", "body", "legs", "tail"],
+        template_type="quadruped",
+        bounding_box=BoundingBox(min=[-1, -1, -1], max=[1, 1, 1]),
+        cached=False,
+        generation_time_ms=seed,
+        pipeline="mock",
+    )
+
+
+class TestShapeRecord:
+    def test_roundtrip(self) -> None:
+        resp = _make_response(1)
+        assert ShapeRecord.from_response(resp).to_response() == resp
+
+    def test_responses_are_independent(self) -> None:
+        """Mutating a served response must not leak into the cached record."""
+        record = ShapeRecord.from_response(_make_response(1))
+        served = record.to_response()
+        served.cached = True
+        served.part_names.append("extra")
+        served.bounding_box.min[0] = 99.0
+        assert record.to_response() == _make_response(1)
+
+    def test_arrays_are_read_only(self) -> None:
+        positions, part_ids = ShapeRecord.from_response(_make_response(1)).arrays()
+        assert positions.shape == (2048, 3)
+        assert part_ids.shape == (2048,)
+        with pytest.raises(ValueError):
+            positions[0, 0] = 1.0
+
+    def test_encoded_roundtrip(self) -> None:
+        record = ShapeRecord.from_response(_make_response(1))
+        restored = ShapeRecord.from_encoded(record.encode())
+        assert restored.to_response() == _make_response(1)
+
+    def test_from_blob_reads_binary_and_legacy_json(self) -> None:
+        resp = _make_response(1)
+        binary = ShapeRecord.from_response(resp).encode()
+        legacy = resp.model_dump_json().encode()
+        assert ShapeRecord.from_blob("shapes/a.bin", binary).to_response() == resp
+        assert ShapeRecord.from_blob("shapes/a.json", legacy).to_response() == resp
+
+    def test_compact_size(self) -> None:
+        """A 2048-point shape costs ~26 KB, so 1 GB holds tens of thousands."""
+        record = ShapeRecord.from_response(_make_response(1))
+        assert record.nbytes < 28 * 1024
+        assert (1 << 30) // record.nbytes > 30_000
+
+    def test_zstd_compression(self) -> None:
+        pytest.importorskip("zstandard")
+        resp = _make_response(1)
+        resp.positions = encode_float32(np.zeros((2048, 3)))  # Highly compressible
+        record = ShapeRecord.from_response(resp, compress=True)
+        assert record.compressed
+        assert record.nbytes < ShapeRecord.from_response(resp).nbytes
+        assert record.to_response() == resp
+        assert record.compressed_as(False).to_response() == resp
+        assert ShapeRecord.from_response(resp).compressed_as(True).compressed
+        assert record.compressed_as(True) is record
+
+
+class TestMemoryTier:
+    def test_evicts_by_bytes(self) -> None:
+        records = [ShapeRecord.from_response(_make_response(i)) for i in range(5)]
+        tier = MemoryTier(max_bytes=records[0].nbytes * 3)
+        for i, record in enumerate(records):
+            tier[f"k{i}"] = record
+
+        assert len(tier) == 3
+        assert "k0" not in tier
+        assert tier.currsize <= tier.maxsize
+        stats = tier.stats()
+        assert stats["evictions"] == 2
+        assert stats["eviction_rate"] == pytest.approx(2 / 5)
+
+    def test_clear_is_not_eviction(self) -> None:
+        tier = MemoryTier(max_bytes=1 << 20)
+        tier["a"] = ShapeRecord.from_response(_make_response(1))
+        tier.clear()
+        assert len(tier) == 0
+        assert tier.currsize == 0
+        assert tier.stats()["evictions"] == 0
+
+    def test_fits(self) -> None:
+        record = ShapeRecord.from_response(_make_response(1))
+        tier = MemoryTier(max_bytes=record.nbytes)
+        assert tier.fits(record.nbytes)
+        tier["a"] = record
+        assert not tier.fits(1)
+
+
+class TestSerializedBody:
+    def test_to_json_matches_pydantic(self) -> None:
+        resp = _make_response(1)
+        body = ShapeRecord.from_response(resp).to_json(cached=True, generation_time_ms=7)
+        expected = resp.model_copy(update={"cached": True, "generation_time_ms": 7})
+        assert GenerateResponse.model_validate_json(body) == expected
+        assert json.loads(body) == json.loads(expected.model_dump_json())
+
+    def test_to_json_alias_of(self) -> None:
+        resp = _make_response(1)
+        body = ShapeRecord.from_response(resp).to_json(
+            cached=True, generation_time_ms=7, alias_of="horse"
+        )
+        expected = resp.model_copy(
+            update={"cached": True, "generation_time_ms": 7, "alias_of": "horse"}
+        )
+        assert GenerateResponse.model_validate_json(body) == expected
+
+    def test_body_is_counted_once(self) -> None:
+        record = ShapeRecord.from_response(_make_response(1))
+        before = record.nbytes
+        added = record.prepare_json()
+        assert added > 0
+        assert record.nbytes == before + added
+        assert record.prepare_json() == 0
+
+    def test_reaccount_updates_budget(self) -> None:
+        tier = MemoryTier(max_bytes=1 << 20)
+        record = ShapeRecord.from_response(_make_response(1))
+        tier["a"] = record
+        before = tier.currsize
+        record.prepare_json()
+        tier.reaccount("a")
+        assert tier.currsize == record.nbytes > before
+        assert tier.stats()["evictions"] == 0
+
+    def test_reaccount_at_budget_evicts_others_in_step(self) -> None:
+        records = [ShapeRecord.from_response(_make_response(1)) for _ in range(3)]
+        tier = MemoryTier(max_bytes=records[0].nbytes * 3)
+        for i, record in enumerate(records):
+            tier[f"k{i}"] = record
+        records[0].prepare_json()  # The least recent entry grows
+        tier.reaccount("k0")
+        assert tier.peek("k0") is records[0] and "k0" in tier
+        assert sorted(tier.keys()) == sorted(tier._records)
+        assert tier.currsize == sum(tier.peek(k).nbytes for k in tier) <= tier.maxsize
+        assert tier.stats()["evictions"] == 3 - len(tier)
+        assert tier.stats()["eviction_rate"] == pytest.approx((3 - len(tier)) / 3, abs=1e-4)
+
+    def test_peek_follows_evictions_without_touching_recency(self) -> None:
+        record = ShapeRecord.from_response(_make_response(1))
+        tier = MemoryTier(max_bytes=record.nbytes * 2)
+        tier["a"] = record
+        tier["b"] = ShapeRecord.from_response(_make_response(1))
+        assert tier.peek("a") is record  # Still least recent
+        tier["c"] = ShapeRecord.from_response(_make_response(1))
+        assert tier.peek("a") is None and "a" not in tier
+        del tier["b"]
+        tier.clear()
+        assert tier.peek("c") is None
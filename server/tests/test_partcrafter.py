@@ -329,10 +329,10 @@ class TestPipelineFallback:
         orchestrator = PipelineOrchestrator(mock_registry, mock_cache, settings)
 
         # Call _generate_sync directly
-        from app.pipeline.template_matcher import get_template
+        from app.pipeline.concept import analyze_concept
 
-        template = get_template("horse")
-        positions, part_ids, part_names, pipeline = orchestrator._generate_sync("horse", template)
+        concept = analyze_concept("horse")
+        positions, part_ids, part_names, pipeline = orchestrator._generate_sync(concept)
 
         assert pipeline == "mock"
         assert positions.shape == (2048, 3)
@@ -351,10 +351,9 @@ class TestPipelineFallback:
         cache.is_connected = True
         orchestrator = PipelineOrchestrator(registry, cache, settings)
 
-        from app.pipeline.template_matcher import get_template
+        from app.pipeline.concept import analyze_concept
 
-        template = get_template("cat")
-        result = orchestrator._generate_sync("cat", template)
+        result = orchestrator._generate_sync(analyze_concept("cat"))
 
         assert len(result) == 4
         positions, part_ids, part_names, pipeline = result
@@ -583,14 +582,14 @@ class TestShapeCacheCoverage:
         """Cache with no bucket name should still work (memory-only)."""
         from app.cache.shape_cache import ShapeCache
 
-        cache = ShapeCache(bucket_name="", memory_capacity=10)
+        cache = ShapeCache(bucket_name="")
         assert cache.is_connected is True
 
     @pytest.mark.asyncio
     async def test_stats_initially_zero(self):
         from app.cache.shape_cache import ShapeCache
 
-        cache = ShapeCache(bucket_name="", memory_capacity=10)
+        cache = ShapeCache(bucket_name="")
         stats = await cache.stats()
         assert stats["memory_hits"] == 0
         assert stats["storage_hits"] == 0
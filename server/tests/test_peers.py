@@ -0,0 +1,203 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for the peer cache tier — consistent hashing + owner fill over HTTP
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.cache.peers import HashRing, PeerTier
+from app.cache.shape_cache import ShapeCache
+from app.cache.storage import LocalStorageBackend
+from app.routes import cache as cache_routes
+from app.schemas import BoundingBox, GenerateResponse
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+PEERS = ["http://a", "http://b"]
+
+
+def _response(part: str = "body") -> GenerateResponse:
+    return GenerateResponse(
+        positions="AAAAAAAAAAAAAAAA",  # One zero point (3 × float32)
+        part_ids="AA==",
+        part_names=[part],
+        template_type="quadruped",
+        bounding_box=BoundingBox(min=[-0.5, -0.5, -0.5], max=[0.5, 0.5, 0.5]),
+        cached=False,
+        generation_time_ms=100,
+        pipeline="mock",
+    )
+
+
+class Cluster(httpx.AsyncBaseTransport):
+    """Routes each peer URL to that instance's app, in-process."""
+
+    def __init__(self) -> None:
+        self.apps: dict[str, httpx.ASGITransport] = {}
+        self.down: set[str] = set()
+        self.requests = 0
+
+    def add(self, host: str, cache: ShapeCache) -> None:
+        app = FastAPI()
+        app.include_router(cache_routes.router)
+        app.state.shape_cache = cache
+        self.apps[host] = httpx.ASGITransport(app=app)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if request.url.host in self.down:
+            raise httpx.ConnectError("connection refused", request=request)
+        return await self.apps[request.url.host].handle_async_request(request)
+
+
+def _owned_by(peer: str) -> str:
+    """A concept whose cache key the ring assigns to ``peer``."""
+    ring = HashRing(PEERS)
+    for i in range(1000):
+        concept = f"concept {i}"
+        if ring.owner(ShapeCache._hash_key(ShapeCache.normalize_key(concept))) == peer:
+            return concept
+    raise AssertionError("no key found")
+
+
+@pytest.fixture()
+def cluster() -> Cluster:
+    return Cluster()
+
+
+def _instance(cluster: Cluster, url: str, storage: LocalStorageBackend | None = None) -> ShapeCache:
+    cache = ShapeCache(
+        bucket_name="", storage=storage, peers=PeerTier(PEERS, url, transport=cluster)
+    )
+    cluster.add(url.removeprefix("http://"), cache)
+    return cache
+
+
+class TestHashRing:
+    def test_deterministic(self) -> None:
+        ring = HashRing(["http://a", "http://b", "http://c"])
+        again = HashRing(["http://c", "http://a", "http://b"])
+        keys = [f"{i:016x}" for i in range(200)]
+        assert [ring.owner(k) for k in keys] == [again.owner(k) for k in keys]
+
+    def test_spreads_keys(self) -> None:
+        ring = HashRing(["http://a", "http://b", "http://c"])
+        owners = [ring.owner(f"{i:016x}") for i in range(3000)]
+        assert all(owners.count(node) > 600 for node in ("http://a", "http://b", "http://c"))
+
+    def test_removing_a_node_only_moves_its_keys(self) -> None:
+        before = HashRing(["http://a", "http://b", "http://c"])
+        after = HashRing(["http://a", "http://b"])
+        for key in (f"{i:016x}" for i in range(1000)):
+            if before.owner(key) != "http://c":
+                assert after.owner(key) == before.owner(key)
+
+    def test_needs_a_node(self) -> None:
+        with pytest.raises(ValueError):
+            HashRing([])
+
+
+class TestPeerTier:
+    def test_self_owned_keys_are_local(self) -> None:
+        tier = PeerTier(["http://a/", "http://b"], "http://a")
+        key = ShapeCache._hash_key(ShapeCache.normalize_key(_owned_by("http://a")))
+        assert tier.owner(key) is None
+        key = ShapeCache._hash_key(ShapeCache.normalize_key(_owned_by("http://b")))
+        assert tier.owner(key) == "http://b"
+
+
+class TestPeerFill:
+    @pytest.mark.asyncio
+    async def test_miss_filled_from_owner(self, cluster: Cluster) -> None:
+        a = _instance(cluster, "http://a")
+        b = _instance(cluster, "http://b")
+        concept = _owned_by("http://a")
+        await a.set(concept, _response("head"))
+
+        hit = await b.get(concept)
+        assert hit is not None and hit.part_names == ["head"]
+        stats = await b.stats()
+        assert stats["peer_hits"] == 1
+        assert stats["peers"]["hits"] == 1
+        assert (await a.stats())["peers"]["served"] == 1
+
+        assert await b.get(concept) is not None  # Now local
+        assert cluster.requests == 1
+
+    @pytest.mark.asyncio
+    async def test_owner_miss_is_final(self, cluster: Cluster) -> None:
+        _instance(cluster, "http://a")
+        b = _instance(cluster, "http://b")
+        assert await b.get(_owned_by("http://a")) is None
+        stats = await b.stats()
+        assert stats["peers"]["misses"] == 1
+        assert stats["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_owned_keys_never_leave(self, cluster: Cluster) -> None:
+        _instance(cluster, "http://a")
+        b = _instance(cluster, "http://b")
+        assert await b.get(_owned_by("http://b")) is None
+        assert cluster.requests == 0
+
+    @pytest.mark.asyncio
+    async def test_owner_reads_through_storage(self, cluster: Cluster, tmp_path: Path) -> None:
+        shared = LocalStorageBackend(tmp_path)
+        a = _instance(cluster, "http://a", shared)
+        b = _instance(cluster, "http://b", shared)
+        concept = _owned_by("http://a")
+        await b.set(concept, _response())
+        await b.flush_writes()
+        b.clear_memory()
+
+        assert await b.get(concept) is not None
+        assert (await a.stats())["storage_hits"] == 1  # The owner did the storage read
+        assert (await b.stats())["peer_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_owner_down_falls_back_to_storage(self, cluster: Cluster, tmp_path: Path) -> None:
+        shared = LocalStorageBackend(tmp_path)
+        _instance(cluster, "http://a", shared)
+        b = _instance(cluster, "http://b", shared)
+        concept = _owned_by("http://a")
+        await b.set(concept, _response())
+        await b.flush_writes()
+        b.clear_memory()
+        cluster.down.add("a")
+
+        assert await b.get(concept) is not None
+        stats = await b.stats()
+        assert stats["storage_hits"] == 1
+        assert stats["peers"]["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_owner_asked_before_the_known_keys_filter(
+        self, cluster: Cluster, tmp_path: Path
+    ) -> None:
+        shared = LocalStorageBackend(tmp_path)
+        a = _instance(cluster, "http://a", shared)
+        b = _instance(cluster, "http://b", shared)
+        await b.count_stored_shapes()  # Builds b's filter from the (empty) manifest
+        concept = _owned_by("http://a")
+        await a.set(concept, _response("head"))  # Upload still queued: not in the manifest
+
+        hit = await b.get(concept)
+        assert hit is not None and hit.part_names == ["head"]
+        assert (await b.stats())["bloom"]["skipped_storage_reads"] == 0
+
+        assert await b.get(_owned_by("http://b")) is None  # Own key: filter still skips storage
+        assert (await b.stats())["bloom"]["skipped_storage_reads"] == 1
+        await a.flush_writes()
+
+    @pytest.mark.asyncio
+    async def test_endpoint_rejects_bad_keys(self, cluster: Cluster) -> None:
+        _instance(cluster, "http://a")
+        async with httpx.AsyncClient(transport=cluster) as client:
+            assert (await client.get("http://a/internal/cache/../x")).status_code == 404
+            assert (await client.get("http://a/internal/cache/NOTHEX")).status_code == 422
@@ -3,14 +3,23 @@
 # ─────────────────────────────────────────────────────────────────────────────
 
 
+import asyncio
+import time
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
+from app.cache.memory_tier import ShapeRecord
 from app.cache.shape_cache import ShapeCache
 from app.config import Settings
 from app.models.registry import ModelRegistry
-from app.schemas import BoundingBox, GenerateRequest, GenerateResponse, QualityLevel
+from app.schemas import (
+    BoundingBox,
+    GenerateRequest,
+    GenerateResponse,
+    QualityLevel,
+    RequestPriority,
+)
 from app.services.pipeline import PipelineOrchestrator
 
 
@@ -28,6 +37,10 @@ def orchestrator_settings() -> Settings:
 def orchestrator_cache() -> ShapeCache:
     cache = MagicMock(spec=ShapeCache)
     cache.get = AsyncMock(return_value=None)
+    cache.get_record = AsyncMock(return_value=None)
+    cache.peek_record = MagicMock(return_value=None)
+    cache.get_alias_record = AsyncMock(return_value=None)
+    cache.peek_alias_record = MagicMock(return_value=None)
     cache.set = AsyncMock()
     return cache
 
@@ -109,7 +122,7 @@ class TestPipelineOrchestrator:
         orchestrator_settings: Settings,
     ):
         cached_response = GenerateResponse(
-            positions="AAAA",
+            positions="AAAAAAAAAAAAAAAA",
             part_ids="AA==",
             part_names=["body"],
             template_type="default",
@@ -120,7 +133,10 @@ class TestPipelineOrchestrator:
         )
 
         cache = MagicMock(spec=ShapeCache)
-        cache.get = AsyncMock(return_value=cached_response)
+        cache.get_record = AsyncMock(return_value=ShapeRecord.from_response(cached_response))
+        cache.peek_record = MagicMock(return_value=None)
+        cache.get_alias_record = AsyncMock(return_value=None)
+        cache.peek_alias_record = MagicMock(return_value=None)
         cache.set = AsyncMock()
 
         orchestrator = PipelineOrchestrator(orchestrator_registry, cache, orchestrator_settings)
@@ -130,6 +146,46 @@ class TestPipelineOrchestrator:
         assert result.cached is True
         cache.set.assert_not_called()
 
+    @pytest.mark.asyncio
+    async def test_generate_json_hit_skips_response_model(
+        self,
+        orchestrator_registry: ModelRegistry,
+        orchestrator_settings: Settings,
+    ):
+        """Hits are served from the record's pre-serialized body."""
+        stored = GenerateResponse(
+            positions="AAAAAAAAAAAAAAAA",
+            part_ids="AA==",
+            part_names=["body"],
+            template_type="default",
+            bounding_box=BoundingBox(min=[-1, -1, -1], max=[1, 1, 1]),
+            cached=False,
+            generation_time_ms=50,
+            pipeline="mock",
+        )
+        cache = MagicMock(spec=ShapeCache)
+        cache.get = AsyncMock()
+        cache.get_record = AsyncMock(return_value=None)
+        cache.peek_record = MagicMock(return_value=ShapeRecord.from_response(stored))
+        cache.set = AsyncMock()
+
+        orchestrator = PipelineOrchestrator(orchestrator_registry, cache, orchestrator_settings)
+        body = await orchestrator.generate_json(GenerateRequest(text="ball"))
+
+        result = GenerateResponse.model_validate_json(body)
+        assert result.cached is True
+        assert result.positions == stored.positions
+        cache.get.assert_not_called()
+        cache.set.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_generate_json_miss_generates(self, orchestrator: PipelineOrchestrator):
+        orchestrator._cache.get_record = AsyncMock(return_value=None)  # type: ignore[method-assign]
+        body = await orchestrator.generate_json(GenerateRequest(text="horse"))
+        result = GenerateResponse.model_validate_json(body)
+        assert result.cached is False
+        assert result.pipeline == "mock"
+
     @pytest.mark.asyncio
     async def test_deterministic_output(self, orchestrator: PipelineOrchestrator):
         """Same noun should produce the same mock shape."""
@@ -146,3 +202,191 @@ class TestPipelineOrchestrator:
         request = GenerateRequest(text="eagle", quality=QualityLevel.fast)
         result = await orchestrator.generate(request)
         assert isinstance(result, GenerateResponse)
+
+
+class TestCoalescing:
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_generate_once(
+        self,
+        orchestrator_registry: ModelRegistry,
+        orchestrator_cache: ShapeCache,
+        orchestrator_settings: Settings,
+    ):
+        """Ten concurrent requests for one concept run one GPU generation."""
+        from app.services.metrics import PipelineMetrics
+
+        metrics = PipelineMetrics()
+        orchestrator = PipelineOrchestrator(
+            orchestrator_registry, orchestrator_cache, orchestrator_settings, metrics=metrics
+        )
+        calls = 0
+        original = orchestrator._image_stage
+
+        def counting_generate(generation):  # type: ignore[no-untyped-def]
+            nonlocal calls
+            calls += 1
+            time.sleep(0.05)  # Keep the flight open while the others arrive
+            return original(generation)
+
+        orchestrator._image_stage = counting_generate  # type: ignore[method-assign]
+
+        results = await asyncio.gather(
+            *(orchestrator.generate(GenerateRequest(text="dragon")) for _ in range(10))
+        )
+
+        assert calls == 1
+        assert len({r.positions for r in results}) == 1
+        assert not any(r.cached for r in results)
+        assert orchestrator_cache.get_record.await_count == 1
+        data = metrics.to_dict()
+        assert data["requests_total"] == 10
+        assert data["coalesced_requests"] == 9
+        assert metrics.recent_generations_per_minute() == 1
+
+    @pytest.mark.asyncio
+    async def test_memory_hit_bypasses_flight(
+        self,
+        orchestrator: PipelineOrchestrator,
+        orchestrator_cache: ShapeCache,
+    ):
+        record = ShapeRecord.from_response(
+            GenerateResponse(
+                positions="AAAAAAAAAAAAAAAA",
+                part_ids="AA==",
+                part_names=["body"],
+                template_type="default",
+                bounding_box=BoundingBox(min=[-1, -1, -1], max=[1, 1, 1]),
+                cached=False,
+                generation_time_ms=50,
+                pipeline="mock",
+            )
+        )
+        orchestrator_cache.peek_record.return_value = record  # type: ignore[attr-defined]
+
+        result = await orchestrator.generate(GenerateRequest(text="ball"))
+
+        assert result.cached is True
+        orchestrator_cache.get_record.assert_not_called()  # type: ignore[attr-defined]
+        assert orchestrator._flights.leaders == 0
+
+    @pytest.mark.asyncio
+    async def test_interactive_joiner_promotes_a_queued_flight(
+        self,
+        orchestrator_registry: ModelRegistry,
+        orchestrator_cache: ShapeCache,
+        orchestrator_settings: Settings,
+    ):
+        """An interactive request sharing a queued pregenerate flight is served
+        ahead of the other pregenerate work."""
+        settings = orchestrator_settings.model_copy(update={"gpu_slots": 1})
+        orchestrator = PipelineOrchestrator(orchestrator_registry, orchestrator_cache, settings)
+        order: list[str] = []
+        original = orchestrator._image_stage
+
+        def recording_generate(generation):  # type: ignore[no-untyped-def]
+            order.append(generation.concept.normalized)
+            return original(generation)
+
+        orchestrator._image_stage = recording_generate  # type: ignore[method-assign]
+        scheduler = orchestrator._scheduler.device("cpu")
+        release = asyncio.Event()
+
+        async def hold() -> None:
+            async with scheduler.slot(RequestPriority.interactive, "holder"):
+                await release.wait()
+
+        holder = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        batch = [
+            asyncio.ensure_future(
+                orchestrator.generate(GenerateRequest(text=text, priority="pregenerate"), "batch")
+            )
+            for text in ("horse", "dog", "eagle")
+        ]
+        for _ in range(100):
+            if scheduler.queued() == 3:
+                break
+            await asyncio.sleep(0.01)
+        assert scheduler.queued(RequestPriority.pregenerate) == 3
+
+        user = asyncio.ensure_future(orchestrator.generate(GenerateRequest(text="eagle"), "user"))
+        await asyncio.sleep(0.01)
+        assert scheduler.queued(RequestPriority.interactive) == 1
+        release.set()
+        await asyncio.gather(holder, user, *batch)
+
+        assert order == ["eagle", "horse", "dog"]
+        assert orchestrator.queue_stats()["promoted"] == 1
+        await orchestrator.close()
+
+
+class TestAliases:
+    """Misses served from a cached near-synonym."""
+
+    @pytest.fixture
+    def horse_record(self) -> ShapeRecord:
+        return ShapeRecord.from_response(
+            GenerateResponse(
+                positions="AAAAAAAAAAAAAAAA",
+                part_ids="AA==",
+                part_names=["head", "body"],
+                template_type="quadruped",
+                bounding_box=BoundingBox(min=[-1, -1, -1], max=[1, 1, 1]),
+                cached=False,
+                generation_time_ms=50,
+                pipeline="mock",
+            )
+        )
+
+    @pytest.mark.asyncio
+    async def test_alias_hit_records_canonical(
+        self,
+        orchestrator: PipelineOrchestrator,
+        orchestrator_cache: ShapeCache,
+        horse_record: ShapeRecord,
+    ):
+        orchestrator_cache.get_alias_record.return_value = (horse_record, "horse")  # type: ignore[attr-defined]
+
+        result = await orchestrator.generate(GenerateRequest(text="pony"))
+
+        assert result.cached is True
+        assert result.alias_of == "horse"
+        orchestrator_cache.set.assert_not_called()  # type: ignore[attr-defined]
+
+    @pytest.mark.asyncio
+    async def test_memory_alias_hit_is_inline(
+        self,
+        orchestrator: PipelineOrchestrator,
+        orchestrator_cache: ShapeCache,
+        horse_record: ShapeRecord,
+    ):
+        orchestrator_cache.peek_alias_record.return_value = (horse_record, "horse")  # type: ignore[attr-defined]
+
+        body = await orchestrator.generate_json(GenerateRequest(text="stallion"))
+
+        result = GenerateResponse.model_validate_json(body)
+        assert result.cached is True
+        assert result.alias_of == "horse"
+        orchestrator_cache.get_record.assert_not_called()  # type: ignore[attr-defined]
+        assert orchestrator._flights.leaders == 0
+
+    @pytest.mark.asyncio
+    async def test_miss_is_counted_once_after_alias_resolution(
+        self,
+        orchestrator: PipelineOrchestrator,
+        orchestrator_cache: ShapeCache,
+    ):
+        await orchestrator.generate(GenerateRequest(text="pony"))
+        orchestrator_cache.get_record.assert_awaited_once()  # type: ignore[attr-defined]
+        assert orchestrator_cache.get_record.await_args.kwargs["count_miss"] is False  # type: ignore[attr-defined]
+        orchestrator_cache.get_alias_record.assert_awaited_once()  # type: ignore[attr-defined]
+
+        await orchestrator.generate(GenerateRequest(text="pony", quality=QualityLevel.fast))
+        # Profile keys have no near-synonyms: get_record() counts the miss itself
+        assert orchestrator_cache.get_record.await_args.kwargs["count_miss"] is True  # type: ignore[attr-defined]
+        orchestrator_cache.get_alias_record.assert_awaited_once()  # type: ignore[attr-defined]
+
+    @pytest.mark.asyncio
+    async def test_generated_response_has_no_alias(self, orchestrator: PipelineOrchestrator):
+        result = await orchestrator.generate(GenerateRequest(text="horse"))
+        assert result.alias_of is None
@@ -0,0 +1,187 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for deadline-aware stage planning — estimates, budgets, degradation
+# ─────────────────────────────────────────────────────────────────────────────
+# The planner is primed with step estimates, so each test decides which
+# steps fit without any step actually taking that long.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import time
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import PIL.Image
+import pytest
+import trimesh
+
+from app.cache.shape_cache import ShapeCache
+from app.config import Settings
+from app.models.registry import ModelRegistry
+from app.pipeline.concept import analyze_concept
+from app.pipeline.profiles import PROFILES
+from app.schemas import GenerateRequest
+from app.services.pipeline import PipelineOrchestrator
+from app.services.planner import Deadline, StagePlanner
+
+IMAGE = PIL.Image.new("RGB", (8, 8))
+
+
+class RecordingPartCrafter:
+    name = "partcrafter"
+    vram_gb = 0.0
+
+    def __init__(self, empty: bool = False) -> None:
+        self.empty = empty
+        self.calls: list[dict[str, Any]] = []
+
+    def generate(
+        self, image: PIL.Image.Image, num_parts: int, **kwargs: Any
+    ) -> list[trimesh.Trimesh]:
+        self.calls.append(kwargs)
+        if self.empty:
+            return [trimesh.Trimesh() for _ in range(num_parts)]
+        return [
+            trimesh.creation.box(extents=[0.2, 0.2, 0.2]).apply_translation([i * 0.3, 0, 0])
+            for i in range(num_parts)
+        ]
+
+
+def _orchestrator(partcrafter: RecordingPartCrafter) -> PipelineOrchestrator:
+    settings = Settings(cache_bucket="", skip_model_load=True, max_points=256)
+    registry = ModelRegistry(settings)
+    sdxl = MagicMock()
+    sdxl.generate.return_value = IMAGE
+    registry.register("sdxl_turbo", sdxl)
+    registry.register("partcrafter", partcrafter)
+    hunyuan = MagicMock()
+    hunyuan.generate.return_value = trimesh.creation.box(extents=[1, 1, 1])
+    registry.register("hunyuan3d_turbo", hunyuan)
+    registry.register("grounded_sam2", MagicMock())
+    cache = MagicMock(spec=ShapeCache)
+    cache.get_record = AsyncMock(return_value=None)
+    cache.peek_record = MagicMock(return_value=None)
+    cache.get_alias_record = AsyncMock(return_value=None)
+    cache.peek_alias_record = MagicMock(return_value=None)
+    cache.set = AsyncMock()
+    return PipelineOrchestrator(registry, cache, settings)
+
+
+def _views(mesh: trimesh.Trimesh, **kwargs: Any) -> list[tuple[PIL.Image.Image, np.ndarray]]:
+    return [(IMAGE, np.zeros((8, 8), dtype=np.int32)) for _ in range(4)]
+
+
+class TestDeadline:
+    def test_remaining_and_cap(self) -> None:
+        deadline = Deadline.after(10)
+        assert 9 < deadline.remaining() <= 10
+        assert deadline.capped(1).remaining() <= 1
+        assert deadline.capped(100).at == deadline.at
+        assert Deadline(time.perf_counter() - 1).remaining() == 0.0
+
+
+class TestStagePlanner:
+    def test_unobserved_steps_always_fit(self) -> None:
+        planner = StagePlanner()
+        assert planner.estimate("partcrafter", "quadruped") is None
+        assert planner.fits("partcrafter", "quadruped", Deadline.after(0))
+
+    def test_estimates_are_per_template_with_a_global_default(self) -> None:
+        planner = StagePlanner(margin=1.0)
+        planner.observe("hunyuan3d", "quadruped", 10.0)
+        planner.observe("hunyuan3d", "vehicle", 20.0)
+        assert planner.estimate("hunyuan3d", "quadruped") == 10.0
+        assert planner.estimate("hunyuan3d", "plant") == pytest.approx(12.0)  # EWMA of both
+        planner.observe("hunyuan3d", "quadruped", 20.0)
+        assert planner.estimate("hunyuan3d", "quadruped") == pytest.approx(12.0)
+
+    def test_work_scales_the_estimate(self) -> None:
+        planner = StagePlanner(margin=1.0)
+        planner.observe("partcrafter", "quadruped", 2.0, work=0.5)
+        assert planner.estimate("partcrafter", "quadruped") == 4.0
+        assert planner.estimate("partcrafter", "quadruped", work=0.25) == 1.0
+
+    def test_fits_needs_the_margin(self) -> None:
+        planner = StagePlanner(margin=2.0)
+        planner.observe("render", "quadruped", 3.0)
+        assert planner.fits("render", "quadruped", None)
+        assert planner.fits("render", "quadruped", Deadline.after(10))
+        assert not planner.fits("render", "quadruped", Deadline.after(5))
+
+    def test_stats(self) -> None:
+        planner = StagePlanner()
+        planner.observe("segment", "biped", 0.5)
+        planner.record_degraded("segment")
+        assert planner.stats() == {
+            "margin": 1.2,
+            "estimates_s": {"segment": {"*": 0.5, "biped": 0.5}},
+            "degraded": {"segment": 1},
+        }
+
+
+class TestDeadlineDegradation:
+    def test_partcrafter_downgrades_to_a_profile_that_fits(self) -> None:
+        partcrafter = RecordingPartCrafter()
+        orchestrator = _orchestrator(partcrafter)
+        orchestrator._planner.observe("partcrafter", "quadruped", 30.0)
+        fast = PROFILES["fast"]
+        _, _, _, pipeline = orchestrator._generate_sync(
+            analyze_concept("horse"), reference_image=IMAGE, deadline=Deadline.after(15)
+        )
+        assert pipeline == "partcrafter"
+        assert partcrafter.calls[0]["num_steps"] == fast.num_steps
+        assert partcrafter.calls[0]["num_tokens"] == fast.num_tokens
+        assert orchestrator.planner_stats()["degraded"] == {"partcrafter": 1}
+
+    def test_nothing_fits_skips_to_the_procedural_shape(self) -> None:
+        partcrafter = RecordingPartCrafter()
+        orchestrator = _orchestrator(partcrafter)
+        orchestrator._planner.observe("partcrafter", "quadruped", 300.0)
+        orchestrator._planner.observe("hunyuan3d", "quadruped", 60.0)
+        _, _, _, pipeline = orchestrator._generate_sync(
+            analyze_concept("horse"), reference_image=IMAGE, deadline=Deadline.after(20)
+        )
+        assert pipeline == "sdxl_turbo+mock"  # Procedural shape
+        assert partcrafter.calls == []
+        orchestrator._registry.get("hunyuan3d_turbo").generate.assert_not_called()
+        assert orchestrator.planner_stats()["degraded"] == {"partcrafter": 1, "hunyuan3d": 1}
+
+    def test_fallback_cap_applies_without_a_request_deadline(self) -> None:
+        orchestrator = _orchestrator(RecordingPartCrafter(empty=True))
+        orchestrator._planner.observe("hunyuan3d", "quadruped", 200.0)  # > 120 s cap
+        orchestrator._generate_sync(analyze_concept("horse"), reference_image=IMAGE)
+        orchestrator._registry.get("hunyuan3d_turbo").generate.assert_not_called()
+
+    def test_segmentation_is_skipped_when_out_of_time(self) -> None:
+        orchestrator = _orchestrator(RecordingPartCrafter(empty=True))
+        orchestrator._planner.observe("segment", "quadruped", 50.0)
+        with patch("app.services.pipeline.render_multiview_with_id_pass", side_effect=_views):
+            _, part_ids, part_names, pipeline = orchestrator._generate_sync(
+                analyze_concept("horse"), reference_image=IMAGE, deadline=Deadline.after(30)
+            )
+        assert pipeline == "hunyuan3d_grounded_sam"
+        assert set(part_ids.tolist()) == {0}  # Unlabeled mesh: one part
+        assert part_names == analyze_concept("horse").template.part_names
+        orchestrator._registry.get("grounded_sam2").segment.assert_not_called()
+        assert orchestrator.planner_stats()["degraded"] == {"segment": 1}
+
+    @pytest.mark.asyncio
+    async def test_generations_feed_the_estimates(self) -> None:
+        orchestrator = _orchestrator(RecordingPartCrafter())
+        await orchestrator.generate(GenerateRequest(text="horse"))
+        estimates = orchestrator.planner_stats()["estimates_s"]
+        assert set(estimates["partcrafter"]) == {"*", "quadruped"}
+        assert "planner" in orchestrator.queue_snapshot()
+        orchestrator._cache.set.assert_awaited_once()
+        await orchestrator.close()
+
+    @pytest.mark.asyncio
+    async def test_degraded_results_are_not_cached(self) -> None:
+        partcrafter = RecordingPartCrafter()
+        orchestrator = _orchestrator(partcrafter)
+        orchestrator._planner.observe("partcrafter", "quadruped", 10_000.0)  # Never fits
+        response = await orchestrator.generate(GenerateRequest(text="horse"))
+        assert response.pipeline != "partcrafter"
+        orchestrator._cache.set.assert_not_awaited()
+        await orchestrator.close()
@@ -0,0 +1,163 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for pipeline profiles — quality tiers, part counts and cache keys
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import base64
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import PIL.Image
+import pytest
+import trimesh
+
+from app.cache.shape_cache import ShapeCache
+from app.config import Settings
+from app.models.registry import ModelRegistry
+from app.pipeline.concept import analyze_concept
+from app.pipeline.profiles import (
+    DEFAULT_PROFILE,
+    PROFILES,
+    get_profile,
+    profile_concept,
+    with_part_count,
+)
+from app.schemas import GenerateRequest, GenerateResponse, QualityLevel
+from app.services.pipeline import PipelineOrchestrator
+
+
+class RecordingPartCrafter:
+    """Records the settings of each call; ``empty`` makes every part fail."""
+
+    name = "partcrafter"
+    vram_gb = 0.0
+
+    def __init__(self, empty: bool = False) -> None:
+        self.empty = empty
+        self.calls: list[dict[str, Any]] = []
+
+    def generate(
+        self, image: PIL.Image.Image, num_parts: int, **kwargs: Any
+    ) -> list[trimesh.Trimesh]:
+        self.calls.append({"num_parts": num_parts, **kwargs})
+        if self.empty:
+            return [trimesh.Trimesh() for _ in range(num_parts)]
+        return [
+            trimesh.creation.box(extents=[0.2, 0.2, 0.2]).apply_translation([i * 0.3, 0, 0])
+            for i in range(num_parts)
+        ]
+
+
+def _point_count(response: GenerateResponse) -> int:
+    return len(base64.b64decode(response.part_ids))
+
+
+def _orchestrator(partcrafter: RecordingPartCrafter) -> PipelineOrchestrator:
+    settings = Settings(cache_bucket="", skip_model_load=True, max_points=2048)
+    registry = ModelRegistry(settings)
+    sdxl = MagicMock()
+    sdxl.generate.return_value = PIL.Image.new("RGB", (8, 8))
+    registry.register("sdxl_turbo", sdxl)
+    registry.register("partcrafter", partcrafter)
+    cache = MagicMock(spec=ShapeCache)
+    cache.get_record = AsyncMock(return_value=None)
+    cache.peek_record = MagicMock(return_value=None)
+    cache.get_alias_record = AsyncMock(return_value=None)
+    cache.peek_alias_record = MagicMock(return_value=None)
+    cache.set = AsyncMock()
+    return PipelineOrchestrator(registry, cache, settings)
+
+
+class TestProfiles:
+    def test_quality_levels_have_profiles(self) -> None:
+        assert {q.value for q in QualityLevel} == set(PROFILES)
+        fast, standard = get_profile("fast"), get_profile("standard")
+        assert fast.num_steps < standard.num_steps
+        assert fast.num_tokens < standard.num_tokens
+        assert not fast.allow_fallback and standard.allow_fallback
+        assert get_profile("unknown") is DEFAULT_PROFILE
+
+    def test_part_count_truncates_or_pads(self) -> None:
+        template = analyze_concept("horse").template
+        assert with_part_count(template, 2).part_names == template.part_names[:2]
+        padded = with_part_count(template, template.num_parts + 2)
+        assert padded.part_names[: template.num_parts] == template.part_names
+        assert padded.part_names[-2:] == [
+            f"part_{template.num_parts + 1}",
+            f"part_{template.num_parts + 2}",
+        ]
+        assert padded.template_type == template.template_type
+
+
+class TestProfileConcept:
+    def test_default_keeps_the_plain_key(self) -> None:
+        plain = analyze_concept("horse")
+        assert profile_concept("horse") is plain
+        assert profile_concept("horse", "standard", plain.template.num_parts) is plain
+
+    def test_profile_and_part_count_change_the_key(self) -> None:
+        keys = {
+            profile_concept("horse").cache_key,
+            profile_concept("horse", "fast").cache_key,
+            profile_concept("horse", "standard", 3).cache_key,
+            profile_concept("horse", "fast", 3).cache_key,
+        }
+        assert len(keys) == 4
+        resized = profile_concept("horse", "fast", 3)
+        assert resized.template.num_parts == 3
+        assert resized.prompt == analyze_concept("horse").prompt
+
+
+class TestOrchestratorProfiles:
+    @pytest.mark.asyncio
+    async def test_fast_profile_settings_reach_the_models(self) -> None:
+        partcrafter = RecordingPartCrafter()
+        orchestrator = _orchestrator(partcrafter)
+        fast = PROFILES["fast"]
+        response = await orchestrator.generate(
+            GenerateRequest(text="horse", quality=QualityLevel.fast, num_parts=3)
+        )
+        assert partcrafter.calls == [
+            {
+                "num_parts": 3,
+                "num_steps": fast.num_steps,
+                "num_tokens": fast.num_tokens,
+                "guidance_scale": fast.guidance_scale,
+            }
+        ]
+        assert len(response.part_names) == 3
+        assert _point_count(response) == fast.max_points
+        cached_under = orchestrator._cache.set.call_args.args[0]  # type: ignore[attr-defined]
+        assert cached_under.cache_key == profile_concept("horse", "fast", 3).cache_key
+        await orchestrator.close()
+
+    @pytest.mark.asyncio
+    async def test_standard_profile_is_unchanged(self) -> None:
+        partcrafter = RecordingPartCrafter()
+        orchestrator = _orchestrator(partcrafter)
+        response = await orchestrator.generate(GenerateRequest(text="horse"))
+        assert partcrafter.calls[0]["num_steps"] == DEFAULT_PROFILE.num_steps
+        assert _point_count(response) == 2048
+        cached_under = orchestrator._cache.set.call_args.args[0]  # type: ignore[attr-defined]
+        assert cached_under.cache_key == analyze_concept("horse").cache_key
+        await orchestrator.close()
+
+    @pytest.mark.asyncio
+    async def test_fast_profile_never_runs_the_fallback(self) -> None:
+        orchestrator = _orchestrator(RecordingPartCrafter(empty=True))
+        orchestrator._registry.get_or_load = MagicMock()  # type: ignore[method-assign]
+        response = await orchestrator.generate(
+            GenerateRequest(text="horse", quality=QualityLevel.fast)
+        )
+        orchestrator._registry.get_or_load.assert_not_called()
+        assert response.pipeline == "sdxl_turbo+mock"
+        await orchestrator.close()
+
+    @pytest.mark.asyncio
+    async def test_profiles_skip_near_synonyms(self) -> None:
+        orchestrator = _orchestrator(RecordingPartCrafter())
+        await orchestrator.generate(GenerateRequest(text="horse", quality=QualityLevel.fast))
+        orchestrator._cache.peek_alias_record.assert_not_called()  # type: ignore[attr-defined]
+        orchestrator._cache.get_alias_record.assert_not_called()  # type: ignore[attr-defined]
+        await orchestrator.close()
@@ -0,0 +1,226 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for GPUScheduler — priority classes, per-client fairness, admission,
+# and DeviceScheduler's slots per device
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+import pytest
+
+from app.exceptions import GPUQueueFullError
+from app.schemas import GenerateRequest, RequestPriority
+from app.services.scheduler import DeviceScheduler, GPUScheduler
+
+if TYPE_CHECKING:
+    from fastapi.testclient import TestClient
+
+INTERACTIVE = RequestPriority.interactive
+PREFETCH = RequestPriority.prefetch
+PREGENERATE = RequestPriority.pregenerate
+
+
+async def _hold(scheduler: GPUScheduler, release: asyncio.Event) -> None:
+    async with scheduler.slot(INTERACTIVE, "holder"):
+        await release.wait()
+
+
+async def _run_queued(
+    scheduler: GPUScheduler, jobs: list[tuple[RequestPriority, str, str]]
+) -> list[str]:
+    """Queue ``jobs`` behind one held slot, then release it; returns run order."""
+    order: list[str] = []
+    release = asyncio.Event()
+    holder = asyncio.ensure_future(_hold(scheduler, release))
+    await asyncio.sleep(0)
+
+    async def job(priority: RequestPriority, client: str, name: str) -> None:
+        async with scheduler.slot(priority, client):
+            order.append(name)
+
+    tasks = [asyncio.ensure_future(job(*j)) for j in jobs]
+    await asyncio.sleep(0)
+    assert scheduler.queued() == len(jobs)
+    release.set()
+    await asyncio.gather(holder, *tasks)
+    return order
+
+
+class TestGPUScheduler:
+    @pytest.mark.asyncio
+    async def test_free_slots_run_immediately(self) -> None:
+        scheduler = GPUScheduler(slots=2)
+        async with scheduler.slot(INTERACTIVE) as waited, scheduler.slot(PREGENERATE):
+            assert waited < 0.1
+            assert scheduler.stats()["running"] == 2
+        assert scheduler.stats()["running"] == 0
+
+    @pytest.mark.asyncio
+    async def test_priority_order(self) -> None:
+        scheduler = GPUScheduler(slots=1)
+        order = await _run_queued(
+            scheduler,
+            [(PREGENERATE, "a", "pregen"), (PREFETCH, "a", "prefetch"), (INTERACTIVE, "a", "user")],
+        )
+        assert order == ["user", "prefetch", "pregen"]
+
+    @pytest.mark.asyncio
+    async def test_promoted_job_moves_ahead_of_its_old_class(self) -> None:
+        scheduler = GPUScheduler(slots=1)
+        order: list[str] = []
+        release = asyncio.Event()
+        holder = asyncio.ensure_future(_hold(scheduler, release))
+        await asyncio.sleep(0)
+
+        async def job(name: str) -> None:
+            async with scheduler.slot(PREGENERATE, "batch", job=name):
+                order.append(name)
+
+        tasks = [asyncio.ensure_future(job(name)) for name in ("a", "b", "c")]
+        await asyncio.sleep(0)
+        assert scheduler.promote("c", INTERACTIVE)
+        assert not scheduler.promote("c", INTERACTIVE)  # Already there
+        assert not scheduler.promote("unknown", INTERACTIVE)
+        assert scheduler.stats()["queued_by_priority"]["interactive"] == 1
+        release.set()
+        await asyncio.gather(holder, *tasks)
+        assert order == ["c", "a", "b"]
+        assert scheduler.stats()["promoted"] == 1
+        assert scheduler._jobs == {}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_promoted_job_leaves_the_queue(self) -> None:
+        scheduler = GPUScheduler(slots=1)
+        release = asyncio.Event()
+        holder = asyncio.ensure_future(_hold(scheduler, release))
+        await asyncio.sleep(0)
+
+        async def job() -> None:
+            async with scheduler.slot(PREGENERATE, "batch", job="k"):
+                pass
+
+        waiting = asyncio.ensure_future(job())
+        await asyncio.sleep(0)
+        scheduler.promote("k", INTERACTIVE)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert scheduler.queued() == 0
+        release.set()
+        await holder
+
+    @pytest.mark.asyncio
+    async def test_round_robin_across_clients(self) -> None:
+        scheduler = GPUScheduler(slots=1)
+        jobs = [(INTERACTIVE, "greedy", f"g{i}") for i in range(3)] + [(INTERACTIVE, "b", "b0")]
+        assert await _run_queued(scheduler, jobs) == ["g0", "b0", "g1", "g2"]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self) -> None:
+        scheduler = GPUScheduler(slots=1)
+        release = asyncio.Event()
+        holder = asyncio.ensure_future(_hold(scheduler, release))
+        await asyncio.sleep(0)
+
+        async def waiter() -> None:
+            async with scheduler.slot(INTERACTIVE, "c"):
+                pass
+
+        with pytest.raises(TimeoutError):
+            await asyncio.wait_for(waiter(), 0.01)
+        assert scheduler.queued() == 0
+        release.set()
+        await holder
+        assert scheduler.stats()["running"] == 0
+
+    @pytest.mark.asyncio
+    async def test_admission_by_estimated_wait(self) -> None:
+        scheduler = GPUScheduler(slots=1, max_wait_s=3.0, initial_latency_s=2.0)
+        scheduler.admit(INTERACTIVE)  # Idle: no wait
+        release = asyncio.Event()
+        holder = asyncio.ensure_future(_hold(scheduler, release))
+        await asyncio.sleep(0)
+        assert scheduler.estimated_wait() == pytest.approx(2.0)
+        scheduler.admit(INTERACTIVE)
+
+        queued = asyncio.ensure_future(scheduler.slot(PREGENERATE, "bulk").__aenter__())
+        await asyncio.sleep(0)
+        # Background work queued behind does not count against interactive...
+        assert scheduler.estimated_wait(INTERACTIVE) == pytest.approx(2.0)
+        # ...but does against more background work
+        with pytest.raises(GPUQueueFullError) as exc_info:
+            scheduler.admit(PREGENERATE)
+        assert exc_info.value.retry_after_seconds >= 1.0
+        assert scheduler.stats()["rejected"] == 1
+
+        queued.cancel()
+        release.set()
+        await holder
+
+    @pytest.mark.asyncio
+    async def test_latency_is_observed(self) -> None:
+        scheduler = GPUScheduler(slots=1, initial_latency_s=100.0)
+        async with scheduler.slot(INTERACTIVE):
+            await asyncio.sleep(0.01)
+        assert scheduler.stats()["avg_latency_s"] < 1.0
+
+
+class TestDeviceScheduler:
+    @pytest.mark.asyncio
+    async def test_each_device_has_its_own_slots(self) -> None:
+        scheduler = DeviceScheduler(["cuda:0", "cuda:1"], slots=1)
+        release = asyncio.Event()
+        holder = asyncio.ensure_future(_hold(scheduler.device("cuda:0"), release))
+        await asyncio.sleep(0)
+        async with scheduler.slot(INTERACTIVE, "other", "cuda:1") as waited:
+            assert waited < 0.1  # cuda:0 being busy does not hold cuda:1 back
+            stats = scheduler.stats()
+            assert (stats["slots"], stats["running"]) == (2, 2)
+            assert stats["by_device"]["cuda:1"]["running"] == 1
+        release.set()
+        await holder
+        async with scheduler.slot(INTERACTIVE):  # No device: a scheduler of its own
+            assert set(scheduler.stats()["by_device"]) == {"cuda:0", "cuda:1", "None"}
+
+    @pytest.mark.asyncio
+    async def test_admission_uses_the_given_device_queue(self) -> None:
+        scheduler = DeviceScheduler(["cuda:0", "cuda:1"], slots=1, max_wait_s=0.0)
+        release = asyncio.Event()
+        holder = asyncio.ensure_future(_hold(scheduler.device("cuda:0"), release))
+        await asyncio.sleep(0)
+        scheduler.admit(INTERACTIVE, "cuda:1")  # cuda:1 is idle
+        assert scheduler.estimated_wait() == 0.0  # Shortest device queue
+        with pytest.raises(GPUQueueFullError):
+            scheduler.admit(INTERACTIVE, "cuda:0")  # Even though cuda:1 is idle
+        assert scheduler.stats()["by_device"]["cuda:0"]["rejected"] == 1
+        scheduler.device("cuda:1")._running = 1
+        with pytest.raises(GPUQueueFullError):
+            scheduler.admit(INTERACTIVE, "cuda:1")
+        assert scheduler.stats()["rejected"] == 2
+        scheduler.device("cuda:1")._running = 0
+        release.set()
+        await holder
+
+
+class TestSchedulerEndpoints:
+    def test_debug_queue(self, client: TestClient) -> None:
+        response = client.get("/debug/queue")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["queued_by_priority"] == {"interactive": 0, "prefetch": 0, "pregenerate": 0}
+        assert set(data["waiting"]) == {"interactive", "prefetch", "pregenerate"}
+
+    def test_full_queue_is_503_with_retry_after(self, client: TestClient) -> None:
+        orchestrator = client.app.state.pipeline_orchestrator  # type: ignore[attr-defined]
+        orchestrator._scheduler = DeviceScheduler(["cpu"], slots=1, max_wait_s=0.0)
+        orchestrator._scheduler.device("cpu")._running = 1  # The only slot is busy
+        response = client.post("/generate", json={"text": "dragon"})
+        assert response.status_code == 503
+        assert response.json()["type"] == "GPUQueueFullError"
+        assert int(response.headers["Retry-After"]) >= 1
+
+    def test_priority_field_defaults_to_interactive(self) -> None:
+        assert GenerateRequest(text="dog").priority == INTERACTIVE
+        assert GenerateRequest(text="dog", priority="pregenerate").priority == PREGENERATE
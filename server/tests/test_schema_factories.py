@@ -104,6 +104,7 @@ class TestGenerateResponseFactory:
             "cached": IsInstance(bool),
             "generation_time_ms": IsNonNegative,
             "pipeline": IsStr,
+            "alias_of": IsStr | None,
         }
 
     def test_batch_all_valid(self):
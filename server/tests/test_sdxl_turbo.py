@@ -13,7 +13,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 from PIL import Image
 
-from app.models.protocol import TextToImageModel
+from app.models.protocol import BatchTextToImageModel, TextToImageModel
 from app.pipeline.prompt_templates import get_canonical_prompt
 from app.pipeline.template_matcher import get_template
 
@@ -133,6 +133,43 @@ class TestSDXLTurboGenerate:
         call_kwargs = mock_pipe.call_args.kwargs
         assert call_kwargs["num_inference_steps"] == 1
 
+    def test_generate_batch_passes_prompt_list(self):
+        mock_pipe = _make_mock_pipeline()
+        mock_pipe.return_value.images = [Image.new("RGB", (512, 512)) for _ in range(2)]
+        model, _ = _create_model(mock_pipe)
+
+        images = model.generate_batch(["a horse", "a dog"])
+
+        assert len(images) == 2
+        assert mock_pipe.call_args.kwargs["prompt"] == ["a horse", "a dog"]
+
+    def test_bound_token_stops_denoising(self):
+        from app.exceptions import GenerationCancelledError
+        from app.models.cancellation import CancellationToken, cancellable
+
+        mock_pipe = _make_mock_pipeline()
+        model, _ = _create_model(mock_pipe)
+
+        def run_steps(**kwargs):
+            for step in range(4):
+                kwargs["callback_on_step_end"](mock_pipe, step, 0, {})
+                token.cancel("timeout")  # Cancelled during the first step
+            return mock_pipe.return_value
+
+        mock_pipe.side_effect = run_steps
+        token = CancellationToken("horse")
+        oom = type("OutOfMemoryError", (RuntimeError,), {})
+        with (
+            patch.object(sys.modules["torch"].cuda, "OutOfMemoryError", oom),
+            cancellable(token),
+            pytest.raises(GenerationCancelledError, match="timeout"),
+        ):
+            model.generate("a 3D render of a horse")
+
+    def test_batch_protocol_compliance(self):
+        model, _ = _create_model()
+        assert isinstance(model, BatchTextToImageModel)
+
     def test_generate_oom_clears_cache_and_reraises(self):
         """OOM handler should call torch.cuda.empty_cache() then re-raise."""
         mock_pipe = _make_mock_pipeline()
@@ -247,6 +284,10 @@ class TestPipelineFallback:
         registry = ModelRegistry(settings)
         cache = MagicMock()
         cache.get = AsyncMock(return_value=None)
+        cache.get_record = AsyncMock(return_value=None)
+        cache.peek_record = MagicMock(return_value=None)
+        cache.get_alias_record = AsyncMock(return_value=None)
+        cache.peek_alias_record = MagicMock(return_value=None)
         cache.set = AsyncMock()
 
         orchestrator = PipelineOrchestrator(registry, cache, settings)
@@ -1,26 +1,49 @@
 # ─────────────────────────────────────────────────────────────────────────────
-# Tests for ShapeCache — two-tier caching with hardened normalization
+# Tests for ShapeCache — tiered caching with hardened normalization
 # ─────────────────────────────────────────────────────────────────────────────
 
 from __future__ import annotations
 
 import asyncio
 import threading
+import time
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
 from unittest.mock import patch
 
 import pytest
-
+from google.api_core.exceptions import NotFound, PreconditionFailed
+
+from app.cache.disk_tier import DiskTier
+from app.cache.manifest import (
+    LEGACY_FORMAT,
+    MANIFEST_BLOB,
+    ManifestEntry,
+    _serialize,
+    add_to_manifest,
+    read_manifest,
+)
+from app.cache.memory_tier import MemoryTier, ShapeRecord
 from app.cache.shape_cache import ShapeCache
+from app.cache.shape_format import FORMAT_VERSION
+from app.cache.snapshot import SNAPSHOT_BLOB
+from app.cache.storage import GCSStorageBackend
+from app.cache.warmup import plan_warmup
+from app.pipeline.aliases import AliasIndex
+from app.pipeline.concept import analyze_concept
 from app.schemas import BoundingBox, GenerateResponse
 
+if TYPE_CHECKING:
+    from pathlib import Path
+
 # ── Fixtures ─────────────────────────────────────────────────────────────────
 
 
 def _make_response(text: str = "dog") -> GenerateResponse:
     """Create a minimal valid GenerateResponse for testing."""
     return GenerateResponse(
-        positions="AAAA",  # Dummy base64
-        part_ids="AAAA",
+        positions="AAAAAAAAAAAAAAAA",  # One zero point (3 × float32)
+        part_ids="AA==",
         part_names=["body"],
         template_type="quadruped",
         bounding_box=BoundingBox(
@@ -36,7 +59,7 @@ def _make_response(text: str = "dog") -> GenerateResponse:
 @pytest.fixture()
 def cache() -> ShapeCache:
     """Create a memory-only ShapeCache (no Cloud Storage)."""
-    return ShapeCache(bucket_name="", memory_capacity=100)
+    return ShapeCache(bucket_name="")
 
 
 # ── Normalization ────────────────────────────────────────────────────────────
@@ -128,6 +151,31 @@ class TestSetGet:
         assert result is not None
         assert result.template_type == "quadruped"
 
+    @pytest.mark.asyncio
+    async def test_get_record_prepares_body(self, cache: ShapeCache) -> None:
+        await cache.set("dog", _make_response("dog"))
+        before = (await cache.stats())["memory"]["bytes"]
+        record = await cache.get_record("dog", prepare_json=True)
+        assert record is not None
+        body = record.to_json(cached=True, generation_time_ms=1)
+        assert GenerateResponse.model_validate_json(body).cached is True
+        assert (await cache.stats())["memory"]["bytes"] > before  # Body counts toward budget
+
+    @pytest.mark.asyncio
+    async def test_served_responses_are_independent(self, cache: ShapeCache) -> None:
+        await cache.set("dog", _make_response("dog"))
+        first = await cache.get("dog")
+        assert first is not None
+        first.cached = True
+        second = await cache.get("dog")
+        assert second is not None and second.cached is False
+
+    @pytest.mark.asyncio
+    async def test_accepts_precomputed_analysis(self, cache: ShapeCache) -> None:
+        """The orchestrator passes its ConceptAnalysis instead of re-normalizing."""
+        await cache.set(analyze_concept("dogs"), _make_response("dog"))
+        assert await cache.get("the dog") is not None
+
 
 # ── Stats ────────────────────────────────────────────────────────────────────
 
@@ -170,48 +218,88 @@ class TestStats:
 class FakeBlob:
     """In-memory fake for google.cloud.storage.Blob."""
 
-    def __init__(self, name: str, data: str | None = None) -> None:
+    def __init__(self, name: str, data: bytes | None = None) -> None:
         self.name = name
         self._data = data
+        self.generation: int | None = None
+        self._stored_generation = 0
+        self.time_created = datetime.now(UTC)
+        self.requests = 0  # exists() + download calls (network round-trips)
+
+    @property
+    def size(self) -> int:
+        return len(self._data or b"")
 
     def exists(self) -> bool:
+        self.requests += 1
         return self._data is not None
 
     def download_as_text(self) -> str:
-        assert self._data is not None
+        return self.download_as_bytes().decode()
+
+    def download_as_bytes(self) -> bytes:
+        self.requests += 1
+        if self._data is None:
+            raise NotFound(self.name)
+        self.generation = self._stored_generation
         return self._data
 
-    def upload_from_string(self, data: str, content_type: str = "") -> None:
-        self._data = data
+    def upload_from_string(
+        self,
+        data: str | bytes,
+        content_type: str = "",
+        if_generation_match: int | None = None,
+    ) -> None:
+        if if_generation_match is not None and if_generation_match != self._stored_generation:
+            raise PreconditionFailed(self.name)
+        self._data = data.encode() if isinstance(data, str) else data
+        self._stored_generation += 1
+
+    def download_to_filename(self, filename: str) -> None:
+        with open(filename, "wb") as f:
+            f.write(self.download_as_bytes())
+
+    def upload_from_filename(self, filename: str, content_type: str = "") -> None:
+        with open(filename, "rb") as f:
+            self.upload_from_string(f.read(), content_type=content_type)
 
 
 class FakeBucket:
     """In-memory fake for google.cloud.storage.Bucket."""
 
-    def __init__(self) -> None:
+    def __init__(self, name: str = "test-bucket") -> None:
+        self.name = name
         self._blobs: dict[str, FakeBlob] = {}
+        self.list_calls = 0
 
     def blob(self, name: str) -> FakeBlob:
         if name not in self._blobs:
             self._blobs[name] = FakeBlob(name)
         return self._blobs[name]
 
+    def shape_requests(self) -> int:
+        return sum(b.requests for name, b in self._blobs.items() if name.startswith("shapes/"))
+
     def list_blobs(self, prefix: str = "") -> list[FakeBlob]:
-        return [b for name, b in self._blobs.items() if name.startswith(prefix)]
+        self.list_calls += 1
+        return [
+            b for name, b in sorted(self._blobs.items()) if name.startswith(prefix) and b.exists()
+        ]
 
 
 class TestTwoTier:
     @pytest.fixture()
     def storage_cache(self) -> ShapeCache:
         """ShapeCache with a fake Cloud Storage bucket."""
-        c = ShapeCache(bucket_name="test-bucket", memory_capacity=100)
-        c._bucket = FakeBucket()
+        c = ShapeCache(bucket_name="test-bucket")
+        c._storage = GCSStorageBackend(FakeBucket())
         return c
 
     @pytest.mark.asyncio
     async def test_storage_hit_promotes_to_memory(self, storage_cache: ShapeCache) -> None:
         resp = _make_response("dog")
         await storage_cache.set("dog", resp)
+        await storage_cache.flush_writes()
 
         # Clear memory — force storage lookup
         storage_cache.clear_memory()
@@ -231,6 +319,7 @@ class TestTwoTier:
     async def test_count_stored_shapes(self, storage_cache: ShapeCache) -> None:
         await storage_cache.set("dog", _make_response("dog"))
         await storage_cache.set("cat", _make_response("cat"))
+        await storage_cache.flush_writes()
         count = await storage_cache.count_stored_shapes()
         assert count == 2
 
@@ -238,6 +327,7 @@ class TestTwoTier:
     async def test_load_all_cached(self, storage_cache: ShapeCache) -> None:
         await storage_cache.set("dog", _make_response("dog"))
         await storage_cache.set("cat", _make_response("cat"))
+        await storage_cache.flush_writes()
 
         # Clear memory
         storage_cache.clear_memory()
@@ -250,18 +340,419 @@ class TestTwoTier:
     @pytest.mark.asyncio
     async def test_preload_to_memory(self, storage_cache: ShapeCache) -> None:
         await storage_cache.set("dog", _make_response("dog"))
+        await storage_cache.flush_writes()
         storage_cache.clear_memory()
 
         result = await storage_cache.preload_to_memory("dog")
         assert result is True
         assert len(storage_cache._memory) == 1
 
+    @pytest.mark.asyncio
+    async def test_set_writes_binary_record(self, storage_cache: ShapeCache) -> None:
+        await storage_cache.set("dog", _make_response("dog"))
+        await storage_cache.flush_writes()
+        key = ShapeCache._hash_key(ShapeCache.normalize_key("dog"))
+        blob = storage_cache._storage.bucket.blob(f"shapes/{key}.bin")
+        assert blob.download_as_bytes()[:4] == b"LSHP"
+        assert not storage_cache._storage.bucket.blob(f"shapes/{key}.json").exists()
+
+    @pytest.mark.asyncio
+    async def test_legacy_json_blob_still_readable(self, storage_cache: ShapeCache) -> None:
+        key = ShapeCache._hash_key(ShapeCache.normalize_key("cat"))
+        legacy = storage_cache._storage.bucket.blob(f"shapes/{key}.json")
+        legacy.upload_from_string(_make_response("cat").model_dump_json())
+
+        result = await storage_cache.get("cat")
+        assert result is not None
+        assert result.template_type == "quadruped"
+
+    @pytest.mark.asyncio
+    async def test_load_all_dedupes_legacy_and_binary(self, storage_cache: ShapeCache) -> None:
+        """A key with both a legacy .json and a .bin record loads once."""
+        await storage_cache.set("dog", _make_response("dog"))
+        await storage_cache.flush_writes()
+        key = ShapeCache._hash_key(ShapeCache.normalize_key("dog"))
+        storage_cache._storage.bucket.blob(f"shapes/{key}.json").upload_from_string(
+            _make_response("dog").model_dump_json()
+        )
+        storage_cache.clear_memory()
+
+        assert await storage_cache.load_all_cached() == 1
+        assert await storage_cache.count_stored_shapes() == 1
+
     @pytest.mark.asyncio
     async def test_preload_missing_concept(self, storage_cache: ShapeCache) -> None:
         result = await storage_cache.preload_to_memory("unicorn")
         assert result is False
 
 
+# ── Manifest Index ───────────────────────────────────────────────────────────
+
+
+class TestManifest:
+    @pytest.fixture()
+    def storage_cache(self) -> ShapeCache:
+        c = ShapeCache(bucket_name="test-bucket")
+        c._storage = GCSStorageBackend(FakeBucket())
+        return c
+
+    @pytest.mark.asyncio
+    async def test_set_updates_manifest(self, storage_cache: ShapeCache) -> None:
+        await storage_cache.set("dog", _make_response("dog"))
+        await storage_cache.set("cat", _make_response("cat"))
+        await storage_cache.flush_writes()
+
+        current = read_manifest(storage_cache._storage)
+        assert current is not None
+        entries, generation = current
+        assert len(entries) == 2
+        assert generation == 2
+        assert all(e.size > 0 and e.format == FORMAT_VERSION for e in entries.values())
+
+    @pytest.mark.asyncio
+    async def test_count_and_warmup_skip_listing(self, storage_cache: ShapeCache) -> None:
+        await storage_cache.set("dog", _make_response("dog"))
+        await storage_cache.set("cat", _make_response("cat"))
+        await storage_cache.flush_writes()
+        storage_cache.clear_memory()
+        storage_cache._storage.bucket.list_calls = 0
+
+        assert await storage_cache.count_stored_shapes() == 2
+        assert await storage_cache.load_all_cached() == 2
+        await storage_cache.stats()
+        assert storage_cache._storage.bucket.list_calls == 0
+
+    @pytest.mark.asyncio
+    async def test_rebuilds_for_pre_manifest_bucket(self, storage_cache: ShapeCache) -> None:
+        """Legacy buckets without a manifest are listed once, then indexed."""
+        bucket = storage_cache._storage.bucket
+        for concept in ("dog", "cat"):
+            key = ShapeCache._hash_key(ShapeCache.normalize_key(concept))
+            bucket.blob(f"shapes/{key}.json").upload_from_string(
+                _make_response(concept).model_dump_json()
+            )
+
+        assert await storage_cache.load_all_cached() == 2
+        assert bucket.list_calls == 1
+        current = read_manifest(GCSStorageBackend(bucket))
+        assert current is not None
+        assert {e.format for e in current[0].values()} == {LEGACY_FORMAT}
+
+        assert await storage_cache.count_stored_shapes() == 2
+        assert bucket.list_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_first_set_keeps_legacy_entries(self, storage_cache: ShapeCache) -> None:
+        key = ShapeCache._hash_key(ShapeCache.normalize_key("cat"))
+        storage_cache._storage.bucket.blob(f"shapes/{key}.json").upload_from_string(
+            _make_response("cat").model_dump_json()
+        )
+        await storage_cache.set("dog", _make_response("dog"))
+        await storage_cache.flush_writes()
+        assert await storage_cache.count_stored_shapes() == 2
+
+    def test_conflicting_writer_retries(self) -> None:
+        """A concurrent manifest write forces a re-read, not a lost update."""
+        bucket = FakeBucket()
+        storage = GCSStorageBackend(bucket)
+        add_to_manifest(storage, ManifestEntry(key="a", size=1, created_at=0.0))
+
+        manifest_blob = bucket.blob(MANIFEST_BLOB)
+        real_upload = manifest_blob.upload_from_string
+        raced = False
+
+        def racing_upload(data: bytes, **kwargs: object) -> None:
+            nonlocal raced
+            if not raced:
+                raced = True  # Another instance sneaks in an entry first
+                entries, gen = read_manifest(storage)  # type: ignore[misc]
+                entries["b"] = ManifestEntry(key="b", size=1, created_at=0.0)
+                real_upload(_serialize(entries), if_generation_match=gen)
+            real_upload(data, **kwargs)  # type: ignore[arg-type]
+
+        manifest_blob.upload_from_string = racing_upload  # type: ignore[method-assign]
+        entries = add_to_manifest(storage, ManifestEntry(key="c", size=1, created_at=0.0))
+        assert set(entries) == {"a", "b", "c"}
+
+
+# ── Warmup ───────────────────────────────────────────────────────────────────
+
+
+class TestWarmupPlan:
+    def _entries(self) -> list[ManifestEntry]:
+        return [
+            ManifestEntry(key="old_popular", size=100, created_at=1.0, hits=50, last_used=2.0),
+            ManifestEntry(key="new_rare", size=100, created_at=9.0, hits=1),
+            ManifestEntry(key="mid", size=100, created_at=5.0, hits=10),
+        ]
+
+    def test_recent_order(self) -> None:
+        plan = plan_warmup(self._entries(), order="recent", max_entries=10, memory_budget_bytes=0)
+        assert [e.key for e in plan] == ["new_rare", "mid", "old_popular"]
+
+    def test_frequent_order(self) -> None:
+        plan = plan_warmup(self._entries(), order="frequent", max_entries=10, memory_budget_bytes=0)
+        assert [e.key for e in plan] == ["old_popular", "mid", "new_rare"]
+
+    def test_memory_budget_and_capacity(self) -> None:
+        by_budget = plan_warmup(
+            self._entries(), order="frequent", max_entries=10, memory_budget_bytes=250
+        )
+        assert [e.key for e in by_budget] == ["old_popular", "mid"]
+        by_cap = plan_warmup(
+            self._entries(), order="frequent", max_entries=1, memory_budget_bytes=0
+        )
+        assert [e.key for e in by_cap] == ["old_popular"]
+
+    def test_unknown_order(self) -> None:
+        with pytest.raises(ValueError, match="warmup order"):
+            plan_warmup([], order="random", max_entries=1, memory_budget_bytes=0)
+
+
+class TestParallelWarmup:
+    @pytest.fixture()
+    def storage_cache(self) -> ShapeCache:
+        c = ShapeCache(bucket_name="test-bucket")
+        c._storage = GCSStorageBackend(FakeBucket())
+        return c
+
+    async def _populate(self, cache: ShapeCache, n: int) -> None:
+        for i in range(n):
+            await cache.set(f"concept {i}", _make_response())
+        await cache.flush_writes()
+        cache.clear_memory()
+
+    @pytest.mark.asyncio
+    async def test_fetches_in_parallel(self, storage_cache: ShapeCache) -> None:
+        await self._populate(storage_cache, 8)
+        active = peak = 0
+        gate = threading.Lock()
+        real_fetch = storage_cache._fetch_entry
+
+        def slow_fetch(entry: ManifestEntry, stopped: threading.Event) -> int:
+            nonlocal active, peak
+            with gate:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with gate:
+                active -= 1
+            return real_fetch(entry, stopped)
+
+        storage_cache._fetch_entry = slow_fetch  # type: ignore[method-assign]
+        assert await storage_cache.load_all_cached(workers=4) == 8
+        assert peak > 1
+
+    @pytest.mark.asyncio
+    async def test_deadline_stops_warmup(self, storage_cache: ShapeCache) -> None:
+        await self._populate(storage_cache, 6)
+        real_fetch = storage_cache._fetch_entry
+
+        def slow_fetch(entry: ManifestEntry, stopped: threading.Event) -> int:
+            time.sleep(0.2)
+            return real_fetch(entry, stopped)
+
+        storage_cache._fetch_entry = slow_fetch  # type: ignore[method-assign]
+        loaded = await storage_cache.load_all_cached(workers=1, deadline_s=0.3)
+        assert 0 < loaded < 6
+
+        stats = await storage_cache.stats()
+        assert stats["warmup"]["state"] == "deadline"
+        assert stats["warmup"]["planned"] == 6
+
+        await asyncio.sleep(0.3)  # The fetch in flight at the deadline finishes
+        assert len(storage_cache._memory) == loaded
+
+    @pytest.mark.asyncio
+    async def test_budget_limits_loaded(self, storage_cache: ShapeCache) -> None:
+        await self._populate(storage_cache, 5)
+        size = next(iter(storage_cache._manifest.values())).size
+        loaded = await storage_cache.load_all_cached(memory_budget_bytes=size * 2)
+        assert loaded == 2
+
+    @pytest.mark.asyncio
+    async def test_frequent_order_uses_flushed_hits(self, storage_cache: ShapeCache) -> None:
+        await storage_cache.set("dog", _make_response())
+        await storage_cache.set("cat", _make_response())
+        await storage_cache.flush_writes()
+        for _ in range(3):
+            await storage_cache.get("cat")
+        await storage_cache.set("horse", _make_response())  # Flushes hit deltas
+        await storage_cache.flush_writes()
+
+        entries = read_manifest(storage_cache._storage)[0]  # type: ignore[index]
+        cat_key = ShapeCache._hash_key(ShapeCache.normalize_key("cat"))
+        assert entries[cat_key].hits == 3
+
+        storage_cache.clear_memory()
+        record_bytes = ShapeRecord.from_response(_make_response()).nbytes
+        storage_cache._memory = MemoryTier(max_bytes=record_bytes)  # Room for one
+        assert await storage_cache.load_all_cached(order="frequent") == 1
+        assert cat_key in storage_cache._memory
+
+    @pytest.mark.asyncio
+    async def test_stats_report_warmup(self, storage_cache: ShapeCache) -> None:
+        await self._populate(storage_cache, 3)
+        await storage_cache.load_all_cached()
+        warmup = (await storage_cache.stats())["warmup"]
+        assert warmup["state"] == "complete"
+        assert warmup["loaded"] == 3
+        assert warmup["bytes_loaded"] > 0
+
+
+# ── Single Round-Trip Reads + Known-Key Bloom Filter ─────────────────────────
+
+
+class TestStorageLookups:
+    @pytest.fixture()
+    def storage_cache(self) -> ShapeCache:
+        c = ShapeCache(bucket_name="test-bucket")
+        c._storage = GCSStorageBackend(FakeBucket())
+        return c
+
+    @pytest.mark.asyncio
+    async def test_hit_is_one_round_trip(self, storage_cache: ShapeCache) -> None:
+        await storage_cache.set("dog", _make_response("dog"))
+        await storage_cache.flush_writes()
+        storage_cache.clear_memory()
+        bucket = storage_cache._storage.bucket
+        before = bucket.shape_requests()
+
+        assert await storage_cache.get("dog") is not None
+        assert bucket.shape_requests() - before == 1
+
+    @pytest.mark.asyncio
+    async def test_legacy_hit_is_one_round_trip_once_manifest_known(
+        self, storage_cache: ShapeCache
+    ) -> None:
+        key = ShapeCache._hash_key(ShapeCache.normalize_key("cat"))
+        storage_cache._storage.bucket.blob(f"shapes/{key}.json").upload_from_string(
+            _make_response("cat").model_dump_json()
+        )
+        await storage_cache.count_stored_shapes()  # Loads manifest (rebuilt from listing)
+        before = storage_cache._storage.bucket.shape_requests()
+
+        assert await storage_cache.get("cat") is not None
+        assert storage_cache._storage.bucket.shape_requests() - before == 1
+
+    @pytest.mark.asyncio
+    async def test_bloom_skips_storage_for_unknown_keys(self, storage_cache: ShapeCache) -> None:
+        await storage_cache.set("dog", _make_response("dog"))
+        await storage_cache.flush_writes()
+        await storage_cache.load_all_cached()  # Builds the filter
+        before = storage_cache._storage.bucket.shape_requests()
+
+        assert await storage_cache.get("unicorn") is None
+        assert storage_cache._storage.bucket.shape_requests() == before
+
+        stats = await storage_cache.stats()
+        assert stats["misses"] == 1
+        assert stats["bloom"]["skipped_storage_reads"] == 1
+
+    @pytest.mark.asyncio
+    async def test_set_after_warmup_is_found(self, storage_cache: ShapeCache) -> None:
+        await storage_cache.load_all_cached()
+        await storage_cache.set("horse", _make_response("horse"))
+        await storage_cache.flush_writes()
+        storage_cache.clear_memory()
+
+        assert await storage_cache.get("horse") is not None
+
+    @pytest.mark.asyncio
+    async def test_no_filter_before_manifest_read(self, storage_cache: ShapeCache) -> None:
+        """Until the manifest is read, misses still consult storage."""
+        assert await storage_cache.get("unicorn") is None
+        assert storage_cache._storage.bucket.shape_requests() == 2  # .bin + legacy .json probe
+        assert (await storage_cache.stats())["bloom"]["skipped_storage_reads"] == 0
+
+    @pytest.mark.asyncio
+    async def test_stale_filter_refreshes_in_background(self) -> None:
+        """Keys written by another instance become visible after a refresh."""
+        bucket = FakeBucket()
+        writer = ShapeCache(bucket_name="test")
+        writer._storage = GCSStorageBackend(bucket)
+        reader = ShapeCache(bucket_name="test", bloom_refresh_seconds=0)
+        reader._storage = GCSStorageBackend(bucket)
+        await reader.load_all_cached()
+
+        await writer.set("dragon", _make_response("dragon"))
+        await writer.flush_writes()
+        assert await reader.get("dragon") is None  # Filter predates the write
+        await reader._bloom_refresh_task  # type: ignore[misc]
+        assert await reader.get("dragon") is not None
+
+
+# ── Local Disk Tier ──────────────────────────────────────────────────────────
+
+
+class TestDiskTier:
+    @pytest.fixture()
+    def disk_cache(self, tmp_path: Path) -> ShapeCache:
+        return ShapeCache(bucket_name="", disk_dir=str(tmp_path))
+
+    @pytest.mark.asyncio
+    async def test_disk_hit_promotes_to_memory(self, disk_cache: ShapeCache) -> None:
+        await disk_cache.connect()
+        await disk_cache.set("dog", _make_response("dog"))
+        await disk_cache.flush_writes()
+        disk_cache.clear_memory()
+
+        result = await disk_cache.get("dog")
+        assert result is not None
+        assert len(disk_cache._memory) == 1
+
+        stats = await disk_cache.stats()
+        assert stats["disk_hits"] == 1
+        assert stats["memory_hits"] == 0
+        assert stats["disk_cache_size"] == 1
+        assert stats["hit_rate"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_shutdown_flush_and_startup_reload(self, tmp_path: Path) -> None:
+        first = ShapeCache(bucket_name="", disk_dir=str(tmp_path))
+        await first.connect()
+        await first.set("dog", _make_response("dog"))
+        await first.flush_writes()
+        # Simulate a shape that only ever reached memory (e.g. a storage promotion)
+        key = ShapeCache._hash_key(ShapeCache.normalize_key("cat"))
+        first._remember(key, ShapeRecord.from_response(_make_response("cat")))
+        await first.disconnect()
+
+        second = ShapeCache(bucket_name="", disk_dir=str(tmp_path))
+        await second.connect()
+        assert len(second._memory) == 2
+        assert await second.get("cat") is not None
+
+    @pytest.mark.asyncio
+    async def test_reload_skips_storage_downloads(self, tmp_path: Path) -> None:
+        first = ShapeCache(bucket_name="test", disk_dir=str(tmp_path))
+        first._storage = GCSStorageBackend(FakeBucket())
+        await first.connect()
+        await first.set("dog", _make_response("dog"))
+        await first.set("cat", _make_response("cat"))
+        await first.flush_writes()
+        await first.disconnect()
+
+        second = ShapeCache(bucket_name="test", disk_dir=str(tmp_path))
+        await second.connect()
+        second._storage = first._storage
+        assert await second.load_all_cached() == 0  # Everything already in memory
+        assert len(second._memory) == 2
+
+    @pytest.mark.asyncio
+    async def test_storage_hit_written_to_disk(self, tmp_path: Path) -> None:
+        cache = ShapeCache(bucket_name="test", disk_dir=str(tmp_path))
+        cache._storage = GCSStorageBackend(FakeBucket())
+        await cache.connect()
+        await cache.set("dog", _make_response("dog"))
+        cache._disk = DiskTier(tmp_path / "fresh", max_bytes=1 << 20)
+        cache._disk.open()
+        cache.clear_memory()
+
+        assert await cache.get("dog") is not None
+        assert len(cache._disk) == 1
+
+
 # ── Coalescing (Thundering Herd Prevention) ──────────────────────────────────
 
 
@@ -272,7 +763,7 @@ class TestCoalescing:
         in only one Cloud Storage read (the second awaits the first)."""
         storage_reads = 0
 
-        cache = ShapeCache(bucket_name="test", memory_capacity=100)
+        cache = ShapeCache(bucket_name="test")
         bucket = FakeBucket()
 
         # Pre-populate storage with a response
@@ -289,10 +780,10 @@ class TestCoalescing:
             import time
 
             time.sleep(0.05)
-            cache._bucket = bucket
+            cache._storage = GCSStorageBackend(bucket)
             return original_get(key)
 
-        cache._bucket = bucket
+        cache._storage = GCSStorageBackend(bucket)
         cache._get_from_storage = counting_get  # type: ignore[assignment]
 
         # Fire two concurrent gets
@@ -306,6 +797,47 @@ class TestCoalescing:
         # Only one storage read should have happened
         assert storage_reads == 1
 
+    @pytest.mark.asyncio
+    async def test_waiters_share_record_without_memory(self) -> None:
+        """Waiters get the leader's record even if the memory tier can't keep it."""
+        storage_reads = 0
+        bucket = FakeBucket()
+        resp = _make_response("dog")
+        key = ShapeCache._hash_key(ShapeCache.normalize_key("dog"))
+        bucket.blob(f"shapes/{key}.json").upload_from_string(resp.model_dump_json())
+
+        cache = ShapeCache(bucket_name="test", memory_max_bytes=1)  # Nothing fits
+        cache._storage = GCSStorageBackend(bucket)
+        original_get = cache._get_from_storage
+
+        def counting_get(key: str) -> GenerateResponse | None:
+            nonlocal storage_reads
+            storage_reads += 1
+            import time
+
+            time.sleep(0.05)
+            return original_get(key)
+
+        cache._get_from_storage = counting_get  # type: ignore[assignment]
+
+        records = await asyncio.gather(*(cache.get_record("dog") for _ in range(5)))
+
+        assert storage_reads == 1
+        assert all(r is records[0] for r in records)
+        assert records[0] is not None
+        stats = await cache.stats()
+        assert stats["coalesced_hits"] == 4
+        assert stats["storage_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_peek_record_is_memory_only(self, cache: ShapeCache) -> None:
+        assert cache.peek_record("dog") is None
+        await cache.set("dog", _make_response("dog"))
+        assert cache.peek_record("dog") is not None
+        stats = await cache.stats()
+        assert stats["misses"] == 0
+        assert stats["memory_hits"] == 1
+
 
 # ── Collision Logging ────────────────────────────────────────────────────────
 
@@ -363,3 +895,167 @@ class TestClear:
         assert len(cache._memory) == 1
         cache.clear_memory()
         assert len(cache._memory) == 0
+
+
+# ── Write-behind ─────────────────────────────────────────────────────────────
+
+
+class TestWriteBehind:
+    @pytest.mark.asyncio
+    async def test_disconnect_drains_uploads(self) -> None:
+        cache = ShapeCache(bucket_name="test-bucket")
+        cache._storage = GCSStorageBackend(FakeBucket())
+        await cache.set("dog", _make_response("dog"))
+        await cache.disconnect()
+
+        key = ShapeCache._hash_key(ShapeCache.normalize_key("dog"))
+        assert cache._storage.bucket.blob(f"shapes/{key}.bin").exists()
+        assert cache.write_stats()["written"] == 1
+
+
+class TestMemoryPolicy:
+    @pytest.mark.asyncio
+    async def test_tinylfu_policy(self) -> None:
+        cache = ShapeCache(bucket_name="", memory_policy="tinylfu")
+        await cache.set("dog", _make_response("dog"))
+        record = await cache.get_record("dog", prepare_json=True)
+        assert record is not None
+        stats = await cache.stats()
+        assert stats["memory"]["policy"] == "tinylfu"
+        assert stats["memory"]["bytes"] == record.nbytes
+
+
+class TestAliases:
+    @pytest.fixture()
+    def alias_cache(self) -> ShapeCache:
+        return ShapeCache(bucket_name="", aliases=AliasIndex({"pony": "horse"}, wordnet=False))
+
+    @pytest.mark.asyncio
+    async def test_miss_served_by_canonical(self, alias_cache: ShapeCache) -> None:
+        await alias_cache.set("horse", _make_response("horse"))
+
+        assert await alias_cache.get_record("pony", count_miss=False) is None
+        hit = await alias_cache.get_alias_record("pony", prepare_json=True)
+        assert hit is not None
+        record, canonical = hit
+        assert canonical == "horse"
+        assert record is alias_cache.peek_record("horse")
+        stats = await alias_cache.stats()
+        assert stats["alias_hits"] == 1
+        assert stats["misses"] == 0  # The exact-key miss was served after all
+
+    @pytest.mark.asyncio
+    async def test_peek_is_memory_only(self, alias_cache: ShapeCache) -> None:
+        assert alias_cache.peek_alias_record("pony") is None
+        await alias_cache.set("horse", _make_response("horse"))
+        hit = alias_cache.peek_alias_record("pony")
+        assert hit is not None and hit[1] == "horse"
+
+    @pytest.mark.asyncio
+    async def test_no_candidate_cached(self, alias_cache: ShapeCache) -> None:
+        assert await alias_cache.get_record("pony", count_miss=False) is None
+        assert await alias_cache.get_alias_record("pony") is None
+        assert await alias_cache.get_alias_record("dragon") is None
+        assert (await alias_cache.stats())["misses"] == 2  # Once each, after alias resolution
+
+
+class TestContentDedupe:
+    @pytest.mark.asyncio
+    async def test_identical_shape_uploaded_once(self) -> None:
+        cache = ShapeCache(bucket_name="test")
+        cache._storage = GCSStorageBackend(FakeBucket())
+        await cache.set("dog", _make_response("dog"))
+        await cache.flush_writes()
+        await cache.set("hound", _make_response("hound"))  # Same points, parts, template
+        await cache.flush_writes()
+
+        bucket = cache._storage.bucket
+        stored = [b.name for b in bucket.list_blobs(prefix="shapes/")]
+        assert len(stored) == 1
+        entries = read_manifest(cache._storage)[0]  # type: ignore[index]
+        hound = entries[ShapeCache._hash_key(ShapeCache.normalize_key("hound"))]
+        assert hound.blob_name == stored[0]
+        assert (await cache.stats())["deduped_uploads"] == 1
+
+        cache.clear_memory()
+        assert await cache.get("hound") is not None  # Read through the shared blob
+
+
+class TestSnapshot:
+    @pytest.fixture()
+    def bucket(self) -> FakeBucket:
+        return FakeBucket()
+
+    async def _populate(self, bucket: FakeBucket, concepts: list[str]) -> ShapeCache:
+        cache = ShapeCache(bucket_name="test", storage=GCSStorageBackend(bucket))
+        for i, concept in enumerate(concepts):
+            response = _make_response(concept)
+            response.part_names = [f"part{i}"]  # Distinct content: no upload dedupe
+            await cache.set(concept, response)
+        await cache.flush_writes()
+        return cache
+
+    @pytest.mark.asyncio
+    async def test_cold_start_from_one_download(self, bucket: FakeBucket) -> None:
+        writer = await self._populate(bucket, ["dog", "cat", "horse"])
+        info = await writer.build_snapshot(top_n=100)
+        assert info is not None and info.entries == 3
+
+        reader = ShapeCache(bucket_name="test", storage=GCSStorageBackend(bucket))
+        before = bucket.shape_requests()
+        assert await reader.load_all_cached() == 3
+        assert bucket.shape_requests() == before  # No per-shape GETs
+        assert bucket.blob(SNAPSHOT_BLOB).requests == 1
+        hit = await reader.get("cat")
+        assert hit is not None and hit.part_names == ["part1"]
+
+        snapshot = (await reader.stats())["snapshot"]
+        assert snapshot["version"] == 1
+        assert snapshot["entries"] == 3
+        assert snapshot["age_s"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_top_n_by_hits(self, bucket: FakeBucket) -> None:
+        writer = await self._populate(bucket, ["dog", "cat", "horse"])
+        for _ in range(3):
+            await writer.get("horse")
+        await writer.set("bird", _make_response())  # Flushes hit deltas
+        await writer.flush_writes()
+        await writer.build_snapshot(top_n=1)
+
+        reader = ShapeCache(bucket_name="test", storage=GCSStorageBackend(bucket))
+        reader._load_snapshot_sync(deadline=float("inf"))
+        horse = ShapeCache._hash_key(ShapeCache.normalize_key("horse"))
+        assert list(reader._memory.keys()) == [horse]
+
+    @pytest.mark.asyncio
+    async def test_rest_fetched_per_shape(self, bucket: FakeBucket) -> None:
+        writer = await self._populate(bucket, ["dog", "cat"])
+        await writer.build_snapshot(top_n=1)
+        await writer.set("horse", _make_response())  # Newer than the snapshot
+        await writer.flush_writes()
+
+        reader = ShapeCache(bucket_name="test", storage=GCSStorageBackend(bucket))
+        assert await reader.load_all_cached() == 3
+        assert (await reader.stats())["warmup"]["loaded"] == 2
+
+    @pytest.mark.asyncio
+    async def test_version_increments(self, bucket: FakeBucket) -> None:
+        writer = await self._populate(bucket, ["dog"])
+        first = await writer.build_snapshot(top_n=10)
+        second = await writer.build_snapshot(top_n=10)
+        assert first is not None and second is not None
+        assert (first.version, second.version) == (1, 2)
+
+    @pytest.mark.asyncio
+    async def test_corrupt_snapshot_falls_back(self, bucket: FakeBucket) -> None:
+        await self._populate(bucket, ["dog", "cat"])
+        bucket.blob(SNAPSHOT_BLOB).upload_from_string(b"garbage" * 10)
+
+        reader = ShapeCache(bucket_name="test", storage=GCSStorageBackend(bucket))
+        assert await reader.load_all_cached() == 2
+        assert (await reader.stats())["snapshot"] is None
+
+    @pytest.mark.asyncio
+    async def test_no_storage(self, cache: ShapeCache) -> None:
+        assert await cache.build_snapshot(top_n=10) is None
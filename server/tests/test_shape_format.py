@@ -0,0 +1,100 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for the binary on-storage shape record format
+# ─────────────────────────────────────────────────────────────────────────────
+
+import struct
+
+import numpy as np
+import pytest
+
+from app.cache.shape_format import (
+    FORMAT_VERSION,
+    ShapeFormatError,
+    decode_arrays,
+    decode_blob,
+    decode_shape,
+    encode_shape,
+)
+from app.pipeline.encoding import compute_bbox, encode_float32, encode_uint8
+from app.schemas import BoundingBox, GenerateResponse
+
+
+def _make_response(n: int = 64) -> GenerateResponse:
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(-1, 1, (n, 3)).astype(np.float32)
+    part_ids = rng.integers(0, 6, n).astype(np.uint8)
+    bbox = compute_bbox(positions)
+    return GenerateResponse(
+        positions=encode_float32(positions),
+        part_ids=encode_uint8(part_ids),
+        part_names=["head", "body", "front_legs", "back_legs", "tail", "neck"],
+        template_type="quadruped",
+        bounding_box=BoundingBox(min=bbox["min"], max=bbox["max"]),
+        cached=False,
+        generation_time_ms=1234,
+        pipeline="partcrafter",
+    )
+
+
+class TestRoundTrip:
+    def test_decode_matches_original(self) -> None:
+        resp = _make_response()
+        assert decode_shape(encode_shape(resp)) == resp
+
+    def test_smaller_than_json(self) -> None:
+        resp = _make_response(2048)
+        assert len(encode_shape(resp)) < len(resp.model_dump_json()) * 0.8
+
+    def test_decode_from_memoryview(self) -> None:
+        resp = _make_response()
+        assert decode_shape(memoryview(encode_shape(resp))) == resp
+
+    def test_legacy_json_blob(self) -> None:
+        resp = _make_response()
+        assert decode_blob("shapes/abc.json", resp.model_dump_json().encode()) == resp
+
+    def test_binary_blob(self) -> None:
+        resp = _make_response()
+        assert decode_blob("shapes/abc.bin", encode_shape(resp)) == resp
+
+
+class TestZeroCopyArrays:
+    def test_arrays_match(self) -> None:
+        rng = np.random.default_rng(1)
+        positions = rng.uniform(-1, 1, (32, 3)).astype(np.float32)
+        part_ids = rng.integers(0, 4, 32).astype(np.uint8)
+        resp = _make_response().model_copy(
+            update={"positions": encode_float32(positions), "part_ids": encode_uint8(part_ids)}
+        )
+
+        pos_view, ids_view = decode_arrays(encode_shape(resp))
+        np.testing.assert_array_equal(pos_view, positions)
+        np.testing.assert_array_equal(ids_view, part_ids)
+
+    def test_arrays_share_buffer(self) -> None:
+        data = bytearray(encode_shape(_make_response()))
+        positions, _ = decode_arrays(data)
+        assert np.shares_memory(positions, np.frombuffer(data, dtype=np.uint8))
+
+
+class TestValidation:
+    def test_bad_magic(self) -> None:
+        data = bytearray(encode_shape(_make_response()))
+        data[:4] = b"NOPE"
+        with pytest.raises(ShapeFormatError, match="magic"):
+            decode_shape(bytes(data))
+
+    def test_unknown_version(self) -> None:
+        data = bytearray(encode_shape(_make_response()))
+        struct.pack_into("<B", data, 4, FORMAT_VERSION + 1)
+        with pytest.raises(ShapeFormatError, match="version"):
+            decode_shape(bytes(data))
+
+    def test_truncated(self) -> None:
+        data = encode_shape(_make_response())
+        with pytest.raises(ShapeFormatError, match="Truncated"):
+            decode_shape(data[:-10])
+
+    def test_too_short(self) -> None:
+        with pytest.raises(ShapeFormatError):
+            decode_shape(b"LSHP")
@@ -0,0 +1,258 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for SharedMemoryTier — one shape arena mapped by every worker process
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import base64
+import multiprocessing
+import uuid
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+
+from app.cache.memory_tier import ShapeRecord
+from app.cache.shape_cache import ShapeCache
+from app.cache.shared_tier import _SLOT, SharedMemoryTier, default_segment_name
+from app.cache.storage import LocalStorageBackend
+from app.schemas import BoundingBox, GenerateResponse
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+MB = 1024 * 1024
+
+
+def _response(part: str = "body", points: int = 1) -> GenerateResponse:
+    positions = np.arange(points * 3, dtype=np.float32)
+    return GenerateResponse(
+        positions=base64.b64encode(positions.tobytes()).decode(),
+        part_ids=base64.b64encode(bytes(points)).decode(),
+        part_names=[part],
+        template_type="quadruped",
+        bounding_box=BoundingBox(min=[-0.5, -0.5, -0.5], max=[0.5, 0.5, 0.5]),
+        cached=False,
+        generation_time_ms=100,
+        pipeline="mock",
+    )
+
+
+def _record(part: str = "body", points: int = 1) -> ShapeRecord:
+    return ShapeRecord.from_response(_response(part, points))
+
+
+@pytest.fixture()
+def name() -> str:
+    return f"lumen-test-{uuid.uuid4().hex[:12]}"
+
+
+@pytest.fixture()
+def tier(name: str) -> Iterator[SharedMemoryTier]:
+    tier = SharedMemoryTier(1 * MB, name)
+    yield tier
+    tier.close()
+
+
+def _read_in_child(name: str, key: str, out: multiprocessing.Queue[object]) -> None:
+    tier = SharedMemoryTier(1 * MB, name)
+    record = tier.get(key)
+    out.put((tier.created, None if record is None else list(record.part_names)))
+    tier[f"{key}-child"] = _record("from child")
+    del record
+    tier.close()
+
+
+class TestSharedMemoryTier:
+    def test_round_trip(self, tier: SharedMemoryTier) -> None:
+        tier["dog"] = _record("head", points=4)
+        record = tier.get("dog")
+        assert record is not None
+        assert record.part_names == ("head",)
+        positions, _ = record.arrays()
+        assert positions.tolist()[1] == [3.0, 4.0, 5.0]
+        assert record.to_response().positions == _response("head", points=4).positions
+        assert "dog" in tier and "cat" not in tier
+        assert tier.get("cat") is None
+
+    def test_repeat_hits_reuse_the_prepared_record(self, tier: SharedMemoryTier, name: str) -> None:
+        tier["dog"] = _record("head", points=64)
+        record = tier.get("dog")
+        assert record.prepare_json() > 0
+        tier.reaccount("dog")
+        assert tier.get("dog") is record  # No copy, JSON still prepared
+        assert record.prepare_json() == 0
+        assert tier.stats()["local_hits"] == 1
+        assert tier.stats()["local_bytes"] == record.nbytes
+
+        other = SharedMemoryTier(1 * MB, name)  # Another worker rewrites the key
+        try:
+            other["dog"] = _record("new", points=64)
+        finally:
+            other.close()
+        assert tier.get("dog").part_names == ("new",)
+
+    def test_reads_survive_eviction(self, name: str) -> None:
+        small = SharedMemoryTier(16 * 1024, f"{name}-small")
+        try:
+            small["dog"] = _record("head", points=256)
+            held = small.get("dog")
+            for i in range(10):
+                small[f"k{i}"] = _record("filler", points=256)  # Wraps over "dog"
+            assert "dog" not in small
+            assert held.part_names == ("head",)  # Copied out, not a view of the arena
+            assert held.to_response().positions == _response("head", points=256).positions
+        finally:
+            small.close()
+
+    def test_second_opener_attaches(self, tier: SharedMemoryTier, name: str) -> None:
+        tier["dog"] = _record("head")
+        other = SharedMemoryTier(64 * MB, name)  # Size comes from the segment
+        try:
+            assert tier.created and not other.created
+            assert other.maxsize == tier.maxsize
+            assert other.get("dog").part_names == ("head",)
+            other["cat"] = _record("tail")
+            assert tier.get("cat").part_names == ("tail",)
+            assert len(tier) == len(other) == 2
+            assert tier.stats()["workers"] == 2
+        finally:
+            other.close()
+        assert tier.stats()["workers"] == 1
+
+    def test_last_worker_to_close_unlinks(self, name: str) -> None:
+        creator = SharedMemoryTier(1 * MB, name)
+        other = SharedMemoryTier(1 * MB, name)
+        creator["dog"] = _record("head")
+        creator.close()  # Still mapped by the other worker: the segment stays
+        third = SharedMemoryTier(1 * MB, name)
+        assert not third.created and third.get("dog").part_names == ("head",)
+        third.close()
+        other.close()
+        fresh = SharedMemoryTier(1 * MB, name)
+        try:
+            assert fresh.created and len(fresh) == 0
+        finally:
+            fresh.close()
+
+    def test_visible_across_processes(self, tier: SharedMemoryTier, name: str) -> None:
+        tier["dog"] = _record("head")
+        ctx = multiprocessing.get_context("spawn")
+        out: multiprocessing.Queue[object] = ctx.Queue()
+        child = ctx.Process(target=_read_in_child, args=(name, "dog", out))
+        child.start()
+        child.join(timeout=30)
+        assert child.exitcode == 0
+        assert out.get(timeout=1) == (False, ["head"])
+        assert tier.get("dog-child").part_names == ("from child",)
+
+    def test_segment_name(self) -> None:
+        assert default_segment_name(8080) != default_segment_name(8081)
+        with pytest.raises(ValueError):
+            SharedMemoryTier(1 * MB, "")
+
+    def test_slot_left_mid_update_is_a_miss(self, tier: SharedMemoryTier) -> None:
+        tier["dog"] = _record("head")
+        slot, seq, offset, length = tier._find("dog")  # type: ignore[misc]
+        at = tier._slot_at(slot)
+        _SLOT.pack_into(tier._buf, at, seq + 1, *_SLOT.unpack_from(tier._buf, at)[1:])
+        assert tier.get("dog") is None  # A writer died holding it: no busy-wait
+        tier["dog"] = _record("again")
+        assert tier.get("dog").part_names == ("again",)
+
+    def test_replace_and_delete(self, tier: SharedMemoryTier) -> None:
+        tier["dog"] = _record("old")
+        held = tier.get("dog")
+        tier["dog"] = _record("new")
+        assert tier.get("dog").part_names == ("new",)
+        assert held.part_names == ("old",)  # Earlier views stay valid
+        assert len(tier) == 1
+        del tier["dog"]
+        assert "dog" not in tier and len(tier) == 0
+        tier["dog"] = _record("again")  # Reuses the tombstone
+        assert tier.get("dog").part_names == ("again",)
+
+    def test_full_arena_evicts_the_oldest(self, name: str) -> None:
+        small = SharedMemoryTier(16 * 1024, f"{name}-small")
+        try:
+            for i in range(20):
+                small[f"k{i}"] = _record(f"p{i}", points=256)  # ~3.4 KB each
+            assert 0 < len(small) < 20
+            assert small.rejected == 0
+            assert small.stats()["evictions"] == 20 - len(small)
+            assert sorted(small.keys()) == sorted(f"k{i}" for i in range(20 - len(small), 20))
+            assert small.get("k19").part_names == ("p19",)
+            assert small.currsize <= small.maxsize
+            small["huge"] = _record(points=4096)  # Larger than the whole arena
+            assert small.rejected == 1
+        finally:
+            small.close()
+
+    def test_index_is_rebuilt_past_its_tombstones(self, tier: SharedMemoryTier) -> None:
+        for i in range(1000):
+            tier["dog"] = _record(f"v{i}")
+            del tier["dog"]
+        tier["dog"] = _record("last")
+        assert tier.get("dog").part_names == ("last",)
+        assert tier.stats()["slots_used"] < 1000
+
+    def test_clear_and_listing(self, tier: SharedMemoryTier) -> None:
+        for key in ("a", "b", "c"):
+            tier[key] = _record(key)
+        assert sorted(tier.keys()) == ["a", "b", "c"]
+        assert sorted(k for k, _ in tier.items()) == ["a", "b", "c"]
+        tier.clear()
+        assert len(tier) == 0 and tier.keys() == []
+        assert tier.stats()["entries"] == 0
+        assert tier.currsize == 0  # Arena reclaimed, not just the index
+
+
+class TestShapeCacheShared:
+    @pytest.mark.asyncio
+    async def test_workers_share_one_arena(self, name: str, tmp_path: Path) -> None:
+        storage = LocalStorageBackend(tmp_path)
+        first = ShapeCache(memory_policy="shared", shared_memory_name=name, storage=storage)
+        second = ShapeCache(memory_policy="shared", shared_memory_name=name, storage=storage)
+        try:
+            await first.set("dog", _response("head"))
+            await first.flush_writes()
+            hit = await second.get("dog")
+            assert hit is not None and hit.part_names == ["head"]
+            assert (await second.stats())["memory_hits"] == 1
+
+            assert await second.load_all_cached() == 0  # The creator warms the arena
+            assert second.warmup.state == "shared"
+            first.clear_memory()
+            assert await first.load_all_cached() == 1
+            assert (await second.stats())["memory"]["entries"] == 1
+        finally:
+            await second.disconnect()
+            await first.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_disk_promotion_is_not_repeated_per_worker(
+        self, name: str, tmp_path: Path
+    ) -> None:
+        dirs = [tmp_path / "first", tmp_path / "second"]
+        for disk_dir in dirs:  # Both workers' disk tiers hold the same shapes
+            seed = ShapeCache(disk_dir=str(disk_dir))
+            await seed.connect()
+            for key in ("dog", "cat"):
+                await seed.set(key, _response(key))
+            await seed.disconnect()
+
+        first, second = (
+            ShapeCache(memory_policy="shared", shared_memory_name=name, disk_dir=str(disk_dir))
+            for disk_dir in dirs
+        )
+        try:
+            await first.connect()
+            stats = (await first.stats())["memory"]
+            assert stats["entries"] == 2
+            await second.connect()
+            after = (await second.stats())["memory"]
+            assert (after["entries"], after["bytes"]) == (2, stats["bytes"])
+        finally:
+            await second.disconnect()
+            await first.disconnect()
@@ -0,0 +1,139 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for SingleFlight — per-key coalescing of concurrent async work
+# ─────────────────────────────────────────────────────────────────────────────
+
+import asyncio
+
+import pytest
+
+from app.schemas import RequestPriority
+from app.services.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_result(self) -> None:
+        flights = SingleFlight()
+        calls = 0
+
+        async def work() -> object:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return object()
+
+        results = await asyncio.gather(*(flights.do("k", work) for _ in range(10)))
+
+        assert calls == 1
+        assert all(value is results[0][0] for value, _ in results)
+        assert [shared for _, shared in results].count(False) == 1
+        assert flights.stats() == {"in_flight": 0, "leaders": 1, "waiters": 9, "cancelled": 0}
+
+    @pytest.mark.asyncio
+    async def test_keys_are_independent(self) -> None:
+        flights = SingleFlight()
+
+        async def work(value: str) -> str:
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(
+            flights.do("a", lambda: work("a")), flights.do("b", lambda: work("b"))
+        )
+        assert [value for value, _ in results] == ["a", "b"]
+        assert flights.leaders == 2
+
+    @pytest.mark.asyncio
+    async def test_exception_is_shared_and_not_cached(self) -> None:
+        flights = SingleFlight()
+        calls = 0
+
+        async def fail() -> None:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(
+            flights.do("k", fail), flights.do("k", fail), return_exceptions=True
+        )
+        assert calls == 1
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+        # The failed flight is gone — the next call retries
+        with pytest.raises(RuntimeError):
+            await flights.do("k", fail)
+        assert calls == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_work(self) -> None:
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def work() -> str:
+            await release.wait()
+            return "done"
+
+        leader = asyncio.create_task(flights.do("k", work))
+        waiter = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await waiter == ("done", True)
+        assert leader.cancelled()
+        assert flights.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_last_waiter_leaving_cancels_work(self) -> None:
+        flights = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def work() -> str:
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "done"
+
+        callers = [asyncio.create_task(flights.do("k", work)) for _ in range(2)]
+        await started.wait()
+        for caller in callers:
+            caller.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        assert flights.stats()["cancelled"] == 1
+        await asyncio.sleep(0)
+        assert flights.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_more_important_caller_promotes_the_flight(self) -> None:
+        flights = SingleFlight()
+        release = asyncio.Event()
+        promotions: list[RequestPriority] = []
+
+        async def work() -> str:
+            flights.on_promote("k", promotions.append)
+            await release.wait()
+            return "done"
+
+        leader = asyncio.create_task(flights.do("k", work, priority=RequestPriority.pregenerate))
+        await asyncio.sleep(0)
+        joiners = [
+            asyncio.create_task(flights.do("k", work, priority=priority))
+            for priority in (
+                RequestPriority.pregenerate,
+                RequestPriority.interactive,
+                RequestPriority.prefetch,
+            )
+        ]
+        await asyncio.sleep(0)
+        assert flights.priority("k") == RequestPriority.interactive
+        assert promotions == [RequestPriority.interactive]  # Neither equal nor lower promotes
+
+        release.set()
+        await asyncio.gather(leader, *joiners)
+        assert flights.priority("k") is None
@@ -0,0 +1,78 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for snapshot bundles — packed hot set for one-download warmup
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from app.cache.shape_format import ShapeFormatError, encode_shape
+from app.cache.snapshot import SnapshotReader, write_snapshot
+from app.schemas import BoundingBox, GenerateResponse
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _response(part: str) -> GenerateResponse:
+    return GenerateResponse(
+        positions="AAAAAAAAAAAAAAAA",  # One zero point (3 × float32)
+        part_ids="AA==",
+        part_names=[part],
+        template_type="quadruped",
+        bounding_box=BoundingBox(min=[-0.5, -0.5, -0.5], max=[0.5, 0.5, 0.5]),
+        cached=False,
+        generation_time_ms=100,
+        pipeline="mock",
+    )
+
+
+def _write(path: Path, parts: list[str], version: int = 1) -> None:
+    records = [(f"key{i}", encode_shape(_response(p)), 10 - i) for i, p in enumerate(parts)]
+    with path.open("wb") as out:
+        write_snapshot(out, records, version=version)
+
+
+class TestSnapshotBundle:
+    def test_round_trip_in_priority_order(self, tmp_path: Path) -> None:
+        path = tmp_path / "snapshot.bin"
+        _write(path, ["body", "head", "tail"], version=7)
+        with SnapshotReader(path) as reader:
+            assert len(reader) == 3
+            assert reader.info.version == 7
+            assert reader.info.size == path.stat().st_size
+            loaded = [(key, record.part_names) for key, record, _ in reader]
+        assert loaded == [("key0", ("body",)), ("key1", ("head",)), ("key2", ("tail",))]
+
+    def test_info_to_dict(self, tmp_path: Path) -> None:
+        path = tmp_path / "snapshot.bin"
+        _write(path, ["body"])
+        with SnapshotReader(path) as reader:
+            info = reader.info.to_dict()
+        assert info["version"] == 1
+        assert info["entries"] == 1
+        assert 0 <= info["age_s"] < 60
+
+    def test_empty_bundle(self, tmp_path: Path) -> None:
+        path = tmp_path / "snapshot.bin"
+        _write(path, [])
+        with SnapshotReader(path) as reader:
+            assert list(reader) == []
+
+    def test_rejects_bad_magic(self, tmp_path: Path) -> None:
+        path = tmp_path / "snapshot.bin"
+        path.write_bytes(b"\0" * 64)
+        with pytest.raises(ShapeFormatError):
+            SnapshotReader(path)
+
+    def test_rejects_truncated(self, tmp_path: Path) -> None:
+        path = tmp_path / "snapshot.bin"
+        _write(path, ["body", "head"])
+        path.write_bytes(path.read_bytes()[20:])  # Index offset now points past the end
+        with pytest.raises(ShapeFormatError):
+            SnapshotReader(path)
+        path.write_bytes(b"LSNB")
+        with pytest.raises(ShapeFormatError):
+            SnapshotReader(path)
@@ -0,0 +1,112 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for StagePipeline — stage workers joined by bounded queues
+# ─────────────────────────────────────────────────────────────────────────────
+# Fake stages sleep for a fixed latency (releasing the GIL like GPU kernels
+# and numpy do), so overlap across stages shows up as wall-clock speedup.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.stages import Stage, StagePipeline
+
+
+def _sleeper(name: str, seconds: float):  # type: ignore[no-untyped-def]
+    def run(trail: list[str]) -> list[str]:
+        time.sleep(seconds)
+        return [*trail, name]
+
+    return run
+
+
+def _pipeline(latency_s: float, **kwargs: int) -> StagePipeline:
+    return StagePipeline(
+        [
+            Stage("image", _sleeper("image", latency_s), 1, ThreadPoolExecutor(1)),
+            Stage("mesh", _sleeper("mesh", latency_s), 1, ThreadPoolExecutor(1)),
+            Stage("post", _sleeper("post", latency_s), 1, ThreadPoolExecutor(1)),
+        ],
+        **kwargs,
+    )
+
+
+class TestStagePipeline:
+    @pytest.mark.asyncio
+    async def test_jobs_pass_every_stage(self) -> None:
+        pipeline = _pipeline(0)
+        results = await asyncio.gather(*(pipeline.submit([str(i)]) for i in range(5)))
+        assert results == [[str(i), "image", "mesh", "post"] for i in range(5)]
+        assert all(s["completed"] == 5 for s in pipeline.stats().values())
+        await pipeline.close()
+
+    @pytest.mark.asyncio
+    async def test_requests_overlap_across_stages(self) -> None:
+        """6 jobs × 3 stages × 30 ms: ~540 ms in sequence, ~240 ms pipelined."""
+        pipeline = _pipeline(0.03)
+        t0 = time.perf_counter()
+        await asyncio.gather(*(pipeline.submit([]) for _ in range(6)))
+        elapsed = time.perf_counter() - t0
+        assert elapsed < 0.45
+        await pipeline.close()
+
+    @pytest.mark.asyncio
+    async def test_errors_skip_later_stages(self) -> None:
+        def fail(value: object) -> object:
+            raise ValueError("no mesh")
+
+        post_calls: list[object] = []
+        pipeline = StagePipeline(
+            [Stage("mesh", fail), Stage("post", lambda v: post_calls.append(v) or v)]
+        )
+        with pytest.raises(ValueError, match="no mesh"):
+            await pipeline.submit(1)
+        assert post_calls == []
+        assert pipeline.stats()["mesh"]["failed"] == 1
+        await pipeline.close()
+
+    @pytest.mark.asyncio
+    async def test_async_stage_runs_on_loop(self) -> None:
+        async def double(value: int) -> int:
+            await asyncio.sleep(0)
+            return value * 2
+
+        pipeline = StagePipeline([Stage("image", double), Stage("post", lambda v: v + 1)])
+        assert await pipeline.submit(5) == 11
+        await pipeline.close()
+
+    @pytest.mark.asyncio
+    async def test_backpressure_bounds_work_in_progress(self) -> None:
+        release = asyncio.Event()
+
+        async def blocked(value: int) -> int:
+            await release.wait()
+            return value
+
+        pipeline = StagePipeline(
+            [Stage("image", lambda v: v, workers=1), Stage("post", blocked, workers=1)],
+            queue_size=1,
+        )
+        jobs = [asyncio.ensure_future(pipeline.submit(i)) for i in range(10)]
+        await asyncio.sleep(0.05)
+        # post holds 1 and queues 1; image holds 1 waiting to hand off and queues 1
+        assert pipeline.stats()["image"]["completed"] <= 3
+        release.set()
+        assert await asyncio.gather(*jobs) == list(range(10))
+        await pipeline.close()
+
+    @pytest.mark.asyncio
+    async def test_abandoned_jobs_are_skipped(self) -> None:
+        calls: list[int] = []
+        pipeline = StagePipeline(
+            [Stage("image", _sleeper("image", 0.05)), Stage("mesh", lambda v: calls.append(1))]
+        )
+        with pytest.raises(TimeoutError):
+            await asyncio.wait_for(pipeline.submit([]), 0.01)
+        await asyncio.sleep(0.1)
+        assert calls == []
+        await pipeline.close()
@@ -0,0 +1,126 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for storage backends — local directory store behind the shared tier
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pytest
+
+from app.cache.manifest import ManifestEntry, add_to_manifest, read_manifest
+from app.cache.shape_cache import ShapeCache
+from app.cache.storage import LocalStorageBackend, StorageConflictError
+from app.schemas import BoundingBox, GenerateResponse
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.fixture()
+def store(tmp_path: Path) -> LocalStorageBackend:
+    return LocalStorageBackend(tmp_path / "store")
+
+
+class TestLocalStorageBackend:
+    def test_round_trip(self, store: LocalStorageBackend) -> None:
+        assert store.get("shapes/abcdef.bin") is None
+        store.put("shapes/abcdef.bin", b"payload")
+        assert store.get("shapes/abcdef.bin") == b"payload"
+
+    def test_sharded_by_key_prefix(self, store: LocalStorageBackend) -> None:
+        store.put("shapes/3fa9c1.bin", b"x")
+        assert (store.root / "shapes" / "3f" / "3fa9c1.bin").read_bytes() == b"x"
+
+    def test_put_replaces_atomically(self, store: LocalStorageBackend) -> None:
+        store.put("shapes/abcdef.bin", b"old")
+        with (
+            patch("app.cache.storage.os.replace", side_effect=OSError("disk full")),
+            pytest.raises(OSError),
+        ):
+            store.put("shapes/abcdef.bin", b"new")
+        assert store.get("shapes/abcdef.bin") == b"old"  # Never half-written
+        assert [p.name for p in (store.root / "shapes" / "ab").iterdir()] == ["abcdef.bin"]
+
+    def test_file_round_trip(self, store: LocalStorageBackend, tmp_path: Path) -> None:
+        src, dst = tmp_path / "src.bin", tmp_path / "dst.bin"
+        src.write_bytes(b"bundle")
+        assert not store.get_file("index/snapshot.bin", dst)
+        store.put_file("index/snapshot.bin", src)
+        assert store.get_file("index/snapshot.bin", dst)
+        assert dst.read_bytes() == b"bundle"
+
+    def test_rejects_escaping_names(self, store: LocalStorageBackend) -> None:
+        with pytest.raises(ValueError):
+            store.put("../outside.bin", b"x")
+
+    def test_list_and_delete(self, store: LocalStorageBackend) -> None:
+        store.put("shapes/aa01.bin", b"1")
+        store.put("shapes/bb02.json", b"22")
+        store.put("index/shapes-manifest.json", b"{}")
+
+        listed = store.list("shapes/")
+        assert [(o.name, o.size) for o in listed] == [
+            ("shapes/aa01.bin", 1),
+            ("shapes/bb02.json", 2),
+        ]
+
+        store.delete("shapes/aa01.bin")
+        store.delete("shapes/aa01.bin")  # Missing is fine
+        assert [o.name for o in store.list("shapes/")] == ["shapes/bb02.json"]
+
+    def test_conditional_put(self, store: LocalStorageBackend) -> None:
+        store.put("index/m.json", b"v1", if_generation_match=0)
+        with pytest.raises(StorageConflictError):
+            store.put("index/m.json", b"again", if_generation_match=0)  # Already exists
+
+        _, generation = store.get_with_generation("index/m.json")  # type: ignore[misc]
+        store.put("index/m.json", b"v2", if_generation_match=generation)
+        with pytest.raises(StorageConflictError):
+            store.put("index/m.json", b"stale", if_generation_match=generation)
+        assert store.get("index/m.json") == b"v2"
+
+    def test_concurrent_manifest_updates_lose_nothing(self, store: LocalStorageBackend) -> None:
+        def add(key: str) -> None:
+            add_to_manifest(store, ManifestEntry(key=key, size=1, created_at=0.0))
+
+        threads = [threading.Thread(target=add, args=(f"k{i}",)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        current = read_manifest(store)
+        assert current is not None
+        assert set(current[0]) == {f"k{i}" for i in range(8)}
+
+
+class TestShapeCacheOnLocalStorage:
+    @pytest.mark.asyncio
+    async def test_shared_between_instances(self, tmp_path: Path) -> None:
+        """A shape written by one instance is served by another from the directory."""
+        response = GenerateResponse(
+            positions="AAAAAAAAAAAAAAAA",  # One zero point (3 × float32)
+            part_ids="AA==",
+            part_names=["body"],
+            template_type="quadruped",
+            bounding_box=BoundingBox(min=[-0.5, -0.5, -0.5], max=[0.5, 0.5, 0.5]),
+            cached=False,
+            generation_time_ms=100,
+            pipeline="mock",
+        )
+        writer = ShapeCache(bucket_name="", storage=LocalStorageBackend(tmp_path))
+        await writer.connect()
+        await writer.set("dog", response)
+        await writer.disconnect()
+
+        reader = ShapeCache(bucket_name="", storage=LocalStorageBackend(tmp_path))
+        await reader.connect()
+        assert reader.is_connected
+        assert await reader.count_stored_shapes() == 1
+        hit = await reader.get("dog")
+        assert hit is not None
+        assert hit.positions == response.positions
+        assert (await reader.stats())["storage_hits"] == 1
+        await reader.disconnect()
@@ -0,0 +1,103 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for POST /generate/stream — placeholder, stage events, final result
+# ─────────────────────────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import pytest
+
+from app.cache.memory_tier import ShapeRecord
+from app.pipeline.placeholder import placeholder_points
+from app.pipeline.template_matcher import TEMPLATES
+from app.schemas import GenerateRequest, GenerateResponse
+from app.services.scheduler import DeviceScheduler
+
+if TYPE_CHECKING:
+    from fastapi.testclient import TestClient
+
+    from app.services.pipeline import PipelineOrchestrator
+
+
+def _events(client: TestClient, text: str) -> list[dict[str, Any]]:
+    with client.stream("POST", "/generate/stream", json={"text": text}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        return [json.loads(line) for line in response.iter_lines() if line]
+
+
+class TestPlaceholderPoints:
+    @pytest.mark.parametrize("template_type", sorted(TEMPLATES))
+    def test_every_template_has_a_layout(self, template_type: str) -> None:
+        part_names = TEMPLATES[template_type]["part_names"]
+        positions, part_ids = placeholder_points(part_names, total_points=512)
+        assert positions.shape == (512, 3) and positions.dtype == np.float32
+        assert part_ids.shape == (512,) and part_ids.dtype == np.uint8
+        assert set(part_ids.tolist()) == set(range(len(part_names)))
+        assert np.abs(positions).max() <= 1.0 + 1e-6
+
+    def test_parts_are_placed_apart(self) -> None:
+        positions, part_ids = placeholder_points(["head", "body", "tail"])
+        head, tail = positions[part_ids == 0].mean(axis=0), positions[part_ids == 2].mean(axis=0)
+        assert head[0] > 0 > tail[0]  # Head forward, tail behind
+
+    def test_unknown_part_names_and_determinism(self) -> None:
+        a = placeholder_points(["gizmo", "widget"], total_points=64, seed=3)
+        b = placeholder_points(["gizmo", "widget"], total_points=64, seed=3)
+        assert np.array_equal(a[0], b[0])
+        with pytest.raises(ValueError):
+            placeholder_points([])
+
+
+class TestGenerateStream:
+    def test_miss_streams_placeholder_stages_and_result(self, client: TestClient) -> None:
+        events = _events(client, "horse")
+        assert [e["event"] for e in events] == [
+            "placeholder",
+            "stage",
+            "stage",
+            "stage",
+            "stage",
+            "result",
+        ]
+        assert [e["stage"] for e in events[1:-1]] == ["gpu_slot", "image", "mesh", "post"]
+
+        placeholder = GenerateResponse.model_validate(events[0]["data"])
+        assert placeholder.pipeline == "placeholder"
+        assert placeholder.template_type == "quadruped"
+        assert placeholder.part_names == TEMPLATES["quadruped"]["part_names"]
+
+        result = GenerateResponse.model_validate(events[-1]["data"])
+        assert result.cached is False
+        assert result.pipeline == "mock"
+
+    def test_memory_hit_is_a_single_result(self, client: TestClient) -> None:
+        orchestrator: PipelineOrchestrator = client.app.state.pipeline_orchestrator  # type: ignore[attr-defined]
+        cached = [e for e in _events(client, "dog") if e["event"] == "result"][0]["data"]
+        record = ShapeRecord.from_response(GenerateResponse.model_validate(cached))
+        orchestrator._cache.peek_record.return_value = record  # type: ignore[attr-defined]
+
+        events = _events(client, "dog")
+        assert [e["event"] for e in events] == ["result"]
+        assert events[0]["data"]["cached"] is True
+
+    def test_errors_end_the_stream(self, client: TestClient) -> None:
+        orchestrator = client.app.state.pipeline_orchestrator  # type: ignore[attr-defined]
+        orchestrator._scheduler = DeviceScheduler(["cpu"], slots=1, max_wait_s=0.0)
+        orchestrator._scheduler.device("cpu")._running = 1  # The only slot is busy
+        events = _events(client, "eagle")
+        assert [e["event"] for e in events] == ["placeholder", "error"]
+        assert events[-1]["type"] == "GPUQueueFullError"
+        assert events[-1]["status"] == 503
+        assert events[-1]["retry_after"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_listeners_are_removed(self, client: TestClient) -> None:
+        orchestrator = client.app.state.pipeline_orchestrator  # type: ignore[attr-defined]
+        lines = [line async for line in orchestrator.generate_stream(GenerateRequest(text="cat"))]
+        assert json.loads(lines[-1])["event"] == "result"
+        assert orchestrator._progress == {}
+        await orchestrator.close()
@@ -0,0 +1,131 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for TinyLFUMemoryTier — frequency-aware admission for the memory tier
+# ─────────────────────────────────────────────────────────────────────────────
+
+import numpy as np
+import pytest
+
+from app.cache.memory_tier import MemoryTier, ShapeRecord
+from app.cache.tinylfu import FrequencySketch, TinyLFUMemoryTier
+
+
+def _record(n: int = 256) -> ShapeRecord:
+    return ShapeRecord(
+        np.zeros((n, 3), dtype=np.float32),
+        np.zeros(n, dtype=np.uint8),
+        part_names=("body",),
+        template_type="default",
+        bbox_min=(-1.0, -1.0, -1.0),
+        bbox_max=(1.0, 1.0, 1.0),
+        pipeline="mock",
+        generation_time_ms=0,
+    )
+
+
+def _access(tier: MemoryTier | TinyLFUMemoryTier, key: str, record: ShapeRecord) -> bool:
+    """One request: lookup, insert on miss. Returns whether it hit."""
+    if tier.get(key) is not None:
+        return True
+    tier[key] = record
+    return False
+
+
+class TestFrequencySketch:
+    def test_counts_accesses(self) -> None:
+        sketch = FrequencySketch(expected_entries=100)
+        for _ in range(5):
+            sketch.increment("dog")
+        sketch.increment("cat")
+        assert sketch.frequency("dog") == 5
+        assert sketch.frequency("cat") == 1
+        assert sketch.frequency("unseen") == 0
+
+    def test_saturates_at_fifteen(self) -> None:
+        sketch = FrequencySketch(expected_entries=100)
+        for _ in range(100):
+            sketch.increment("dog")
+        assert sketch.frequency("dog") == 15
+
+    def test_aging_halves_counts(self) -> None:
+        sketch = FrequencySketch(expected_entries=100)
+        for _ in range(8):
+            sketch.increment("dog")
+        sketch._age()
+        assert sketch.frequency("dog") == 4
+
+    def test_ages_after_sample_size(self) -> None:
+        sketch = FrequencySketch(expected_entries=1)  # Width 1024 → age after 10240
+        for i in range(10_239):
+            sketch.increment(f"concept {i}")
+        assert sketch.resets == 0
+        # Increments whose counters are all saturated do not count toward the sample,
+        # and which keys saturate depends on the per-process string hash
+        for i in range(10_239, 11_000):
+            sketch.increment(f"concept {i}")
+            if sketch.resets:
+                break
+        assert sketch.resets == 1
+
+
+class TestTinyLFUMemoryTier:
+    def test_mapping_basics(self) -> None:
+        record = _record()
+        tier = TinyLFUMemoryTier(max_bytes=record.nbytes * 10)
+        tier["a"] = record
+        assert "a" in tier
+        assert tier.get("a") is record
+        assert tier.peek("a") is record
+        assert len(tier) == 1
+        assert tier.currsize == record.nbytes
+        assert tier.items() == [("a", record)]
+        del tier["a"]
+        assert "a" not in tier
+        assert tier.currsize == 0
+
+    def test_respects_byte_budget(self) -> None:
+        record = _record()
+        tier = TinyLFUMemoryTier(max_bytes=record.nbytes * 5)
+        for i in range(50):
+            _access(tier, f"k{i}", record)
+        assert tier.currsize <= tier.maxsize
+        assert len(tier) <= 5
+        assert tier.stats()["evictions"] == 50 - len(tier)
+
+    def test_one_off_burst_keeps_hot_set(self) -> None:
+        """A scan of unique keys must not flush frequently used entries."""
+        record = _record()
+        budget = record.nbytes * 20
+        hot = [f"hot {i}" for i in range(10)]
+
+        def run(tier: MemoryTier | TinyLFUMemoryTier) -> int:
+            for _ in range(5):
+                for key in hot:
+                    _access(tier, key, record)
+            for i in range(200):
+                _access(tier, f"one-off {i}", record)
+            return sum(_access(tier, key, record) for key in hot)
+
+        assert run(MemoryTier(budget)) == 0  # LRU: scan flushed everything
+        assert run(TinyLFUMemoryTier(budget)) == len(hot)
+
+    def test_reaccount_grows_entry(self) -> None:
+        record = _record()
+        tier = TinyLFUMemoryTier(max_bytes=1 << 20)
+        tier["a"] = record
+        before = tier.currsize
+        record.prepare_json()
+        tier.reaccount("a")
+        assert tier.currsize == record.nbytes > before
+
+    def test_rejects_oversized(self) -> None:
+        record = _record()
+        tier = TinyLFUMemoryTier(max_bytes=record.nbytes - 1)
+        with pytest.raises(ValueError):
+            tier["a"] = record
+
+    def test_stats(self) -> None:
+        tier = TinyLFUMemoryTier(max_bytes=1 << 20)
+        stats = tier.stats()
+        assert stats["policy"] == "tinylfu"
+        assert stats["entries"] == 0
+        assert {"admitted", "rejected", "window_entries"} <= set(stats)
@@ -0,0 +1,106 @@
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests for WriteBehindQueue — bounded, coalescing Cloud Storage uploads
+# ─────────────────────────────────────────────────────────────────────────────
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.cache.write_behind import WriteBehindQueue
+
+
+class RecordingUpload:
+    """Blocking upload stand-in; optionally held until released."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.calls: list[tuple[str, object]] = []
+        self.delay = delay
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, key: str, value: object) -> None:
+        self.release.wait(timeout=5)
+        time.sleep(self.delay)
+        self.calls.append((key, value))
+
+
+class TestWriteBehindQueue:
+    @pytest.mark.asyncio
+    async def test_uploads_in_background(self) -> None:
+        upload = RecordingUpload()
+        queue = WriteBehindQueue(upload, concurrency=2)
+        assert await queue.put("a", 1)
+        assert await queue.put("b", 2)
+        await queue.flush()
+        assert sorted(upload.calls) == [("a", 1), ("b", 2)]
+        assert queue.stats()["written"] == 2
+        await queue.drain(timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_pending_key_is_coalesced(self) -> None:
+        upload = RecordingUpload()
+        upload.release.clear()
+        queue = WriteBehindQueue(upload, concurrency=1)
+        await queue.put("busy", 0)  # Occupies the only worker
+        await asyncio.sleep(0.01)
+        await queue.put("k", 1)
+        await queue.put("k", 2)
+        upload.release.set()
+        await queue.flush()
+
+        assert upload.calls == [("busy", 0), ("k", 2)]
+        assert queue.stats()["coalesced"] == 1
+        await queue.drain(timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_after_timeout(self) -> None:
+        upload = RecordingUpload()
+        upload.release.clear()
+        queue = WriteBehindQueue(upload, max_pending=1, concurrency=1, enqueue_timeout=0.05)
+        await queue.put("a", 1)  # Taken by the worker
+        await asyncio.sleep(0.01)
+        assert await queue.put("b", 2)  # Fills the single slot
+        assert not await queue.put("c", 3)  # Waits, then drops
+
+        stats = queue.stats()
+        assert stats["dropped"] == 1
+        upload.release.set()
+        await queue.flush()
+        assert [key for key, _ in upload.calls] == ["a", "b"]
+        await queue.drain(timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_drain_flushes_pending(self) -> None:
+        upload = RecordingUpload(delay=0.01)
+        queue = WriteBehindQueue(upload, concurrency=2)
+        for i in range(6):
+            await queue.put(f"k{i}", i)
+        assert await queue.drain(timeout=5) == 0
+        assert len(upload.calls) == 6
+        assert not await queue.put("late", 0)  # Closed after drain
+
+    @pytest.mark.asyncio
+    async def test_drain_respects_deadline(self) -> None:
+        upload = RecordingUpload()
+        upload.release.clear()
+        queue = WriteBehindQueue(upload, concurrency=1)
+        for i in range(3):
+            await queue.put(f"k{i}", i)
+        t0 = time.perf_counter()
+        abandoned = await queue.drain(timeout=0.05)
+        assert time.perf_counter() - t0 < 1
+        assert abandoned == 3
+        upload.release.set()
+
+    @pytest.mark.asyncio
+    async def test_failed_upload_is_counted(self) -> None:
+        def failing(key: str, value: object) -> None:
+            raise RuntimeError("storage down")
+
+        queue = WriteBehindQueue(failing)
+        await queue.put("a", 1)
+        await queue.flush()
+        assert queue.stats()["failed"] == 1
+        assert await queue.drain(timeout=1) == 0